@@ -0,0 +1,130 @@
+"""
+Benchmark: /api/dashboard3/batch vs One /api/dashboard3 Request per Range
+For the dashboard's preset ranges (1 to 5 of them), compares computing every
+range with its own request against one batch request, both on a cold cache:
+the batch merges the additive sections of all ranges from one scan of daily
+partials (functions/daily_partials.py) and only runs the others per range.
+
+Checks parity first: every range of the batch must match its single-range
+response (tie-dependent ranks excepted). Then reports the median wall time and
+how many sections each variant computed with their own query.
+
+Usage (SUPABASE_* env vars as for the API):
+    python batch_ranges.py --loads 10
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from datetime import timedelta
+from pathlib import Path
+from fastapi import Response
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "functions"))
+import main
+from main import AUTO_MAX_POINTS, CACHE_METRICS, BATCH_METRICS, standard_ranges
+
+RANK_FIELDS = {"overall_rank", "demand_rank", "interest_rank", "engagement_rank", "view_rank", "retention_rank",
+               "recommended_position", "demand_tier", "learning_priority", "portfolio_recommendation",
+               "role_attractiveness", "positioning_suggestion"}
+
+
+def single(key: str) -> dict:
+    start, end = key.split(":")
+    return asyncio.run(main.get_dashboard3_data(Response(), start, end, "auto", AUTO_MAX_POINTS,
+                                                None, None, None))
+
+
+def batch(keys: list[str]) -> dict:
+    return asyncio.run(main.get_dashboard3_batch(Response(), keys, "auto", AUTO_MAX_POINTS))
+
+
+def comparable(section) -> str:
+    """A response field without tie-dependent ranks, as sorted JSON"""
+    if isinstance(section, list):
+        return json.dumps(sorted(json.dumps({k: v for k, v in row.items() if k not in RANK_FIELDS},
+                                            sort_keys=True, default=str) for row in section))
+    return json.dumps(section, sort_keys=True, default=str)
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def check_parity(keys: list[str]) -> bool:
+    """Every range of a batch equals its own /api/dashboard3 response"""
+    main._cache.clear()
+    batched = batch(keys)["ranges"]
+    main._cache.clear()
+    ok = True
+    for key in keys:
+        expected = single(key)
+        for field, value in expected.items():
+            if field != "updated_at" and comparable(value) != comparable(batched[key][field]):
+                print(f"  MISMATCH {key} {field}")
+                ok = False
+    return ok
+
+
+def time_variant(keys: list[str], loads: int, batched: bool) -> tuple[float, float]:
+    """Median ms on a cold cache, and sections computed by their own query per run"""
+    timings, computed = [], []
+    for _ in range(loads + 1):
+        main._cache.clear()
+        refreshes = CACHE_METRICS["refreshes"]
+        run_start = time.perf_counter()
+        if batched:
+            batch(keys)
+        else:
+            for key in keys:
+                single(key)
+        timings.append((time.perf_counter() - run_start) * 1000)
+        computed.append(CACHE_METRICS["refreshes"] - refreshes)
+    return statistics.median(timings[1:]), statistics.median(computed[1:])
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Batch endpoint vs one dashboard request per range")
+    parser.add_argument("--loads", type=int, default=10, help="Measured runs per variant and range count")
+    return parser.parse_args()
+
+
+def main_benchmark():
+    args = parse_args()
+    # Preset ranges ending at the last synced day, smallest first
+    last_day = main.run_pg_query("SELECT MAX(session_date) AS last_day FROM sessions")[0]["last_day"]
+    presets = standard_ranges(last_day + timedelta(days=1))
+    keys = [f"{start}:{end}" for start, end in presets.values()]
+
+    print("=" * 60)
+    print("Batch dashboard ranges benchmark")
+    print("=" * 60)
+    print(f"Ranges: {', '.join(presets)} (ending {last_day}), {args.loads} runs per variant")
+
+    print("\nParity (batch vs single-range requests):")
+    ok = check_parity(keys)
+    print("  all ranges match" if ok else "  MISMATCHES found")
+
+    print(f"\n{'ranges':<8}{'single ms':>11}{'batch ms':>10}{'single queries':>16}{'batch queries':>15}{'scans':>7}")
+    for count in range(1, len(keys) + 1):
+        single_ms, single_queries = time_variant(keys[:count], args.loads, False)
+        fetches = BATCH_METRICS["partial_fetches"]
+        batch_ms, batch_queries = time_variant(keys[:count], args.loads, True)
+        # Each shared scan runs one query per partial
+        shared = (BATCH_METRICS["partial_fetches"] - fetches) / (args.loads + 1)
+        print(f"{count:<8}{single_ms:>11.1f}{batch_ms:>10.1f}{single_queries:>16.0f}"
+              f"{batch_queries:>15.0f}{shared:>7.0f}")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_benchmark()
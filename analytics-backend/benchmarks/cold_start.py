@@ -0,0 +1,185 @@
+"""
+Benchmark: API Cold Start
+Measures how long a freshly started API process takes to serve its first
+/api/dashboard3, the way an instance woken from idle does: a new interpreter
+importing main.py from a fresh copy of functions/ (like the image's /app), then
+the lifespan's warm-up (see COLD START in main.py).
+
+First prints an import-time profile of `import main` (python -X importtime,
+the slowest of the imports it makes). Then, for each variant, starts uvicorn
+on the copy and reports the median time from spawning the process to:
+
+    listening    the port accepts connections
+    ready        /ready answers 200
+    dashboard3   the first successful /api/dashboard3 of the dashboard's
+                 default range (all time), sent as soon as the port listens
+                 (the request that woke the instance), or right after /ready
+                 flipped (a platform that waits for readiness)
+
+Variants: the modules as source or precompiled (compileall, as the Dockerfile
+does), and with the pool's connections pre-warmed at startup or not
+(DB_POOL_WARM=0: the first request opens them).
+
+Usage (SUPABASE_* env vars as for the API):
+    python cold_start.py --runs 5
+"""
+
+import os
+import sys
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+from pathlib import Path
+
+FUNCTIONS_DIR = Path(__file__).resolve().parent.parent / "functions"
+
+# The dashboard's default preset (all time), as the frontend requests it
+YESTERDAY = date.today() - timedelta(days=1)
+DASHBOARD_PATH = f"/api/dashboard3?start_date=2020-01-01&end_date={YESTERDAY.isoformat()}"
+
+# name -> (precompiled bytecode, extra environment)
+VARIANTS = {
+    "source, no pre-warm": (False, {"DB_POOL_WARM": "0"}),
+    "compiled, no pre-warm": (True, {"DB_POOL_WARM": "0"}),
+    "compiled, pre-warmed": (True, {}),
+}
+
+
+def fresh_copy(root: Path, compiled: bool) -> Path:
+    """functions/ copied without bytecode or .env, optionally compiled as in the image"""
+    app_dir = root / "app"
+    shutil.rmtree(app_dir, ignore_errors=True)
+    shutil.copytree(FUNCTIONS_DIR, app_dir, ignore=shutil.ignore_patterns("__pycache__", ".env"))
+    if compiled:
+        subprocess.run([sys.executable, "-m", "compileall", "-q", str(app_dir)], check=True)
+    return app_dir
+
+
+def get_status(url: str, timeout: float) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+# ============================================================================
+# IMPORT PROFILE
+# ============================================================================
+
+def import_profile(app_dir: Path, top: int):
+    """Slowest imports made by `import main`, from python -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=app_dir, capture_output=True, text=True)
+    imports, nested, total_us = [], [], 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        # A module's imports are logged before the module itself
+        if depth == 1:
+            nested.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            if name.strip() == "main":
+                imports, total_us = nested, int(cumulative)
+            nested = []
+    print(f"Import profile of `import main` (uncompiled): {total_us / 1000:.0f}ms, slowest imports:")
+    for us, name in sorted(imports, reverse=True)[:top]:
+        print(f"  {name:<32}{us / 1000:>8.1f}ms")
+
+
+# ============================================================================
+# COLD STARTS
+# ============================================================================
+
+def cold_start(app_dir: Path, env: dict, port: int, wait_ready: bool, timeout: float) -> dict:
+    """Spawn uvicorn on app_dir and time its way to the first successful /api/dashboard3"""
+    base = f"http://127.0.0.1:{port}"
+    timings = {}
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+                               cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while "dashboard3" not in timings:
+            elapsed = time.perf_counter() - start
+            if elapsed > timeout or process.poll() is not None:
+                raise RuntimeError(f"no successful /api/dashboard3 after {elapsed:.1f}s")
+            if "listening" not in timings:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                    timings["listening"] = elapsed
+                except OSError:
+                    time.sleep(0.005)
+                continue
+            if wait_ready and "ready" not in timings:
+                if get_status(f"{base}/ready", timeout) == 200:
+                    timings["ready"] = time.perf_counter() - start
+            elif get_status(f"{base}{DASHBOARD_PATH}", timeout) == 200:
+                timings["dashboard3"] = time.perf_counter() - start
+                continue
+            time.sleep(0.01)
+        # When the request went first: keep polling for the readiness flip
+        while "ready" not in timings and time.perf_counter() - start < timeout:
+            if get_status(f"{base}/ready", timeout) == 200:
+                timings["ready"] = time.perf_counter() - start
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait()
+    return timings
+
+
+def median_ms(runs: list[dict], step: str) -> float:
+    values = [run[step] for run in runs if step in run]
+    return statistics.median(values) * 1000 if values else float("nan")
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="API cold start: process spawn to the first /api/dashboard3")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per variant and path")
+    parser.add_argument("--port", type=int, default=8790, help="Port the API processes listen on")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for a process")
+    parser.add_argument("--top", type=int, default=10, help="Imports listed in the profile")
+    return parser.parse_args()
+
+
+def main_benchmark():
+    args = parse_args()
+
+    print("=" * 60)
+    print("API cold start benchmark")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as root:
+        import_profile(fresh_copy(Path(root), compiled=False), args.top)
+
+        print(f"\n{'variant':<26}{'path':<14}{'listening':>11}{'ready':>9}{'dashboard3':>12}  (median ms)")
+        for name, (compiled, extra_env) in VARIANTS.items():
+            env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1", **extra_env}
+            for wait_ready in (False, True):
+                runs = []
+                for _ in range(args.runs):
+                    # A fresh copy per start: no bytecode left behind by the previous one
+                    app_dir = fresh_copy(Path(root), compiled)
+                    runs.append(cold_start(app_dir, env, args.port, wait_ready, args.timeout))
+                path = "after /ready" if wait_ready else "immediate"
+                print(f"{name:<26}{path:<14}{median_ms(runs, 'listening'):>11.0f}"
+                      f"{median_ms(runs, 'ready'):>9.0f}{median_ms(runs, 'dashboard3'):>12.0f}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,162 @@
+"""
+Benchmark: Cumulative (Prefix Sum) Tables vs Scanning the Daily Stats
+For the ranking sections of /api/dashboard3 (project, section, skill, domain and
+experience), compares the scans of the *_daily_stats tables with the
+*_cumulative queries in functions/dashboard_queries.py, which read two rows per
+entity from the tables maintained by supabase/cumulative.py.
+
+Checks parity first: every row must match (section ranks excepted, since
+ROW_NUMBER doesn't order ties). Then reports the median query time per range.
+
+With --history-days N the daily stats are replaced, for this session only, by
+TEMP copies holding N days (the real rows repeated further back in time), with
+TEMP cumulative tables built from them, to show how both variants grow with the
+length of the data. Nothing is written to the real tables.
+
+Usage (SUPABASE_* env vars as for the API):
+    python cumulative_ranges.py --loads 30
+    python cumulative_ranges.py --history-days 1095
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "functions"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "supabase"))
+import dashboard_queries
+from dashboard_queries import CUMULATIVE_QUERIES, execute_query
+from cumulative import CUMULATIVE_TABLES, refresh_sql
+from prepared_statements import get_connection
+
+MODE = "off"  # plain statements, so only the work each query does differs
+RANK_FIELDS = {"engagement_rank", "view_rank", "retention_rank"}
+
+
+def run(cursor, name: str, start: date, end: date, cumulative: bool) -> list[dict]:
+    """Run a ranking section as a scan or from the cumulative tables"""
+    dashboard_queries.CUMULATIVE_MODE = "on" if cumulative else "off"
+    return execute_query(cursor, name, start, end, mode=MODE)
+
+
+def comparable(rows: list[dict]) -> list[str]:
+    """Rows without tie-dependent ranks, as sorted JSON"""
+    return sorted(json.dumps({k: str(v) for k, v in row.items() if k not in RANK_FIELDS}, sort_keys=True)
+                  for row in rows)
+
+
+def create_history(cursor, days: int) -> tuple[date, date]:
+    """TEMP daily stats spanning `days` days and their TEMP cumulative tables"""
+    cursor.execute("SELECT MIN(event_date) AS first_day, MAX(event_date) AS last_day FROM project_daily_stats")
+    bounds = cursor.fetchone()
+    span = (bounds["last_day"] - bounds["first_day"]).days + 1
+    copies = -(-days // span)
+
+    for source, config in CUMULATIVE_TABLES.items():
+        # TEMP tables come first on the search path, so the catalog and refresh
+        # SQL pick them up unchanged
+        cursor.execute(f"""
+            CREATE TEMP TABLE {source} AS
+            SELECT d.*, d.event_date - copy * %(span)s AS shifted_date
+            FROM public.{source} d, generate_series(0, %(copies)s - 1) AS copy
+        """, {"span": span, "copies": copies})
+        cursor.execute(f"UPDATE {source} SET event_date = shifted_date")
+        cursor.execute(f"ALTER TABLE {source} DROP COLUMN shifted_date")
+        cursor.execute(f"CREATE INDEX ON {source} (event_date)")
+        cursor.execute(f"CREATE INDEX ON {source} ({config['key']})")
+        cursor.execute(f"CREATE TEMP TABLE {config['table']} (LIKE public.{config['table']} INCLUDING ALL)")
+        cursor.execute(refresh_sql(source, config), {"since": date.min})
+        cursor.execute(f"ANALYZE {source}")
+        cursor.execute(f"ANALYZE {config['table']}")
+
+    return bounds["last_day"] - timedelta(days=copies * span - 1), bounds["last_day"]
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def check_parity(cursor, ranges: dict) -> bool:
+    """Every section returns the same rows both ways, for every range"""
+    ok = True
+    for range_name, (start, end) in ranges.items():
+        for name in CUMULATIVE_QUERIES:
+            if comparable(run(cursor, name, start, end, False)) != comparable(run(cursor, name, start, end, True)):
+                print(f"  MISMATCH {name} ({range_name})")
+                ok = False
+    return ok
+
+
+def time_query(cursor, name: str, start: date, end: date, loads: int, cumulative: bool) -> float:
+    """Median ms of one ranking section query"""
+    timings = []
+    for _ in range(loads + 1):
+        query_start = time.perf_counter()
+        run(cursor, name, start, end, cumulative)
+        timings.append((time.perf_counter() - query_start) * 1000)
+    return statistics.median(timings[1:])
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cumulative table range totals vs daily stats scans")
+    parser.add_argument("--loads", type=int, default=20, help="Measured runs per query and variant")
+    parser.add_argument("--history-days", type=int,
+                        help="Benchmark on TEMP copies of the daily stats stretched to this many days")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    if args.history_days:
+        first_day, last_day = create_history(cursor, args.history_days)
+    else:
+        cursor.execute("SELECT MIN(event_date) AS first_day, MAX(event_date) AS last_day FROM project_daily_stats")
+        bounds = cursor.fetchone()
+        first_day, last_day = bounds["first_day"], bounds["last_day"]
+
+    ranges = {
+        "last_7_days": (last_day - timedelta(days=6), last_day),
+        "last_30_days": (last_day - timedelta(days=29), last_day),
+        "all_time": (first_day, last_day),
+    }
+
+    print("=" * 60)
+    print("Cumulative range totals benchmark")
+    print("=" * 60)
+    print(f"Data: {first_day} to {last_day} ({(last_day - first_day).days + 1} days), {args.loads} runs per query")
+
+    print("\nParity (scan vs cumulative):")
+    ok = check_parity(cursor, ranges)
+    print("  all sections match" if ok else "  MISMATCHES found")
+
+    for range_name, (start, end) in ranges.items():
+        print(f"\n{range_name} ({start} to {end}), median ms:")
+        print(f"  {'query':<24}{'scan':>9}{'cumulative':>12}")
+        totals = [0.0, 0.0]
+        for name in CUMULATIVE_QUERIES:
+            scan = time_query(cursor, name, start, end, args.loads, False)
+            cumulative = time_query(cursor, name, start, end, args.loads, True)
+            totals[0] += scan
+            totals[1] += cumulative
+            print(f"  {name:<24}{scan:>9.2f}{cumulative:>12.2f}")
+        print(f"  {'total':<24}{totals[0]:>9.2f}{totals[1]:>12.2f}")
+
+    conn.rollback()
+    conn.close()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark: Admission Control Under Overload
+Starts the API with admission control on and off (DB_ADMISSION; see ADMISSION
+CONTROL in main.py) and sends it /api/dashboard3 requests at a fixed arrival
+rate, each for a range nobody asked for before, so every one of them runs its
+queries against Supabase. Past the rate the database can take, requests
+without admission control queue behind the pooler and time out or come back
+degraded; with it, the excess is answered 503 with Retry-After at once while
+the admitted requests keep their latency.
+
+Reports per variant the answers by outcome (200 complete, 200 degraded, 503,
+any other error), p50 / p99 latency of the complete answers, p99 of the 503s
+with their median Retry-After, and the limiter's limit and cuts afterwards
+(/api/metrics).
+
+Usage (SUPABASE_* env vars as for the API; point them at a slower link, e.g.
+a proxy adding latency, to overload it at lower rates):
+    python overload.py --rate 20,60 --seconds 15
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+FUNCTIONS_DIR = Path(__file__).resolve().parent.parent / "functions"
+
+# Ranges start on distinct days from here: none of them is cached
+FIRST_DAY = date(2020, 1, 1)
+
+
+def unique_paths():
+    """Endpoint paths of ranges never requested before (distinct start day and length)"""
+    for i in itertools.count():
+        start = FIRST_DAY + timedelta(days=i % 1500)
+        end = start + timedelta(days=7 + i // 1500)
+        yield f"/api/dashboard3?start_date={start}&end_date={end}"
+
+
+def get_json(url: str, timeout: float) -> dict:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def wait_ready(port: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"API on port {port} not ready after {timeout}s")
+
+
+# ============================================================================
+# LOAD
+# ============================================================================
+
+def request(url: str, timeout: float) -> tuple[str, float, str]:
+    """(outcome, seconds, Retry-After) of one request: complete, degraded, 503 or error"""
+    request_start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            body = json.loads(response.read())
+            outcome = "degraded" if body.get("degraded") else "complete"
+            return outcome, time.perf_counter() - request_start, None
+    except urllib.error.HTTPError as e:
+        e.read()
+        outcome = "503" if e.code == 503 else "error"
+        return outcome, time.perf_counter() - request_start, e.headers.get("Retry-After")
+    except OSError:
+        return "error", time.perf_counter() - request_start, None
+
+
+def percentile_ms(latencies: list[float], fraction: float) -> float:
+    if not latencies:
+        return float("nan")
+    latencies = sorted(latencies)
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000
+
+
+def run_variant(admission: bool, rate: float, args) -> dict:
+    """Start the API, send it `rate` requests per second for args.seconds and stop it"""
+    env = {**os.environ, "DB_ADMISSION": "on" if admission else "off", "WEB_CONCURRENCY": "1"}
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port)],
+                               cwd=FUNCTIONS_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(args.port, 60)
+        paths = unique_paths()
+        futures = []
+        # Open loop: requests go out on schedule whether or not earlier ones returned
+        with ThreadPoolExecutor(max_workers=args.max_outstanding) as executor:
+            run_start = time.perf_counter()
+            for i in range(int(rate * args.seconds)):
+                time.sleep(max(run_start + i / rate - time.perf_counter(), 0))
+                futures.append(executor.submit(request, base + next(paths), args.timeout))
+            results = [future.result() for future in futures]
+        admission_state = get_json(f"{base}/api/metrics", 10)["admission"]
+    finally:
+        process.terminate()
+        process.wait()
+
+    by_outcome = {outcome: [seconds for name, seconds, _ in results if name == outcome]
+                  for outcome in ("complete", "degraded", "503", "error")}
+    retry_after = [int(value) for outcome, _, value in results if outcome == "503" and value]
+    return {
+        "counts": {outcome: len(latencies) for outcome, latencies in by_outcome.items()},
+        "p50_ms": percentile_ms(by_outcome["complete"], 0.5),
+        "p99_ms": percentile_ms(by_outcome["complete"], 0.99),
+        "p99_503_ms": percentile_ms(by_outcome["503"], 0.99),
+        "retry_after": statistics.median(retry_after) if retry_after else float("nan"),
+        "limit": admission_state["limit"],
+        "decreases": admission_state["decreases"],
+    }
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Admission control under overload")
+    parser.add_argument("--rate", default="20,60", help="Comma-separated request rates (per second)")
+    parser.add_argument("--seconds", type=float, default=15, help="Load duration per variant")
+    parser.add_argument("--timeout", type=float, default=30, help="Client timeout per request")
+    parser.add_argument("--max-outstanding", type=int, default=512, help="Requests in flight at most (client threads)")
+    parser.add_argument("--port", type=int, default=8792, help="Port the API listens on")
+    return parser.parse_args()
+
+
+def main_benchmark():
+    args = parse_args()
+    print("=" * 60)
+    print("Overload benchmark")
+    print("=" * 60)
+    print(f"{args.seconds:.0f}s per variant, every request a new range\n")
+    print(f"{'rate/s':<8}{'admission':<11}{'complete':>9}{'degraded':>9}{'503':>6}{'error':>7}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'503 p99':>9}{'retry s':>8}{'limit':>7}{'cuts':>6}")
+    for rate in [float(value) for value in args.rate.split(",")]:
+        for admission in (False, True):
+            result = run_variant(admission, rate, args)
+            counts = result["counts"]
+            print(f"{rate:<8.0f}{'on' if admission else 'off':<11}{counts['complete']:>9}{counts['degraded']:>9}"
+                  f"{counts['503']:>6}{counts['error']:>7}{result['p50_ms']:>9.0f}{result['p99_ms']:>9.0f}"
+                  f"{result['p99_503_ms']:>9.0f}{result['retry_after']:>8.0f}{result['limit']:>7.1f}"
+                  f"{result['decreases']:>6}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
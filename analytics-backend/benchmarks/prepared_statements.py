@@ -0,0 +1,159 @@
+"""
+Benchmark: Prepared Statements for the Dashboard Queries
+Compares one /api/dashboard3 load (the 18 catalog queries in
+functions/dashboard_queries.py) run as plain statements against prepared ones.
+
+Reports, per dashboard load:
+1. Server planning time: the "Planning Time" of EXPLAIN ANALYZE for each
+   query, plain vs EXECUTE of the prepared statement. Once Postgres switches a
+   prepared statement to its generic plan (after 5 executions) this drops to
+   almost nothing; parsing is skipped from the first EXECUTE on.
+2. Wall time of the whole load from the client, per DASHBOARD_PREPARED mode
+   (off / session / transaction), queries run one after another on one
+   connection so the numbers are comparable.
+
+Usage (SUPABASE_* env vars as for the API):
+    python prepared_statements.py --loads 30
+    python prepared_statements.py --start 2025-01-01 --end 2025-01-31
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import date, timedelta
+from pathlib import Path
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "functions"))
+from dashboard_queries import API_QUERIES, QUERIES, execute_query, prepare_sql, execute_sql, statement_name
+
+SUPABASE_CONFIG = {
+    "host": os.getenv("SUPABASE_HOST"),
+    "port": os.getenv("SUPABASE_PORT", "6543"),
+    "database": os.getenv("SUPABASE_DATABASE", "postgres"),
+    "user": os.getenv("SUPABASE_USER"),
+    "password": os.getenv("SUPABASE_PASSWORD"),
+}
+
+GENERIC_PLAN_AFTER = 5  # custom plans Postgres tries before considering the generic one
+
+
+def get_connection():
+    return psycopg2.connect(
+        host=SUPABASE_CONFIG["host"],
+        port=SUPABASE_CONFIG["port"],
+        database=SUPABASE_CONFIG["database"],
+        user=SUPABASE_CONFIG["user"],
+        password=SUPABASE_CONFIG["password"],
+        sslmode=os.getenv("SUPABASE_SSLMODE", "require"),
+        cursor_factory=RealDictCursor,
+    )
+
+
+def planning_ms(cursor, sql: str, params: dict) -> float:
+    """Planning Time reported by EXPLAIN ANALYZE"""
+    cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()["QUERY PLAN"]
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return plan[0]["Planning Time"]
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def bench_planning(conn, start: date, end: date, loads: int) -> dict:
+    """Median planning time per query and per dashboard load, plain vs prepared"""
+    params = {"start_date": start, "end_date": end}
+    plain, prepared = {}, {}
+    with conn.cursor() as cursor:
+        for name in API_QUERIES:
+            cursor.execute(prepare_sql(name), params)
+            # Let the plan cache settle before measuring
+            for _ in range(GENERIC_PLAN_AFTER + 1):
+                cursor.execute(execute_sql(name), params)
+                cursor.fetchall()
+            plain[name] = statistics.median(planning_ms(cursor, QUERIES[name], params) for _ in range(loads))
+            prepared[name] = statistics.median(planning_ms(cursor, execute_sql(name), params) for _ in range(loads))
+
+        cursor.execute("SELECT name, generic_plans, custom_plans FROM pg_prepared_statements")
+        plan_counts = {row["name"]: row for row in cursor.fetchall()}
+        cursor.execute("DEALLOCATE ALL")
+    conn.rollback()
+
+    generic = [name for name in API_QUERIES if plan_counts[statement_name(name)]["generic_plans"] > 0]
+    return {"plain": plain, "prepared": prepared, "generic": generic}
+
+
+def bench_wall_time(conn, start: date, end: date, loads: int, mode: str) -> list[float]:
+    """Wall time (ms) of each full dashboard load in the given mode, warm-up excluded"""
+    timings = []
+    with conn.cursor() as cursor:
+        for load in range(loads + GENERIC_PLAN_AFTER + 1):
+            load_start = time.perf_counter()
+            for name in API_QUERIES:
+                execute_query(cursor, name, start, end, mode=mode)
+            conn.rollback()
+            if load > GENERIC_PLAN_AFTER:
+                timings.append((time.perf_counter() - load_start) * 1000)
+        cursor.execute("DEALLOCATE ALL")
+    conn.rollback()
+    return timings
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Planning time saved by prepared dashboard queries")
+    parser.add_argument("--start", type=date.fromisoformat, help="Range start (default: last 30 days of data)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Range end (default: latest session date)")
+    parser.add_argument("--loads", type=int, default=20, help="Measured dashboard loads per variant")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = get_connection()
+
+    if not args.end or not args.start:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT MAX(session_date) AS max_date FROM sessions")
+            latest = cursor.fetchone()["max_date"] or date.today()
+        conn.rollback()
+        args.end = args.end or latest
+        args.start = args.start or args.end - timedelta(days=29)
+
+    print("=" * 60)
+    print("Prepared statement benchmark")
+    print("=" * 60)
+    print(f"Range: {args.start} to {args.end}, {len(API_QUERIES)} queries per load, {args.loads} loads")
+
+    planning = bench_planning(conn, args.start, args.end, args.loads)
+    print("\nPlanning time per query (median ms):")
+    print(f"  {'query':<28}{'plain':>8}{'prepared':>10}")
+    for name in API_QUERIES:
+        marker = "" if name in planning["generic"] else "  (custom plan)"
+        print(f"  {name:<28}{planning['plain'][name]:>8.3f}{planning['prepared'][name]:>10.3f}{marker}")
+    plain_total = sum(planning["plain"].values())
+    prepared_total = sum(planning["prepared"].values())
+    print(f"  {'per dashboard load':<28}{plain_total:>8.3f}{prepared_total:>10.3f}")
+    print(f"\nPlanning time saved per load: {plain_total - prepared_total:.3f} ms "
+          f"({(1 - prepared_total / plain_total) * 100 if plain_total else 0:.0f}%)")
+
+    print("\nWall time per dashboard load (sequential, one connection):")
+    for mode in ["off", "session", "transaction"]:
+        timings = bench_wall_time(conn, args.start, args.end, args.loads, mode)
+        print(f"  {mode:<12} median {statistics.median(timings):8.2f} ms   "
+              f"p90 {sorted(timings)[int(len(timings) * 0.9) - 1]:8.2f} ms")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: NumPy Ranking Engine vs the SQL Rankings
+For the project, skill, domain and experience rankings of /api/dashboard3,
+compares the original SQL (PERCENTILE_CONT subqueries inside CASE chains, kept
+in dashboard_queries.py as project_rankings, tech_demand, ...) with the
+*_aggregates queries plus ranking_engine.rank_entities.
+
+Checks parity first: every row must match, except that rows with tied scores
+may swap rank-dependent fields (ROW_NUMBER doesn't order ties in either).
+Parity only holds with the default weights and thresholds (no RANKING_OVERRIDES).
+Then reports the median time per dashboard load of each variant.
+
+Usage (SUPABASE_* env vars as for the API):
+    python ranking_engine.py --loads 50
+    python ranking_engine.py --start 2025-01-01 --end 2025-06-30
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "functions"))
+from dashboard_queries import execute_query
+from ranking_engine import API_RANKINGS, RANKINGS, rank_entities
+from prepared_statements import get_connection
+
+MODE = "off"  # both variants run as plain statements so only the ranking work differs
+
+
+def tie_insensitive(rows: list[dict], ranking: dict) -> tuple[list, list]:
+    """Rows without their rank-dependent fields, and those fields, each as sorted JSON"""
+    rank_fields = {ranking["rank"]} | {field for field, tier in ranking["tiers"].items() if tier["by"] == "rank"}
+    encode = lambda keep: sorted(
+        json.dumps({k: str(v) for k, v in row.items() if (k in rank_fields) == keep}, sort_keys=True) for row in rows
+    )
+    return encode(False), encode(True)
+
+
+def check_parity(cursor, start: date, end: date) -> bool:
+    """Compare engine and SQL output for every API ranking"""
+    ok = True
+    for name, source in API_RANKINGS.items():
+        expected = execute_query(cursor, name, start, end, mode=MODE)
+        actual = rank_entities(name, execute_query(cursor, source, start, end, mode=MODE))
+        if actual == expected:
+            status = "identical"
+        else:
+            other, ranks = tie_insensitive(expected, RANKINGS[name])
+            other_actual, ranks_actual = tie_insensitive(actual, RANKINGS[name])
+            # With a LIMIT, a tie at the cut-off may pick a different row
+            truncated = RANKINGS[name]["limit"] and len(expected) == RANKINGS[name]["limit"]
+            if ranks == ranks_actual and (other == other_actual or truncated):
+                status = "identical up to tied scores"
+            else:
+                status = "MISMATCH"
+                ok = False
+        print(f"  {name:<22} {len(actual):>3} rows  {status}")
+    return ok
+
+
+def time_loads(cursor, start: date, end: date, loads: int, use_engine: bool) -> list[float]:
+    """Milliseconds per dashboard load for the four rankings"""
+    timings = []
+    for _ in range(loads):
+        load_start = time.perf_counter()
+        for name, source in API_RANKINGS.items():
+            if use_engine:
+                rank_entities(name, execute_query(cursor, source, start, end, mode=MODE))
+            else:
+                execute_query(cursor, name, start, end, mode=MODE)
+        timings.append((time.perf_counter() - load_start) * 1000)
+    return timings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ranking engine parity and timing vs SQL")
+    parser.add_argument("--start", type=date.fromisoformat, help="Range start (default: all data)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Range end (default: latest session date)")
+    parser.add_argument("--loads", type=int, default=30, help="Measured loads per variant")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    conn = get_connection()
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT MIN(session_date) AS min_date, MAX(session_date) AS max_date FROM sessions")
+        bounds = cursor.fetchone()
+        end = args.end or bounds["max_date"] or date.today()
+        start = args.start or bounds["min_date"] or end - timedelta(days=29)
+
+        print("=" * 60)
+        print("Ranking engine benchmark")
+        print("=" * 60)
+        print(f"Range: {start} to {end}\n")
+
+        print("Parity with the SQL rankings:")
+        parity = check_parity(cursor, start, end)
+
+        sql = time_loads(cursor, start, end, args.loads, use_engine=False)
+        engine = time_loads(cursor, start, end, args.loads, use_engine=True)
+    conn.rollback()
+    conn.close()
+
+    print(f"\nFour rankings per load (median of {args.loads}):")
+    print(f"  SQL rankings               {statistics.median(sql):8.2f} ms")
+    print(f"  aggregates + NumPy engine  {statistics.median(engine):8.2f} ms")
+
+    if not parity:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: In-Memory Session Store vs SQL for the Dashboard Sections
+For the dashboard's preset ranges, computes every section session_store.py
+covers both with its catalog query and from the store.
+
+Checks parity first: every section must come out the same from both, in the
+same order of its ORDER BY column (ranks excepted; for the LIMIT sections the
+rows tied at the boundary may differ; floats to 12 significant digits, as
+Postgres adds float sums in scan order). Then reports the
+median time per section and for all of them, the store's load and refresh
+times and its memory footprint.
+
+Usage (SUPABASE_* env vars as for the API):
+    python session_store.py --loads 20
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "functions"))
+import main
+import session_store
+from session_store import STORE_SECTIONS
+
+# ORDER BY column of the sections that have one (ties in it leave the order open)
+ORDER_COLUMNS = {"temporal_hourly": "hour", "temporal_dow": "day_number", "devices": "sessions",
+                 "browsers": "sessions", "operating_systems": "sessions", "geographic": "sessions",
+                 "visitor_segments": "count", "section_rankings": "health_score",
+                 "traffic_sources_summary": "sessions", "top_visitors": "visitor_value_score",
+                 "gist_top_visitors": "visitor_value_score", "gist_visitor_segments": "count",
+                 "daily_metrics": "date", "partial_sections": "event_date",
+                 **{f"daily_metrics_{unit}": "date" for unit in ["week", "month", "quarter", "year"]}}
+# Sections with a LIMIT, which can keep different rows among those tied at its boundary
+LIMITED = {"browsers", "operating_systems", "geographic", "traffic_sources_summary", "top_visitors",
+           "gist_top_visitors"}
+
+
+def comparable(rows: list[dict]) -> list[str]:
+    """A section's rows as sorted JSON, ranks left out and floats to 12 significant digits"""
+    return sorted(json.dumps({k: float(f"{v:.12g}") if isinstance(v, float) else v for k, v in dict(row).items()
+                              if not k.endswith("_rank")}, sort_keys=True, default=str) for row in rows)
+
+
+def same_rows(name: str, expected: list[dict], actual: list[dict]) -> bool:
+    order = ORDER_COLUMNS.get(name)
+    if order and [row[order] for row in expected] != [row[order] for row in actual]:
+        return False
+    if name in LIMITED and expected:
+        # Rows tied with the last one are free to differ
+        boundary = expected[-1][order]
+        expected = [row for row in expected if row[order] != boundary]
+        actual = [row for row in actual if row[order] != boundary]
+    return comparable(expected) == comparable(actual)
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def check_parity(ranges: dict) -> bool:
+    """Every store section equals its catalog query's rows"""
+    ok = True
+    for range_name, (start, end) in ranges.items():
+        for name in STORE_SECTIONS:
+            if not same_rows(name, main.run_catalog_query(name, start, end), session_store.query(name, start, end)):
+                print(f"  MISMATCH {range_name} {name}")
+                ok = False
+    return ok
+
+
+def median_ms(fn, loads: int) -> float:
+    timings = []
+    for _ in range(loads + 1):
+        run_start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - run_start) * 1000)
+    return statistics.median(timings[1:])
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="In-memory session store vs SQL for the dashboard sections")
+    parser.add_argument("--loads", type=int, default=20, help="Measured runs per section and range")
+    return parser.parse_args()
+
+
+def main_benchmark():
+    args = parse_args()
+    load_start = time.perf_counter()
+    main.run_with_connection(session_store.load)
+    load_ms = (time.perf_counter() - load_start) * 1000
+
+    # Preset ranges ending at the last synced day
+    last_day = main.run_pg_query("SELECT MAX(session_date) AS last_day FROM sessions")[0]["last_day"]
+    ranges = main.standard_ranges(last_day + timedelta(days=1))
+
+    print("=" * 60)
+    print("Session store benchmark")
+    print("=" * 60)
+    stats = session_store.stats()
+    print(f"Loaded {sum(stats['rows'].values())} rows in {load_ms:.0f}ms, "
+          f"{stats['total_memory_bytes'] / 1024:.0f} KiB in memory:")
+    for table, rows in stats["rows"].items():
+        print(f"  {table:<28}{rows:>8} rows{stats['memory_bytes'][table] / 1024:>9.0f} KiB")
+
+    print("\nParity (store vs catalog queries):")
+    ok = check_parity(ranges)
+    print("  all sections match" if ok else "  MISMATCHES found")
+
+    print(f"\n{'range':<14}{'section':<24}{'sql ms':>9}{'store ms':>10}")
+    for range_name, (start, end) in ranges.items():
+        sql_total = store_total = 0
+        for name in STORE_SECTIONS:
+            sql_ms = median_ms(lambda: main.run_catalog_query(name, start, end), args.loads)
+            store_ms = median_ms(lambda: session_store.query(name, start, end), args.loads)
+            sql_total, store_total = sql_total + sql_ms, store_total + store_ms
+            print(f"{range_name:<14}{name:<24}{sql_ms:>9.2f}{store_ms:>10.2f}")
+        print(f"{range_name:<14}{'(all sections)':<24}{sql_total:>9.2f}{store_total:>10.2f}")
+
+    # A sync that rewrote nothing: only the signature queries run
+    refresh_ms = median_ms(lambda: (session_store.mark_dirty(), main.run_with_connection(session_store.refresh)),
+                           args.loads)
+    print(f"\nNo-change refresh of every table: {refresh_ms:.1f}ms")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_benchmark()
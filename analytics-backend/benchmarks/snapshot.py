@@ -0,0 +1,153 @@
+"""
+Benchmark: Gist Build from the Local Snapshot vs from Supabase
+Writes a snapshot of the dashboard tables (supabase/snapshot.py), then builds
+the gist's date ranges both ways: with the catalog queries against Postgres,
+and from the snapshot through the session store (GIST_SNAPSHOT_DIR in
+update_dashboard_gist.py).
+
+Checks parity first: every range's payload must come out the same from both
+(list rows in any order, since rows tied in an ORDER BY may come either way;
+floats to 12 significant digits, as Postgres adds float sums in scan order).
+The sections one by one are checked against their catalog queries by
+session_store.py. Then reports the snapshot's size and write time and the
+median time to build every range both ways, the snapshot's load included.
+
+Usage (SUPABASE_* env vars as for the sync):
+    python snapshot.py --out /tmp/dashboard-snapshot --loads 5
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "functions"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "supabase"))
+import session_store
+from snapshot import write_snapshot
+from sync_to_supabase import get_supabase_connection
+from update_dashboard_gist import (
+    canonical_json, database_query, dashboard_date_ranges, fetch_daily_partials, fetch_dashboard_data,
+    get_connection_pool, get_data_date_range, widest_range,
+)
+
+
+def comparable(value):
+    """A payload as JSON values, list rows sorted and floats to 12 significant digits"""
+    if isinstance(value, dict):
+        return {k: comparable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return sorted((comparable(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(value, float):
+        return float(f"{value:.12g}")
+    return value
+
+
+def differences(expected, actual, path: str = "") -> list[str]:
+    """Paths where two comparable() payloads differ"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return [diff for key in expected.keys() | actual.keys()
+                for diff in differences(expected.get(key), actual.get(key), f"{path}.{key}")]
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        return [diff for i, (e, a) in enumerate(zip(expected, actual))
+                for diff in differences(e, a, f"{path}[{i}]")]
+    return [] if expected == actual else [path]
+
+
+# ============================================================================
+# BUILDS
+# ============================================================================
+
+def build(query, date_ranges: dict) -> dict:
+    """Every range's gist payload, from daily partials shared across the ranges"""
+    partials = fetch_daily_partials(query, *widest_range(date_ranges))
+    return {name: fetch_dashboard_data(query, start, end, partials) for name, (start, end) in date_ranges.items()}
+
+
+def build_from_database(pool, date_ranges: dict) -> dict:
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            return build(database_query(cursor), date_ranges)
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
+
+
+def build_from_snapshot(path: str, date_ranges: dict) -> dict:
+    session_store.load_snapshot(path)
+    return build(session_store.query, date_ranges)
+
+
+def median_ms(fn, loads: int) -> float:
+    timings = []
+    for _ in range(loads + 1):
+        run_start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - run_start) * 1000)
+    return statistics.median(timings[1:])
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gist build from the local snapshot vs from Supabase")
+    parser.add_argument("--out", default="/tmp/dashboard-snapshot", help="Snapshot directory to write")
+    parser.add_argument("--loads", type=int, default=5, help="Measured builds per source")
+    return parser.parse_args()
+
+
+def main_benchmark():
+    args = parse_args()
+
+    print("=" * 60)
+    print("Dashboard snapshot benchmark")
+    print("=" * 60)
+    print("Writing the snapshot:")
+    pg_conn = get_supabase_connection()
+    write_start = time.perf_counter()
+    manifest = write_snapshot(pg_conn, args.out)
+    write_ms = (time.perf_counter() - write_start) * 1000
+    pg_conn.close()
+    for table, entry in manifest["tables"].items():
+        print(f"  {table:<28}{entry['rows']:>8} rows{entry['bytes'] / 1024:>9.1f} KiB")
+
+    pool = get_connection_pool(1)
+    try:
+        conn = pool.getconn()
+        with conn.cursor() as cursor:
+            date_ranges = dashboard_date_ranges(*get_data_date_range(cursor))
+        conn.rollback()
+        pool.putconn(conn)
+
+        print("\nParity (snapshot vs Postgres, every range's payload):")
+        expected = json.loads(canonical_json(build_from_database(pool, date_ranges)))
+        actual = json.loads(canonical_json(build_from_snapshot(args.out, date_ranges)))
+        diffs = differences(comparable(expected), comparable(actual))
+        for diff in diffs[:20]:
+            print(f"  MISMATCH {diff}")
+        print("  all ranges match" if not diffs else f"  {len(diffs)} MISMATCHES found")
+
+        database_ms = median_ms(lambda: build_from_database(pool, date_ranges), args.loads)
+    finally:
+        pool.closeall()
+    snapshot_ms = median_ms(lambda: build_from_snapshot(args.out, date_ranges), args.loads)
+    compute_ms = median_ms(lambda: build(session_store.query, date_ranges), args.loads)
+
+    print(f"\nSnapshot written in {write_ms:.0f}ms")
+    print(f"{'source':<34}{'ms':>9}")
+    print(f"{'Postgres (catalog queries)':<34}{database_ms:>9.1f}")
+    print(f"{'snapshot (load + compute)':<34}{snapshot_ms:>9.1f}")
+    print(f"{'snapshot (compute, loaded)':<34}{compute_ms:>9.1f}")
+    print(f"Speedup with the load: {database_ms / snapshot_ms:.1f}x")
+
+    if diffs:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,159 @@
+"""
+Benchmark: Multi-Worker Serving with the Shared Response Cache
+Starts the API with 1, 2, 4, ... uvicorn workers (WEB_CONCURRENCY), with the
+shared cache off and on (shared_cache.py; see MULTI-WORKER SERVING in main.py),
+and drives each with concurrent /api/dashboard3 requests for a mix of ranges:
+the standard ones and some custom month ranges, which start uncached.
+
+Reports per variant the throughput, p50 / p99 latency and the transactions the
+database ran meanwhile (pg_stat_database), i.e. whether more workers multiply
+the queries. Throughput can only scale with the cores the machine has.
+
+Usage (SUPABASE_* env vars as for the API):
+    python workers.py --workers 1,2,4 --clients 16 --seconds 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import http.client
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+FUNCTIONS_DIR = Path(__file__).resolve().parent.parent / "functions"
+sys.path.insert(0, str(FUNCTIONS_DIR))
+import main
+
+
+def request_paths(custom_ranges: int) -> list[str]:
+    """The standard ranges plus `custom_ranges` calendar months back from the last full one"""
+    ranges = list(main.standard_ranges().values())
+    month_end = date.today().replace(day=1) - timedelta(days=1)
+    for _ in range(custom_ranges):
+        month_start = month_end.replace(day=1)
+        ranges.append((month_start, month_end))
+        month_end = month_start - timedelta(days=1)
+    return [f"/api/dashboard3?start_date={start}&end_date={end}" for start, end in ranges]
+
+
+def database_transactions() -> int:
+    """Transactions committed or rolled back in the database so far (flushed by idle backends within ~1s)"""
+    row = main.run_pg_query("SELECT xact_commit + xact_rollback AS total FROM pg_stat_database "
+                            "WHERE datname = current_database()")[0]
+    return row["total"]
+
+
+# ============================================================================
+# LOAD
+# ============================================================================
+
+def wait_ready(port: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"API on port {port} not ready after {timeout}s")
+
+
+def client(port: int, paths: list[str], offset: int, stop_at: float) -> tuple[list[float], int]:
+    """Request the paths round-robin on one keep-alive connection until stop_at; (latencies, errors)"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies, errors, i = [], 0, offset
+    while time.perf_counter() < stop_at:
+        request_start = time.perf_counter()
+        try:
+            conn.request("GET", paths[i % len(paths)])
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                latencies.append(time.perf_counter() - request_start)
+            else:
+                errors += 1
+        except (http.client.HTTPException, OSError):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        i += 1
+    conn.close()
+    return latencies, errors
+
+
+def run_variant(workers: int, shared: bool, args) -> dict:
+    """Start the API with `workers` processes, load it for args.seconds and stop it"""
+    cache_path = f"/tmp/workers-benchmark-{os.getpid()}.sqlite"
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "DASHBOARD_SHARED_CACHE": "on" if shared else "off",
+           "DASHBOARD_SHARED_CACHE_PATH": cache_path}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--loop", "uvloop", "--http", "httptools"],
+        cwd=FUNCTIONS_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(args.port, 60)
+        time.sleep(args.settle)  # the other workers' startup
+        paths = request_paths(args.custom_ranges)
+        before = database_transactions()
+        run_start = time.perf_counter()
+        stop_at = run_start + args.seconds
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            results = list(executor.map(lambda i: client(args.port, paths, i, stop_at), range(args.clients)))
+        elapsed = time.perf_counter() - run_start
+        time.sleep(2)  # idle backends flush their statistics
+        transactions = database_transactions() - before
+    finally:
+        process.terminate()
+        process.wait()
+        for suffix in ("", "-wal", "-shm", ".leader"):
+            Path(cache_path + suffix).unlink(missing_ok=True)
+
+    latencies = sorted(latency for run, _ in results for latency in run)
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float("nan"),
+        "errors": sum(errors for _, errors in results),
+        "transactions": transactions,
+    }
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Multi-worker serving with the shared response cache")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client connections")
+    parser.add_argument("--seconds", type=float, default=10, help="Load duration per variant")
+    parser.add_argument("--custom-ranges", type=int, default=10, help="Custom month ranges in the mix")
+    parser.add_argument("--settle", type=float, default=3, help="Seconds to wait after the first /ready")
+    parser.add_argument("--port", type=int, default=8791, help="Port the API listens on")
+    return parser.parse_args()
+
+
+def main_benchmark():
+    args = parse_args()
+    print("=" * 60)
+    print("Multi-worker benchmark")
+    print("=" * 60)
+    print(f"{os.cpu_count()} cores, {args.clients} clients, {args.seconds:.0f}s per variant, "
+          f"{len(request_paths(args.custom_ranges))} ranges\n")
+    print(f"{'workers':<9}{'shared cache':<14}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}{'db xacts':>10}")
+    for workers in [int(count) for count in args.workers.split(",")]:
+        for shared in (False, True):
+            result = run_variant(workers, shared, args)
+            print(f"{workers:<9}{'on' if shared else 'off':<14}{result['requests_per_second']:>8.0f}"
+                  f"{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['errors']:>8}{result['transactions']:>10}")
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,239 @@
+"""
+Daily Partials - the additive dashboard sections for many ranges from one scan
+Used by the gist publisher (supabase/update_dashboard_gist.py) and the API's
+batch endpoint (/api/dashboard3/batch in main.py).
+
+The daily metrics, conversions and the rankings built from the *_daily_stats
+tables are additive: they are read once as per-day partial aggregates
+(the partial_* catalog queries in dashboard_queries.py) over the span of every
+requested range, and merged per range in Python. The merge reproduces the
+Postgres semantics of the per-range queries (SUM/AVG/MAX, ROW_NUMBER and
+ROUND(x::numeric, n)), so a range comes out as its catalog query would return
+it. MAX() of text columns follows the database collation via a DENSE_RANK
+computed in the partials query.
+
+Non-additive sections (distinct visitors and sessions, top visitors, ...)
+can't be merged and still run per range.
+"""
+
+from datetime import date
+from ranking_engine import pg_round
+
+# Partial -> catalog query it is read with
+PARTIAL_QUERIES = {
+    "daily_metrics": "daily_metrics",
+    "conversions": "partial_conversions",
+    "projects": "partial_projects",
+    "sections": "partial_sections",
+    "skills": "partial_skills",
+    "domains": "partial_domains",
+    "experiences": "partial_experiences",
+    # Not date-filtered: identical for every range
+    "recommendation_performance": "recommendation_performance",
+}
+
+
+# ============================================================================
+# FETCH AND MERGE
+# ============================================================================
+
+def fetch_daily_partials(query, start_date: date, end_date: date, names: list[str] = None) -> dict:
+    """
+    Fetch the per-day partial aggregates `names` (every one when None) for a
+    range; query(name, start, end) returns a catalog query's rows (from
+    Supabase, or session_store.query)
+    """
+    return {name: query(PARTIAL_QUERIES[name], start_date, end_date) for name in names or PARTIAL_QUERIES}
+
+
+def rank_by(rows: list[dict], key, rank_field: str, descending: bool = True):
+    """ROW_NUMBER() OVER (ORDER BY key) into rank_field (ties keep input order)"""
+    for rank, row in enumerate(sorted(rows, key=key, reverse=descending), start=1):
+        row[rank_field] = rank
+
+
+def merge_partials(rows: list[dict], group_field: str, start_date: date, end_date: date,
+                   date_field: str = "event_date") -> dict:
+    """Group the partial rows that fall in [start_date, end_date] by group_field (sorted)"""
+    groups = {}
+    for row in rows:
+        if start_date <= row[date_field] <= end_date:
+            groups.setdefault(row[group_field], []).append(row)
+    return {key: groups[key] for key in sorted(groups)}
+
+
+def collated_max(rows: list[dict], field: str):
+    """MAX(field) across partial rows, in database collation order"""
+    present = [row for row in rows if row[field] is not None]
+    if not present:
+        return None
+    return max(present, key=lambda row: row[f"{field}_order"])[field]
+
+
+def sum_field(rows: list[dict], field: str) -> int:
+    """SUM(COALESCE(field, 0)) across partial rows"""
+    return sum(row[field] or 0 for row in rows)
+
+
+def avg_field(rows: list[dict], field: str):
+    """AVG(field) of a float column from its per-day SUM/COUNT partials (NULL if no values)"""
+    count = sum(row[f"{field}_count"] for row in rows)
+    if not count:
+        return None
+    return sum(row[f"{field}_sum"] for row in rows if row[f"{field}_sum"] is not None) / count
+
+
+def derive_conversion_row(partials: dict, start_date: date, end_date: date) -> dict:
+    """Conversion funnel totals for a range"""
+    rows = [row for row in partials["conversions"] if start_date <= row["event_date"] <= end_date]
+    fields = ["cta_views", "cta_clicks", "form_starts", "form_submissions", "resume_downloads",
+              "social_clicks", "outbound_clicks", "publication_clicks", "content_copies"]
+    return {field: sum_field(rows, field) for field in fields}
+
+
+# ============================================================================
+# CATALOG SECTIONS
+# ============================================================================
+# The rows of a catalog query for a range, from the partials (entity
+# aggregates come unranked, as from the query)
+
+def daily_metrics_rows(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    return [row for row in partials["daily_metrics"] if start_date <= row["date"] <= end_date]
+
+
+def conversion_summary_rows(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    return [derive_conversion_row(partials, start_date, end_date)]
+
+
+def project_aggregates_rows(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    return [{
+        "project_id": project_id,
+        "project_title": collated_max(rows, "project_title"),
+        "project_category": collated_max(rows, "project_category"),
+        "total_views": sum_field(rows, "views"),
+        "total_unique_viewers": sum_field(rows, "unique_viewers"),
+        "total_clicks": sum_field(rows, "clicks"),
+        "total_expands": sum_field(rows, "expands"),
+        "total_link_clicks": sum_field(rows, "link_clicks"),
+        "total_github_clicks": sum_field(rows, "github_clicks"),
+        "total_demo_clicks": sum_field(rows, "demo_clicks"),
+    } for project_id, rows in merge_partials(partials["projects"], "project_id", start_date, end_date).items()]
+
+
+def section_ranking_row(section_id, sums: dict, averages: dict, max_scroll_milestone) -> dict:
+    """
+    One section_rankings row before ranking, from the section's totals of the
+    additive columns and its float averages (None when no values)
+    """
+    exit_rate, engagement = averages["unique_exit_rate"], averages["engagement_rate"]
+    time_spent, scroll_depth = averages["avg_time_spent_seconds"], averages["avg_scroll_depth_percent"]
+    return {
+        "section_id": section_id,
+        "total_unique_views": sums["unique_views"],
+        "total_unique_exits": sums["unique_exits"],
+        "total_unique_viewers": sums["unique_viewers"],
+        "avg_exit_rate": pg_round(exit_rate, 2),
+        "total_views": sums["total_views"],
+        "total_exits": sums["total_exits"],
+        "avg_total_exit_rate": pg_round(averages["total_exit_rate"], 2),
+        "avg_revisits_per_session": pg_round(averages["avg_revisits_per_session"], 2),
+        "total_engaged_views": sums["engaged_sessions"],
+        "avg_engagement_rate": pg_round(engagement, 2),
+        "avg_time_spent_seconds": pg_round(time_spent, 2),
+        "avg_scroll_depth_percent": pg_round(scroll_depth, 2),
+        "max_scroll_milestone": max_scroll_milestone,
+        # float8, like the query's; rounded by rank_sections
+        "health_score": ((engagement or 0) * 2 + (100 - (100 if exit_rate is None else exit_rate)) +
+                         min(time_spent or 0, 100) + (scroll_depth or 0)),
+    }
+
+
+def rank_sections(sections: list[dict]) -> list[dict]:
+    """Ranks, tiers and hints of section_ranking_row rows (dashboard_queries.SECTION_RANKING), healthiest first"""
+    # DESC puts NULLs first and ASC last, as in Postgres
+    rank_by(sections, lambda s: (s["avg_engagement_rate"] is None, s["avg_engagement_rate"] or 0),
+            "engagement_rank")
+    rank_by(sections, lambda s: s["total_views"], "view_rank")
+    rank_by(sections, lambda s: (s["avg_exit_rate"] is None, s["avg_exit_rate"] or 0),
+            "retention_rank", descending=False)
+
+    for section in sections:
+        health, exit_rate, engagement = section["health_score"], section["avg_exit_rate"], section["avg_engagement_rate"]
+        section["health_tier"] = ("excellent" if health >= 300 else "good" if health >= 150 else
+                                  "needs_attention" if health >= 50 else "critical")
+        section["dropoff_indicator"] = ("high_dropoff" if exit_rate is not None and exit_rate >= 90 else
+                                        "moderate_dropoff" if exit_rate is not None and exit_rate >= 70 else
+                                        "low_dropoff")
+        if engagement is not None and engagement < 20:
+            section["optimization_hint"] = "improve_content"
+        elif exit_rate is not None and exit_rate > 85:
+            section["optimization_hint"] = "add_cta_or_navigation"
+        else:
+            section["optimization_hint"] = "maintain"
+
+    sections.sort(key=lambda s: s["health_score"], reverse=True)
+    for section in sections:
+        section["health_score"] = pg_round(section["health_score"], 2)
+    return sections
+
+
+SECTION_SUMS = ["unique_views", "unique_exits", "unique_viewers", "total_views", "total_exits", "engaged_sessions"]
+SECTION_AVERAGES = ["unique_exit_rate", "total_exit_rate", "avg_revisits_per_session", "engagement_rate",
+                    "avg_time_spent_seconds", "avg_scroll_depth_percent"]
+
+
+def section_rankings_rows(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    sections = []
+    for section_id, rows in merge_partials(partials["sections"], "section_id", start_date, end_date).items():
+        milestones = [row["max_scroll_milestone"] for row in rows if row["max_scroll_milestone"] is not None]
+        sections.append(section_ranking_row(
+            section_id,
+            {field: sum_field(rows, field) for field in SECTION_SUMS},
+            {field: avg_field(rows, field) for field in SECTION_AVERAGES},
+            max(milestones) if milestones else None,
+        ))
+    return rank_sections(sections)
+
+
+def skill_aggregates_rows(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    return [{
+        "skill_name": skill_name,
+        "total_interactions": sum_field(rows, "total_interactions"),
+        "total_unique_users": sum_field(rows, "total_unique_users"),
+        "weighted_score": sum_field(rows, "interest_score"),
+    } for skill_name, rows in merge_partials(partials["skills"], "skill_name", start_date, end_date).items()]
+
+
+def domain_aggregates_rows(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    return [{
+        "domain": domain,
+        "total_explicit_interest": sum_field(rows, "total_explicit_interest"),
+        "total_implicit_interest": sum_field(rows, "total_implicit_interest"),
+        "total_interactions": sum_field(rows, "total_interactions"),
+        "total_unique_users": sum_field(rows, "total_unique_users"),
+        "total_interest_score": sum_field(rows, "total_interest_score"),
+    } for domain, rows in merge_partials(partials["domains"], "domain", start_date, end_date).items()]
+
+
+def experience_aggregates_rows(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    return [{
+        "experience_id": experience_id,
+        "experience_title": collated_max(rows, "experience_title"),
+        "company": collated_max(rows, "company"),
+        "total_interactions": sum_field(rows, "total_interactions"),
+        "total_unique_users": sum_field(rows, "total_unique_users"),
+        "total_sessions": sum_field(rows, "total_sessions"),
+    } for experience_id, rows in merge_partials(partials["experiences"], "experience_id",
+                                                start_date, end_date).items()]
+
+
+# Catalog query -> (partial it is merged from, rows for a range)
+PARTIAL_SECTIONS = {
+    "daily_metrics": ("daily_metrics", daily_metrics_rows),
+    "conversion_summary": ("conversions", conversion_summary_rows),
+    "project_aggregates": ("projects", project_aggregates_rows),
+    "section_rankings": ("sections", section_rankings_rows),
+    "skill_aggregates": ("skills", skill_aggregates_rows),
+    "domain_aggregates": ("domains", domain_aggregates_rows),
+    "experience_aggregates": ("experiences", experience_aggregates_rows),
+}
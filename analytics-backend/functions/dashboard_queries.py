@@ -0,0 +1,1154 @@
+"""
+Dashboard Query Catalog
+The SQL behind /api/dashboard3 (main.py) and the gist publisher
+(supabase/update_dashboard_gist.py), kept in one place.
+
+Every statement takes the date range as %(start_date)s / %(end_date)s and runs
+through execute_query(), which can use server-side prepared statements so
+repeated dashboard loads skip parsing (and planning, once Postgres settles on a
+generic plan). DASHBOARD_PREPARED selects how:
+
+    session      PREPARE once per connection, then EXECUTE. Needs a session-level
+                 connection (direct, or the Supabase pooler in session mode, 5432)
+    transaction  Pooler-compatible (transaction mode, 6543): EXECUTE behind a
+                 SAVEPOINT and PREPARE on whichever server connection doesn't have
+                 the statement yet. Names carry a hash of the SQL, so a server
+                 connection shared with other clients never runs a stale text.
+                 Requires the caller to be inside a transaction (autocommit off)
+    off          plain parameterized statements
+    auto         transaction on port 6543, session otherwise (default)
+
+The ranking sections read range totals from the cumulative (prefix sum) tables
+maintained by supabase/cumulative.py; DASHBOARD_CUMULATIVE=off scans the daily
+stats tables instead, as does a cumulative table not yet refreshed since its
+daily table's last load.
+
+The time series (daily_metrics, traffic_daily_stats) also come bucketed by week,
+month, quarter or year (see TIME BUCKETS), so long ranges chart a bounded
+number of points. The overview, conversion summary and ranking queries have
+_compare variants returning a comparison range (%(compare_start_date)s /
+%(compare_end_date)s) along with the requested one (see PERIOD COMPARISON).
+"""
+
+import os
+import re
+import time
+import hashlib
+import threading
+import weakref
+from psycopg2 import errors
+
+PREPARED_MODE = os.getenv("DASHBOARD_PREPARED", "auto")  # auto | session | transaction | off
+CUMULATIVE_MODE = os.getenv("DASHBOARD_CUMULATIVE", "on")  # on | off
+CUMULATIVE_CHECK_SECONDS = float(os.getenv("DASHBOARD_CUMULATIVE_CHECK_SECONDS", "30"))
+POOLER_TRANSACTION_PORT = "6543"
+
+STATEMENT_PREFIX = "dash"
+SAVEPOINT = "dash_execute"
+PARAM_NAMES = ("start_date", "end_date", "compare_start_date", "compare_end_date")
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+# Ranks, tiers and output columns of section_rankings, shared by the scan and
+# the cumulative variant (both provide the `aggregated` CTE)
+SECTION_RANKING = """
+        ranked AS (
+            SELECT *,
+                ROW_NUMBER() OVER (ORDER BY avg_engagement_rate DESC) as engagement_rank,
+                ROW_NUMBER() OVER (ORDER BY total_views DESC) as view_rank,
+                ROW_NUMBER() OVER (ORDER BY avg_exit_rate ASC) as retention_rank,
+                CASE
+                    WHEN health_score >= 300 THEN 'excellent'
+                    WHEN health_score >= 150 THEN 'good'
+                    WHEN health_score >= 50 THEN 'needs_attention'
+                    ELSE 'critical'
+                END as health_tier,
+                CASE
+                    WHEN avg_exit_rate >= 90 THEN 'high_dropoff'
+                    WHEN avg_exit_rate >= 70 THEN 'moderate_dropoff'
+                    ELSE 'low_dropoff'
+                END as dropoff_indicator,
+                CASE
+                    WHEN avg_engagement_rate < 20 THEN 'improve_content'
+                    WHEN avg_exit_rate > 85 THEN 'add_cta_or_navigation'
+                    ELSE 'maintain'
+                END as optimization_hint
+            FROM aggregated
+        )
+        SELECT section_id, total_unique_views, total_unique_exits, total_unique_viewers,
+               avg_exit_rate, total_views, total_exits, avg_total_exit_rate,
+               avg_revisits_per_session, total_engaged_views, avg_engagement_rate,
+               avg_time_spent_seconds, avg_scroll_depth_percent, max_scroll_milestone,
+               ROUND(health_score::numeric, 2) as health_score,
+               engagement_rank::int, view_rank::int, retention_rank::int,
+               health_tier, dropoff_indicator, optimization_hint
+        FROM ranked ORDER BY health_score DESC
+    """
+
+QUERIES = {
+    # Sections shared by the API and the gist
+    "overview": """
+        SELECT
+            COUNT(DISTINCT session_id) as total_sessions,
+            COUNT(DISTINCT user_pseudo_id) as unique_visitors,
+            ROUND(AVG(session_duration_seconds)::numeric, 0) as avg_session_duration,
+            ROUND(AVG(page_views)::numeric, 1) as avg_pages_per_session,
+            ROUND(COUNT(DISTINCT CASE WHEN is_bounce THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as bounce_rate,
+            ROUND(COUNT(DISTINCT CASE WHEN is_engaged THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as engagement_rate,
+            ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement_score
+        FROM sessions WHERE session_date BETWEEN %(start_date)s AND %(end_date)s
+    """,
+    "traffic_sources_summary": """
+        SELECT s.traffic_source, s.traffic_medium,
+               COUNT(DISTINCT s.session_id) as sessions,
+               COUNT(DISTINCT s.user_pseudo_id) as unique_visitors,
+               ROUND(COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as engagement_rate,
+               ROUND(COUNT(DISTINCT CASE WHEN s.is_bounce THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as bounce_rate,
+               ROUND(AVG(s.session_duration_seconds)::numeric, 0) as avg_duration,
+               COUNT(DISTINCT CASE WHEN vi.form_submissions > 0 THEN s.user_pseudo_id END) as conversions,
+               COUNT(DISTINCT CASE WHEN vi.resume_downloads > 0 THEN s.user_pseudo_id END) as resume_downloads
+        FROM sessions s
+        LEFT JOIN visitor_insights vi ON s.user_pseudo_id = vi.user_pseudo_id
+        WHERE s.session_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY s.traffic_source, s.traffic_medium ORDER BY sessions DESC LIMIT 10
+    """,
+    "daily_metrics": """
+        SELECT session_date as date, total_sessions as sessions, unique_visitors as visitors,
+               engagement_rate, bounce_rate, avg_session_duration_sec as avg_duration,
+               desktop_sessions, mobile_sessions, tablet_sessions
+        FROM daily_metrics WHERE session_date BETWEEN %(start_date)s AND %(end_date)s ORDER BY session_date
+    """,
+    "temporal_hourly": """
+        SELECT hour_of_day as hour, COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
+               ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement,
+               ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate
+        FROM sessions WHERE session_date BETWEEN %(start_date)s AND %(end_date)s AND hour_of_day IS NOT NULL
+        GROUP BY hour_of_day ORDER BY hour_of_day
+    """,
+    "temporal_dow": """
+        SELECT
+            CASE session_day_of_week
+                WHEN 1 THEN 'Sunday'
+                WHEN 2 THEN 'Monday'
+                WHEN 3 THEN 'Tuesday'
+                WHEN 4 THEN 'Wednesday'
+                WHEN 5 THEN 'Thursday'
+                WHEN 6 THEN 'Friday'
+                WHEN 7 THEN 'Saturday'
+            END as day_name,
+            session_day_of_week as day_number,
+            COUNT(*) as sessions,
+            COUNT(DISTINCT user_pseudo_id) as unique_visitors,
+            ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement,
+            ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate
+        FROM sessions WHERE session_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY session_day_of_week ORDER BY session_day_of_week
+    """,
+    "devices": """
+        SELECT device_category, COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
+               ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate,
+               ROUND(AVG(session_duration_seconds)::numeric, 0) as avg_duration
+        FROM sessions WHERE session_date BETWEEN %(start_date)s AND %(end_date)s GROUP BY device_category ORDER BY sessions DESC
+    """,
+    "browsers": """
+        SELECT COALESCE(browser, 'Unknown') as browser, COUNT(*) as sessions,
+               COUNT(DISTINCT user_pseudo_id) as unique_visitors
+        FROM sessions WHERE session_date BETWEEN %(start_date)s AND %(end_date)s GROUP BY browser ORDER BY sessions DESC LIMIT 10
+    """,
+    "operating_systems": """
+        SELECT COALESCE(os, 'Unknown') as operating_system, COUNT(*) as sessions,
+               COUNT(DISTINCT user_pseudo_id) as unique_visitors
+        FROM sessions WHERE session_date BETWEEN %(start_date)s AND %(end_date)s GROUP BY os ORDER BY sessions DESC LIMIT 10
+    """,
+    "geographic": """
+        SELECT country, city, COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
+               ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate
+        FROM sessions WHERE session_date BETWEEN %(start_date)s AND %(end_date)s GROUP BY country, city ORDER BY sessions DESC LIMIT 20
+    """,
+
+    # API only
+    "conversion_summary": """
+        SELECT
+            SUM(total_cta_views) as cta_views,
+            SUM(total_cta_clicks) as cta_clicks,
+            SUM(contact_form_starts) as form_starts,
+            SUM(contact_form_submissions) as form_submissions,
+            SUM(resume_downloads) as resume_downloads,
+            SUM(social_clicks) as social_clicks,
+            SUM(outbound_clicks) as outbound_clicks,
+            SUM(publication_clicks) as publication_clicks,
+            SUM(content_copies) as content_copies
+        FROM conversion_funnel WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+    """,
+    "section_rankings": """
+        WITH aggregated AS (
+            SELECT
+                section_id,
+                SUM(COALESCE(unique_views, 0)) as total_unique_views,
+                SUM(COALESCE(unique_exits, 0)) as total_unique_exits,
+                SUM(COALESCE(unique_viewers, 0)) as total_unique_viewers,
+                ROUND(AVG(unique_exit_rate)::numeric, 2) as avg_exit_rate,
+                SUM(COALESCE(total_views, 0)) as total_views,
+                SUM(COALESCE(total_exits, 0)) as total_exits,
+                ROUND(AVG(total_exit_rate)::numeric, 2) as avg_total_exit_rate,
+                ROUND(AVG(avg_revisits_per_session)::numeric, 2) as avg_revisits_per_session,
+                SUM(COALESCE(engaged_sessions, 0)) as total_engaged_views,
+                ROUND(AVG(engagement_rate)::numeric, 2) as avg_engagement_rate,
+                ROUND(AVG(avg_time_spent_seconds)::numeric, 2) as avg_time_spent_seconds,
+                ROUND(AVG(avg_scroll_depth_percent)::numeric, 2) as avg_scroll_depth_percent,
+                MAX(max_scroll_milestone) as max_scroll_milestone,
+                -- Health score: engagement_rate * 2 + (100 - exit_rate) + time_spent + scroll_depth
+                (COALESCE(AVG(engagement_rate), 0) * 2 +
+                 (100 - COALESCE(AVG(unique_exit_rate), 100)) +
+                 LEAST(COALESCE(AVG(avg_time_spent_seconds), 0), 100) +
+                 COALESCE(AVG(avg_scroll_depth_percent), 0)) as health_score
+            FROM section_daily_stats
+            WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY section_id
+        ),""" + SECTION_RANKING,
+    "visitor_segments": """
+        WITH visitor_stats AS (
+            SELECT
+                user_pseudo_id,
+                COUNT(DISTINCT session_id) as total_sessions,
+                SUM(page_views) as total_page_views,
+                ROUND(AVG(session_duration_seconds)::numeric, 2) as avg_duration,
+                ROUND(COUNT(DISTINCT CASE WHEN is_engaged THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as engagement_rate,
+                SUM(conversions_count) as total_conversions,
+                MAX(session_date) - MIN(session_date) as tenure_days,
+                -- Value score: sessions*2 + page_views + conversions*20 + (engagement_rate/10)
+                (COUNT(DISTINCT session_id) * 2 + SUM(page_views) + SUM(conversions_count) * 20) as value_score
+            FROM sessions
+            WHERE session_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY user_pseudo_id
+        ),
+        segmented AS (
+            SELECT *,
+                CASE
+                    WHEN total_conversions > 0 THEN 'converter'
+                    WHEN total_sessions >= 3 AND engagement_rate >= 80 THEN 'engaged_explorer'
+                    WHEN total_sessions >= 2 THEN 'returning_visitor'
+                    WHEN engagement_rate >= 50 THEN 'engaged_new'
+                    ELSE 'casual_browser'
+                END as visitor_segment
+            FROM visitor_stats
+        )
+        SELECT visitor_segment, COUNT(*) as count,
+               ROUND(AVG(value_score)::numeric, 2) as avg_value_score,
+               ROUND(AVG(total_sessions)::numeric, 2) as avg_sessions,
+               ROUND(AVG(engagement_rate)::numeric, 2) as avg_engagement_rate
+        FROM segmented GROUP BY visitor_segment ORDER BY count DESC
+    """,
+    "top_visitors": """
+        WITH visitor_stats AS (
+            SELECT
+                s.user_pseudo_id,
+                COUNT(DISTINCT s.session_id) as total_sessions,
+                MAX(s.session_date) - MIN(s.session_date) as visitor_tenure_days,
+                SUM(s.page_views) as total_page_views,
+                ROUND(AVG(s.session_duration_seconds)::numeric, 2) as avg_session_duration_sec,
+                ROUND(COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as engagement_rate,
+                MODE() WITHIN GROUP (ORDER BY s.device_category) as primary_device,
+                MODE() WITHIN GROUP (ORDER BY s.country) as primary_country,
+                MODE() WITHIN GROUP (ORDER BY s.traffic_source) as primary_traffic_source,
+                SUM(s.projects_clicked_count) as projects_viewed,
+                COALESCE(MAX(vi.cta_clicks), 0) as cta_clicks,
+                COALESCE(MAX(vi.form_submissions), 0) as form_submissions,
+                COALESCE(MAX(vi.social_clicks), 0) as social_clicks,
+                COALESCE(MAX(vi.resume_downloads), 0) as resume_downloads,
+                -- Value score
+                (COUNT(DISTINCT s.session_id) * 2 + SUM(s.page_views) + SUM(s.conversions_count) * 20) as visitor_value_score,
+                CASE
+                    WHEN COALESCE(MAX(vi.form_submissions), 0) > 0 OR COALESCE(MAX(vi.resume_downloads), 0) > 0 THEN 'converter'
+                    WHEN COUNT(DISTINCT s.session_id) >= 3 AND COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END) * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0) >= 80 THEN 'engaged_explorer'
+                    WHEN COUNT(DISTINCT s.session_id) >= 2 THEN 'returning_visitor'
+                    WHEN COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END) * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0) >= 50 THEN 'engaged_new'
+                    ELSE 'casual_browser'
+                END as visitor_segment,
+                'general_visitor' as interest_profile
+            FROM sessions s
+            LEFT JOIN visitor_insights vi ON s.user_pseudo_id = vi.user_pseudo_id
+            WHERE s.session_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY s.user_pseudo_id
+        )
+        SELECT user_pseudo_id, total_sessions, visitor_tenure_days, total_page_views,
+               avg_session_duration_sec, engagement_rate, primary_device, primary_country,
+               primary_traffic_source, projects_viewed, cta_clicks, form_submissions,
+               social_clicks, resume_downloads, visitor_value_score, visitor_segment, interest_profile
+        FROM visitor_stats ORDER BY visitor_value_score DESC LIMIT 15
+    """,
+    "recommendation_performance": """
+        SELECT * FROM recommendation_performance LIMIT 1
+    """,
+
+    # Per-entity aggregates ranked by ranking_engine.py
+    "project_aggregates": """
+        SELECT
+            project_id,
+            MAX(project_title) as project_title,
+            MAX(project_category) as project_category,
+            SUM(COALESCE(views, 0)) as total_views,
+            SUM(COALESCE(unique_viewers, 0)) as total_unique_viewers,
+            SUM(COALESCE(clicks, 0)) as total_clicks,
+            SUM(COALESCE(expands, 0)) as total_expands,
+            SUM(COALESCE(link_clicks, 0)) as total_link_clicks,
+            SUM(COALESCE(github_clicks, 0)) as total_github_clicks,
+            SUM(COALESCE(demo_clicks, 0)) as total_demo_clicks
+        FROM project_daily_stats
+        WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY project_id
+    """,
+    "skill_aggregates": """
+        SELECT
+            skill_name,
+            SUM(COALESCE(clicks, 0) + COALESCE(hovers, 0)) as total_interactions,
+            SUM(COALESCE(unique_users, 0)) as total_unique_users,
+            SUM(COALESCE(weighted_interest_score, 0)) as weighted_score
+        FROM skill_daily_stats
+        WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY skill_name
+    """,
+    "domain_aggregates": """
+        SELECT
+            domain,
+            SUM(COALESCE(explicit_interest_signals, 0)) as total_explicit_interest,
+            SUM(COALESCE(implicit_interest_from_views, 0)) as total_implicit_interest,
+            SUM(COALESCE(total_domain_interactions, 0)) as total_interactions,
+            SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
+            SUM(COALESCE(domain_interest_score, 0)) as total_interest_score
+        FROM domain_daily_stats
+        WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY domain
+    """,
+    "experience_aggregates": """
+        SELECT
+            experience_id,
+            MAX(experience_title) as experience_title,
+            MAX(company) as company,
+            SUM(COALESCE(total_interactions, 0)) as total_interactions,
+            SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
+            SUM(COALESCE(unique_sessions, 0)) as total_sessions
+        FROM experience_daily_stats
+        WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY experience_id
+    """,
+
+    # The same sections from the cumulative tables (supabase/cumulative.py):
+    # each entity's row at the end date minus its row before the start date,
+    # instead of every day in the range. Used in place of the scans above
+    # unless DASHBOARD_CUMULATIVE=off (see CUMULATIVE_QUERIES)
+    "project_aggregates_cumulative": """
+        WITH bounds AS (
+            SELECT LEAST(%(end_date)s, MAX(event_date)) as end_day,
+                   LEAST(%(start_date)s::date - 1, MAX(event_date)) as before_day
+            FROM project_cumulative_stats
+        )
+        SELECT
+            e.project_id,
+            CASE
+                WHEN e.project_title_max IS DISTINCT FROM b.project_title_max
+                     OR e.project_title_max_days > b.project_title_max_days THEN e.project_title_max
+                WHEN e.project_title_max IS NOT NULL THEN (
+                    SELECT MAX(d.project_title) FROM project_daily_stats d
+                    WHERE d.project_id = e.project_id AND d.event_date BETWEEN %(start_date)s AND %(end_date)s)
+            END as project_title,
+            CASE
+                WHEN e.project_category_max IS DISTINCT FROM b.project_category_max
+                     OR e.project_category_max_days > b.project_category_max_days THEN e.project_category_max
+                WHEN e.project_category_max IS NOT NULL THEN (
+                    SELECT MAX(d.project_category) FROM project_daily_stats d
+                    WHERE d.project_id = e.project_id AND d.event_date BETWEEN %(start_date)s AND %(end_date)s)
+            END as project_category,
+            e.views - COALESCE(b.views, 0) as total_views,
+            e.unique_viewers - COALESCE(b.unique_viewers, 0) as total_unique_viewers,
+            e.clicks - COALESCE(b.clicks, 0) as total_clicks,
+            e.expands - COALESCE(b.expands, 0) as total_expands,
+            e.link_clicks - COALESCE(b.link_clicks, 0) as total_link_clicks,
+            e.github_clicks - COALESCE(b.github_clicks, 0) as total_github_clicks,
+            e.demo_clicks - COALESCE(b.demo_clicks, 0) as total_demo_clicks
+        FROM bounds
+        JOIN project_cumulative_stats e ON e.event_date = bounds.end_day
+        LEFT JOIN project_cumulative_stats b ON b.project_id = e.project_id AND b.event_date = bounds.before_day
+        WHERE e.row_count > COALESCE(b.row_count, 0)
+    """,
+    "section_rankings_cumulative": """
+        WITH bounds AS (
+            SELECT LEAST(%(end_date)s, MAX(event_date)) as end_day,
+                   LEAST(%(start_date)s::date - 1, MAX(event_date)) as before_day
+            FROM section_cumulative_stats
+        ),
+        averaged AS (
+            SELECT
+                e.section_id,
+                e.unique_views - COALESCE(b.unique_views, 0) as total_unique_views,
+                e.unique_exits - COALESCE(b.unique_exits, 0) as total_unique_exits,
+                e.unique_viewers - COALESCE(b.unique_viewers, 0) as total_unique_viewers,
+                e.total_views - COALESCE(b.total_views, 0) as total_views,
+                e.total_exits - COALESCE(b.total_exits, 0) as total_exits,
+                e.engaged_sessions - COALESCE(b.engaged_sessions, 0) as total_engaged_views,
+                ((e.unique_exit_rate_sum - COALESCE(b.unique_exit_rate_sum, 0)) /
+                 NULLIF(e.unique_exit_rate_count - COALESCE(b.unique_exit_rate_count, 0), 0))::float8 as exit_rate,
+                ((e.total_exit_rate_sum - COALESCE(b.total_exit_rate_sum, 0)) /
+                 NULLIF(e.total_exit_rate_count - COALESCE(b.total_exit_rate_count, 0), 0))::float8 as total_exit_rate,
+                ((e.avg_revisits_per_session_sum - COALESCE(b.avg_revisits_per_session_sum, 0)) /
+                 NULLIF(e.avg_revisits_per_session_count - COALESCE(b.avg_revisits_per_session_count, 0), 0))::float8 as revisits,
+                ((e.engagement_rate_sum - COALESCE(b.engagement_rate_sum, 0)) /
+                 NULLIF(e.engagement_rate_count - COALESCE(b.engagement_rate_count, 0), 0))::float8 as engagement_rate,
+                ((e.avg_time_spent_seconds_sum - COALESCE(b.avg_time_spent_seconds_sum, 0)) /
+                 NULLIF(e.avg_time_spent_seconds_count - COALESCE(b.avg_time_spent_seconds_count, 0), 0))::float8 as time_spent,
+                ((e.avg_scroll_depth_percent_sum - COALESCE(b.avg_scroll_depth_percent_sum, 0)) /
+                 NULLIF(e.avg_scroll_depth_percent_count - COALESCE(b.avg_scroll_depth_percent_count, 0), 0))::float8 as scroll_depth,
+                CASE
+                    WHEN e.max_scroll_milestone_max IS DISTINCT FROM b.max_scroll_milestone_max
+                         OR e.max_scroll_milestone_max_days > b.max_scroll_milestone_max_days THEN e.max_scroll_milestone_max
+                    WHEN e.max_scroll_milestone_max IS NOT NULL THEN (
+                        SELECT MAX(d.max_scroll_milestone) FROM section_daily_stats d
+                        WHERE d.section_id = e.section_id AND d.event_date BETWEEN %(start_date)s AND %(end_date)s)
+                END as max_scroll_milestone
+            FROM bounds
+            JOIN section_cumulative_stats e ON e.event_date = bounds.end_day
+            LEFT JOIN section_cumulative_stats b ON b.section_id = e.section_id AND b.event_date = bounds.before_day
+            WHERE e.row_count > COALESCE(b.row_count, 0)
+        ),
+        aggregated AS (
+            SELECT
+                section_id, total_unique_views, total_unique_exits, total_unique_viewers,
+                ROUND(exit_rate::numeric, 2) as avg_exit_rate,
+                total_views, total_exits,
+                ROUND(total_exit_rate::numeric, 2) as avg_total_exit_rate,
+                ROUND(revisits::numeric, 2) as avg_revisits_per_session,
+                total_engaged_views,
+                ROUND(engagement_rate::numeric, 2) as avg_engagement_rate,
+                ROUND(time_spent::numeric, 2) as avg_time_spent_seconds,
+                ROUND(scroll_depth::numeric, 2) as avg_scroll_depth_percent,
+                max_scroll_milestone,
+                (COALESCE(engagement_rate, 0) * 2 +
+                 (100 - COALESCE(exit_rate, 100)) +
+                 LEAST(COALESCE(time_spent, 0), 100) +
+                 COALESCE(scroll_depth, 0)) as health_score
+            FROM averaged
+        ),""" + SECTION_RANKING,
+    "skill_aggregates_cumulative": """
+        WITH bounds AS (
+            SELECT LEAST(%(end_date)s, MAX(event_date)) as end_day,
+                   LEAST(%(start_date)s::date - 1, MAX(event_date)) as before_day
+            FROM skill_cumulative_stats
+        )
+        SELECT
+            e.skill_name,
+            (e.clicks - COALESCE(b.clicks, 0)) + (e.hovers - COALESCE(b.hovers, 0)) as total_interactions,
+            e.unique_users - COALESCE(b.unique_users, 0) as total_unique_users,
+            e.weighted_interest_score - COALESCE(b.weighted_interest_score, 0) as weighted_score
+        FROM bounds
+        JOIN skill_cumulative_stats e ON e.event_date = bounds.end_day
+        LEFT JOIN skill_cumulative_stats b ON b.skill_name = e.skill_name AND b.event_date = bounds.before_day
+        WHERE e.row_count > COALESCE(b.row_count, 0)
+    """,
+    "domain_aggregates_cumulative": """
+        WITH bounds AS (
+            SELECT LEAST(%(end_date)s, MAX(event_date)) as end_day,
+                   LEAST(%(start_date)s::date - 1, MAX(event_date)) as before_day
+            FROM domain_cumulative_stats
+        )
+        SELECT
+            e.domain,
+            e.explicit_interest_signals - COALESCE(b.explicit_interest_signals, 0) as total_explicit_interest,
+            e.implicit_interest_from_views - COALESCE(b.implicit_interest_from_views, 0) as total_implicit_interest,
+            e.total_domain_interactions - COALESCE(b.total_domain_interactions, 0) as total_interactions,
+            e.unique_interested_users - COALESCE(b.unique_interested_users, 0) as total_unique_users,
+            e.domain_interest_score - COALESCE(b.domain_interest_score, 0) as total_interest_score
+        FROM bounds
+        JOIN domain_cumulative_stats e ON e.event_date = bounds.end_day
+        LEFT JOIN domain_cumulative_stats b ON b.domain = e.domain AND b.event_date = bounds.before_day
+        WHERE e.row_count > COALESCE(b.row_count, 0)
+    """,
+    "experience_aggregates_cumulative": """
+        WITH bounds AS (
+            SELECT LEAST(%(end_date)s, MAX(event_date)) as end_day,
+                   LEAST(%(start_date)s::date - 1, MAX(event_date)) as before_day
+            FROM experience_cumulative_stats
+        )
+        SELECT
+            e.experience_id,
+            CASE
+                WHEN e.experience_title_max IS DISTINCT FROM b.experience_title_max
+                     OR e.experience_title_max_days > b.experience_title_max_days THEN e.experience_title_max
+                WHEN e.experience_title_max IS NOT NULL THEN (
+                    SELECT MAX(d.experience_title) FROM experience_daily_stats d
+                    WHERE d.experience_id = e.experience_id AND d.event_date BETWEEN %(start_date)s AND %(end_date)s)
+            END as experience_title,
+            CASE
+                WHEN e.company_max IS DISTINCT FROM b.company_max
+                     OR e.company_max_days > b.company_max_days THEN e.company_max
+                WHEN e.company_max IS NOT NULL THEN (
+                    SELECT MAX(d.company) FROM experience_daily_stats d
+                    WHERE d.experience_id = e.experience_id AND d.event_date BETWEEN %(start_date)s AND %(end_date)s)
+            END as company,
+            e.total_interactions - COALESCE(b.total_interactions, 0) as total_interactions,
+            e.unique_interested_users - COALESCE(b.unique_interested_users, 0) as total_unique_users,
+            e.unique_sessions - COALESCE(b.unique_sessions, 0) as total_sessions
+        FROM bounds
+        JOIN experience_cumulative_stats e ON e.event_date = bounds.end_day
+        LEFT JOIN experience_cumulative_stats b ON b.experience_id = e.experience_id AND b.event_date = bounds.before_day
+        WHERE e.row_count > COALESCE(b.row_count, 0)
+    """,
+
+    # Gist only: its own visitor segmentation. Then the per-day partials that
+    # the gist and the batch API merge the additive sections from (daily_partials.py)
+    "gist_visitor_segments": """
+        WITH visitor_stats AS (
+            SELECT
+                user_pseudo_id,
+                COUNT(DISTINCT session_id) as total_sessions,
+                SUM(page_views) as total_page_views,
+                AVG(session_duration_seconds) as avg_duration,
+                AVG(engagement_score) as avg_engagement,
+                SUM(conversions_count) as total_conversions,
+                MAX(device_category) as primary_device
+            FROM sessions
+            WHERE session_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY user_pseudo_id
+        ),
+        segmented AS (
+            SELECT *,
+                CASE
+                    WHEN total_conversions > 0 THEN 'converter'
+                    WHEN total_sessions >= 3 AND avg_engagement > 50 THEN 'power_user'
+                    WHEN total_sessions >= 2 THEN 'returning'
+                    WHEN avg_engagement > 30 THEN 'engaged_new'
+                    ELSE 'casual'
+                END as visitor_segment
+            FROM visitor_stats
+        )
+        SELECT visitor_segment, COUNT(*) as count,
+               ROUND(AVG(avg_engagement)::numeric, 2) as avg_value_score,
+               ROUND(AVG(total_sessions)::numeric, 2) as avg_sessions,
+               ROUND(AVG(avg_engagement)::numeric, 2) as avg_engagement_rate
+        FROM segmented GROUP BY visitor_segment ORDER BY count DESC
+    """,
+    "gist_top_visitors": """
+        WITH visitor_stats AS (
+            SELECT
+                s.user_pseudo_id,
+                COUNT(DISTINCT s.session_id) as total_sessions,
+                MIN(s.session_date) as first_visit,
+                MAX(s.session_date) as last_visit,
+                (MAX(s.session_date) - MIN(s.session_date)) as visitor_tenure_days,
+                SUM(s.page_views) as total_page_views,
+                ROUND(AVG(s.session_duration_seconds)::numeric, 0) as avg_session_duration_sec,
+                ROUND(COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as engagement_rate,
+                MODE() WITHIN GROUP (ORDER BY s.device_category) as primary_device,
+                MODE() WITHIN GROUP (ORDER BY s.country) as primary_country,
+                MODE() WITHIN GROUP (ORDER BY s.traffic_source) as primary_traffic_source,
+                SUM(s.projects_clicked_count) as projects_viewed,
+                SUM(s.conversions_count) as cta_clicks,
+                COALESCE(MAX(vi.form_submissions), 0) as form_submissions,
+                COALESCE(MAX(vi.social_clicks), 0) as social_clicks,
+                COALESCE(MAX(vi.resume_downloads), 0) as resume_downloads,
+                (COUNT(DISTINCT s.session_id) * 10 + SUM(s.page_views) * 2 + SUM(s.conversions_count) * 20 +
+                 ROUND(AVG(s.engagement_score)::numeric, 0)) as visitor_value_score
+            FROM sessions s
+            LEFT JOIN visitor_insights vi ON s.user_pseudo_id = vi.user_pseudo_id
+            WHERE s.session_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY s.user_pseudo_id
+        ),
+        segmented AS (
+            SELECT *,
+                CASE
+                    WHEN form_submissions > 0 OR resume_downloads > 0 THEN 'converter'
+                    WHEN total_sessions >= 3 THEN 'power_user'
+                    WHEN total_sessions >= 2 THEN 'returning'
+                    ELSE 'new'
+                END as visitor_segment,
+                'general_visitor' as interest_profile
+            FROM visitor_stats
+        )
+        SELECT user_pseudo_id, total_sessions, visitor_tenure_days, total_page_views,
+               avg_session_duration_sec, engagement_rate, primary_device, primary_country,
+               primary_traffic_source, projects_viewed, cta_clicks, form_submissions,
+               social_clicks, resume_downloads, visitor_value_score, visitor_segment, interest_profile
+        FROM segmented ORDER BY visitor_value_score DESC LIMIT 15
+    """,
+    "partial_conversions": """
+        SELECT event_date,
+            SUM(total_cta_views) as cta_views,
+            SUM(total_cta_clicks) as cta_clicks,
+            SUM(contact_form_starts) as form_starts,
+            SUM(contact_form_submissions) as form_submissions,
+            SUM(resume_downloads) as resume_downloads,
+            SUM(social_clicks) as social_clicks,
+            SUM(outbound_clicks) as outbound_clicks,
+            SUM(publication_clicks) as publication_clicks,
+            SUM(content_copies) as content_copies
+        FROM conversion_funnel WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY event_date
+    """,
+    "partial_projects": """
+        WITH daily AS (
+            SELECT event_date, project_id,
+                MAX(project_title) as project_title,
+                MAX(project_category) as project_category,
+                SUM(COALESCE(views, 0)) as views,
+                SUM(COALESCE(unique_viewers, 0)) as unique_viewers,
+                SUM(COALESCE(clicks, 0)) as clicks,
+                SUM(COALESCE(expands, 0)) as expands,
+                SUM(COALESCE(link_clicks, 0)) as link_clicks,
+                SUM(COALESCE(github_clicks, 0)) as github_clicks,
+                SUM(COALESCE(demo_clicks, 0)) as demo_clicks
+            FROM project_daily_stats
+            WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY event_date, project_id
+        )
+        SELECT *,
+            DENSE_RANK() OVER (ORDER BY project_title) as project_title_order,
+            DENSE_RANK() OVER (ORDER BY project_category) as project_category_order
+        FROM daily
+    """,
+    "partial_sections": """
+        SELECT event_date, section_id,
+            SUM(COALESCE(unique_views, 0)) as unique_views,
+            SUM(COALESCE(unique_exits, 0)) as unique_exits,
+            SUM(COALESCE(unique_viewers, 0)) as unique_viewers,
+            SUM(COALESCE(total_views, 0)) as total_views,
+            SUM(COALESCE(total_exits, 0)) as total_exits,
+            SUM(COALESCE(engaged_sessions, 0)) as engaged_sessions,
+            SUM(unique_exit_rate) as unique_exit_rate_sum, COUNT(unique_exit_rate) as unique_exit_rate_count,
+            SUM(total_exit_rate) as total_exit_rate_sum, COUNT(total_exit_rate) as total_exit_rate_count,
+            SUM(avg_revisits_per_session) as avg_revisits_per_session_sum,
+            COUNT(avg_revisits_per_session) as avg_revisits_per_session_count,
+            SUM(engagement_rate) as engagement_rate_sum, COUNT(engagement_rate) as engagement_rate_count,
+            SUM(avg_time_spent_seconds) as avg_time_spent_seconds_sum,
+            COUNT(avg_time_spent_seconds) as avg_time_spent_seconds_count,
+            SUM(avg_scroll_depth_percent) as avg_scroll_depth_percent_sum,
+            COUNT(avg_scroll_depth_percent) as avg_scroll_depth_percent_count,
+            MAX(max_scroll_milestone) as max_scroll_milestone
+        FROM section_daily_stats
+        WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY event_date, section_id
+        ORDER BY event_date, section_id
+    """,
+    "partial_skills": """
+        SELECT event_date, skill_name,
+            SUM(COALESCE(clicks, 0) + COALESCE(hovers, 0)) as total_interactions,
+            SUM(COALESCE(unique_users, 0)) as total_unique_users,
+            SUM(COALESCE(weighted_interest_score, 0)) as interest_score
+        FROM skill_daily_stats
+        WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY event_date, skill_name
+    """,
+    "partial_domains": """
+        SELECT event_date, domain,
+            SUM(COALESCE(explicit_interest_signals, 0)) as total_explicit_interest,
+            SUM(COALESCE(implicit_interest_from_views, 0)) as total_implicit_interest,
+            SUM(COALESCE(total_domain_interactions, 0)) as total_interactions,
+            SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
+            SUM(COALESCE(domain_interest_score, 0)) as total_interest_score
+        FROM domain_daily_stats
+        WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY event_date, domain
+    """,
+    "partial_experiences": """
+        WITH daily AS (
+            SELECT event_date, experience_id,
+                MAX(experience_title) as experience_title,
+                MAX(company) as company,
+                SUM(COALESCE(total_interactions, 0)) as total_interactions,
+                SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
+                SUM(COALESCE(unique_sessions, 0)) as total_sessions
+            FROM experience_daily_stats
+            WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY event_date, experience_id
+        )
+        SELECT *,
+            DENSE_RANK() OVER (ORDER BY experience_title) as experience_title_order,
+            DENSE_RANK() OVER (ORDER BY company) as company_order
+        FROM daily
+    """,
+
+    # The SQL rankings ranking_engine.py replaced; kept as the reference its output
+    # is checked against (benchmarks/ranking_engine.py)
+    "project_rankings": """
+        WITH aggregated AS (
+            SELECT
+                project_id,
+                MAX(project_title) as project_title,
+                MAX(project_category) as project_category,
+                SUM(COALESCE(views, 0)) as total_views,
+                SUM(COALESCE(unique_viewers, 0)) as total_unique_viewers,
+                SUM(COALESCE(clicks, 0)) as total_clicks,
+                SUM(COALESCE(expands, 0)) as total_expands,
+                SUM(COALESCE(link_clicks, 0)) as total_link_clicks,
+                SUM(COALESCE(github_clicks, 0)) as total_github_clicks,
+                SUM(COALESCE(demo_clicks, 0)) as total_demo_clicks,
+                -- Engagement score: clicks*5 + expands*3 + link_clicks*4 + views*1
+                (SUM(COALESCE(clicks, 0)) * 5 + SUM(COALESCE(expands, 0)) * 3 +
+                 SUM(COALESCE(link_clicks, 0)) * 4 + SUM(COALESCE(views, 0)) * 1) as engagement_score
+            FROM project_daily_stats
+            WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY project_id
+        ),
+        ranked AS (
+            SELECT *,
+                ROW_NUMBER() OVER (ORDER BY engagement_score DESC) as overall_rank,
+                CASE
+                    WHEN engagement_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY engagement_score) FROM aggregated) THEN 'top_performer'
+                    WHEN engagement_score >= (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY engagement_score) FROM aggregated) THEN 'above_average'
+                    ELSE 'below_average'
+                END as performance_tier,
+                ROUND((PERCENT_RANK() OVER (ORDER BY engagement_score) * 100)::numeric, 1) as engagement_percentile
+            FROM aggregated
+        )
+        SELECT project_id, project_title, project_category, total_views, total_unique_viewers,
+               total_clicks, total_expands, total_link_clicks, total_github_clicks, total_demo_clicks,
+               engagement_score, overall_rank::int, performance_tier,
+               CASE WHEN overall_rank <= 3 THEN 'featured' ELSE 'standard' END as recommended_position,
+               engagement_percentile
+        FROM ranked ORDER BY overall_rank LIMIT 10
+    """,
+    "tech_demand": """
+        WITH aggregated AS (
+            SELECT
+                skill_name,
+                SUM(COALESCE(clicks, 0) + COALESCE(hovers, 0)) as total_interactions,
+                SUM(COALESCE(unique_users, 0)) as total_unique_users,
+                SUM(COALESCE(weighted_interest_score, 0)) as weighted_score
+            FROM skill_daily_stats
+            WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY skill_name
+        ),
+        ranked AS (
+            SELECT *,
+                ROW_NUMBER() OVER (ORDER BY weighted_score DESC) as demand_rank,
+                ROUND((PERCENT_RANK() OVER (ORDER BY weighted_score) * 100)::numeric, 1) as demand_percentile,
+                CASE
+                    WHEN weighted_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY weighted_score) FROM aggregated) THEN 'high_demand'
+                    WHEN weighted_score >= (SELECT PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY weighted_score) FROM aggregated) THEN 'moderate_demand'
+                    ELSE 'low_demand'
+                END as demand_tier,
+                CASE
+                    WHEN weighted_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY weighted_score) FROM aggregated) THEN 'master_this'
+                    WHEN weighted_score >= (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY weighted_score) FROM aggregated) THEN 'strengthen'
+                    ELSE 'maintain'
+                END as learning_priority
+            FROM aggregated
+            WHERE weighted_score > 0
+        )
+        SELECT skill_name, total_interactions, total_unique_users,
+               demand_rank::int, demand_percentile, demand_tier, learning_priority
+        FROM ranked ORDER BY demand_rank
+    """,
+    "domain_rankings": """
+        WITH aggregated AS (
+            SELECT
+                domain,
+                SUM(COALESCE(explicit_interest_signals, 0)) as total_explicit_interest,
+                SUM(COALESCE(implicit_interest_from_views, 0)) as total_implicit_interest,
+                SUM(COALESCE(total_domain_interactions, 0)) as total_interactions,
+                SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
+                SUM(COALESCE(domain_interest_score, 0)) as total_interest_score
+            FROM domain_daily_stats
+            WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY domain
+        ),
+        ranked AS (
+            SELECT *,
+                ROW_NUMBER() OVER (ORDER BY total_interest_score DESC) as interest_rank,
+                ROUND((PERCENT_RANK() OVER (ORDER BY total_interest_score) * 100)::numeric, 1) as interest_percentile,
+                CASE
+                    WHEN total_interest_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY total_interest_score) FROM aggregated) THEN 'high_demand'
+                    WHEN total_interest_score >= (SELECT PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY total_interest_score) FROM aggregated) THEN 'moderate_demand'
+                    ELSE 'low_demand'
+                END as demand_tier,
+                CASE
+                    WHEN total_interest_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY total_interest_score) FROM aggregated) THEN 'primary_strength'
+                    WHEN total_interest_score >= (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY total_interest_score) FROM aggregated) THEN 'secondary_strength'
+                    ELSE 'explore_opportunities'
+                END as portfolio_recommendation
+            FROM aggregated
+            WHERE total_interactions > 0
+        )
+        SELECT domain, total_explicit_interest, total_implicit_interest, total_interactions,
+               total_unique_users, total_interest_score, interest_rank::int, interest_percentile,
+               demand_tier, portfolio_recommendation
+        FROM ranked ORDER BY interest_rank
+    """,
+    "experience_rankings": """
+        WITH aggregated AS (
+            SELECT
+                experience_id,
+                MAX(experience_title) as experience_title,
+                MAX(company) as company,
+                SUM(COALESCE(total_interactions, 0)) as total_interactions,
+                SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
+                SUM(COALESCE(unique_sessions, 0)) as total_sessions
+            FROM experience_daily_stats
+            WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+            GROUP BY experience_id
+        ),
+        ranked AS (
+            SELECT *,
+                ROW_NUMBER() OVER (ORDER BY total_interactions DESC) as interest_rank,
+                ROUND((PERCENT_RANK() OVER (ORDER BY total_interactions) * 100)::numeric, 1) as interest_percentile,
+                CASE
+                    WHEN total_interactions >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY total_interactions) FROM aggregated) THEN 'most_attractive_role'
+                    WHEN total_interactions >= (SELECT PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY total_interactions) FROM aggregated) THEN 'moderately_attractive'
+                    ELSE 'needs_highlighting'
+                END as role_attractiveness,
+                CASE
+                    WHEN total_interactions >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY total_interactions) FROM aggregated) THEN 'lead_with_this'
+                    WHEN total_interactions >= (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY total_interactions) FROM aggregated) THEN 'feature_prominently'
+                    ELSE 'include_for_completeness'
+                END as positioning_suggestion
+            FROM aggregated
+            WHERE total_interactions > 0
+        )
+        SELECT experience_id, experience_title, company, total_interactions, total_unique_users,
+               total_sessions, interest_rank::int, interest_percentile, role_attractiveness, positioning_suggestion
+        FROM ranked ORDER BY interest_rank
+    """,
+}
+
+# Queries behind /api/dashboard3, all run for the requested range (the *_aggregates
+# rows are turned into rankings by ranking_engine.rank_entities)
+API_QUERIES = [
+    "overview", "daily_metrics", "conversion_summary", "project_aggregates",
+    "section_rankings", "visitor_segments", "top_visitors", "skill_aggregates",
+    "domain_aggregates", "experience_aggregates", "recommendation_performance",
+    "temporal_hourly", "temporal_dow", "devices", "browsers", "operating_systems",
+    "geographic", "traffic_sources_summary",
+]
+
+# Scans answered from the cumulative tables instead (when CUMULATIVE_MODE is on)
+CUMULATIVE_QUERIES = {
+    "project_aggregates": "project_aggregates_cumulative",
+    "section_rankings": "section_rankings_cumulative",
+    "skill_aggregates": "skill_aggregates_cumulative",
+    "domain_aggregates": "domain_aggregates_cumulative",
+    "experience_aggregates": "experience_aggregates_cumulative",
+}
+
+
+# ============================================================================
+# TIME BUCKETS
+# ============================================================================
+
+# Coarser granularities of the time series: counts are summed per
+# date_trunc(unit) bucket and rates / averages are weighted by what they are a
+# rate of (sessions, visitors), so a bucket matches its days taken together.
+# A bucket's date is its first day within the range; "days" counts its rows.
+BUCKET_UNITS = ["week", "month", "quarter", "year"]
+GRANULARITIES = ["day"] + BUCKET_UNITS
+AUTO_MAX_POINTS = int(os.getenv("DASHBOARD_AUTO_MAX_POINTS", "120"))  # granularity=auto target
+
+
+def weighted_average(column: str, weight: str) -> str:
+    """SQL average of a per-day rate, weighted by its denominator (NULL rates ignored)"""
+    return (f"SUM({column} * {weight}) FILTER (WHERE {column} IS NOT NULL)"
+            f" / NULLIF(SUM({weight}) FILTER (WHERE {column} IS NOT NULL), 0)")
+
+
+def bucket_sql(unit: str, column: str) -> str:
+    """A date column truncated to its bucket, clamped to the range start"""
+    return f"GREATEST(date_trunc('{unit}', {column}::timestamp)::date, %(start_date)s::date)"
+
+
+def daily_metrics_sql(unit: str) -> str:
+    """daily_metrics (the dashboard's columns) per `unit` bucket"""
+    return f"""
+        SELECT {bucket_sql(unit, "session_date")} as date,
+               SUM(total_sessions) as sessions, SUM(unique_visitors) as visitors,
+               {weighted_average("engagement_rate", "total_sessions")} as engagement_rate,
+               {weighted_average("bounce_rate", "total_sessions")} as bounce_rate,
+               {weighted_average("avg_session_duration_sec", "total_sessions")} as avg_duration,
+               SUM(desktop_sessions) as desktop_sessions, SUM(mobile_sessions) as mobile_sessions,
+               SUM(tablet_sessions) as tablet_sessions, COUNT(*) as days
+        FROM daily_metrics WHERE session_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY 1 ORDER BY 1
+    """
+
+
+def traffic_daily_stats_sql(unit: str) -> str:
+    """traffic_daily_stats per `unit` bucket and source / medium (campaigns combined)"""
+    return f"""
+        SELECT {bucket_sql(unit, "event_date")} as event_date, traffic_source, traffic_medium,
+               SUM(sessions) as sessions, SUM(unique_visitors) as unique_visitors,
+               SUM(total_page_views) as total_page_views,
+               {weighted_average("avg_pages_per_session", "sessions")} as avg_pages_per_session,
+               {weighted_average("avg_session_duration_sec", "sessions")} as avg_session_duration_sec,
+               {weighted_average("engagement_rate", "sessions")} as engagement_rate,
+               {weighted_average("bounce_rate", "sessions")} as bounce_rate,
+               SUM(desktop_sessions) as desktop_sessions, SUM(mobile_sessions) as mobile_sessions,
+               {weighted_average("avg_engagement_score", "sessions")} as avg_engagement_score,
+               SUM(high_engagement_sessions) as high_engagement_sessions,
+               {weighted_average("high_engagement_rate", "sessions")} as high_engagement_rate,
+               SUM(returning_visitors) as returning_visitors,
+               {weighted_average("returning_visitor_rate", "unique_visitors")} as returning_visitor_rate,
+               {weighted_average("avg_scroll_depth", "sessions")} as avg_scroll_depth,
+               COUNT(DISTINCT event_date) as days
+        FROM traffic_daily_stats WHERE event_date BETWEEN %(start_date)s AND %(end_date)s
+        GROUP BY 1, traffic_source, traffic_medium ORDER BY 1, sessions DESC
+    """
+
+
+# Time series -> granularity -> catalog query (daily_metrics by day is the plain query above)
+BUCKETED_QUERIES = {
+    "daily_metrics": {unit: "daily_metrics" if unit == "day" else f"daily_metrics_{unit}"
+                      for unit in GRANULARITIES},
+    "traffic_daily_stats": {unit: "traffic_daily_stats" if unit == "day" else f"traffic_daily_stats_{unit}"
+                            for unit in GRANULARITIES},
+}
+for _unit in BUCKET_UNITS:
+    QUERIES[BUCKETED_QUERIES["daily_metrics"][_unit]] = daily_metrics_sql(_unit)
+for _unit in GRANULARITIES:
+    QUERIES[BUCKETED_QUERIES["traffic_daily_stats"][_unit]] = traffic_daily_stats_sql(_unit)
+
+
+def bucketed_query(name: str, granularity: str) -> str:
+    """Catalog query for a time series at `granularity` (other queries unchanged)"""
+    return BUCKETED_QUERIES.get(name, {}).get(granularity, name)
+
+
+def bucket_count(unit: str, start_date, end_date) -> int:
+    """Points a time series over start_date..end_date has at `unit`"""
+    if unit == "day":
+        return (end_date - start_date).days + 1
+    if unit == "week":
+        return (end_date - start_date).days // 7 + (end_date.weekday() < start_date.weekday()) + 1
+    months = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month
+    if unit == "month":
+        return months + 1
+    if unit == "quarter":
+        return (end_date.year - start_date.year) * 4 + (end_date.month - 1) // 3 - (start_date.month - 1) // 3 + 1
+    return end_date.year - start_date.year + 1
+
+
+def resolve_granularity(granularity: str, start_date, end_date, max_points: int = AUTO_MAX_POINTS) -> str:
+    """"auto" -> the finest granularity giving at most max_points points; others unchanged"""
+    if granularity != "auto":
+        return granularity
+    return next((unit for unit in GRANULARITIES if bucket_count(unit, start_date, end_date) <= max_points), "year")
+
+
+# ============================================================================
+# PERIOD COMPARISON
+# ============================================================================
+
+# Variants computing the requested range ("current") and the comparison range
+# ("previous") in one statement, as rows tagged with a period column. The
+# overview and conversion summary scan the union of both ranges once, each row
+# counted in every period it falls in; the rankings evaluate their (prefix sum)
+# range lookups for both periods side by side.
+COMPARE_PERIODS = """
+    (VALUES ('current', %(start_date)s::date, %(end_date)s::date),
+            ('previous', %(compare_start_date)s::date, %(compare_end_date)s::date)) AS w(period, start_date, end_date)
+"""
+
+
+def period_scan(date_column: str) -> str:
+    """FROM-clause tail expanding each scanned row into the periods it falls in"""
+    return f"""
+        CROSS JOIN LATERAL (VALUES
+            ('current', {date_column} BETWEEN %(start_date)s AND %(end_date)s),
+            ('previous', {date_column} BETWEEN %(compare_start_date)s AND %(compare_end_date)s)
+        ) AS p(period, in_period)
+        WHERE ({date_column} BETWEEN %(start_date)s AND %(end_date)s
+               OR {date_column} BETWEEN %(compare_start_date)s AND %(compare_end_date)s)
+          AND p.in_period
+    """
+
+
+def windowed_sql(sql: str) -> str:
+    """A range query evaluated for both comparison periods"""
+    sql = sql.replace("%(start_date)s", "w.start_date").replace("%(end_date)s", "w.end_date")
+    return f"SELECT w.period, q.* FROM {COMPARE_PERIODS} CROSS JOIN LATERAL ({sql}) q"
+
+
+QUERIES.update({
+    "overview_compare": f"""
+        SELECT p.period,
+            COUNT(DISTINCT session_id) as total_sessions,
+            COUNT(DISTINCT user_pseudo_id) as unique_visitors,
+            ROUND(AVG(session_duration_seconds)::numeric, 0) as avg_session_duration,
+            ROUND(AVG(page_views)::numeric, 1) as avg_pages_per_session,
+            ROUND(COUNT(DISTINCT CASE WHEN is_bounce THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as bounce_rate,
+            ROUND(COUNT(DISTINCT CASE WHEN is_engaged THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as engagement_rate,
+            ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement_score
+        FROM sessions {period_scan("session_date")}
+        GROUP BY p.period
+    """,
+    "conversion_summary_compare": f"""
+        SELECT p.period,
+            SUM(total_cta_views) as cta_views,
+            SUM(total_cta_clicks) as cta_clicks,
+            SUM(contact_form_starts) as form_starts,
+            SUM(contact_form_submissions) as form_submissions,
+            SUM(resume_downloads) as resume_downloads,
+            SUM(social_clicks) as social_clicks,
+            SUM(outbound_clicks) as outbound_clicks,
+            SUM(publication_clicks) as publication_clicks,
+            SUM(content_copies) as content_copies
+        FROM conversion_funnel {period_scan("event_date")}
+        GROUP BY p.period
+    """,
+})
+
+# Section -> its comparison variant (the cumulative rankings get their own, see CUMULATIVE_QUERIES)
+COMPARE_QUERIES = {name: f"{name}_compare" for name in [
+    "overview", "conversion_summary", "project_aggregates", "section_rankings",
+    "skill_aggregates", "domain_aggregates", "experience_aggregates",
+]}
+for _name in ["project_aggregates", "section_rankings", "skill_aggregates", "domain_aggregates",
+              "experience_aggregates"]:
+    QUERIES[COMPARE_QUERIES[_name]] = windowed_sql(QUERIES[_name])
+    QUERIES[f"{CUMULATIVE_QUERIES[_name]}_compare"] = windowed_sql(QUERIES[CUMULATIVE_QUERIES[_name]])
+    CUMULATIVE_QUERIES[COMPARE_QUERIES[_name]] = f"{CUMULATIVE_QUERIES[_name]}_compare"
+
+# Cumulative variant -> (cumulative table, daily table it is built from)
+CUMULATIVE_SOURCES = {
+    cumulative: (f"{name.split('_')[0]}_cumulative_stats", f"{name.split('_')[0]}_daily_stats")
+    for name, cumulative in CUMULATIVE_QUERIES.items()
+}
+
+
+# ============================================================================
+# PREPARED STATEMENTS
+# ============================================================================
+
+# Statements PREPAREd on each connection (session mode)
+_prepared = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+
+def resolve_mode(port: str = None) -> str:
+    """Effective prepared statement mode for a connection to `port`"""
+    if PREPARED_MODE != "auto":
+        return PREPARED_MODE
+    port = str(port or os.getenv("SUPABASE_PORT", POOLER_TRANSACTION_PORT))
+    return "transaction" if port == POOLER_TRANSACTION_PORT else "session"
+
+
+def statement_name(name: str) -> str:
+    """Server-side name of a catalog query, unique to its SQL text"""
+    digest = hashlib.sha1(QUERIES[name].encode()).hexdigest()[:10]
+    return f"{STATEMENT_PREFIX}_{name}_{digest}"
+
+
+def query_params(name: str) -> list[str]:
+    """Parameters a catalog query uses, in PREPARE order"""
+    return [param for param in PARAM_NAMES if f"%({param})s" in QUERIES[name]]
+
+
+def prepare_sql(name: str) -> str:
+    """PREPARE statement for a catalog query ($n placeholders, typed as dates)"""
+    sql = QUERIES[name]
+    params = query_params(name)
+    for position, param in enumerate(params, start=1):
+        sql = sql.replace(f"%({param})s", f"${position}")
+    types = f" ({', '.join('date' for _ in params)})" if params else ""
+    return f"PREPARE {statement_name(name)}{types} AS {sql}"
+
+
+def execute_sql(name: str) -> str:
+    """EXECUTE statement for a prepared catalog query"""
+    params = query_params(name)
+    args = f" ({', '.join(f'%({param})s' for param in params)})" if params else ""
+    return f"EXECUTE {statement_name(name)}{args}"
+
+
+def resolve_query(name: str) -> str:
+    """Catalog query that actually runs for `name` (cumulative variant when enabled)"""
+    if CUMULATIVE_MODE != "off":
+        return CUMULATIVE_QUERIES.get(name, name)
+    return name
+
+
+# ============================================================================
+# CUMULATIVE FRESHNESS
+# ============================================================================
+# A cumulative table is only as current as its last refresh. Loads and
+# refreshes both record themselves in sync_metadata (the refresh under the
+# cumulative table's name, backfill chunks as 'backfill:<table>'), so while the
+# daily table has a successful load newer than the cumulative table's last
+# successful refresh (the refresh failed, or hasn't run yet after the load)
+# its ranges are answered by the daily scan instead. This covers rewritten
+# days (lookback, micro-sync upserts) as well as new ones.
+
+# Cumulative table -> (checked at, its last refresh, its daily table's last load)
+_refresh_marks = {}
+_refresh_marks_lock = threading.Lock()
+
+
+def cumulative_refresh_marks(cursor, name: str) -> tuple:
+    """(cumulative table's last refresh, daily table's last load) for a cumulative variant, re-read every few seconds"""
+    cumulative_table, daily_table = CUMULATIVE_SOURCES[name]
+    now = time.monotonic()
+    with _refresh_marks_lock:
+        cached = _refresh_marks.get(cumulative_table)
+    if cached is None or now - cached[0] > CUMULATIVE_CHECK_SECONDS:
+        cursor.execute("""
+            SELECT (SELECT MAX(last_synced_at) FROM sync_metadata
+                    WHERE table_name = %(cumulative)s AND status = 'success') AS refreshed_at,
+                   (SELECT MAX(last_synced_at) FROM sync_metadata
+                    WHERE table_name IN (%(daily)s, 'backfill:' || %(daily)s) AND status = 'success') AS loaded_at
+        """, {"cumulative": cumulative_table, "daily": daily_table})
+        row = cursor.fetchone()
+        # Works with both tuple and RealDictCursor connections
+        marks = (row["refreshed_at"], row["loaded_at"]) if isinstance(row, dict) else tuple(row)
+        cached = (now, *marks)
+        with _refresh_marks_lock:
+            _refresh_marks[cumulative_table] = cached
+    return cached[1:]
+
+
+def cumulative_lags(cursor, name: str) -> bool:
+    """Whether the daily table behind `name` was loaded since its cumulative table was last refreshed"""
+    refreshed_at, loaded_at = cumulative_refresh_marks(cursor, name)
+    if loaded_at is None:
+        return False
+    return refreshed_at is None or refreshed_at < loaded_at
+
+
+def query_tables(name: str) -> set[str]:
+    """Tables a catalog query reads (FROM / JOIN targets that aren't its own CTEs)"""
+    sql = QUERIES[resolve_query(name)]
+    referenced = set(re.findall(r"(?<!DISTINCT )\b(?:FROM|JOIN)\s+(?:public\.)?(\w+)\b(?!\s*\()",
+                                sql, re.IGNORECASE))
+    ctes = set(re.findall(r"\b(\w+)\s+AS\s*\(", sql, re.IGNORECASE))
+    return referenced - ctes
+
+
+def execute_query(cursor, name: str, start_date=None, end_date=None, mode: str = None,
+                  compare_start_date=None, compare_end_date=None) -> list[dict]:
+    """Run a catalog query and return its rows as dicts"""
+    mode = mode or resolve_mode()
+    resolved = resolve_query(name)
+    if resolved not in CUMULATIVE_SOURCES or not cumulative_lags(cursor, resolved):
+        name = resolved
+    params = {"start_date": start_date, "end_date": end_date,
+              "compare_start_date": compare_start_date, "compare_end_date": compare_end_date}
+
+    if mode == "session":
+        conn = cursor.connection
+        with _prepared_lock:
+            prepared = _prepared.setdefault(conn, set())
+        if name not in prepared:
+            cursor.execute(prepare_sql(name), params)
+            prepared.add(name)
+        cursor.execute(execute_sql(name), params)
+
+    elif mode == "transaction":
+        # One round trip when the server connection already has the statement;
+        # otherwise undo the failed EXECUTE, PREPARE it there and retry, all in
+        # the same transaction so the pooler keeps the same server connection
+        try:
+            cursor.execute(f"SAVEPOINT {SAVEPOINT}; {execute_sql(name)}", params)
+        except errors.InvalidSqlStatementName:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {SAVEPOINT}; {prepare_sql(name)}; {execute_sql(name)}", params)
+
+    else:
+        cursor.execute(QUERIES[name], params)
+
+    return [dict(row) for row in cursor.fetchall()]
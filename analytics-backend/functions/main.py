@@ -10,20 +10,42 @@ Tables available in Supabase:
 - recommendation_performance, sync_metadata
 """
 
-from fastapi import FastAPI, Query, HTTPException
+import time
+# Origin of the cold-start timings (see COLD START): before the imports below
+_import_started = time.monotonic()
+
+from fastapi import FastAPI, Query, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from datetime import date, datetime, timedelta
 from typing import Optional
 from pathlib import Path
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
 import os
+import json
+import math
 import asyncio
+import importlib
+import threading
 from concurrent.futures import ThreadPoolExecutor
 import psycopg2
+from psycopg2.errors import QueryCanceled
 from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from dashboard_queries import (
+    QUERIES, API_QUERIES, GRANULARITIES, AUTO_MAX_POINTS, COMPARE_QUERIES,
+    execute_query, query_tables, bucketed_query, resolve_granularity,
+)
+from ranking_engine import RANKINGS, API_RANKINGS, rank_entities
+from daily_partials import PARTIAL_SECTIONS, fetch_daily_partials
 
-# Load environment variables
-load_dotenv(Path(__file__).parent / ".env")
+# Load environment variables from a local .env (deployments set them directly)
+ENV_FILE = Path(__file__).parent / ".env"
+if ENV_FILE.exists():
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
 
 # Supabase config (Mumbai - ap-south-1)
 SUPABASE_CONFIG = {
@@ -34,29 +56,333 @@ SUPABASE_CONFIG = {
     "password": os.getenv("SUPABASE_PASSWORD"),
 }
 
-def get_supabase_connection():
-    """Get PostgreSQL connection to Supabase"""
-    return psycopg2.connect(
-        host=SUPABASE_CONFIG["host"],
-        port=SUPABASE_CONFIG["port"],
-        database=SUPABASE_CONFIG["database"],
-        user=SUPABASE_CONFIG["user"],
-        password=SUPABASE_CONFIG["password"],
-        sslmode="require",
-        cursor_factory=RealDictCursor
-    )
+# Worker processes (uvicorn's --workers, see MULTI-WORKER SERVING)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Pooled connections are reused across requests, so prepared statements
+# (see dashboard_queries.py) are parsed once per connection, not per load.
+# DB_POOL_TOTAL is the budget toward the Supabase pooler for the whole
+# instance, split evenly across the workers; DB_POOL_SIZE sets a worker's
+# share directly
+DB_POOL_TOTAL = int(os.getenv("DB_POOL_TOTAL", "15"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(max(1, DB_POOL_TOTAL // WORKERS))))
+# Connections opened together at startup, before the first request needs them (see COLD START)
+DB_POOL_WARM = min(int(os.getenv("DB_POOL_WARM", str(DB_POOL_SIZE))), DB_POOL_SIZE)
+
+# Every catalog query runs with a statement_timeout, so a slow one is cancelled
+# by the server and frees its connection; dashboard requests also stop waiting
+# at their deadline and answer with the sections that finished (see build_dashboard3)
+QUERY_TIMEOUT_MS = int(os.getenv("DASHBOARD_QUERY_TIMEOUT_MS", "10000"))    # cap for any catalog query
+REQUEST_DEADLINE_SECONDS = float(os.getenv("DASHBOARD_DEADLINE_SECONDS", "4"))
+
+class WarmConnectionPool(ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool that keeps every connection it opened while idle.
+    The base pool closes a returned connection once minconn are idle, and opens
+    new ones one at a time under its lock, so each burst of parallel sections
+    reconnected serially; prewarm() opens connections concurrently instead.
+    """
+
+    def __init__(self, maxconn: int, **kwargs):
+        super().__init__(0, maxconn, **kwargs)
+        self.minconn = maxconn  # putconn() keeps returned connections open
+        self._warmed = threading.Event()
+        self._warmed.set()
+
+    def getconn(self, key=None):
+        # Connections being pre-warmed are about to be idle: wait for them
+        # rather than open more one by one under the lock meanwhile
+        self._warmed.wait()
+        return super().getconn(key)
+
+    def prewarm(self, count: int) -> int:
+        """Open connections concurrently until `count` are open; returns how many are"""
+        self._warmed.clear()
+        try:
+            return self._open(count)
+        finally:
+            self._warmed.set()
+
+    def _open(self, count: int) -> int:
+        with self._lock:
+            missing = min(count, self.maxconn) - len(self._pool) - len(self._used)
+        if missing <= 0:
+            return len(self._pool) + len(self._used)
+
+        def connect():
+            try:
+                return psycopg2.connect(*self._args, **self._kwargs)
+            except psycopg2.Error as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=missing) as executor:
+            results = list(executor.map(lambda _: connect(), range(missing)))
+        errors = [result for result in results if isinstance(result, Exception)]
+        with self._lock:
+            for conn in results:
+                if isinstance(conn, Exception):
+                    continue
+                if self.closed or len(self._pool) + len(self._used) >= self.maxconn:
+                    conn.close()
+                else:
+                    self._pool.append(conn)
+            opened = len(self._pool) + len(self._used)
+        if len(errors) == len(results):
+            raise errors[0]
+        return opened
+
+    def close_idle(self):
+        """Close the idle connections (after one was found dropped, the others likely were too)"""
+        with self._lock:
+            idle, self._pool = self._pool, []
+        for conn in idle:
+            conn.close()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_connection_pool() -> WarmConnectionPool:
+    """Shared pool of Supabase connections, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WarmConnectionPool(
+                DB_POOL_SIZE,
+                host=SUPABASE_CONFIG["host"],
+                port=SUPABASE_CONFIG["port"],
+                database=SUPABASE_CONFIG["database"],
+                user=SUPABASE_CONFIG["user"],
+                password=SUPABASE_CONFIG["password"],
+                sslmode="require",
+                cursor_factory=RealDictCursor
+            )
+    return _pool
+
+def run_with_connection(fn):
+    """
+    Run fn(cursor) on a pooled connection and return its result.
+    A connection dropped while idle in the pool is discarded, with the other
+    idle ones, and the call retried once on a fresh one.
+    """
+    pool = get_connection_pool()
+    for attempt in range(2):
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                result = fn(cursor)
+            conn.rollback()  # end the read-only transaction
+            pool.putconn(conn)
+            return result
+        except Exception:
+            dropped = bool(conn.closed)
+            if not dropped:
+                conn.rollback()
+            pool.putconn(conn, close=dropped)
+            if not dropped or attempt:
+                raise
+            pool.close_idle()
 
 def run_pg_query(query: str, params: tuple = None) -> list[dict]:
     """Run a single PostgreSQL query"""
-    conn = get_supabase_connection()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
-    finally:
-        conn.close()
+    def run(cursor):
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+    return run_with_connection(run)
+
+def set_statement_timeout(cursor, name: str, deadline: float = None):
+    """statement_timeout of QUERY_TIMEOUT_MS, or less to end by `deadline` (a time.monotonic() value)"""
+    timeout_ms = QUERY_TIMEOUT_MS
+    if deadline is not None:
+        remaining_ms = int((deadline - time.monotonic()) * 1000)
+        if remaining_ms <= 0:
+            raise TimeoutError(f"{name}: deadline passed before the query started")
+        timeout_ms = min(timeout_ms, remaining_ms)
+    # SET LOCAL: ends with the transaction, so pooled connections keep the default
+    cursor.execute("SET LOCAL statement_timeout = %s", (timeout_ms,))
+
+def run_catalog_query(name: str, start: date, end: date, deadline: float = None,
+                      compare: tuple[date, date] = None) -> list[dict]:
+    """
+    Run a dashboard_queries catalog query (prepared where supported), with the
+    comparison range of the _compare variants. The server cancels it after
+    QUERY_TIMEOUT_MS, or at `deadline` (a time.monotonic() value) if that comes first.
+    """
+    def run(cursor):
+        set_statement_timeout(cursor, name, deadline)
+        compare_start, compare_end = compare or (None, None)
+        return execute_query(cursor, name, start, end,
+                             compare_start_date=compare_start, compare_end_date=compare_end)
+    return run_with_connection(run)
+
+
+# ==============================================================================
+# ADMISSION CONTROL - adaptive concurrency limit on database work
+# ==============================================================================
+# Database work (catalog queries, daily partials, watermark and status reads)
+# runs through run_db, which only hands it to supabase_executor once the
+# limiter admits it. The limit adapts AIMD-style to the work's latency: +1
+# after `limit` calls in a row finish within DB_LATENCY_TARGET_MS while there
+# is demand, x DB_LIMIT_DECREASE when one is slower or fails on the
+# connection (at most once per target latency, so one slow burst cuts it
+# once). Calls wait for a slot in order, until their request's deadline; one
+# that would not get a slot in time by the queue's recent pace, or finds
+# DB_QUEUE_SIZE calls waiting already, is rejected at once (Overloaded) and
+# its request answered 503 with Retry-After instead of piling up behind the
+# pooler. A dashboard request makes a few dozen calls, so dashboard_sections
+# first admits the request as a whole (admit): refusing it up front rather
+# than after some of its sections ran for nothing. Limits are per worker
+# process, like the pool they default to (DB_POOL_SIZE, a worker's share of
+# DB_POOL_TOTAL).
+
+DB_ADMISSION = os.getenv("DB_ADMISSION", "on") != "off"
+DB_LIMIT_MIN = int(os.getenv("DB_LIMIT_MIN", "2"))
+DB_LIMIT_MAX = min(int(os.getenv("DB_LIMIT_MAX", str(DB_POOL_SIZE))), DB_POOL_SIZE)
+DB_QUEUE_SIZE = int(os.getenv("DB_QUEUE_SIZE", str(20 * DB_POOL_SIZE)))
+DB_LATENCY_TARGET_MS = float(os.getenv("DB_LATENCY_TARGET_MS", "1000"))
+DB_LIMIT_DECREASE = float(os.getenv("DB_LIMIT_DECREASE", "0.75"))
+
+# Errors that signal an overloaded database or pooler, and shrink the limit
+OVERLOAD_ERRORS = (TimeoutError, QueryCanceled, psycopg2.OperationalError, PoolError)
+
+# Counters reported by /api/metrics
+ADMISSION_METRICS = {
+    "admitted": 0,           # calls run
+    "queued": 0,             # calls that waited for a slot first
+    "rejected": 0,           # calls refused: queue full or no slot before the deadline
+    "rejected_requests": 0,  # requests refused before running any call (admit)
+    "queue_timeouts": 0,     # calls whose deadline passed while queued
+    "increases": 0,          # limit +1
+    "decreases": 0,          # limit cut
+}
+
+class Overloaded(Exception):
+    """Database work refused by admission control; retry in `retry_after` seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"database busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a bounded FIFO wait queue (see ADMISSION CONTROL); event loop only"""
 
-app = FastAPI(title="Portfolio Analytics API", version="3.0.0")
+    def __init__(self, minimum: int, maximum: int, queue_size: int, target_seconds: float, decrease: float):
+        self.minimum, self.maximum, self.queue_size = minimum, maximum, queue_size
+        self.target_seconds, self.decrease = target_seconds, decrease
+        self.limit = float(maximum)
+        self.in_use = 0
+        self.waiters = deque()
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.latency = 0.0  # moving average, for Retry-After
+
+    def expected_wait(self, calls: int = 1) -> float:
+        """Seconds until the last of `calls` joining the queue now would get a slot"""
+        return (len(self.waiters) + calls) * self.latency / max(int(self.limit), 1)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.expected_wait()))
+
+    def admit(self, calls: int, deadline: float):
+        """Refuse (Overloaded) a request whose `calls` would overflow the queue or not all get a slot before `deadline`"""
+        if not self.waiters and self.in_use + calls <= int(self.limit):
+            return
+        late = time.monotonic() + self.expected_wait(calls) > deadline
+        if late or len(self.waiters) + calls > self.queue_size:
+            ADMISSION_METRICS["rejected_requests"] += 1
+            raise Overloaded(self.retry_after())
+
+    async def acquire(self, deadline: float = None):
+        """Take a slot, waiting in line until `deadline` (TimeoutError); Overloaded when it can't come in time"""
+        if self.in_use < int(self.limit) and not self.waiters:
+            self.in_use += 1
+            ADMISSION_METRICS["admitted"] += 1
+            return
+        late = deadline is not None and time.monotonic() + self.expected_wait() > deadline
+        if late or len(self.waiters) >= self.queue_size:
+            ADMISSION_METRICS["rejected"] += 1
+            raise Overloaded(self.retry_after())
+        waiter = asyncio.get_event_loop().create_future()
+        self.waiters.append(waiter)
+        ADMISSION_METRICS["queued"] += 1
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as e:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                self.release_slot()  # granted just as the caller gave up
+            if isinstance(e, asyncio.TimeoutError):
+                ADMISSION_METRICS["queue_timeouts"] += 1
+                raise TimeoutError("deadline passed while queued for the database") from None
+            raise
+        ADMISSION_METRICS["admitted"] += 1
+
+    def release(self, seconds: float, overloaded: bool):
+        """Free a slot after work that took `seconds`, adapting the limit"""
+        self.latency = seconds if not self.latency else 0.9 * self.latency + 0.1 * seconds
+        if overloaded or seconds > self.target_seconds:
+            now = time.monotonic()
+            if now - self.last_decrease >= self.target_seconds:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.last_decrease, self.successes = now, 0
+                ADMISSION_METRICS["decreases"] += 1
+        elif self.waiters or self.in_use >= int(self.limit):
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.maximum:
+                self.limit = min(self.maximum, self.limit + 1)
+                self.successes = 0
+                ADMISSION_METRICS["increases"] += 1
+        self.release_slot()
+
+    def release_slot(self):
+        self.in_use -= 1
+        while self.waiters and self.in_use < int(self.limit):
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_use += 1
+                waiter.set_result(None)
+
+    def stats(self) -> dict:
+        return {"limit": round(self.limit, 2), "in_use": self.in_use, "waiting": len(self.waiters),
+                "latency_ms": round(self.latency * 1000, 1)}
+
+db_limiter = AdaptiveLimiter(DB_LIMIT_MIN, DB_LIMIT_MAX, DB_QUEUE_SIZE, DB_LATENCY_TARGET_MS / 1000, DB_LIMIT_DECREASE)
+
+async def run_db(fn, deadline: float = None):
+    """Run blocking database work fn() on supabase_executor once the limiter admits it"""
+    loop = asyncio.get_event_loop()
+    if not DB_ADMISSION:
+        return await loop.run_in_executor(supabase_executor, fn)
+    await db_limiter.acquire(deadline)
+    started = time.monotonic()
+    future = loop.run_in_executor(supabase_executor, fn)
+
+    def done(future):
+        overloaded = not future.cancelled() and isinstance(future.exception(), OVERLOAD_ERRORS)
+        db_limiter.release(time.monotonic() - started, overloaded)
+
+    # The slot is held until the work itself ends, even if the caller stops waiting
+    future.add_done_callback(done)
+    return await asyncio.shield(future)
+
+def overloaded_response(error: Overloaded) -> HTTPException:
+    """503 telling the client when to retry"""
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(error.retry_after)})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up (prewarm), follow the syncs (sync_listener / sync_watcher) and keep the cache fresh while the app runs"""
+    tasks = [asyncio.create_task(prewarm()), asyncio.create_task(sync_watcher())]
+    if SESSION_STORE:
+        tasks.append(asyncio.create_task(load_session_store()))
+    if SYNC_LISTEN:
+        tasks.append(asyncio.create_task(sync_listener()))
+    yield
+    for task in tasks:
+        task.cancel()
+
+app = FastAPI(title="Portfolio Analytics API", version="3.0.0", lifespan=lifespan)
 
 # CORS for frontend
 app.add_middleware(
@@ -67,8 +393,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Thread pool for parallel Supabase queries
-supabase_executor = ThreadPoolExecutor(max_workers=15)
+# Thread pool for parallel Supabase queries, one thread per pooled connection
+# (more would only wait on the pool, or fail with PoolError when it's exhausted)
+supabase_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE)
 
 
 def parse_date(d: Optional[str]) -> Optional[date]:
@@ -84,495 +411,1127 @@ def get_date_filter(start_date: Optional[str], end_date: Optional[str]) -> tuple
 
 
 # ==============================================================================
-# MAIN DASHBOARD3 ENDPOINT - Fast Supabase version with parallel queries
+# REQUEST COALESCING
 # ==============================================================================
+# Concurrent identical requests (e.g. a shared dashboard link opened in several
+# tabs at once) await one in-flight computation instead of each running all
+# the queries and competing for supabase_executor's threads
 
-@app.get("/api/dashboard3")
-async def get_dashboard3_data(
-    start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None)
-):
+_inflight: dict[tuple, asyncio.Future] = {}
+
+# Counters reported by /api/metrics
+METRICS = {
+    "requests": 0,       # single_flight calls
+    "computations": 0,   # calls that started a computation
+    "coalesced": 0,      # calls that joined one already in flight
+    "errors": 0,         # computations that raised
+}
+
+def _finish_flight(key: tuple, task: asyncio.Future):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled() and task.exception() is not None:
+        METRICS["errors"] += 1
+
+async def single_flight(key: tuple, compute):
     """
-    Combined endpoint that fetches ALL Dashboard3 data from Supabase.
-    Runs all queries in PARALLEL for maximum speed (~0.5-0.8 seconds).
+    Return the result of compute() for key, sharing it with every concurrent
+    caller of the same key (exceptions are shared too). Keys must identify the
+    request completely: normalized range plus any options.
     """
-    start, end = get_date_filter(start_date, end_date)
+    METRICS["requests"] += 1
+    task = _inflight.get(key)
+    if task is None:
+        METRICS["computations"] += 1
+        task = asyncio.ensure_future(compute())
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _finish_flight(key, done))
+    else:
+        METRICS["coalesced"] += 1
+    # A caller that goes away (client disconnect) must not cancel the others' result
+    return await asyncio.shield(task)
 
-    # Define all queries
-    queries = {
-        "overview": ("""
-            SELECT
-                COUNT(DISTINCT session_id) as total_sessions,
-                COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-                ROUND(AVG(session_duration_seconds)::numeric, 0) as avg_session_duration,
-                ROUND(AVG(page_views)::numeric, 1) as avg_pages_per_session,
-                ROUND(COUNT(DISTINCT CASE WHEN is_bounce THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as bounce_rate,
-                ROUND(COUNT(DISTINCT CASE WHEN is_engaged THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as engagement_rate,
-                ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement_score
-            FROM sessions WHERE session_date BETWEEN %s AND %s
-        """, (start, end)),
-        "daily_metrics": ("""
-            SELECT session_date as date, total_sessions as sessions, unique_visitors as visitors,
-                   engagement_rate, bounce_rate, avg_session_duration_sec as avg_duration,
-                   desktop_sessions, mobile_sessions, tablet_sessions
-            FROM daily_metrics WHERE session_date BETWEEN %s AND %s ORDER BY session_date
-        """, (start, end)),
-        "traffic": ("""
-            SELECT traffic_source, traffic_medium,
-                   SUM(sessions) as sessions,
-                   SUM(unique_visitors) as unique_visitors,
-                   ROUND(AVG(engagement_rate)::numeric, 2) as engagement_rate,
-                   ROUND(AVG(bounce_rate)::numeric, 2) as bounce_rate
-            FROM traffic_daily_stats
-            WHERE event_date BETWEEN %s AND %s
-            GROUP BY traffic_source, traffic_medium
-            ORDER BY SUM(sessions) DESC LIMIT 10
-        """, (start, end)),
-        "conversion_summary": ("""
-            SELECT
-                SUM(total_cta_views) as cta_views,
-                SUM(total_cta_clicks) as cta_clicks,
-                SUM(contact_form_starts) as form_starts,
-                SUM(contact_form_submissions) as form_submissions,
-                SUM(resume_downloads) as resume_downloads,
-                SUM(social_clicks) as social_clicks,
-                SUM(outbound_clicks) as outbound_clicks,
-                SUM(publication_clicks) as publication_clicks,
-                SUM(content_copies) as content_copies
-            FROM conversion_funnel WHERE event_date BETWEEN %s AND %s
-        """, (start, end)),
-        "project_rankings": ("""
-            WITH aggregated AS (
-                SELECT
-                    project_id,
-                    MAX(project_title) as project_title,
-                    MAX(project_category) as project_category,
-                    SUM(COALESCE(views, 0)) as total_views,
-                    SUM(COALESCE(unique_viewers, 0)) as total_unique_viewers,
-                    SUM(COALESCE(clicks, 0)) as total_clicks,
-                    SUM(COALESCE(expands, 0)) as total_expands,
-                    SUM(COALESCE(link_clicks, 0)) as total_link_clicks,
-                    SUM(COALESCE(github_clicks, 0)) as total_github_clicks,
-                    SUM(COALESCE(demo_clicks, 0)) as total_demo_clicks,
-                    -- Engagement score: clicks*5 + expands*3 + link_clicks*4 + views*1
-                    (SUM(COALESCE(clicks, 0)) * 5 + SUM(COALESCE(expands, 0)) * 3 +
-                     SUM(COALESCE(link_clicks, 0)) * 4 + SUM(COALESCE(views, 0)) * 1) as engagement_score
-                FROM project_daily_stats
-                WHERE event_date BETWEEN %s AND %s
-                GROUP BY project_id
-            ),
-            ranked AS (
-                SELECT *,
-                    ROW_NUMBER() OVER (ORDER BY engagement_score DESC) as overall_rank,
-                    CASE
-                        WHEN engagement_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY engagement_score) FROM aggregated) THEN 'top_performer'
-                        WHEN engagement_score >= (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY engagement_score) FROM aggregated) THEN 'above_average'
-                        ELSE 'below_average'
-                    END as performance_tier,
-                    ROUND((PERCENT_RANK() OVER (ORDER BY engagement_score) * 100)::numeric, 1) as engagement_percentile
-                FROM aggregated
-            )
-            SELECT project_id, project_title, project_category, total_views, total_unique_viewers,
-                   total_clicks, total_expands, total_link_clicks, total_github_clicks, total_demo_clicks,
-                   engagement_score, overall_rank::int, performance_tier,
-                   CASE WHEN overall_rank <= 3 THEN 'featured' ELSE 'standard' END as recommended_position,
-                   engagement_percentile
-            FROM ranked ORDER BY overall_rank LIMIT 10
-        """, (start, end)),
-        "section_rankings": ("""
-            WITH aggregated AS (
-                SELECT
-                    section_id,
-                    SUM(COALESCE(unique_views, 0)) as total_unique_views,
-                    SUM(COALESCE(unique_exits, 0)) as total_unique_exits,
-                    SUM(COALESCE(unique_viewers, 0)) as total_unique_viewers,
-                    ROUND(AVG(unique_exit_rate)::numeric, 2) as avg_exit_rate,
-                    SUM(COALESCE(total_views, 0)) as total_views,
-                    SUM(COALESCE(total_exits, 0)) as total_exits,
-                    ROUND(AVG(total_exit_rate)::numeric, 2) as avg_total_exit_rate,
-                    ROUND(AVG(avg_revisits_per_session)::numeric, 2) as avg_revisits_per_session,
-                    SUM(COALESCE(engaged_sessions, 0)) as total_engaged_views,
-                    ROUND(AVG(engagement_rate)::numeric, 2) as avg_engagement_rate,
-                    ROUND(AVG(avg_time_spent_seconds)::numeric, 2) as avg_time_spent_seconds,
-                    ROUND(AVG(avg_scroll_depth_percent)::numeric, 2) as avg_scroll_depth_percent,
-                    MAX(max_scroll_milestone) as max_scroll_milestone,
-                    -- Health score: engagement_rate * 2 + (100 - exit_rate) + time_spent + scroll_depth
-                    (COALESCE(AVG(engagement_rate), 0) * 2 +
-                     (100 - COALESCE(AVG(unique_exit_rate), 100)) +
-                     LEAST(COALESCE(AVG(avg_time_spent_seconds), 0), 100) +
-                     COALESCE(AVG(avg_scroll_depth_percent), 0)) as health_score
-                FROM section_daily_stats
-                WHERE event_date BETWEEN %s AND %s
-                GROUP BY section_id
-            ),
-            ranked AS (
-                SELECT *,
-                    ROW_NUMBER() OVER (ORDER BY avg_engagement_rate DESC) as engagement_rank,
-                    ROW_NUMBER() OVER (ORDER BY total_views DESC) as view_rank,
-                    ROW_NUMBER() OVER (ORDER BY avg_exit_rate ASC) as retention_rank,
-                    CASE
-                        WHEN health_score >= 300 THEN 'excellent'
-                        WHEN health_score >= 150 THEN 'good'
-                        WHEN health_score >= 50 THEN 'needs_attention'
-                        ELSE 'critical'
-                    END as health_tier,
-                    CASE
-                        WHEN avg_exit_rate >= 90 THEN 'high_dropoff'
-                        WHEN avg_exit_rate >= 70 THEN 'moderate_dropoff'
-                        ELSE 'low_dropoff'
-                    END as dropoff_indicator,
-                    CASE
-                        WHEN avg_engagement_rate < 20 THEN 'improve_content'
-                        WHEN avg_exit_rate > 85 THEN 'add_cta_or_navigation'
-                        ELSE 'maintain'
-                    END as optimization_hint
-                FROM aggregated
-            )
-            SELECT section_id, total_unique_views, total_unique_exits, total_unique_viewers,
-                   avg_exit_rate, total_views, total_exits, avg_total_exit_rate,
-                   avg_revisits_per_session, total_engaged_views, avg_engagement_rate,
-                   avg_time_spent_seconds, avg_scroll_depth_percent, max_scroll_milestone,
-                   ROUND(health_score::numeric, 2) as health_score,
-                   engagement_rank::int, view_rank::int, retention_rank::int,
-                   health_tier, dropoff_indicator, optimization_hint
-            FROM ranked ORDER BY health_score DESC
-        """, (start, end)),
-        "visitor_segments": ("""
-            WITH visitor_stats AS (
-                SELECT
-                    user_pseudo_id,
-                    COUNT(DISTINCT session_id) as total_sessions,
-                    SUM(page_views) as total_page_views,
-                    ROUND(AVG(session_duration_seconds)::numeric, 2) as avg_duration,
-                    ROUND(COUNT(DISTINCT CASE WHEN is_engaged THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as engagement_rate,
-                    SUM(conversions_count) as total_conversions,
-                    MAX(session_date) - MIN(session_date) as tenure_days,
-                    -- Value score: sessions*2 + page_views + conversions*20 + (engagement_rate/10)
-                    (COUNT(DISTINCT session_id) * 2 + SUM(page_views) + SUM(conversions_count) * 20) as value_score
-                FROM sessions
-                WHERE session_date BETWEEN %s AND %s
-                GROUP BY user_pseudo_id
-            ),
-            segmented AS (
-                SELECT *,
-                    CASE
-                        WHEN total_conversions > 0 THEN 'converter'
-                        WHEN total_sessions >= 3 AND engagement_rate >= 80 THEN 'engaged_explorer'
-                        WHEN total_sessions >= 2 THEN 'returning_visitor'
-                        WHEN engagement_rate >= 50 THEN 'engaged_new'
-                        ELSE 'casual_browser'
-                    END as visitor_segment
-                FROM visitor_stats
-            )
-            SELECT visitor_segment, COUNT(*) as count,
-                   ROUND(AVG(value_score)::numeric, 2) as avg_value_score,
-                   ROUND(AVG(total_sessions)::numeric, 2) as avg_sessions,
-                   ROUND(AVG(engagement_rate)::numeric, 2) as avg_engagement_rate
-            FROM segmented GROUP BY visitor_segment ORDER BY count DESC
-        """, (start, end)),
-        "top_visitors": ("""
-            WITH visitor_stats AS (
-                SELECT
-                    s.user_pseudo_id,
-                    COUNT(DISTINCT s.session_id) as total_sessions,
-                    MAX(s.session_date) - MIN(s.session_date) as visitor_tenure_days,
-                    SUM(s.page_views) as total_page_views,
-                    ROUND(AVG(s.session_duration_seconds)::numeric, 2) as avg_session_duration_sec,
-                    ROUND(COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as engagement_rate,
-                    MODE() WITHIN GROUP (ORDER BY s.device_category) as primary_device,
-                    MODE() WITHIN GROUP (ORDER BY s.country) as primary_country,
-                    MODE() WITHIN GROUP (ORDER BY s.traffic_source) as primary_traffic_source,
-                    SUM(s.projects_clicked_count) as projects_viewed,
-                    COALESCE(MAX(vi.cta_clicks), 0) as cta_clicks,
-                    COALESCE(MAX(vi.form_submissions), 0) as form_submissions,
-                    COALESCE(MAX(vi.social_clicks), 0) as social_clicks,
-                    COALESCE(MAX(vi.resume_downloads), 0) as resume_downloads,
-                    -- Value score
-                    (COUNT(DISTINCT s.session_id) * 2 + SUM(s.page_views) + SUM(s.conversions_count) * 20) as visitor_value_score,
-                    CASE
-                        WHEN COALESCE(MAX(vi.form_submissions), 0) > 0 OR COALESCE(MAX(vi.resume_downloads), 0) > 0 THEN 'converter'
-                        WHEN COUNT(DISTINCT s.session_id) >= 3 AND COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END) * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0) >= 80 THEN 'engaged_explorer'
-                        WHEN COUNT(DISTINCT s.session_id) >= 2 THEN 'returning_visitor'
-                        WHEN COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END) * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0) >= 50 THEN 'engaged_new'
-                        ELSE 'casual_browser'
-                    END as visitor_segment,
-                    'general_visitor' as interest_profile
-                FROM sessions s
-                LEFT JOIN visitor_insights vi ON s.user_pseudo_id = vi.user_pseudo_id
-                WHERE s.session_date BETWEEN %s AND %s
-                GROUP BY s.user_pseudo_id
-            )
-            SELECT user_pseudo_id, total_sessions, visitor_tenure_days, total_page_views,
-                   avg_session_duration_sec, engagement_rate, primary_device, primary_country,
-                   primary_traffic_source, projects_viewed, cta_clicks, form_submissions,
-                   social_clicks, resume_downloads, visitor_value_score, visitor_segment, interest_profile
-            FROM visitor_stats ORDER BY visitor_value_score DESC LIMIT 15
-        """, (start, end)),
-        "tech_demand": ("""
-            WITH aggregated AS (
-                SELECT
-                    skill_name,
-                    SUM(COALESCE(clicks, 0) + COALESCE(hovers, 0)) as total_interactions,
-                    SUM(COALESCE(unique_users, 0)) as total_unique_users,
-                    SUM(COALESCE(weighted_interest_score, 0)) as weighted_score
-                FROM skill_daily_stats
-                WHERE event_date BETWEEN %s AND %s
-                GROUP BY skill_name
-            ),
-            ranked AS (
-                SELECT *,
-                    ROW_NUMBER() OVER (ORDER BY weighted_score DESC) as demand_rank,
-                    ROUND((PERCENT_RANK() OVER (ORDER BY weighted_score) * 100)::numeric, 1) as demand_percentile,
-                    CASE
-                        WHEN weighted_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY weighted_score) FROM aggregated) THEN 'high_demand'
-                        WHEN weighted_score >= (SELECT PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY weighted_score) FROM aggregated) THEN 'moderate_demand'
-                        ELSE 'low_demand'
-                    END as demand_tier,
-                    CASE
-                        WHEN weighted_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY weighted_score) FROM aggregated) THEN 'master_this'
-                        WHEN weighted_score >= (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY weighted_score) FROM aggregated) THEN 'strengthen'
-                        ELSE 'maintain'
-                    END as learning_priority
-                FROM aggregated
-                WHERE weighted_score > 0
-            )
-            SELECT skill_name, total_interactions, total_unique_users,
-                   demand_rank::int, demand_percentile, demand_tier, learning_priority
-            FROM ranked ORDER BY demand_rank
-        """, (start, end)),
-        "domain_rankings": ("""
-            WITH aggregated AS (
-                SELECT
-                    domain,
-                    SUM(COALESCE(explicit_interest_signals, 0)) as total_explicit_interest,
-                    SUM(COALESCE(implicit_interest_from_views, 0)) as total_implicit_interest,
-                    SUM(COALESCE(total_domain_interactions, 0)) as total_interactions,
-                    SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
-                    SUM(COALESCE(domain_interest_score, 0)) as total_interest_score
-                FROM domain_daily_stats
-                WHERE event_date BETWEEN %s AND %s
-                GROUP BY domain
-            ),
-            ranked AS (
-                SELECT *,
-                    ROW_NUMBER() OVER (ORDER BY total_interest_score DESC) as interest_rank,
-                    ROUND((PERCENT_RANK() OVER (ORDER BY total_interest_score) * 100)::numeric, 1) as interest_percentile,
-                    CASE
-                        WHEN total_interest_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY total_interest_score) FROM aggregated) THEN 'high_demand'
-                        WHEN total_interest_score >= (SELECT PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY total_interest_score) FROM aggregated) THEN 'moderate_demand'
-                        ELSE 'low_demand'
-                    END as demand_tier,
-                    CASE
-                        WHEN total_interest_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY total_interest_score) FROM aggregated) THEN 'primary_strength'
-                        WHEN total_interest_score >= (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY total_interest_score) FROM aggregated) THEN 'secondary_strength'
-                        ELSE 'explore_opportunities'
-                    END as portfolio_recommendation
-                FROM aggregated
-                WHERE total_interactions > 0
-            )
-            SELECT domain, total_explicit_interest, total_implicit_interest, total_interactions,
-                   total_unique_users, total_interest_score, interest_rank::int, interest_percentile,
-                   demand_tier, portfolio_recommendation
-            FROM ranked ORDER BY interest_rank
-        """, (start, end)),
-        "experience_rankings": ("""
-            WITH aggregated AS (
-                SELECT
-                    experience_id,
-                    MAX(experience_title) as experience_title,
-                    MAX(company) as company,
-                    SUM(COALESCE(total_interactions, 0)) as total_interactions,
-                    SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
-                    SUM(COALESCE(unique_sessions, 0)) as total_sessions
-                FROM experience_daily_stats
-                WHERE event_date BETWEEN %s AND %s
-                GROUP BY experience_id
-            ),
-            ranked AS (
-                SELECT *,
-                    ROW_NUMBER() OVER (ORDER BY total_interactions DESC) as interest_rank,
-                    ROUND((PERCENT_RANK() OVER (ORDER BY total_interactions) * 100)::numeric, 1) as interest_percentile,
-                    CASE
-                        WHEN total_interactions >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY total_interactions) FROM aggregated) THEN 'most_attractive_role'
-                        WHEN total_interactions >= (SELECT PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY total_interactions) FROM aggregated) THEN 'moderately_attractive'
-                        ELSE 'needs_highlighting'
-                    END as role_attractiveness,
-                    CASE
-                        WHEN total_interactions >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY total_interactions) FROM aggregated) THEN 'lead_with_this'
-                        WHEN total_interactions >= (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY total_interactions) FROM aggregated) THEN 'feature_prominently'
-                        ELSE 'include_for_completeness'
-                    END as positioning_suggestion
-                FROM aggregated
-                WHERE total_interactions > 0
-            )
-            SELECT experience_id, experience_title, company, total_interactions, total_unique_users,
-                   total_sessions, interest_rank::int, interest_percentile, role_attractiveness, positioning_suggestion
-            FROM ranked ORDER BY interest_rank
-        """, (start, end)),
-        "recommendation_performance": ("""
-            SELECT * FROM recommendation_performance LIMIT 1
-        """, None),
-        "temporal_hourly": ("""
-            SELECT hour_of_day as hour, COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-                   ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement,
-                   ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate
-            FROM sessions WHERE session_date BETWEEN %s AND %s AND hour_of_day IS NOT NULL
-            GROUP BY hour_of_day ORDER BY hour_of_day
-        """, (start, end)),
-        "temporal_dow": ("""
-            SELECT
-                CASE session_day_of_week
-                    WHEN 1 THEN 'Sunday'
-                    WHEN 2 THEN 'Monday'
-                    WHEN 3 THEN 'Tuesday'
-                    WHEN 4 THEN 'Wednesday'
-                    WHEN 5 THEN 'Thursday'
-                    WHEN 6 THEN 'Friday'
-                    WHEN 7 THEN 'Saturday'
-                END as day_name,
-                session_day_of_week as day_number,
-                COUNT(*) as sessions,
-                COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-                ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement,
-                ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate
-            FROM sessions WHERE session_date BETWEEN %s AND %s
-            GROUP BY session_day_of_week ORDER BY session_day_of_week
-        """, (start, end)),
-        "devices": ("""
-            SELECT device_category, COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-                   ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate,
-                   ROUND(AVG(session_duration_seconds)::numeric, 0) as avg_duration
-            FROM sessions WHERE session_date BETWEEN %s AND %s GROUP BY device_category ORDER BY sessions DESC
-        """, (start, end)),
-        "browsers": ("""
-            SELECT COALESCE(browser, 'Unknown') as browser, COUNT(*) as sessions,
-                   COUNT(DISTINCT user_pseudo_id) as unique_visitors
-            FROM sessions WHERE session_date BETWEEN %s AND %s GROUP BY browser ORDER BY sessions DESC LIMIT 10
-        """, (start, end)),
-        "operating_systems": ("""
-            SELECT COALESCE(os, 'Unknown') as operating_system, COUNT(*) as sessions,
-                   COUNT(DISTINCT user_pseudo_id) as unique_visitors
-            FROM sessions WHERE session_date BETWEEN %s AND %s GROUP BY os ORDER BY sessions DESC LIMIT 10
-        """, (start, end)),
-        "geographic": ("""
-            SELECT country, city, COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-                   ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate
-            FROM sessions WHERE session_date BETWEEN %s AND %s GROUP BY country, city ORDER BY sessions DESC LIMIT 20
-        """, (start, end)),
-        "traffic_sources_summary": ("""
-            SELECT s.traffic_source, s.traffic_medium,
-                   COUNT(DISTINCT s.session_id) as sessions,
-                   COUNT(DISTINCT s.user_pseudo_id) as unique_visitors,
-                   ROUND(COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as engagement_rate,
-                   ROUND(COUNT(DISTINCT CASE WHEN s.is_bounce THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as bounce_rate,
-                   ROUND(AVG(s.session_duration_seconds)::numeric, 0) as avg_duration,
-                   COUNT(DISTINCT CASE WHEN vi.form_submissions > 0 THEN s.user_pseudo_id END) as conversions,
-                   COUNT(DISTINCT CASE WHEN vi.resume_downloads > 0 THEN s.user_pseudo_id END) as resume_downloads
-            FROM sessions s
-            LEFT JOIN visitor_insights vi ON s.user_pseudo_id = vi.user_pseudo_id
-            WHERE s.session_date BETWEEN %s AND %s
-            GROUP BY s.traffic_source, s.traffic_medium ORDER BY sessions DESC LIMIT 10
-        """, (start, end)),
+
+# ==============================================================================
+# RESULT CACHE - per section, invalidated by the sync's NOTIFY
+# ==============================================================================
+# Every catalog query's rows are cached per range with the generation of the
+# tables it reads (dashboard_queries.query_tables). The sync scripts NOTIFY
+# SYNC_CHANNEL with the tables they changed once their data is committed; a
+# listener bumps those tables' generations, so only the sections reading them
+# go stale, and the watcher recomputes the standard ranges' stale sections in
+# the background while the previous rows keep being served. Other ranges are
+# revalidated the same way on their next request. Requests never check the
+# database for freshness.
+#
+# LISTEN needs a session connection: the transaction pooler (port 6543) can't
+# deliver notifications, so the listener connects to SUPABASE_LISTEN_HOST/PORT
+# (direct connection or session pooler). While it is disconnected the watcher
+# falls back to polling the sync_metadata watermark, and every (re)connect
+# invalidates everything, since notifications sent meanwhile are lost.
+
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "32"))     # cached ranges (standard ones never evicted)
+SYNC_POLL_SECONDS = float(os.getenv("SYNC_POLL_SECONDS", "60"))          # watcher interval (watermark polls when not listening)
+CACHE_WARMING = os.getenv("DASHBOARD_CACHE_WARMING", "on") != "off"
+SYNC_LISTEN = os.getenv("DASHBOARD_SYNC_LISTEN", "on") != "off"
+SYNC_CHANNEL = os.getenv("SYNC_NOTIFY_CHANNEL", "analytics_sync")       # see supabase/maintenance.py notify_sync
+LISTEN_CONFIG = {
+    **SUPABASE_CONFIG,
+    "host": os.getenv("SUPABASE_LISTEN_HOST", SUPABASE_CONFIG["host"]),
+    "port": os.getenv("SUPABASE_LISTEN_PORT", "5432"),
+}
+ALL_TIME_START = date(2020, 1, 1)  # start the dashboard requests for "all time"
+WARM_FIRST_RANGE = "all_time"      # the dashboard's default preset (useDashboardData.ts)
+
+# Tables each section reads, and the ranking applied to its rows before caching
+# (comparison variants are ranked per period, see rank_periods)
+SECTION_TABLES = {name: sorted(query_tables(name)) for name in QUERIES}
+RANKED_SECTIONS = {source: name for name, source in API_RANKINGS.items()}
+COMPARED_SECTIONS = {variant: name for name, variant in COMPARE_QUERIES.items()}
+
+_cache: OrderedDict = OrderedDict()   # (start, end[, compare_start, compare_end]) -> {section: entry}
+_generations = defaultdict(int)       # table -> generation; "*" covers every table
+_watermark = {"value": None, "checked_at": None}
+_listener = {"connected": False, "connects": 0, "notifications": 0, "last_notification": None}
+_warm_needed = asyncio.Event()
+_background: set = set()
+
+# Counters reported by /api/metrics
+CACHE_METRICS = {
+    "hits": 0,            # requests served entirely fresh from the cache
+    "stale_hits": 0,      # requests served (partly) stale while sections refresh
+    "misses": 0,          # requests that computed at least one section
+    "refreshes": 0,       # sections (re)computed
+    "refresh_errors": 0,  # background refreshes that failed (stale rows kept)
+    "invalidations": 0,   # change notifications / watermark changes applied
+    "warmups": 0,         # standard range warm-ups after a sync or day change
+}
+
+def dashboard_key(start: date, end: date, granularity: str = "day", compare: tuple[date, date] = None) -> tuple:
+    """Coalescing key of a /api/dashboard3 request"""
+    return ("dashboard3", start, end, granularity, compare)
+
+def range_key(start: date, end: date, compare: tuple[date, date] = None) -> tuple:
+    """Cache key of a range, with the comparison range of _compare sections"""
+    return (start, end) + tuple(compare or ())
+
+def standard_ranges(today: date = None) -> dict[str, tuple[date, date]]:
+    """The dashboard's preset ranges (getPresetDates in useDashboardData.ts)"""
+    yesterday = (today or date.today()) - timedelta(days=1)
+    return {
+        "yesterday": (yesterday, yesterday),
+        "last_7_days": (yesterday - timedelta(days=6), yesterday),
+        "last_14_days": (yesterday - timedelta(days=13), yesterday),
+        "last_30_days": (yesterday - timedelta(days=29), yesterday),
+        "all_time": (ALL_TIME_START, yesterday),
     }
 
+def read_sync_watermark():
+    """Time of the latest sync step recorded in sync_metadata"""
+    rows = run_pg_query("SELECT MAX(last_synced_at) AS watermark FROM sync_metadata")
+    return rows[0]["watermark"] if rows else None
+
+def note_watermark(value):
+    """Record the sync watermark; a change since the last one seen invalidates everything"""
+    previous = _watermark["value"]
+    _watermark.update(value=value, checked_at=time.monotonic())
+    # Before the first read, anything already cached may predate a sync
+    if value != previous and (previous is not None or _cache):
+        invalidate(reason=f"watermark {value}")
+
+def section_generation(name: str) -> tuple:
+    """Current generation of the data a section reads"""
+    return (_generations["*"],) + tuple(_generations[table] for table in SECTION_TABLES[name])
+
+def invalidate(tables: list[str] = None, reason: str = "notification"):
+    """Mark the sections reading `tables` (every section when None) stale and warm them"""
+    if tables is None:
+        _generations["*"] += 1
+    for table in tables or []:
+        _generations[table] += 1
+    CACHE_METRICS["invalidations"] += 1
+    if SESSION_STORE:
+        session_store.mark_dirty(tables)
+    if SHARED_CACHE and shared_cache.is_leader():
+        _shared_epoch["value"] = shared_cache.bump_epoch()
+    stale = [name for name in API_QUERIES if tables is None or set(SECTION_TABLES[name]) & set(tables)]
+    print(f"Invalidated {len(stale)}/{len(API_QUERIES)} sections ({reason}: {', '.join(tables or ['all tables'])})")
+    _warm_needed.set()
+
+def store_section(start: date, end: date, name: str, rows: list[dict], generation: tuple,
+                  compare: tuple[date, date] = None):
+    """Cache a section's rows, evicting the least recently used non-standard ranges"""
+    key = range_key(start, end, compare)
+    _cache.setdefault(key, {})[name] = {"rows": rows, "generation": generation, "computed_at": datetime.utcnow()}
+    _cache.move_to_end(key)
+    pinned = set(standard_ranges().values())
+    for old_key in [k for k in _cache if k not in pinned]:
+        if len(_cache) <= DASHBOARD_CACHE_SIZE:
+            break
+        del _cache[old_key]
+
+def rank_periods(ranking: str, rows: list[dict]) -> list[dict]:
+    """
+    Rank each period of a comparison variant's rows on its own, keeping the
+    period column; every previous row is kept, so any current entity finds its
+    previous rank.
+    """
+    ranked = []
+    for period in ("current", "previous"):
+        period_rows = [row for row in rows if row["period"] == period]
+        ranked += [{"period": period, **row}
+                   for row in rank_entities(ranking, period_rows, all_rows=period == "previous")]
+    return ranked
+
+async def refresh_section(name: str, start: date, end: date, deadline: float = None,
+                          compare: tuple[date, date] = None) -> list[dict]:
+    """Compute a section (ranked where it feeds a ranking) and cache it under the generation read beforehand"""
+    generation = section_generation(name)
+    if compare is None and SESSION_STORE and name in session_store.STORE_SECTIONS and session_store.is_loaded():
+        rows = await store_section_rows(name, start, end)
+    else:
+        rows = await run_db(lambda: run_catalog_query(name, start, end, deadline, compare), deadline)
+    if name in RANKED_SECTIONS:
+        rows = rank_entities(RANKED_SECTIONS[name], rows)
+    elif COMPARED_SECTIONS.get(name) in RANKED_SECTIONS:
+        rows = rank_periods(RANKED_SECTIONS[COMPARED_SECTIONS[name]], rows)
+    CACHE_METRICS["refreshes"] += 1
+    store_section(start, end, name, rows, generation, compare)
+    return rows
+
+def section_key(name: str, start: date, end: date, compare: tuple[date, date] = None) -> tuple:
+    """Coalescing key of one section's computation"""
+    return ("section", name) + range_key(start, end, compare)
+
+def _background_done(task: asyncio.Future):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        CACHE_METRICS["refresh_errors"] += 1
+        print(f"Background cache refresh failed: {task.exception()}")
+
+def revalidate(name: str, start: date, end: date, compare: tuple[date, date] = None):
+    """Refresh a section in the background, unless it is already being computed"""
+    key = section_key(name, start, end, compare)
+    if key in _inflight:
+        return
+    task = asyncio.ensure_future(single_flight(key, lambda: refresh_section(name, start, end, compare=compare)))
+    _background.add(task)
+    task.add_done_callback(_background_done)
+
+async def cached_section(name: str, start: date, end: date, deadline: float = None,
+                         compare: tuple[date, date] = None) -> tuple[list[dict], str]:
+    """
+    (rows, status) of a section: "hit" when cached at its tables' current
+    generation, "stale" when cached at an older one (a refresh is started in the
+    background) or "miss" when computed now (shared with concurrent requests,
+    so they share its deadline too).
+    """
+    entry = _cache.get(range_key(start, end, compare), {}).get(name)
+    if entry is None:
+        compute = lambda: refresh_section(name, start, end, deadline, compare)
+        return await single_flight(section_key(name, start, end, compare), compute), "miss"
+    if entry["generation"] == section_generation(name):
+        return entry["rows"], "hit"
+    revalidate(name, start, end, compare)
+    return entry["rows"], "stale"
+
+async def warm_standard_ranges():
+    """Recompute the standard ranges' missing or stale sections, one range at a time"""
+    CACHE_METRICS["warmups"] += 1
+    # The frontend's default range first: a cold start's first request most likely asks for it
+    ranges = sorted(standard_ranges().items(), key=lambda item: item[0] != WARM_FIRST_RANGE)
+    for range_name, (start, end) in ranges:
+        sections = _cache.get((start, end), {})
+        stale = [name for name in API_QUERIES
+                 if name not in sections or sections[name]["generation"] != section_generation(name)]
+        results = await asyncio.gather(*[
+            single_flight(section_key(name, start, end), lambda name=name: refresh_section(name, start, end))
+            for name in stale
+        ], return_exceptions=True)
+        for name, result in zip(stale, results):
+            if isinstance(result, Exception):
+                print(f"Warming {range_name} {name} failed: {result}")
+
+async def sync_listener():
+    """LISTEN for the sync's change notifications and invalidate the tables they name"""
+    loop = asyncio.get_event_loop()
+    notifications = asyncio.Queue()
+    backoff = 1
+    while True:
+        if not is_leader():
+            await asyncio.sleep(SYNC_POLL_SECONDS)  # the leader listens for every worker
+            continue
+        conn, fd = None, None
+        try:
+            conn = await loop.run_in_executor(None, lambda: psycopg2.connect(
+                **LISTEN_CONFIG, sslmode="require", keepalives=1, keepalives_idle=30))
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {SYNC_CHANNEL}")
+                # Catches syncs missed while not listening, and is the baseline
+                # for the watcher's polls if this connection drops later
+                cursor.execute("SELECT MAX(last_synced_at) FROM sync_metadata")
+                note_watermark(cursor.fetchone()[0])
+
+            def on_readable():
+                try:
+                    conn.poll()
+                    while conn.notifies:
+                        notifications.put_nowait(conn.notifies.pop(0))
+                except Exception as e:
+                    notifications.put_nowait(e)
+
+            fd = conn.fileno()
+            loop.add_reader(fd, on_readable)
+            _listener.update(connected=True, connects=_listener["connects"] + 1)
+            backoff = 1
+            print(f"Listening on {SYNC_CHANNEL}")
+
+            while True:
+                item = await notifications.get()
+                if isinstance(item, Exception):
+                    raise item
+                _listener.update(notifications=_listener["notifications"] + 1,
+                                 last_notification=datetime.utcnow().isoformat() + "Z")
+                try:
+                    tables = json.loads(item.payload)["tables"]
+                except (ValueError, KeyError, TypeError):
+                    tables = None  # unknown payload: assume everything changed
+                invalidate(tables)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Sync listener error: {e} (retrying in {backoff}s)")
+        finally:
+            _listener["connected"] = False
+            if fd is not None:
+                loop.remove_reader(fd)
+            if conn is not None and not conn.closed:
+                conn.close()
+            while not notifications.empty():
+                notifications.get_nowait()
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, SYNC_POLL_SECONDS)
+
+async def sync_watcher():
+    """
+    Warm the standard ranges at startup, after each invalidation and when the
+    date changes; poll the sync watermark while the listener is down. Workers
+    other than the shared cache's leader only follow its epoch.
+    """
+    warmed_day = None
+    while True:
+        try:
+            if not is_leader():
+                await follow_shared_epoch()
+                _warm_needed.clear()
+                note_startup("cache")  # the leader warms the shared cache
+            else:
+                if not _listener["connected"]:
+                    note_watermark(await run_db(read_sync_watermark))
+                if not CACHE_WARMING:
+                    _warm_needed.clear()
+                elif _warm_needed.is_set() or warmed_day != date.today():
+                    _warm_needed.clear()  # invalidations during the warm-up set it again
+                    start_time = time.monotonic()
+                    await warm_standard_ranges()
+                    if SHARED_CACHE:
+                        await publish_standard_responses()
+                    print(f"Warmed standard ranges in {time.monotonic() - start_time:.2f}s")
+                    warmed_day = date.today()
+                    note_startup("cache")
+        except Exception as e:
+            print(f"Sync watcher error: {e}")
+        try:
+            await asyncio.wait_for(_warm_needed.wait(), timeout=SYNC_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+# ==============================================================================
+# SESSION STORE - sessions and daily stats in memory (session_store.py)
+# ==============================================================================
+# With DASHBOARD_SESSION_STORE=on the process loads sessions and the
+# *_daily_stats tables at startup, and computes the sections reading only
+# those (session_store.STORE_SECTIONS) in memory instead of querying Supabase.
+# Invalidations mark the store's tables dirty too; the next section needing one
+# first re-reads the days the sync changed. Until the first load completes
+# sections keep coming from SQL.
+
+SESSION_STORE = os.getenv("DASHBOARD_SESSION_STORE", "off") == "on"
+if SESSION_STORE:
+    import session_store  # NumPy-backed; kept off the cold start when disabled
+
+async def load_session_store():
+    """Load the store in the background at startup"""
+    loop = asyncio.get_event_loop()
+    start_time = time.monotonic()
+    try:
+        await loop.run_in_executor(supabase_executor, lambda: run_with_connection(session_store.load))
+        memory = session_store.stats()["total_memory_bytes"]
+        print(f"Loaded session store in {time.monotonic() - start_time:.2f}s ({memory / 1024:.0f} KiB)")
+    except Exception as e:
+        print(f"Session store load failed, sections stay on SQL: {e}")
+    note_startup("store")
+
+async def store_section_rows(name: str, start: date, end: date) -> list[dict]:
+    """A section's rows from the store, refreshing its tables first if a sync changed them"""
+    loop = asyncio.get_event_loop()
+    if session_store.is_stale(name):
+        refresh = lambda: loop.run_in_executor(supabase_executor, lambda: run_with_connection(session_store.refresh))
+        await single_flight(("session_store",), refresh)
+    return await loop.run_in_executor(supabase_executor, lambda: session_store.query(name, start, end))
+
+
+# ==============================================================================
+# COLD START - pre-warming and readiness (/ready)
+# ==============================================================================
+# Idle instances are stopped, so a request can land on a process that has just
+# started. At startup the lifespan opens DB_POOL_WARM pool connections in
+# parallel (the first request's sections would otherwise open them one after
+# another under the pool's lock; meanwhile they wait for these instead) and
+# imports the modules left out of the import path. /ready answers 503 until those are done, the session store
+# is loaded (when enabled) and the standard ranges are cached (when warming),
+# so a readiness probe only sends traffic to a warm instance. Timings are in
+# /api/metrics; benchmarks/cold_start.py measures the whole path.
+
+# Imported in the background rather than on the first request that needs them
+WARM_IMPORTS = ["numpy"]
+
+# Seconds from the start of main's imports to each startup step's end
+STARTUP = {
+    "serving": None,       # lifespan started (imports done)
+    "pool": None,          # DB_POOL_WARM connections open
+    "pool_connections": 0,
+    "imports": None,       # WARM_IMPORTS imported
+    "store": None,         # session store loaded (or failed: sections stay on SQL)
+    "cache": None,         # standard ranges warmed once
+    "ready": None,
+}
+
+def startup_pending() -> list[str]:
+    """Startup steps /ready still waits for"""
+    steps = ["pool", "imports"] + (["store"] if SESSION_STORE else []) + (["cache"] if CACHE_WARMING else [])
+    return [step for step in steps if STARTUP[step] is None]
+
+def note_startup(step: str):
+    """Record when a startup step first finished, and when the last one did"""
+    if STARTUP[step] is None:
+        STARTUP[step] = round(time.monotonic() - _import_started, 3)
+    if STARTUP["ready"] is None and STARTUP["serving"] is not None and not startup_pending():
+        STARTUP["ready"] = round(time.monotonic() - _import_started, 3)
+        print(f"Ready {STARTUP['ready']:.2f}s after the imports started ({STARTUP['pool_connections']} connections open)")
+
+async def prewarm():
+    """Open the pool's connections and import WARM_IMPORTS concurrently, retrying the connections until they open"""
+    note_startup("serving")
+    loop = asyncio.get_event_loop()
+    imports = loop.run_in_executor(None, lambda: [importlib.import_module(name) for name in WARM_IMPORTS])
+    backoff = 1
+    while True:
+        try:
+            STARTUP["pool_connections"] = await loop.run_in_executor(
+                None, lambda: get_connection_pool().prewarm(DB_POOL_WARM))
+            break
+        except Exception as e:
+            print(f"Connection pre-warm failed: {e} (retrying in {backoff}s)")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, SYNC_POLL_SECONDS)
+    note_startup("pool")
+    await imports
+    note_startup("imports")
+
+
+# ==============================================================================
+# MULTI-WORKER SERVING - responses shared across processes (shared_cache.py)
+# ==============================================================================
+# With WEB_CONCURRENCY workers (uvicorn's --workers; see the Dockerfile) the
+# JSON encoding and shaping spread over the cores, and with more than one the
+# shared cache is on by default: /api/dashboard3 bodies are encoded once into
+# shared memory and served to every worker from there. A response missing from
+# it is built by one worker under a lease while the others wait for its entry,
+# so the workers don't multiply the queries. Only the leader follows the syncs
+# and warms the standard ranges (encoding their responses for everyone); the
+# others invalidate their own caches when they see its epoch move. The stream
+# and batch endpoints keep to each worker's section cache. Each worker pools
+# its share of DB_POOL_TOTAL connections, so adding workers doesn't add
+# pooler clients.
+
+SHARED_CACHE = os.getenv("DASHBOARD_SHARED_CACHE", "on" if WORKERS > 1 else "off") == "on"
+if SHARED_CACHE:
+    import shared_cache
+SHARED_WAIT_SECONDS = 0.02   # poll interval while another worker builds a response
+
+_shared_epoch = {"value": None}   # shared epoch this worker's caches follow
+
+def is_leader() -> bool:
+    """Whether this worker follows the syncs and warms the cache (always, without the shared cache)"""
+    return not SHARED_CACHE or shared_cache.acquire_leadership()
+
+async def run_shared(fn, *args):
+    """
+    Run a shared_cache call off the event loop: it is SQLite, and a write can
+    wait up to its busy timeout on another worker's
+    """
+    return await asyncio.get_event_loop().run_in_executor(None, fn, *args)
+
+async def follow_shared_epoch() -> int:
+    """The shared epoch; a follower seeing it move invalidates its own caches"""
+    epoch = await run_shared(shared_cache.epoch)
+    if _shared_epoch["value"] not in (None, epoch) and not shared_cache.is_leader():
+        invalidate(reason=f"shared epoch {epoch}")
+    _shared_epoch["value"] = epoch
+    return epoch
+
+def encode_response(content: dict) -> bytes:
+    """A response body as FastAPI renders a returned dict"""
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+async def shared_dashboard3(start: date, end: date, granularity: str = "day",
+                            compare: tuple[date, date] = None) -> tuple[bytes, str]:
+    """
+    (body, cache status) of a /api/dashboard3 response: "shared" from the shared
+    cache, else built here (see build_dashboard3) and stored for every worker
+    unless stale or degraded. While another worker holds the lease on it, waits
+    for its entry, up to REQUEST_DEADLINE_SECONDS before building it too.
+    """
+    key = dashboard_key(start, end, granularity, compare)
+    epoch = await follow_shared_epoch()
+    give_up = time.monotonic() + REQUEST_DEADLINE_SECONDS
+    while True:
+        body = await run_shared(shared_cache.get, key, epoch)
+        if body is not None:
+            return body, "shared"
+        leased = await run_shared(shared_cache.lease, key, REQUEST_DEADLINE_SECONDS + 1)
+        if leased or time.monotonic() > give_up:
+            break
+        await asyncio.sleep(SHARED_WAIT_SECONDS)
+    try:
+        result, status = await build_dashboard3(start, end, granularity, compare)
+        body = encode_response(result)
+        if status != "stale" and not result["degraded"]:
+            await run_shared(shared_cache.put, key, epoch, body)
+    finally:
+        if leased:
+            await run_shared(shared_cache.release, key)
+    return body, status
+
+async def publish_standard_responses():
+    """Leader: encode the standard ranges' responses into the shared cache after a warm-up"""
+    for range_name, (start, end) in standard_ranges().items():
+        try:
+            await single_flight(("shared",) + dashboard_key(start, end), lambda: shared_dashboard3(start, end))
+        except Exception as e:
+            print(f"Publishing {range_name} failed: {e}")
+
+
+# ==============================================================================
+# MAIN DASHBOARD3 ENDPOINT - Fast Supabase version with parallel queries
+# ==============================================================================
+
+# Counters reported by /api/metrics
+DEADLINE_METRICS = {
+    "degraded_responses": 0,  # responses missing at least one section
+    "timeouts": 0,            # sections cut off by their deadline / statement_timeout
+    "failures": 0,            # sections whose query failed otherwise
+}
+
+def degrade(name: str, start: date, end: date, error: Exception = None) -> str:
+    """Log and count a section left out of a response; returns the name "degraded" lists"""
+    timed_out = error is None or isinstance(error, (TimeoutError, QueryCanceled))
+    DEADLINE_METRICS["timeouts" if timed_out else "failures"] += 1
+    print(f"Section {name} ({start} to {end}) {'timed out' if timed_out else f'failed: {error}'}")
+    return RANKED_SECTIONS.get(name, name)
+
+def section_source(name: str, granularity: str, compare: tuple[date, date] = None) -> tuple[str, tuple]:
+    """(section, compare) a catalog query is cached as: bucketed, or its _compare variant when comparing"""
+    if compare and name in COMPARE_QUERIES:
+        return COMPARE_QUERIES[name], compare
+    return bucketed_query(name, granularity), None
+
+def section_task(name: str, start: date, end: date, deadline: float, granularity: str,
+                 compare: tuple[date, date] = None) -> asyncio.Future:
+    """cached_section of a catalog query (see section_source)"""
+    section, compare = section_source(name, granularity, compare)
+    return asyncio.ensure_future(cached_section(section, start, end, deadline, compare))
+
+def sections_to_compute(start: date, end: date, granularity: str, compare: tuple[date, date] = None) -> int:
+    """Catalog queries of a request neither cached nor already being computed"""
+    count = 0
+    for name in API_QUERIES:
+        section, section_compare = section_source(name, granularity, compare)
+        cached = section in _cache.get(range_key(start, end, section_compare), {})
+        if not cached and section_key(section, start, end, section_compare) not in _inflight:
+            count += 1
+    return count
+
+def split_periods(name: str, rows: list[dict], status: str, compare: tuple[date, date] = None) -> list[tuple]:
+    """A section's (name, rows, status), or its current and previous_<name> ones for a _compare variant"""
+    if not compare or name not in COMPARE_QUERIES:
+        return [(name, rows, status)]
+    periods = {"current": [], "previous": []}
+    for row in rows:
+        periods[row["period"]].append({key: value for key, value in row.items() if key != "period"})
+    return [(name, periods["current"], status), (f"previous_{name}", periods["previous"], status)]
+
+async def dashboard_sections(start: date, end: date, granularity: str = "day", compare: tuple[date, date] = None,
+                             deadline: float = None):
+    """
+    Yield (name, rows, status) for every catalog query (dashboard_queries.API_QUERIES)
+    as soon as it completes: from the section cache or run in PARALLEL. Time
+    series run bucketed at `granularity` (see bucketed_query). With a `compare`
+    range, the COMPARE_QUERIES sections run as their _compare variants and
+    also yield previous_<name> with the comparison range's rows.
+
+    Stops waiting at `deadline` (REQUEST_DEADLINE_SECONDS from now by default).
+    Sections that time out or fail are yielded with no rows and status "degraded";
+    a request (or section) refused by admission control raises Overloaded.
+    """
+    deadline = deadline or time.monotonic() + REQUEST_DEADLINE_SECONDS
+    if DB_ADMISSION:
+        db_limiter.admit(sections_to_compute(start, end, granularity, compare), deadline)
+    tasks = {section_task(name, start, end, deadline, granularity, compare): name for name in API_QUERIES}
+    pending = set(tasks)
     try:
-        # Run all queries in parallel
-        loop = asyncio.get_event_loop()
-
-        async def run_query_async(name: str, query: str, params: tuple):
-            result = await loop.run_in_executor(supabase_executor, lambda: run_pg_query(query, params))
-            return (name, result)
-
-        tasks = [run_query_async(name, q[0], q[1]) for name, q in queries.items()]
-        results = await asyncio.gather(*tasks)
-
-        # Convert to dict
-        data = {name: result for name, result in results}
-
-        # Ensure all 7 days are present in temporal_dow, even with zero values
-        all_days = [
-            (1, 'Sunday'), (2, 'Monday'), (3, 'Tuesday'), (4, 'Wednesday'),
-            (5, 'Thursday'), (6, 'Friday'), (7, 'Saturday')
-        ]
-        dow_raw = {row['day_number']: row for row in data.get("temporal_dow", [])}
-        data["temporal_dow"] = [
+        while pending:
+            # Queries still running at the deadline are being cancelled by their
+            # statement_timeout; not waiting for that also bounds time spent
+            # queueing for a connection or executor thread
+            done, pending = await asyncio.wait(pending, timeout=max(deadline - time.monotonic(), 0),
+                                               return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in sorted(done, key=lambda task: API_QUERIES.index(tasks[task])):
+                if isinstance(task.exception(), Overloaded):
+                    raise task.exception()
+                if task.exception() is None:
+                    rows, status = task.result()
+                else:
+                    degrade(tasks[task], start, end, task.exception())
+                    rows, status = [], "degraded"
+                for section in split_periods(tasks[task], rows, status, compare):
+                    yield section
+        for task in sorted(pending, key=lambda task: API_QUERIES.index(tasks[task])):
+            degrade(tasks[task], start, end)
+            for section in split_periods(tasks[task], [], "degraded", compare):
+                yield section
+    finally:
+        # The shared computations themselves are shielded (see single_flight)
+        # and finish into the cache
+        for task in pending:
+            task.cancel()
+
+def response_status(statuses: list[str]) -> str:
+    """Cache status of a response (miss / stale / hit, worst section first), counted in CACHE_METRICS"""
+    status = "miss" if {"miss", "degraded"} & set(statuses) else "stale" if "stale" in statuses else "hit"
+    CACHE_METRICS[{"miss": "misses", "stale": "stale_hits", "hit": "hits"}[status]] += 1
+    return status
+
+def shape_overview(data: dict) -> dict:
+    overview = data["overview"][0] if data["overview"] else {}
+    conversion_summary = shape_conversion_summary(data)
+    # True conversions = form submissions + resume downloads
+    # (social_clicks are engagement signals, not conversions)
+    total_conversions = (conversion_summary["form_submissions"] +
+                       conversion_summary["resume_downloads"])
+    return {
+        "totalSessions": overview.get("total_sessions", 0),
+        "uniqueVisitors": overview.get("unique_visitors", 0),
+        "avgSessionDuration": float(overview.get("avg_session_duration") or 0),
+        "avgPagesPerSession": float(overview.get("avg_pages_per_session") or 0),
+        "bounceRate": float(overview.get("bounce_rate") or 0),
+        "engagementRate": float(overview.get("engagement_rate") or 0),
+        "avgEngagementScore": float(overview.get("avg_engagement_score") or 0),
+        "totalConversions": total_conversions,
+    }
+
+def shape_conversion_summary(data: dict) -> dict:
+    conv = data.get("conversion_summary", [{}])[0] if data.get("conversion_summary") else {}
+    return {
+        "cta_views": int(conv.get("cta_views") or 0),
+        "cta_clicks": int(conv.get("cta_clicks") or 0),
+        "form_starts": int(conv.get("form_starts") or 0),
+        "form_submissions": int(conv.get("form_submissions") or 0),
+        "resume_downloads": int(conv.get("resume_downloads") or 0),
+        "social_clicks": int(conv.get("social_clicks") or 0),
+        "outbound_clicks": int(conv.get("outbound_clicks") or 0),
+        "publication_clicks": int(conv.get("publication_clicks") or 0),
+        "content_copies": int(conv.get("content_copies") or 0),
+    }
+
+def shape_visitor_segments(data: dict) -> dict:
+    visitor_segments = {}
+    for seg in data.get("visitor_segments", []):
+        visitor_segments[seg["visitor_segment"]] = {
+            "count": seg["count"],
+            "avg_value_score": float(seg["avg_value_score"] or 0),
+            "avg_sessions": float(seg["avg_sessions"] or 0),
+            "avg_engagement_rate": float(seg["avg_engagement_rate"] or 0)
+        }
+    return visitor_segments
+
+def shape_temporal(data: dict) -> dict:
+    # Ensure all 7 days are present in temporal_dow, even with zero values
+    all_days = [
+        (1, 'Sunday'), (2, 'Monday'), (3, 'Tuesday'), (4, 'Wednesday'),
+        (5, 'Thursday'), (6, 'Friday'), (7, 'Saturday')
+    ]
+    dow_raw = {row['day_number']: row for row in data.get("temporal_dow", [])}
+    return {
+        "hourlyDistribution": data["temporal_hourly"],
+        "dayOfWeekDistribution": [
             dow_raw.get(num, {
                 'day_name': name, 'day_number': num, 'sessions': 0,
                 'unique_visitors': 0, 'avg_engagement': 0, 'engagement_rate': 0
             }) for num, name in all_days
-        ]
-
-        # Extract overview
-        overview = data["overview"][0] if data["overview"] else {}
-
-        # Build visitor segments dict
-        visitor_segments = {}
-        for seg in data.get("visitor_segments", []):
-            visitor_segments[seg["visitor_segment"]] = {
-                "count": seg["count"],
-                "avg_value_score": float(seg["avg_value_score"] or 0),
-                "avg_sessions": float(seg["avg_sessions"] or 0),
-                "avg_engagement_rate": float(seg["avg_engagement_rate"] or 0)
-            }
-
-        # Build conversion summary
-        conv = data.get("conversion_summary", [{}])[0] if data.get("conversion_summary") else {}
-        conversion_summary = {
-            "cta_views": int(conv.get("cta_views") or 0),
-            "cta_clicks": int(conv.get("cta_clicks") or 0),
-            "form_starts": int(conv.get("form_starts") or 0),
-            "form_submissions": int(conv.get("form_submissions") or 0),
-            "resume_downloads": int(conv.get("resume_downloads") or 0),
-            "social_clicks": int(conv.get("social_clicks") or 0),
-            "outbound_clicks": int(conv.get("outbound_clicks") or 0),
-            "publication_clicks": int(conv.get("publication_clicks") or 0),
-            "content_copies": int(conv.get("content_copies") or 0),
+        ],
+    }
+
+def shape_devices(data: dict) -> dict:
+    return {
+        "categories": data["devices"],
+        "browsers": data["browsers"],
+        "operatingSystems": data["operating_systems"],
+    }
+
+# Response field -> (catalog queries it's built from, shaping function; None
+# passes the single query's rows through). Project, skill, domain and
+# experience aggregates are cached already ranked (see refresh_section).
+RESPONSE_SECTIONS = {
+    "overview": (["overview", "conversion_summary"], shape_overview),
+    "dailyMetrics": (["daily_metrics"], None),
+    "trafficSources": (["traffic_sources_summary"], None),
+    "conversionSummary": (["conversion_summary"], shape_conversion_summary),
+    "projectRankings": (["project_aggregates"], None),
+    "sectionRankings": (["section_rankings"], None),
+    "visitorSegments": (["visitor_segments"], shape_visitor_segments),
+    "topVisitors": (["top_visitors"], None),
+    "techDemand": (["skill_aggregates"], None),
+    "domainRankings": (["domain_aggregates"], None),
+    "experienceRankings": (["experience_aggregates"], None),
+    "recommendationPerformance": (["recommendation_performance"], None),
+    "temporal": (["temporal_hourly", "temporal_dow"], shape_temporal),
+    "devices": (["devices", "browsers", "operating_systems"], shape_devices),
+    "geographic": (["geographic"], None),
+}
+
+def metric_deltas(current: dict, previous: dict) -> dict:
+    """{field: {current, previous, change, changePct}} of two shaped metric dicts"""
+    deltas = {}
+    for field, value in current.items():
+        before = previous.get(field, 0)
+        change = round(value - before, 2)
+        deltas[field] = {
+            "current": value,
+            "previous": before,
+            "change": change,
+            "changePct": round(change * 100 / before, 2) if before else None,
         }
-        # True conversions = form submissions + resume downloads
-        # (social_clicks are engagement signals, not conversions)
-        total_conversions = (conversion_summary["form_submissions"] +
-                           conversion_summary["resume_downloads"])
+    return deltas
 
-        return {
-            "overview": {
-                "totalSessions": overview.get("total_sessions", 0),
-                "uniqueVisitors": overview.get("unique_visitors", 0),
-                "avgSessionDuration": float(overview.get("avg_session_duration") or 0),
-                "avgPagesPerSession": float(overview.get("avg_pages_per_session") or 0),
-                "bounceRate": float(overview.get("bounce_rate") or 0),
-                "engagementRate": float(overview.get("engagement_rate") or 0),
-                "avgEngagementScore": float(overview.get("avg_engagement_score") or 0),
-                "totalConversions": total_conversions,
-            },
-            "dailyMetrics": data["daily_metrics"],
-            "trafficSources": data["traffic_sources_summary"],
-            "conversionSummary": conversion_summary,
-            "projectRankings": data["project_rankings"],
-            "sectionRankings": data["section_rankings"],
-            "visitorSegments": visitor_segments,
-            "topVisitors": data["top_visitors"],
-            "techDemand": data["tech_demand"],
-            "domainRankings": data["domain_rankings"],
-            "experienceRankings": data["experience_rankings"],
-            "recommendationPerformance": data["recommendation_performance"],
-            "temporal": {
-                "hourlyDistribution": data["temporal_hourly"],
-                "dayOfWeekDistribution": data["temporal_dow"],
-            },
-            "devices": {
-                "categories": data["devices"],
-                "browsers": data["browsers"],
-                "operatingSystems": data["operating_systems"],
-            },
-            "geographic": data["geographic"],
-            "dateRange": {"start": str(start), "end": str(end)},
-            "source": "supabase",
-            "updated_at": datetime.utcnow().isoformat() + "Z"
+# Ranking response field -> catalog query; section_rankings is ordered (not
+# ranked) by health_score in SQL, so its rank is the position in that order
+COMPARED_RANKINGS = {
+    "projectRankings": "project_aggregates",
+    "sectionRankings": "section_rankings",
+    "techDemand": "skill_aggregates",
+    "domainRankings": "domain_aggregates",
+    "experienceRankings": "experience_aggregates",
+}
+
+def ranking_deltas(name: str, current: list[dict], previous: list[dict]) -> list[dict]:
+    """Rank and score movement of every current entry of a ranking since the comparison range"""
+    if name in RANKED_SECTIONS:
+        ranking = RANKINGS[RANKED_SECTIONS[name]]
+        key, rank = ranking["fields"][0], ranking["rank"]
+        score = ranking["score"] if ranking["score"] in ranking["fields"] else None
+        ranks = lambda rows: {row[key]: row[rank] for row in rows}
+    else:
+        key, score = "section_id", "health_score"
+        ranks = lambda rows: {row[key]: position for position, row in
+                              enumerate(sorted(rows, key=lambda row: -(row[score] or 0)), 1)}
+
+    current_ranks, previous_ranks = ranks(current), ranks(previous)
+    previous_rows = {row[key]: row for row in previous}
+    deltas = []
+    for row in sorted(current, key=lambda row: current_ranks[row[key]]):
+        before = previous_rows.get(row[key])
+        delta = {
+            key: row[key],
+            "rank": current_ranks[row[key]],
+            "previousRank": previous_ranks.get(row[key]),
+            # Positive when the entity moved up
+            "rankChange": previous_ranks[row[key]] - current_ranks[row[key]] if before else None,
         }
+        if score:
+            delta.update(score=row[score], previousScore=before[score] if before else None,
+                         scoreChange=row[score] - before[score] if before and row[score] is not None
+                         and before[score] is not None else None)
+        deltas.append(delta)
+    return deltas
+
+def shape_comparison(data: dict, compare: tuple[date, date]) -> dict:
+    """Current vs comparison range values and deltas of the overview, conversion summary and rankings"""
+    previous = {name: data[f"previous_{name}"] for name in COMPARE_QUERIES}
+    return {
+        "dateRange": {"start": str(compare[0]), "end": str(compare[1])},
+        "overview": metric_deltas(shape_overview(data), shape_overview(previous)),
+        "conversionSummary": metric_deltas(shape_conversion_summary(data), shape_conversion_summary(previous)),
+        **{field: ranking_deltas(name, data[name], previous[name]) for field, name in COMPARED_RANKINGS.items()},
+    }
+
+def shape_section(field: str, data: dict):
+    """A response field from the rows of the catalog queries it needs (cached rows are never modified)"""
+    queries, shape = RESPONSE_SECTIONS[field]
+    return shape(data) if shape else data[queries[0]]
+
+def degraded_sections(data: dict, statuses: list[str]) -> list[str]:
+    """Names of the degraded sections, each once (previous_<name> is the same query)"""
+    return [RANKED_SECTIONS.get(name, name) for name, status in zip(data, statuses)
+            if status == "degraded" and not name.startswith("previous_")]
+
+def response_footer(start: date, end: date, granularity: str, degraded: list[str]) -> dict:
+    """Fields closing every dashboard response"""
+    return {
+        "dateRange": {"start": str(start), "end": str(end)},
+        "granularity": granularity,
+        "degraded": degraded,
+        "source": "supabase",
+        "updated_at": datetime.utcnow().isoformat() + "Z"
+    }
+
+async def build_dashboard3(start: date, end: date, granularity: str = "day",
+                           compare: tuple[date, date] = None, deadline: float = None) -> tuple[dict, str]:
+    """
+    Fetch ALL Dashboard3 data for a range from Supabase (see dashboard_sections,
+    ~0.5-0.8 seconds when nothing is cached), plus a "comparison" with the
+    `compare` range (see shape_comparison).
+
+    Answers by `deadline` (REQUEST_DEADLINE_SECONDS from now by default):
+    sections that time out or fail are
+    returned empty and named in "degraded"; only a request where every
+    section failed raises. Returns the response and its cache status.
+    """
+    data, statuses = {}, []
+    async for name, rows, status in dashboard_sections(start, end, granularity, compare, deadline):
+        data[name] = rows
+        statuses.append(status)
+
+    degraded = degraded_sections(data, statuses)
+    if len(degraded) == len(API_QUERIES):
+        raise RuntimeError("every dashboard query failed or timed out")
+    if degraded:
+        DEADLINE_METRICS["degraded_responses"] += 1
+
+    result = {field: shape_section(field, data) for field in RESPONSE_SECTIONS}
+    if compare:
+        result["comparison"] = shape_comparison(data, compare)
+    return {**result, **response_footer(start, end, granularity, degraded)}, response_status(statuses)
+
+
+GRANULARITY_PATTERN = f"^({'|'.join(GRANULARITIES)}|auto)$"
+
+def get_compare_range(start: date, end: date, compare: Optional[str],
+                      compare_start_date: Optional[str], compare_end_date: Optional[str]) -> Optional[tuple[date, date]]:
+    """
+    Comparison range of a request: an explicit one (a missing bound keeps the
+    requested range's length), the same-length range right before it for
+    compare=previous_period, or None
+    """
+    length = end - start
+    try:
+        compare_start, compare_end = parse_date(compare_start_date), parse_date(compare_end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid compare_start_date / compare_end_date, expected YYYY-MM-DD")
+    if compare_start or compare_end:
+        compare_start, compare_end = compare_start or compare_end - length, compare_end or compare_start + length
+        if compare_start > compare_end:
+            raise HTTPException(status_code=400,
+                                detail=f"invalid comparison range {compare_start}:{compare_end}, start is after end")
+        return compare_start, compare_end
+    if compare == "previous_period":
+        return start - length - timedelta(days=1), start - timedelta(days=1)
+    return None
+
+@app.get("/api/dashboard3")
+async def get_dashboard3_data(
+    response: Response,
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    granularity: str = Query("day", pattern=GRANULARITY_PATTERN),
+    points: int = Query(AUTO_MAX_POINTS, ge=2, le=1000),
+    compare: Optional[str] = Query(None, pattern="^previous_period$"),
+    compare_start_date: Optional[str] = Query(None),
+    compare_end_date: Optional[str] = Query(None)
+):
+    """
+    Combined endpoint that fetches ALL Dashboard3 data from Supabase.
+    Served from the section cache when possible (X-Cache: hit | stale | miss),
+    or as an encoded response shared by the workers (X-Cache: shared, see
+    MULTI-WORKER SERVING); concurrent requests for the same range share one
+    computation (see single_flight).
+
+    dailyMetrics has one row per day, or per week / month / quarter / year with
+    `granularity`; "auto" picks the finest one giving at most `points` rows.
+
+    With compare=previous_period (or compare_start_date / compare_end_date) a
+    "comparison" field adds the overview, conversion summary and ranking
+    changes since that range, computed in the same queries as the current values.
+    """
+    start, end = get_date_filter(start_date, end_date)
+    granularity = resolve_granularity(granularity, start, end, points)
+    compare_range = get_compare_range(start, end, compare, compare_start_date, compare_end_date)
+
+    key = dashboard_key(start, end, granularity, compare_range)
+    try:
+        if SHARED_CACHE:
+            body, status = await single_flight(("shared",) + key,
+                                               lambda: shared_dashboard3(start, end, granularity, compare_range))
+            return Response(body, media_type="application/json", headers={"X-Cache": status})
+        result, status = await single_flight(key, lambda: build_dashboard3(start, end, granularity, compare_range))
+    except Overloaded as e:
+        raise overloaded_response(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    response.headers["X-Cache"] = status
+    return result
+
+
+# ==============================================================================
+# STREAMING DASHBOARD3 ENDPOINT - each section as soon as it's ready
+# ==============================================================================
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def stream_event(event: str, payload: dict, stream_format: str) -> str:
+    """One NDJSON line ({"event": ..., ...}) or SSE event"""
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+    return json.dumps(jsonable_encoder({"event": event, **payload})) + "\n"
 
+async def dashboard3_events(start: date, end: date, granularity: str, stream_format: str,
+                            compare: tuple[date, date] = None):
+    """
+    "section" events ({"section": <response field>, "data": ...}) in completion
+    order, each as soon as the catalog queries it needs are done (the
+    "comparison" section once all the compared ones are), then one "complete"
+    event with dateRange, degraded, source and updated_at; or, when admission
+    control refuses a section, an "overloaded" event with retry_after (seconds)
+    """
+    data, statuses = {}, []
+    remaining = {field: set(queries) for field, (queries, _) in RESPONSE_SECTIONS.items()}
+    if compare:
+        remaining["comparison"] = set(COMPARE_QUERIES) | {f"previous_{name}" for name in COMPARE_QUERIES}
+    try:
+        async for name, rows, status in dashboard_sections(start, end, granularity, compare):
+            data[name] = rows
+            statuses.append(status)
+            for field in [field for field, queries in remaining.items() if queries <= data.keys()]:
+                del remaining[field]
+                shaped = shape_comparison(data, compare) if field == "comparison" else shape_section(field, data)
+                yield stream_event("section", {"section": field, "data": shaped}, stream_format)
+    except Overloaded as e:
+        # The status line is already sent
+        yield stream_event("overloaded", {"detail": str(e), "retry_after": e.retry_after}, stream_format)
+        return
+
+    degraded = degraded_sections(data, statuses)
+    if degraded:
+        DEADLINE_METRICS["degraded_responses"] += 1
+    response_status(statuses)
+    yield stream_event("complete", response_footer(start, end, granularity, degraded), stream_format)
+
+
+@app.get("/api/dashboard3/stream")
+async def stream_dashboard3_data(
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    granularity: str = Query("day", pattern=GRANULARITY_PATTERN),
+    points: int = Query(AUTO_MAX_POINTS, ge=2, le=1000),
+    compare: Optional[str] = Query(None, pattern="^previous_period$"),
+    compare_start_date: Optional[str] = Query(None),
+    compare_end_date: Optional[str] = Query(None),
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$")
+):
+    """
+    Same data as /api/dashboard3, streamed section by section (NDJSON lines or
+    Server-Sent Events) so cached and cheap sections render before slow ones.
+    Sections that miss the deadline arrive empty and are named in "degraded".
+    """
+    start, end = get_date_filter(start_date, end_date)
+    granularity = resolve_granularity(granularity, start, end, points)
+    compare_range = get_compare_range(start, end, compare, compare_start_date, compare_end_date)
+    return StreamingResponse(
+        dashboard3_events(start, end, granularity, stream_format, compare_range),
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        # Proxies (nginx, Cloud Run) must pass events through unbuffered
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ==============================================================================
+# BATCH DASHBOARD3 ENDPOINT - several ranges from shared scans
+# ==============================================================================
+# The additive sections (daily_partials.PARTIAL_SECTIONS) missing from the
+# cache for any of the ranges are computed together: their per-day partials
+# are fetched once over the span of those ranges and merged per range, then
+# cached like any section. The rest are per range, as in /api/dashboard3 (and
+# shared with concurrent single-range requests).
+
+BATCH_MAX_RANGES = int(os.getenv("DASHBOARD_BATCH_MAX_RANGES", "8"))
+
+# Counters reported by /api/metrics
+BATCH_METRICS = {
+    "batches": 0,           # batch requests
+    "ranges": 0,            # ranges requested in them
+    "partial_fetches": 0,   # shared scans of daily partials
+    "partial_sections": 0,  # (range, section) pairs merged from them
+    "partial_errors": 0,    # shared scans that failed (sections computed per range instead)
+}
+
+def run_daily_partials(start: date, end: date, names: list[str], deadline: float = None) -> dict:
+    """Fetch daily_partials for a span on one pooled connection, bounded like run_catalog_query"""
+    def run(cursor):
+        set_statement_timeout(cursor, "daily partials", deadline)
+        return fetch_daily_partials(lambda name, *dates: execute_query(cursor, name, *dates), start, end, names)
+    return run_with_connection(run)
+
+async def merge_partial_sections(ranges: list[tuple[date, date]], granularities: list[str], deadline: float):
+    """
+    Cache every uncached additive section of `ranges` from one fetch of their
+    daily partials. On failure nothing is cached, so the sections are then
+    computed per range.
+    """
+    missing = [(start, end, name) for (start, end), granularity in zip(ranges, granularities)
+               for name in API_QUERIES
+               if name in PARTIAL_SECTIONS and bucketed_query(name, granularity) == name
+               and name not in _cache.get((start, end), {})]
+    if not missing:
+        return
+    names = sorted({name for _, _, name in missing})
+    generations = {name: section_generation(name) for name in names}
+    span = (min(start for start, _, _ in missing), max(end for _, end, _ in missing))
+    partial_names = sorted({PARTIAL_SECTIONS[name][0] for name in names})
+
+    try:
+        partials = await single_flight(("partials",) + span + tuple(partial_names), lambda: run_db(
+            lambda: run_daily_partials(*span, partial_names, deadline), deadline))
+    except Exception as e:
+        BATCH_METRICS["partial_errors"] += 1
+        print(f"Daily partials ({span[0]} to {span[1]}) failed: {e}")
+        return
+    BATCH_METRICS["partial_fetches"] += 1
+
+    for start, end, name in missing:
+        rows = PARTIAL_SECTIONS[name][1](partials, start, end)
+        if name in RANKED_SECTIONS:
+            rows = rank_entities(RANKED_SECTIONS[name], rows)
+        store_section(start, end, name, rows, generations[name])
+    BATCH_METRICS["partial_sections"] += len(missing)
+
+def batch_status(statuses: list[str]) -> str:
+    """Cache status of a batch: its worst range's"""
+    return next((status for status in ("miss", "stale") if status in statuses), "hit")
+
+def parse_batch_range(value: str) -> tuple[date, date]:
+    """A "YYYY-MM-DD:YYYY-MM-DD" range of the batch endpoint"""
+    try:
+        start, end = (parse_date(part) for part in value.split(":"))
+    except ValueError:
+        start = end = None
+    if not start or not end or start > end:
+        raise HTTPException(status_code=400, detail=f"invalid range {value!r}, expected YYYY-MM-DD:YYYY-MM-DD")
+    return start, end
+
+
+@app.get("/api/dashboard3/batch")
+async def get_dashboard3_batch(
+    response: Response,
+    ranges: list[str] = Query(..., description="start:end, e.g. 2025-01-01:2025-01-07; repeat for each range"),
+    granularity: str = Query("day", pattern=GRANULARITY_PATTERN),
+    points: int = Query(AUTO_MAX_POINTS, ge=2, le=1000)
+):
+    """
+    /api/dashboard3 for several ranges at once (e.g. every preset of the range
+    picker), keyed by "start:end". The additive sections of all the ranges
+    come from one scan (see merge_partial_sections), so the cost grows much
+    slower than one request per range. A range whose every section failed has
+    an "error" instead.
+    """
+    parsed = {value: parse_batch_range(value) for value in dict.fromkeys(ranges)}
+    if len(parsed) > BATCH_MAX_RANGES:
+        raise HTTPException(status_code=400, detail=f"at most {BATCH_MAX_RANGES} ranges per batch")
+    keys = {f"{start}:{end}": (start, end) for start, end in parsed.values()}
+    granularities = {key: resolve_granularity(granularity, start, end, points) for key, (start, end) in keys.items()}
+    BATCH_METRICS["batches"] += 1
+    BATCH_METRICS["ranges"] += len(keys)
+
+    deadline = time.monotonic() + REQUEST_DEADLINE_SECONDS
+    await merge_partial_sections(list(keys.values()), list(granularities.values()), deadline)
+
+    async def build(key: str) -> tuple[dict, str]:
+        start, end = keys[key]
+        return await single_flight(dashboard_key(start, end, granularities[key]),
+                                   lambda: build_dashboard3(start, end, granularities[key], deadline=deadline))
+
+    results = await asyncio.gather(*[build(key) for key in keys], return_exceptions=True)
+    if all(isinstance(result, Exception) for result in results):
+        overloaded = [result for result in results if isinstance(result, Overloaded)]
+        if overloaded:
+            raise overloaded_response(max(overloaded, key=lambda error: error.retry_after))
+        raise HTTPException(status_code=500, detail=str(results[0]))
+
+    response.headers["X-Cache"] = batch_status([result[1] for result in results if not isinstance(result, Exception)])
+    return {
+        "ranges": {key: {"error": str(result)} if isinstance(result, Exception) else result[0]
+                   for key, result in zip(keys, results)},
+        "source": "supabase",
+        "updated_at": datetime.utcnow().isoformat() + "Z"
+    }
+
+
+# ==============================================================================
+# TRAFFIC DAILY STATS ENDPOINT
+# ==============================================================================
+
+@app.get("/api/traffic-daily-stats")
+async def get_traffic_daily_stats(
+    response: Response,
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    granularity: str = Query("day", pattern=GRANULARITY_PATTERN),
+    points: int = Query(AUTO_MAX_POINTS, ge=2, le=1000)
+):
+    """
+    Traffic per source / medium over time, per day or bucketed like
+    /api/dashboard3's dailyMetrics (rates weighted by sessions / visitors).
+    """
+    start, end = get_date_filter(start_date, end_date)
+    granularity = resolve_granularity(granularity, start, end, points)
+    deadline = time.monotonic() + REQUEST_DEADLINE_SECONDS
+
+    try:
+        rows, status = await asyncio.wait_for(
+            cached_section(bucketed_query("traffic_daily_stats", granularity), start, end, deadline),
+            timeout=REQUEST_DEADLINE_SECONDS)
+    except (TimeoutError, QueryCanceled):
+        raise HTTPException(status_code=504, detail="traffic_daily_stats timed out")
+    except Overloaded as e:
+        raise overloaded_response(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    response.headers["X-Cache"] = status
+    return {
+        "trafficDailyStats": rows,
+        "dateRange": {"start": str(start), "end": str(end)},
+        "granularity": granularity,
+        "source": "supabase",
+        "updated_at": datetime.utcnow().isoformat() + "Z"
+    }
+
 
 # ==============================================================================
 # SYNC STATUS ENDPOINT
@@ -582,31 +1541,82 @@ async def get_dashboard3_data(
 async def get_sync_status():
     """Get the last sync status from Supabase"""
     try:
-        result = run_pg_query("""
+        result = await run_db(lambda: run_pg_query("""
             SELECT table_name, last_synced_at, rows_synced, sync_duration_seconds, status
             FROM sync_metadata
             ORDER BY last_synced_at DESC
-        """)
+        """), time.monotonic() + REQUEST_DEADLINE_SECONDS)
         return {
             "syncStatus": result,
             "updated_at": datetime.utcnow().isoformat() + "Z"
         }
+    except Overloaded as e:
+        raise overloaded_response(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==============================================================================
+# METRICS
+# ==============================================================================
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    Request coalescing, result cache, batch, session store, admission control,
+    deadline counters and startup timings since the process started (of the
+    worker answering)
+    """
+    return {
+        "coalescing": {**METRICS, "in_flight": len(_inflight)},
+        "cache": {
+            **CACHE_METRICS,
+            "ranges": len(_cache),
+            "sections": sum(len(sections) for sections in _cache.values()),
+            "generations": dict(_generations),
+            "watermark": _watermark["value"],
+            "background_refreshes": len(_background),
+        },
+        "listener": {**_listener, "enabled": SYNC_LISTEN, "channel": SYNC_CHANNEL},
+        "batch": {**BATCH_METRICS, "max_ranges": BATCH_MAX_RANGES},
+        "session_store": {**(session_store.stats() if SESSION_STORE else {}), "enabled": SESSION_STORE},
+        "startup": {**STARTUP, "pool_warm": DB_POOL_WARM, "waiting_for": startup_pending()},
+        "workers": {"count": WORKERS, "pid": os.getpid(),
+                    # Reported only: a scrape must not take leadership (is_leader would)
+                    "leader": not SHARED_CACHE or shared_cache.is_leader(),
+                    "shared_cache": {**(await run_shared(shared_cache.stats) if SHARED_CACHE else {}),
+                                     "enabled": SHARED_CACHE}},
+        "admission": {**ADMISSION_METRICS, **db_limiter.stats(), "enabled": DB_ADMISSION,
+                      "queue_size": DB_QUEUE_SIZE, "latency_target_ms": DB_LATENCY_TARGET_MS},
+        "deadlines": {
+            **DEADLINE_METRICS,
+            "query_timeout_ms": QUERY_TIMEOUT_MS,
+            "request_deadline_seconds": REQUEST_DEADLINE_SECONDS,
+        },
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+
 # ==============================================================================
 # HEALTH & INFO
 # ==============================================================================
 
+# How long /health waits for its database check before answering "busy"
+HEALTH_TIMEOUT_SECONDS = 2.0
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     try:
-        # Test Supabase connection
-        run_pg_query("SELECT 1")
+        # Test Supabase connection, off the event loop and in line with the
+        # dashboard's database work (the pool blocks while it is pre-warmed)
+        await asyncio.wait_for(run_db(lambda: run_pg_query("SELECT 1"),
+                                      time.monotonic() + HEALTH_TIMEOUT_SECONDS),
+                               HEALTH_TIMEOUT_SECONDS)
         db_status = "connected"
-    except:
+    except (Overloaded, TimeoutError, asyncio.TimeoutError, PoolError):
+        db_status = "busy"
+    except Exception:
         db_status = "disconnected"
 
     return {
@@ -616,6 +1626,20 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness probe: 503 until the instance is warm (see COLD START), then 200"""
+    ready = STARTUP["ready"] is not None
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "warming",
+        "waiting_for": startup_pending(),
+        "startup": STARTUP,
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+
 @app.get("/")
 async def root():
     return {
@@ -631,8 +1655,13 @@ async def root():
         ],
         "endpoints": {
             "main": "/api/dashboard3",
+            "stream": "/api/dashboard3/stream?format=ndjson|sse",
+            "batch": "/api/dashboard3/batch?ranges=start:end&ranges=...",
+            "traffic_daily_stats": "/api/traffic-daily-stats",
             "sync_status": "/api/sync-status",
-            "health": "/health"
+            "metrics": "/api/metrics",
+            "health": "/health",
+            "ready": "/ready"
         },
         "data_refresh": "Daily at 8 PM IST via GitHub Actions (BigQuery → Supabase)"
     }
@@ -0,0 +1,318 @@
+"""
+Ranking Engine - scores, ranks and tiers for the dashboard's entity rankings
+(projects, skills, domains, experiences) in one vectorized NumPy pass.
+
+The inputs are the small per-entity aggregates (one row per project, skill, ...)
+returned by the *_aggregates catalog queries or merged from the gist's daily
+partials. For each ranking this computes, with Postgres semantics so the output
+matches the SQL it replaces value for value:
+
+    score        weighted sum of aggregate columns (integer weights keep bigint math)
+    rank         ROW_NUMBER() OVER (ORDER BY score DESC)
+    percentile   ROUND((PERCENT_RANK() OVER (ORDER BY score) * 100)::numeric, 1)
+    tiers        CASE chains on score >= PERCENTILE_CONT(q) or on rank <= n
+
+Percentile thresholds are taken over every aggregated row, while rank and
+percent rank only cover rows passing the ranking's filter (e.g.
+total_interactions > 0), as in the SQL. Rows with tied scores keep their input
+order.
+
+Weights and tier thresholds live in RANKINGS and can be overridden with a JSON
+file (RANKING_OVERRIDES=path), e.g.
+    {"project_rankings": {"weights": {"total_clicks": 6},
+                          "tiers": {"performance_tier": {"thresholds": [[0.8, "top_performer"],
+                                                                        [0.5, "above_average"]]}}}}
+
+NumPy is imported on the first ranking rather than with the module, so it stays
+off the API's cold-start path (main.py warms it up alongside the connections).
+"""
+
+from __future__ import annotations
+
+import os
+import json
+from decimal import Decimal, ROUND_HALF_UP
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# ============================================================================
+# RANKING DEFINITIONS
+# ============================================================================
+# weights     score = sum(column * weight); None ranks on the score column as is
+# filter      (column, minimum): only rows with column > minimum are ranked
+# tiers       field -> {"by": "percentile" | "rank", "thresholds": [[value, label], ...],
+#             "default": label}; the first threshold met wins, like a CASE
+# fields      output columns, in order
+
+RANKINGS = {
+    # /api/dashboard3
+    "project_rankings": {
+        "weights": {"total_clicks": 5, "total_expands": 3, "total_link_clicks": 4, "total_views": 1},
+        "score": "engagement_score",
+        "rank": "overall_rank",
+        "percentile": "engagement_percentile",
+        "filter": None,
+        "tiers": {
+            "performance_tier": {"by": "percentile", "thresholds": [[0.75, "top_performer"], [0.5, "above_average"]],
+                                 "default": "below_average"},
+            "recommended_position": {"by": "rank", "thresholds": [[3, "featured"]], "default": "standard"},
+        },
+        "limit": 10,
+        "fields": ["project_id", "project_title", "project_category", "total_views", "total_unique_viewers",
+                   "total_clicks", "total_expands", "total_link_clicks", "total_github_clicks",
+                   "total_demo_clicks", "engagement_score", "overall_rank", "performance_tier",
+                   "recommended_position", "engagement_percentile"],
+    },
+    "tech_demand": {
+        "weights": None,
+        "score": "weighted_score",
+        "rank": "demand_rank",
+        "percentile": "demand_percentile",
+        "filter": ("weighted_score", 0),
+        "tiers": {
+            "demand_tier": {"by": "percentile", "thresholds": [[0.75, "high_demand"], [0.25, "moderate_demand"]],
+                            "default": "low_demand"},
+            "learning_priority": {"by": "percentile", "thresholds": [[0.75, "master_this"], [0.5, "strengthen"]],
+                                  "default": "maintain"},
+        },
+        "limit": None,
+        "fields": ["skill_name", "total_interactions", "total_unique_users",
+                   "demand_rank", "demand_percentile", "demand_tier", "learning_priority"],
+    },
+    "domain_rankings": {
+        "weights": None,
+        "score": "total_interest_score",
+        "rank": "interest_rank",
+        "percentile": "interest_percentile",
+        "filter": ("total_interactions", 0),
+        "tiers": {
+            "demand_tier": {"by": "percentile", "thresholds": [[0.75, "high_demand"], [0.25, "moderate_demand"]],
+                            "default": "low_demand"},
+            "portfolio_recommendation": {"by": "percentile",
+                                         "thresholds": [[0.75, "primary_strength"], [0.5, "secondary_strength"]],
+                                         "default": "explore_opportunities"},
+        },
+        "limit": None,
+        "fields": ["domain", "total_explicit_interest", "total_implicit_interest", "total_interactions",
+                   "total_unique_users", "total_interest_score", "interest_rank", "interest_percentile",
+                   "demand_tier", "portfolio_recommendation"],
+    },
+    "experience_rankings": {
+        "weights": None,
+        "score": "total_interactions",
+        "rank": "interest_rank",
+        "percentile": "interest_percentile",
+        "filter": ("total_interactions", 0),
+        "tiers": {
+            "role_attractiveness": {"by": "percentile",
+                                    "thresholds": [[0.75, "most_attractive_role"], [0.25, "moderately_attractive"]],
+                                    "default": "needs_highlighting"},
+            "positioning_suggestion": {"by": "percentile",
+                                       "thresholds": [[0.75, "lead_with_this"], [0.5, "feature_prominently"]],
+                                       "default": "include_for_completeness"},
+        },
+        "limit": None,
+        "fields": ["experience_id", "experience_title", "company", "total_interactions", "total_unique_users",
+                   "total_sessions", "interest_rank", "interest_percentile", "role_attractiveness",
+                   "positioning_suggestion"],
+    },
+
+    # Gist (update_dashboard_gist.py): rank-based tiers for skills, domains and experiences
+    "gist_tech_demand": {
+        "weights": None,
+        "score": "interest_score",
+        "rank": "demand_rank",
+        "percentile": "demand_percentile",
+        "filter": None,
+        "tiers": {
+            "demand_tier": {"by": "rank", "thresholds": [[5, "high_demand"], [15, "moderate_demand"]],
+                            "default": "niche"},
+            "learning_priority": {"by": "rank", "thresholds": [[5, "maintain_expertise"], [10, "showcase_more"]],
+                                  "default": "consider_highlighting"},
+        },
+        "limit": None,
+        "fields": ["skill_name", "total_interactions", "total_unique_users",
+                   "demand_rank", "demand_percentile", "demand_tier", "learning_priority"],
+    },
+    "gist_domain_rankings": {
+        "weights": None,
+        "score": "total_interest_score",
+        "rank": "interest_rank",
+        "percentile": "interest_percentile",
+        "filter": None,
+        "tiers": {
+            "demand_tier": {"by": "rank", "thresholds": [[3, "high_demand"], [7, "moderate_demand"]],
+                            "default": "niche"},
+            "portfolio_recommendation": {"by": "rank", "thresholds": [[3, "feature_prominently"]],
+                                         "default": "maintain_presence"},
+        },
+        "limit": None,
+        "fields": ["domain", "total_explicit_interest", "total_implicit_interest", "total_interactions",
+                   "total_unique_users", "total_interest_score", "interest_rank", "interest_percentile",
+                   "demand_tier", "portfolio_recommendation"],
+    },
+    "gist_experience_rankings": {
+        "weights": None,
+        "score": "total_interactions",
+        "rank": "interest_rank",
+        "percentile": "interest_percentile",
+        "filter": None,
+        "tiers": {
+            "role_attractiveness": {"by": "rank", "thresholds": [[2, "highly_attractive"]],
+                                    "default": "moderately_attractive"},
+            "positioning_suggestion": {"by": "rank", "thresholds": [[2, "feature_at_top"]],
+                                       "default": "maintain_position"},
+        },
+        "limit": None,
+        "fields": ["experience_id", "experience_title", "company", "total_interactions", "total_unique_users",
+                   "total_sessions", "interest_rank", "interest_percentile", "role_attractiveness",
+                   "positioning_suggestion"],
+    },
+}
+RANKINGS["gist_project_rankings"] = RANKINGS["project_rankings"]
+
+# /api/dashboard3 rankings and the catalog query (dashboard_queries.py) each is ranked from
+API_RANKINGS = {
+    "project_rankings": "project_aggregates",
+    "tech_demand": "skill_aggregates",
+    "domain_rankings": "domain_aggregates",
+    "experience_rankings": "experience_aggregates",
+}
+
+
+def load_overrides(path: str = None):
+    """Merge weights and tier thresholds from a JSON file into RANKINGS"""
+    path = path or os.getenv("RANKING_OVERRIDES")
+    if not path:
+        return
+    with open(path) as f:
+        overrides = json.load(f)
+    for name, override in overrides.items():
+        ranking = RANKINGS[name]
+        if "weights" in override:
+            ranking["weights"] = {**(ranking["weights"] or {}), **override["weights"]}
+        for field, tier in override.get("tiers", {}).items():
+            ranking["tiers"][field] = {**ranking["tiers"][field], **tier}
+
+
+load_overrides()
+
+
+# ============================================================================
+# POSTGRES SEMANTICS
+# ============================================================================
+
+def pg_round(value, places: int):
+    """ROUND(value::numeric, places) as Postgres computes it (float8 → numeric keeps 15 significant digits)"""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        value = Decimal(f"{value:.15g}")
+    return Decimal(value).quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP)
+
+
+def percentile_cont(values: np.ndarray, fraction: float) -> float:
+    """PERCENTILE_CONT(fraction) WITHIN GROUP (ORDER BY value::float8)"""
+    import numpy as np
+
+    ordered = np.sort(values.astype(np.float64))
+    position = fraction * (len(ordered) - 1)
+    lower, upper = int(np.floor(position)), int(np.ceil(position))
+    if lower == upper:
+        return float(ordered[lower])
+    # Same operation order as Postgres' float8 interpolation, unlike np.percentile
+    return float(ordered[lower] + (position - lower) * (ordered[upper] - ordered[lower]))
+
+
+def percent_ranks(values: np.ndarray) -> np.ndarray:
+    """PERCENT_RANK() OVER (ORDER BY value): rows strictly below / (n - 1)"""
+    import numpy as np
+
+    if len(values) <= 1:
+        return np.zeros(len(values))
+    below = np.searchsorted(np.sort(values), values, side="left")
+    return below / (len(values) - 1)
+
+
+def row_numbers(values: np.ndarray) -> np.ndarray:
+    """ROW_NUMBER() OVER (ORDER BY value DESC), ties in input order"""
+    import numpy as np
+
+    order = np.argsort(-values, kind="stable")
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[order] = np.arange(1, len(values) + 1)
+    return ranks
+
+
+def column(rows: list[dict], name: str) -> np.ndarray:
+    """One aggregate column as an int64 (or float64) array"""
+    import numpy as np
+
+    values = np.asarray([row[name] for row in rows])
+    if values.dtype == object:  # numeric/Decimal columns
+        values = values.astype(np.float64)
+    return values
+
+
+# ============================================================================
+# RANKING
+# ============================================================================
+
+def rank_entities(name: str, rows: list[dict], all_rows: bool = False) -> list[dict]:
+    """
+    Score, rank and tier aggregated rows using the RANKINGS[name] definition;
+    all_rows skips the ranking's limit (e.g. to look up any entity's previous rank)
+    """
+    import numpy as np
+
+    ranking = RANKINGS[name]
+    if not rows:
+        return []
+
+    weights = ranking["weights"]
+    if weights:
+        scores = sum(column(rows, field) * weight for field, weight in weights.items())
+    else:
+        scores = column(rows, ranking["score"])
+
+    # Percentile thresholds come from every row, ranks only from the ranked ones
+    cutoffs = {
+        fraction: percentile_cont(scores, fraction)
+        for tier in ranking["tiers"].values() if tier["by"] == "percentile"
+        for fraction, _ in tier["thresholds"]
+    }
+    if ranking["filter"]:
+        filter_field, minimum = ranking["filter"]
+        keep = np.flatnonzero(column(rows, filter_field) > minimum)
+        rows, scores = [rows[i] for i in keep], scores[keep]
+        if not rows:
+            return []
+
+    ranks = row_numbers(scores)
+    percentiles = percent_ranks(scores) * 100
+    tiers = {}
+    for field, tier in ranking["tiers"].items():
+        if tier["by"] == "percentile":
+            conditions = [scores >= cutoffs[fraction] for fraction, _ in tier["thresholds"]]
+        else:
+            conditions = [ranks <= limit for limit, _ in tier["thresholds"]]
+        labels = [label for _, label in tier["thresholds"]]
+        tiers[field] = np.select(conditions, labels, default=tier["default"]).tolist()
+
+    order = np.argsort(ranks)
+    if ranking["limit"] and not all_rows:
+        order = order[:ranking["limit"]]
+
+    score_values, rank_values, percentile_values = scores.tolist(), ranks.tolist(), percentiles.tolist()
+    ranked = []
+    for i in order.tolist():
+        row = dict(rows[i])
+        row[ranking["score"]] = score_values[i]
+        row[ranking["rank"]] = rank_values[i]
+        row[ranking["percentile"]] = pg_round(percentile_values[i], 1)
+        for field in tiers:
+            row[field] = tiers[field][i]
+        ranked.append({field: row[field] for field in ranking["fields"]})
+    return ranked
@@ -0,0 +1,1150 @@
+"""
+Session Store - the dashboard tables in memory, as columns
+Optional engine behind the dashboard sections (DASHBOARD_SESSION_STORE=on, see
+main.py): sessions, the *_daily_stats tables and the other tables the catalog
+queries read are loaded once and the sections computed with vectorized NumPy
+instead of a round trip to Supabase. The gist publisher computes from the
+same store loaded from a snapshot file (load_snapshot(), written by
+supabase/snapshot.py) without touching the database.
+
+Layout of a table:
+    days         each row's day (date ordinal), rows sorted by day then id, so a
+                 range is the slice between two binary searches (0 for the
+                 undated tables, which are always read whole)
+    integers     int64 arrays (NULL stored as 0) with a validity mask
+    floats       float64 arrays (NULL stored as NaN)
+    booleans     int8 arrays: 1 / 0, -1 for NULL
+    strings      int32 codes (-1 for NULL) into a dictionary sorted in the
+                 database's collation, so MAX(text) is the largest code
+    records      whole rows, for the small tables read with SELECT *
+
+Results match the catalog queries (dashboard_queries.py) value for value:
+ROUND(x::numeric, n) comes out as the same Decimal, numeric division keeps the
+scale Postgres gives it (pg_div), float sums add up in row order. Ties in
+ORDER BY ... LIMIT, which the SQL leaves unspecified, are broken by group key.
+
+Refresh: mark_dirty() flags the tables a sync changed; refresh() then compares
+per-day signatures (row count, sum of ids, latest materialized_at) with the
+database's and only re-reads the days whose signature changed.
+"""
+
+import sys
+import json
+import time
+import threading
+from datetime import date, datetime
+from decimal import Decimal, localcontext
+from pathlib import Path
+import numpy as np
+from ranking_engine import pg_round
+from daily_partials import SECTION_SUMS, SECTION_AVERAGES, section_ranking_row, rank_sections
+
+# Table -> date column (None: undated) and the columns kept, by type
+STORE_TABLES = {
+    "sessions": {
+        "date": "session_date",
+        "integers": ["session_id", "page_views", "session_duration_seconds", "engagement_score",
+                     "conversions_count", "projects_clicked_count", "hour_of_day", "session_day_of_week"],
+        "floats": [],
+        "booleans": ["is_bounce", "is_engaged"],
+        "strings": ["user_pseudo_id", "device_category", "os", "browser", "country", "city",
+                    "traffic_source", "traffic_medium"],
+    },
+    "project_daily_stats": {
+        "date": "event_date",
+        "integers": ["views", "unique_viewers", "clicks", "expands", "link_clicks", "github_clicks", "demo_clicks"],
+        "floats": [],
+        "booleans": [],
+        "strings": ["project_id", "project_title", "project_category"],
+    },
+    "section_daily_stats": {
+        "date": "event_date",
+        "integers": SECTION_SUMS + ["max_scroll_milestone"],
+        "floats": SECTION_AVERAGES,
+        "booleans": [],
+        "strings": ["section_id"],
+    },
+    "skill_daily_stats": {
+        "date": "event_date",
+        "integers": ["clicks", "hovers", "unique_users", "weighted_interest_score"],
+        "floats": [],
+        "booleans": [],
+        "strings": ["skill_name"],
+    },
+    "domain_daily_stats": {
+        "date": "event_date",
+        "integers": ["explicit_interest_signals", "implicit_interest_from_views", "total_domain_interactions",
+                     "unique_interested_users", "domain_interest_score"],
+        "floats": [],
+        "booleans": [],
+        "strings": ["domain"],
+    },
+    "experience_daily_stats": {
+        "date": "event_date",
+        "integers": ["total_interactions", "unique_interested_users", "unique_sessions"],
+        "floats": [],
+        "booleans": [],
+        "strings": ["experience_id", "experience_title", "company"],
+    },
+    "daily_metrics": {
+        "date": "session_date",
+        "integers": ["total_sessions", "unique_visitors", "desktop_sessions", "mobile_sessions", "tablet_sessions"],
+        "floats": ["engagement_rate", "bounce_rate", "avg_session_duration_sec"],
+        "booleans": [],
+        "strings": [],
+    },
+    "conversion_funnel": {
+        "date": "event_date",
+        "integers": ["total_cta_views", "total_cta_clicks", "contact_form_starts", "contact_form_submissions",
+                     "resume_downloads", "social_clicks", "outbound_clicks", "publication_clicks", "content_copies"],
+        "floats": [],
+        "booleans": [],
+        "strings": [],
+    },
+    "visitor_insights": {
+        "date": None,
+        "integers": ["cta_clicks", "form_submissions", "social_clicks", "resume_downloads"],
+        "floats": [],
+        "booleans": [],
+        "strings": ["user_pseudo_id"],
+    },
+    "recommendation_performance": {
+        "date": None,
+        "records": True,
+    },
+}
+
+_tables: dict[str, dict] = {}   # table -> columns (replaced whole on refresh, never modified)
+_dirty: set = set()             # tables changed since they were read
+_lock = threading.Lock()
+STORE_METRICS = {
+    "source": None,               # "database" or the snapshot loaded
+    "loaded_at": None,
+    "refreshed_at": None,
+    "refreshes": 0,
+    "days_reloaded": 0,
+    "last_refresh_seconds": None,
+}
+
+
+# ============================================================================
+# LOADING
+# ============================================================================
+
+def table_columns(table: str) -> list[str]:
+    """Columns a table is read with (None: all of them)"""
+    config = STORE_TABLES[table]
+    if config.get("records"):
+        return None
+    return ["id"] + [config["date"]] * bool(config["date"]) + \
+        config["integers"] + config["floats"] + config["booleans"] + config["strings"]
+
+
+def fetch_rows(cursor, table: str, days: list[date] = None) -> list[dict]:
+    """A table's stored columns, for every day or just `days` (rows without a day are in no range)"""
+    date_column = STORE_TABLES[table]["date"]
+    columns = table_columns(table)
+    where = ""
+    if date_column:
+        where = f"WHERE {date_column} = ANY(%(days)s)" if days is not None else f"WHERE {date_column} IS NOT NULL"
+    cursor.execute(f"SELECT {', '.join(columns or ['*'])} FROM {table} {where} "
+                   f"ORDER BY {date_column + ', ' if date_column else ''}id", {"days": days})
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def fetch_signatures(cursor, table: str) -> dict:
+    """Day -> (rows, sum of ids, latest materialized_at); changes whenever a sync rewrites the day"""
+    date_column = STORE_TABLES[table]["date"]
+    if date_column is None:
+        cursor.execute(f"SELECT COUNT(*) AS row_count, SUM(id) AS id_sum, MAX(materialized_at) AS latest FROM {table}")
+        return {None: tuple(cursor.fetchone().values())}
+    cursor.execute(f"""
+        SELECT {date_column} AS day, COUNT(*) AS row_count, SUM(id) AS id_sum, MAX(materialized_at) AS latest
+        FROM {table} WHERE {date_column} IS NOT NULL GROUP BY {date_column}
+    """)
+    return {row["day"]: (row["row_count"], row["id_sum"], row["latest"]) for row in cursor.fetchall()}
+
+
+def row_signatures(table: str, rows: list[dict]) -> dict:
+    """fetch_signatures() computed from full rows (of a snapshot)"""
+    date_column = STORE_TABLES[table]["date"]
+    days = {}
+    for row in rows:
+        days.setdefault(row[date_column] if date_column else None, []).append(row)
+    if date_column is None and not days:
+        return {None: (0, None, None)}
+    return {day: (len(day_rows), sum(row["id"] for row in day_rows),
+                  max((row["materialized_at"] for row in day_rows if row["materialized_at"] is not None),
+                      default=None))
+            for day, day_rows in days.items()}
+
+
+def collation_order(cursor, values: set) -> list[str]:
+    """Strings sorted in the database's collation (what MAX(text) follows)"""
+    cursor.execute("SELECT v FROM unnest(%s::text[]) AS v ORDER BY v", (list(values),))
+    return [row["v"] for row in cursor.fetchall()]
+
+
+def build_table(collate, table: str, rows: list[dict], kept: dict = None, keep: np.ndarray = None) -> dict:
+    """
+    Columns of `rows`, merged with the rows of an existing table (`kept`)
+    selected by the `keep` mask; dictionaries are rebuilt over both, in the
+    order collate(column, values) returns
+    """
+    config = STORE_TABLES[table]
+    columns = {"ids": np.array([row["id"] for row in rows], dtype=np.int64),
+               "days": np.array([row[config["date"]].toordinal() if config["date"] else 0 for row in rows],
+                                dtype=np.int32)}
+    if config.get("records"):
+        return {"columns": columns, "dictionaries": {}, "records": rows}
+    for name in config["integers"]:
+        values = [row[name] for row in rows]
+        columns[name] = np.array([0 if v is None else v for v in values], dtype=np.int64)
+        columns[f"{name}_valid"] = np.array([v is not None for v in values], dtype=bool)
+    for name in config["floats"]:
+        columns[name] = np.array([np.nan if row[name] is None else row[name] for row in rows], dtype=np.float64)
+    for name in config["booleans"]:
+        columns[name] = np.array([-1 if row[name] is None else int(row[name]) for row in rows], dtype=np.int8)
+
+    dictionaries = {}
+    for name in config["strings"]:
+        values = [row[name] for row in rows]
+        previous = kept["dictionaries"][name] if kept else []
+        dictionary = collate(name, {v for v in values if v is not None} | set(previous))
+        index = {value: code for code, value in enumerate(dictionary)}
+        columns[name] = np.array([index[v] if v is not None else -1 for v in values], dtype=np.int32)
+        if kept:
+            # Old codes -> new ones; -1 (NULL) stays -1 through the appended entry
+            remap = np.array([index[value] for value in previous] + [-1], dtype=np.int32)
+            kept_codes = kept["columns"][name][keep]
+            columns[name] = np.concatenate([remap[kept_codes], columns[name]])
+        dictionaries[name] = dictionary
+
+    if kept:
+        for name in columns:
+            if name not in config["strings"]:
+                columns[name] = np.concatenate([kept["columns"][name][keep], columns[name]])
+        order = np.lexsort((columns["ids"], columns["days"]))
+        columns = {name: values[order] for name, values in columns.items()}
+
+    return {"columns": columns, "dictionaries": dictionaries}
+
+
+def install(tables: dict, source: str, start_time: float):
+    """Replace the store's tables with freshly loaded ones"""
+    with _lock:
+        _tables.clear()
+        _tables.update(tables)
+    STORE_METRICS.update(source=source, loaded_at=datetime.utcnow().isoformat() + "Z",
+                         last_refresh_seconds=round(time.perf_counter() - start_time, 3))
+
+
+def load(cursor):
+    """Read every store table in full (one snapshot)"""
+    start_time = time.perf_counter()
+    with _lock:
+        _dirty.clear()  # changes from now on are marked again after the snapshot
+    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+    collate = lambda column, values: collation_order(cursor, values)
+    tables = {}
+    for table in STORE_TABLES:
+        tables[table] = build_table(collate, table, fetch_rows(cursor, table))
+        tables[table]["signatures"] = fetch_signatures(cursor, table)
+    install(tables, "database", start_time)
+
+
+def load_snapshot(path) -> dict:
+    """
+    Load every store table from a snapshot directory (supabase/snapshot.py;
+    needs pyarrow) instead of the database; returns its manifest. The
+    signatures come from the rows, so refresh() can bring it up to date.
+    """
+    import pyarrow.parquet as pq
+
+    start_time = time.perf_counter()
+    path = Path(path)
+    manifest = json.loads((path / "manifest.json").read_text())
+    tables = {}
+    for table, config in STORE_TABLES.items():
+        rows = pq.read_table(path / manifest["tables"][table]["file"]).to_pylist()
+        if config["date"]:
+            rows = [row for row in rows if row[config["date"]] is not None]
+        # The snapshot records each text column's values in the database's collation
+        ranks = {column: {value: rank for rank, value in enumerate(values)}
+                 for column, values in manifest["collations"].get(table, {}).items()}
+        collate = lambda column, values: sorted(values, key=ranks[column].__getitem__)
+        fields = table_columns(table)
+        tables[table] = build_table(collate, table, [{field: row[field] for field in fields} for row in rows]
+                                    if fields else rows)
+        tables[table]["signatures"] = row_signatures(table, rows)
+    with _lock:
+        _dirty.clear()
+    install(tables, str(path), start_time)
+    return manifest
+
+
+def mark_dirty(tables: list[str] = None):
+    """Flag store tables a sync changed (every one when None) for the next refresh()"""
+    with _lock:
+        _dirty.update(STORE_TABLES if tables is None else set(tables) & set(STORE_TABLES))
+
+
+def refresh(cursor) -> int:
+    """Re-read the days of the dirty tables whose signature changed; returns how many days"""
+    if not _tables:
+        load(cursor)
+        return 0
+    start_time = time.perf_counter()
+    with _lock:
+        tables = sorted(_dirty)
+        _dirty.clear()
+    try:
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        collate = lambda column, values: collation_order(cursor, values)
+        reloaded = 0
+        for table in tables:
+            current = _tables[table]
+            signatures = fetch_signatures(cursor, table)
+            changed = [day for day in set(signatures) | set(current["signatures"])
+                       if signatures.get(day) != current["signatures"].get(day)]
+            if not changed:
+                continue
+            if STORE_TABLES[table]["date"] is None:
+                updated = build_table(collate, table, fetch_rows(cursor, table))
+            else:
+                keep = ~np.isin(current["columns"]["days"], [day.toordinal() for day in changed])
+                updated = build_table(collate, table, fetch_rows(cursor, table, changed), current, keep)
+            updated["signatures"] = signatures
+            _tables[table] = updated
+            reloaded += len(changed)
+    except Exception:
+        mark_dirty(tables)
+        raise
+    STORE_METRICS.update(refreshed_at=datetime.utcnow().isoformat() + "Z", refreshes=STORE_METRICS["refreshes"] + 1,
+                         days_reloaded=STORE_METRICS["days_reloaded"] + reloaded,
+                         last_refresh_seconds=round(time.perf_counter() - start_time, 3))
+    return reloaded
+
+
+def is_loaded() -> bool:
+    return bool(_tables)
+
+
+def is_stale(name: str) -> bool:
+    """Whether a section's tables changed since they were read"""
+    return bool(_dirty & set(STORE_SECTIONS[name][0]))
+
+
+def day_range(table: str):
+    """(first, last) day of a dated table's rows, None when it has none"""
+    days = _tables[table]["columns"]["days"]
+    return (date.fromordinal(int(days[0])), date.fromordinal(int(days[-1]))) if len(days) else None
+
+
+def memory_bytes() -> dict:
+    """Bytes held per table: column arrays plus dictionary strings (and records)"""
+    return {
+        table: sum(values.nbytes for values in data["columns"].values()) +
+               sum(sys.getsizeof(dictionary) + sum(sys.getsizeof(value) for value in dictionary)
+                   for dictionary in data["dictionaries"].values()) +
+               sum(sys.getsizeof(row) for row in data.get("records", []))
+        for table, data in _tables.items()
+    }
+
+
+def stats() -> dict:
+    """Rows, memory footprint and refresh counters, for /api/metrics"""
+    memory = memory_bytes()
+    return {
+        **STORE_METRICS,
+        "loaded": is_loaded(),
+        "rows": {table: len(data["columns"]["ids"]) for table, data in _tables.items()},
+        "memory_bytes": memory,
+        "total_memory_bytes": sum(memory.values()),
+        "dirty": sorted(_dirty),
+    }
+
+
+# ============================================================================
+# AGGREGATION HELPERS
+# ============================================================================
+
+def range_columns(table: str, start: date, end: date) -> tuple[dict, dict]:
+    """(columns, dictionaries) of a table's rows in [start, end]"""
+    data = _tables[table]
+    days = data["columns"]["days"]
+    rows = slice(np.searchsorted(days, start.toordinal(), "left"), np.searchsorted(days, end.toordinal(), "right"))
+    return {name: values[rows] for name, values in data["columns"].items()}, data["dictionaries"]
+
+
+def group(*keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(distinct key rows sorted, group index of every row): GROUP BY keys, NULL codes included"""
+    if not len(keys[0]):
+        return np.empty((0, len(keys)), dtype=np.int64), np.empty(0, dtype=np.int64)
+    groups, inverse = np.unique(np.stack(keys, axis=1), axis=0, return_inverse=True)
+    return groups, inverse.reshape(-1)
+
+
+def count_by(inverse: np.ndarray, groups: int, mask: np.ndarray = None) -> np.ndarray:
+    """COUNT(*) [FILTER (WHERE mask)] per group"""
+    return np.bincount(inverse if mask is None else inverse[mask], minlength=groups)
+
+
+def distinct_by(inverse: np.ndarray, groups: int, values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """COUNT(DISTINCT values) per group over the rows in mask (non-NULL values)"""
+    pairs = np.unique(np.stack([inverse[mask], values[mask].astype(np.int64)], axis=1), axis=0)
+    return np.bincount(pairs[:, 0], minlength=groups)
+
+
+def sum_by(inverse: np.ndarray, groups: int, values: np.ndarray) -> np.ndarray:
+    """Exact per-group sum of an integer (or, in row order, float) array"""
+    totals = np.zeros(groups, dtype=values.dtype)
+    np.add.at(totals, inverse, values)
+    return totals
+
+
+def max_by(inverse: np.ndarray, groups: int, values: np.ndarray, mask: np.ndarray, empty: int = -1) -> np.ndarray:
+    """Per-group maximum of the rows in mask, `empty` where a group has none"""
+    maxima = np.full(groups, empty, dtype=np.int64)
+    np.maximum.at(maxima, inverse[mask], values[mask])
+    return maxima
+
+
+def mode_by(inverse: np.ndarray, groups: int, codes: np.ndarray) -> np.ndarray:
+    """MODE() WITHIN GROUP (ORDER BY codes) per group: the most frequent non-NULL code, the first of ties; -1 if none"""
+    modes = np.full(groups, -1, dtype=np.int64)
+    mask = codes >= 0
+    if not mask.any():
+        return modes
+    pairs, counts = np.unique(np.stack([inverse[mask], codes[mask].astype(np.int64)], axis=1), axis=0,
+                              return_counts=True)
+    pairs = pairs[np.lexsort((pairs[:, 1], -counts, pairs[:, 0]))]
+    first = np.r_[True, pairs[1:, 0] != pairs[:-1, 0]]
+    modes[pairs[first, 0]] = pairs[first, 1]
+    return modes
+
+
+def dense_rank(codes: np.ndarray) -> np.ndarray:
+    """DENSE_RANK() OVER (ORDER BY codes), NULLs (-1) last"""
+    present = np.unique(codes[codes >= 0])
+    return np.where(codes >= 0, np.searchsorted(present, codes) + 1, len(present) + 1)
+
+
+def pg_div(numerator, denominator: int) -> Decimal:
+    """
+    numeric / a positive integer as Postgres computes it (AVG() too): rounded
+    half away from zero at the scale its select_div_scale() picks, which keeps
+    at least 16 significant digits
+    """
+    def weight_and_first_digit(value: Decimal) -> tuple[int, int]:
+        # numeric stores base-10000 digits
+        if not value:
+            return 0, 0
+        weight = value.adjusted() // 4
+        return weight, int(value.scaleb(-4 * weight))
+
+    numerator = Decimal(numerator)
+    sign, digits, exponent = numerator.as_tuple()
+    weight1, first1 = weight_and_first_digit(abs(numerator))
+    weight2, first2 = weight_and_first_digit(Decimal(denominator))
+    quotient_weight = weight1 - weight2 - (first1 <= first2)
+    scale = min(max(16 - quotient_weight * 4, -exponent, 0), 1000)
+    units = int("".join(map(str, digits))) * 10 ** (scale + exponent)
+    rounded = (2 * units + denominator) // (2 * denominator)
+    return Decimal((sign, tuple(map(int, str(rounded))), -scale))
+
+
+def exact_sum(values) -> Decimal:
+    """SUM() of numeric values, which never rounds"""
+    with localcontext() as context:
+        context.prec = 1000
+        return sum(values, Decimal(0))
+
+
+def average(total, count, places: int):
+    """ROUND(AVG(integer column), places), NULL over no values"""
+    return pg_round(pg_div(int(total), int(count)), places) if count else None
+
+
+def percent(part, whole):
+    """ROUND(part::numeric * 100.0 / NULLIF(whole, 0), 2)"""
+    return pg_round(pg_div(Decimal(int(part)) * Decimal("100.0"), int(whole)), 2) if whole else None
+
+
+def decode(dictionary: list, code) -> str:
+    return dictionary[code] if code >= 0 else None
+
+
+def value(columns: dict, name: str, row: int):
+    """An integer or float column's value at a row, None for NULL"""
+    if f"{name}_valid" in columns:
+        return int(columns[name][row]) if columns[f"{name}_valid"][row] else None
+    return None if np.isnan(columns[name][row]) else float(columns[name][row])
+
+
+def top(rows: list[dict], limit: int = None) -> list[dict]:
+    """ORDER BY sessions DESC [LIMIT n]; rows come in key order, which breaks the ties"""
+    rows = sorted(rows, key=lambda row: -row["sessions"])
+    return rows[:limit] if limit else rows
+
+
+# ============================================================================
+# SESSION SECTIONS
+# ============================================================================
+
+def session_groups(start: date, end: date, *keys: str, mask_column: str = None):
+    """Columns of the sessions in range (optionally only where an integer column is set), grouped by `keys`"""
+    columns, dictionaries = range_columns("sessions", start, end)
+    if mask_column:
+        mask = columns[f"{mask_column}_valid"]
+        columns = {name: values[mask] for name, values in columns.items()}
+    groups, inverse = group(*[columns[key] for key in keys])
+    return columns, dictionaries, groups, inverse
+
+
+def breakdown(columns: dict, groups: np.ndarray, inverse: np.ndarray) -> dict:
+    """sessions, unique_visitors and engaged sessions (COUNT(*) FILTER (WHERE is_engaged)) per group"""
+    n = len(groups)
+    return {
+        "sessions": count_by(inverse, n),
+        "unique_visitors": distinct_by(inverse, n, columns["user_pseudo_id"], columns["user_pseudo_id"] >= 0),
+        "engaged": count_by(inverse, n, columns["is_engaged"] == 1),
+    }
+
+
+def overview_rows(start: date, end: date) -> list[dict]:
+    columns, _ = range_columns("sessions", start, end)
+    session_ids, has_session = columns["session_id"], columns["session_id_valid"]
+    distinct_sessions = lambda mask: len(np.unique(session_ids[mask]))
+    sessions = distinct_sessions(has_session)
+
+    def avg(name: str, places: int):
+        valid = columns[f"{name}_valid"]
+        return average(columns[name][valid].sum(), valid.sum(), places)
+
+    return [{
+        "total_sessions": sessions,
+        "unique_visitors": len(np.unique(columns["user_pseudo_id"][columns["user_pseudo_id"] >= 0])),
+        "avg_session_duration": avg("session_duration_seconds", 0),
+        "avg_pages_per_session": avg("page_views", 1),
+        "bounce_rate": percent(distinct_sessions(has_session & (columns["is_bounce"] == 1)), sessions),
+        "engagement_rate": percent(distinct_sessions(has_session & (columns["is_engaged"] == 1)), sessions),
+        "avg_engagement_score": avg("engagement_score", 2),
+    }]
+
+
+def temporal_hourly_rows(start: date, end: date) -> list[dict]:
+    columns, _, groups, inverse = session_groups(start, end, "hour_of_day", mask_column="hour_of_day")
+    counts = breakdown(columns, groups, inverse)
+    scores = sum_by(inverse, len(groups), columns["engagement_score"])
+    scored = count_by(inverse, len(groups), columns["engagement_score_valid"])
+    return [{
+        "hour": int(groups[i, 0]),
+        "sessions": int(counts["sessions"][i]),
+        "unique_visitors": int(counts["unique_visitors"][i]),
+        "avg_engagement": average(scores[i], scored[i], 2),
+        "engagement_rate": percent(counts["engaged"][i], counts["sessions"][i]),
+    } for i in range(len(groups))]
+
+
+DAY_NAMES = {1: "Sunday", 2: "Monday", 3: "Tuesday", 4: "Wednesday", 5: "Thursday", 6: "Friday", 7: "Saturday"}
+
+
+def temporal_dow_rows(start: date, end: date) -> list[dict]:
+    columns, _ = range_columns("sessions", start, end)
+    # NULL days form their own group, sorted last
+    day = np.where(columns["session_day_of_week_valid"], columns["session_day_of_week"], np.iinfo(np.int64).max)
+    groups, inverse = group(day)
+    counts = breakdown(columns, groups, inverse)
+    scores = sum_by(inverse, len(groups), columns["engagement_score"])
+    scored = count_by(inverse, len(groups), columns["engagement_score_valid"])
+    rows = []
+    for i in range(len(groups)):
+        number = int(groups[i, 0]) if groups[i, 0] != np.iinfo(np.int64).max else None
+        rows.append({
+            "day_name": DAY_NAMES.get(number),
+            "day_number": number,
+            "sessions": int(counts["sessions"][i]),
+            "unique_visitors": int(counts["unique_visitors"][i]),
+            "avg_engagement": average(scores[i], scored[i], 2),
+            "engagement_rate": percent(counts["engaged"][i], counts["sessions"][i]),
+        })
+    return rows
+
+
+def devices_rows(start: date, end: date) -> list[dict]:
+    columns, dictionaries, groups, inverse = session_groups(start, end, "device_category")
+    counts = breakdown(columns, groups, inverse)
+    durations = sum_by(inverse, len(groups), columns["session_duration_seconds"])
+    timed = count_by(inverse, len(groups), columns["session_duration_seconds_valid"])
+    return top([{
+        "device_category": decode(dictionaries["device_category"], groups[i, 0]),
+        "sessions": int(counts["sessions"][i]),
+        "unique_visitors": int(counts["unique_visitors"][i]),
+        "engagement_rate": percent(counts["engaged"][i], counts["sessions"][i]),
+        "avg_duration": average(durations[i], timed[i], 0),
+    } for i in range(len(groups))])
+
+
+def labelled_rows(start: date, end: date, column: str, label: str) -> list[dict]:
+    """browsers / operating_systems: GROUP BY the raw column, NULL shown as 'Unknown', top 10"""
+    columns, dictionaries, groups, inverse = session_groups(start, end, column)
+    counts = breakdown(columns, groups, inverse)
+    return top([{
+        label: decode(dictionaries[column], groups[i, 0]) or "Unknown",
+        "sessions": int(counts["sessions"][i]),
+        "unique_visitors": int(counts["unique_visitors"][i]),
+    } for i in range(len(groups))], 10)
+
+
+def browsers_rows(start: date, end: date) -> list[dict]:
+    return labelled_rows(start, end, "browser", "browser")
+
+
+def operating_systems_rows(start: date, end: date) -> list[dict]:
+    return labelled_rows(start, end, "os", "operating_system")
+
+
+def geographic_rows(start: date, end: date) -> list[dict]:
+    columns, dictionaries, groups, inverse = session_groups(start, end, "country", "city")
+    counts = breakdown(columns, groups, inverse)
+    return top([{
+        "country": decode(dictionaries["country"], groups[i, 0]),
+        "city": decode(dictionaries["city"], groups[i, 1]),
+        "sessions": int(counts["sessions"][i]),
+        "unique_visitors": int(counts["unique_visitors"][i]),
+        "engagement_rate": percent(counts["engaged"][i], counts["sessions"][i]),
+    } for i in range(len(groups))], 20)
+
+
+def visitor_segments_rows(start: date, end: date) -> list[dict]:
+    columns, _, users, inverse = session_groups(start, end, "user_pseudo_id")
+    n = len(users)
+    has_session = columns["session_id_valid"]
+    sessions = distinct_by(inverse, n, columns["session_id"], has_session)
+    engaged = distinct_by(inverse, n, columns["session_id"], has_session & (columns["is_engaged"] == 1))
+    page_views = sum_by(inverse, n, columns["page_views"])
+    conversions = sum_by(inverse, n, columns["conversions_count"])
+    # SUM() is NULL for a visitor without any value, and so is the value score
+    has_pages = count_by(inverse, n, columns["page_views_valid"]) > 0
+    has_conversions = count_by(inverse, n, columns["conversions_count_valid"]) > 0
+    value_scores = sessions * 2 + page_views + conversions * 20
+    has_score = has_pages & has_conversions
+
+    # engagement_rate = ROUND(engaged * 100.0 / sessions, 2) in exact integer hundredths (half up)
+    has_rate = sessions > 0
+    safe_sessions = np.maximum(sessions, 1)
+    rate_hundredths = (engaged * 20000 + safe_sessions) // (2 * safe_sessions)
+    rate_at_least = lambda threshold: has_rate & (rate_hundredths >= threshold * 100)
+
+    segments = np.select(
+        [has_conversions & (conversions > 0), (sessions >= 3) & rate_at_least(80), sessions >= 2, rate_at_least(50)],
+        ["converter", "engaged_explorer", "returning_visitor", "engaged_new"],
+        default="casual_browser",
+    )
+
+    rows = []
+    for segment in sorted(set(segments.tolist())):
+        members = segments == segment
+        scored, rated = members & has_score, members & has_rate
+        rows.append({
+            "visitor_segment": segment,
+            "count": int(members.sum()),
+            "avg_value_score": average(value_scores[scored].sum(), scored.sum(), 2),
+            "avg_sessions": average(sessions[members].sum(), members.sum(), 2),
+            "avg_engagement_rate": pg_round(pg_div(Decimal(int(rate_hundredths[rated].sum())).scaleb(-2),
+                                                   int(rated.sum())), 2) if rated.any() else None,
+        })
+    return sorted(rows, key=lambda row: -row["count"])
+
+
+# ============================================================================
+# VISITOR SECTIONS (sessions per visitor, joined to visitor_insights)
+# ============================================================================
+
+def join_visitor_insights(columns: dict, dictionaries: dict) -> dict:
+    """
+    sessions LEFT JOIN visitor_insights USING (user_pseudo_id): each session row
+    repeated once per matching insights row, with its vi_<column> values
+    (unset where there is no match)
+    """
+    insights = _tables["visitor_insights"]
+    session_codes = {user: code for code, user in enumerate(dictionaries["user_pseudo_id"])}
+    # visitor_insights users as sessions' codes (-1: no session of theirs is loaded)
+    remap = np.array([session_codes.get(user, -1) for user in insights["dictionaries"]["user_pseudo_id"]] + [-1],
+                     dtype=np.int64)
+    insight_users = remap[insights["columns"]["user_pseudo_id"]]
+    order = np.argsort(insight_users, kind="stable")
+    order = order[insight_users[order] >= 0]
+    sorted_users = insight_users[order]
+
+    users = columns["user_pseudo_id"]
+    starts = np.searchsorted(sorted_users, users, "left")
+    matches = np.where(users >= 0, np.searchsorted(sorted_users, users, "right") - starts, 0)
+    repeats = np.maximum(matches, 1)
+    rows = np.repeat(np.arange(len(users)), repeats)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    matched = np.repeat(matches > 0, repeats)
+
+    joined = {name: values[rows] for name, values in columns.items()}
+    insight_rows = order[np.where(matched, starts[rows] + offsets, 0)] if len(order) else None
+    for name in STORE_TABLES["visitor_insights"]["integers"]:
+        if insight_rows is None:
+            joined[f"vi_{name}"], joined[f"vi_{name}_valid"] = np.zeros(len(rows), dtype=np.int64), matched
+        else:
+            joined[f"vi_{name}"] = insights["columns"][name][insight_rows]
+            joined[f"vi_{name}_valid"] = matched & insights["columns"][f"{name}_valid"][insight_rows]
+    return joined
+
+
+def traffic_sources_summary_rows(start: date, end: date) -> list[dict]:
+    columns, dictionaries = range_columns("sessions", start, end)
+    columns = join_visitor_insights(columns, dictionaries)
+    groups, inverse = group(columns["traffic_source"], columns["traffic_medium"])
+    n = len(groups)
+    has_session, has_user = columns["session_id_valid"], columns["user_pseudo_id"] >= 0
+    sessions = distinct_by(inverse, n, columns["session_id"], has_session)
+    engaged = distinct_by(inverse, n, columns["session_id"], has_session & (columns["is_engaged"] == 1))
+    bounced = distinct_by(inverse, n, columns["session_id"], has_session & (columns["is_bounce"] == 1))
+    durations = sum_by(inverse, n, columns["session_duration_seconds"])
+    timed = count_by(inverse, n, columns["session_duration_seconds_valid"])
+    visitors = distinct_by(inverse, n, columns["user_pseudo_id"], has_user)
+    converted = lambda name: distinct_by(inverse, n, columns["user_pseudo_id"],
+                                         has_user & columns[f"vi_{name}_valid"] & (columns[f"vi_{name}"] > 0))
+    conversions, resume_downloads = converted("form_submissions"), converted("resume_downloads")
+    return top([{
+        "traffic_source": decode(dictionaries["traffic_source"], groups[i, 0]),
+        "traffic_medium": decode(dictionaries["traffic_medium"], groups[i, 1]),
+        "sessions": int(sessions[i]),
+        "unique_visitors": int(visitors[i]),
+        "engagement_rate": percent(engaged[i], sessions[i]),
+        "bounce_rate": percent(bounced[i], sessions[i]),
+        "avg_duration": average(durations[i], timed[i], 0),
+        "conversions": int(conversions[i]),
+        "resume_downloads": int(resume_downloads[i]),
+    } for i in range(n)], 10)
+
+
+def visitor_stats(columns: dict) -> dict:
+    """Per-visitor aggregates of (joined) session rows: GROUP BY user_pseudo_id"""
+    users, inverse = group(columns["user_pseudo_id"])
+    n = len(users)
+    has_session = columns["session_id_valid"]
+    first_day, last_day = np.full(n, np.iinfo(np.int64).max), np.full(n, np.iinfo(np.int64).min)
+    np.minimum.at(first_day, inverse, columns["days"].astype(np.int64))
+    np.maximum.at(last_day, inverse, columns["days"].astype(np.int64))
+    stats = {
+        "users": users[:, 0],
+        "inverse": inverse,
+        "sessions": distinct_by(inverse, n, columns["session_id"], has_session),
+        "engaged": distinct_by(inverse, n, columns["session_id"], has_session & (columns["is_engaged"] == 1)),
+        "first_day": first_day,
+        "last_day": last_day,
+    }
+    # (sum, values counted): SUM() is NULL where nothing was counted
+    for name in ["page_views", "conversions_count", "projects_clicked_count", "session_duration_seconds",
+                 "engagement_score"]:
+        stats[name] = (sum_by(inverse, n, columns[name]), count_by(inverse, n, columns[f"{name}_valid"]))
+    return stats
+
+
+def total(stats: dict, name: str, i: int):
+    """SUM(name) of visitor i"""
+    totals, counted = stats[name]
+    return int(totals[i]) if counted[i] else None
+
+
+def top_visitor_rows(columns: dict, dictionaries: dict, stats: dict, score, segment, duration_places: int,
+                     cta_clicks) -> list[dict]:
+    """
+    The top_visitors columns for every visitor, highest score(i) first (NULL
+    scores first, as ORDER BY ... DESC puts them), top 15
+    """
+    inverse, n = stats["inverse"], len(stats["users"])
+    modes = {name: mode_by(inverse, n, columns[name]) for name in ["device_category", "country", "traffic_source"]}
+    insight = lambda name: np.where(count_by(inverse, n, columns[f"vi_{name}_valid"]) > 0,
+                                    max_by(inverse, n, columns[f"vi_{name}"], columns[f"vi_{name}_valid"]), 0)
+    form_submissions, social_clicks, resume_downloads = (insight("form_submissions"), insight("social_clicks"),
+                                                         insight("resume_downloads"))
+    scores = [score(i) for i in range(n)]
+    ranked = sorted(range(n), key=lambda i: (scores[i] is not None, -(scores[i] or 0)))[:15]
+    return [{
+        "user_pseudo_id": decode(dictionaries["user_pseudo_id"], stats["users"][i]),
+        "total_sessions": int(stats["sessions"][i]),
+        "visitor_tenure_days": int(stats["last_day"][i] - stats["first_day"][i]),
+        "total_page_views": total(stats, "page_views", i),
+        "avg_session_duration_sec": average(*[x[i] for x in stats["session_duration_seconds"]], duration_places),
+        "engagement_rate": percent(stats["engaged"][i], stats["sessions"][i]),
+        "primary_device": decode(dictionaries["device_category"], modes["device_category"][i]),
+        "primary_country": decode(dictionaries["country"], modes["country"][i]),
+        "primary_traffic_source": decode(dictionaries["traffic_source"], modes["traffic_source"][i]),
+        "projects_viewed": total(stats, "projects_clicked_count", i),
+        "cta_clicks": cta_clicks(i),
+        "form_submissions": int(form_submissions[i]),
+        "social_clicks": int(social_clicks[i]),
+        "resume_downloads": int(resume_downloads[i]),
+        "visitor_value_score": scores[i],
+        "visitor_segment": segment(i, form_submissions[i], resume_downloads[i]),
+        "interest_profile": "general_visitor",
+    } for i in ranked]
+
+
+def top_visitors_rows(start: date, end: date) -> list[dict]:
+    columns, dictionaries = range_columns("sessions", start, end)
+    columns = join_visitor_insights(columns, dictionaries)
+    stats = visitor_stats(columns)
+    sessions, engaged = stats["sessions"], stats["engaged"]
+    n = len(stats["users"])
+    cta_clicks = np.where(count_by(stats["inverse"], n, columns["vi_cta_clicks_valid"]) > 0,
+                          max_by(stats["inverse"], n, columns["vi_cta_clicks"], columns["vi_cta_clicks_valid"]), 0)
+
+    def score(i):
+        page_views, conversions = total(stats, "page_views", i), total(stats, "conversions_count", i)
+        return None if page_views is None or conversions is None else int(sessions[i]) * 2 + page_views + conversions * 20
+
+    def segment(i, form_submissions, resume_downloads):
+        # COUNT(DISTINCT engaged) * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), unrounded
+        rate = pg_div(Decimal(int(engaged[i])) * Decimal("100.0"), int(sessions[i])) if sessions[i] else None
+        if form_submissions > 0 or resume_downloads > 0:
+            return "converter"
+        if sessions[i] >= 3 and rate is not None and rate >= 80:
+            return "engaged_explorer"
+        if sessions[i] >= 2:
+            return "returning_visitor"
+        if rate is not None and rate >= 50:
+            return "engaged_new"
+        return "casual_browser"
+
+    return top_visitor_rows(columns, dictionaries, stats, score, segment, 2, lambda i: int(cta_clicks[i]))
+
+
+def gist_top_visitors_rows(start: date, end: date) -> list[dict]:
+    columns, dictionaries = range_columns("sessions", start, end)
+    columns = join_visitor_insights(columns, dictionaries)
+    stats = visitor_stats(columns)
+    sessions = stats["sessions"]
+
+    def score(i):
+        page_views, conversions = total(stats, "page_views", i), total(stats, "conversions_count", i)
+        engagement, scored = (int(x[i]) for x in stats["engagement_score"])
+        if page_views is None or conversions is None or not scored:
+            return None
+        # ROUND(AVG(engagement_score), 0): the quotient rounded half away from zero
+        engagement = (2 * abs(engagement) + scored) // (2 * scored) * (1 if engagement >= 0 else -1)
+        return Decimal(int(sessions[i]) * 10 + page_views * 2 + conversions * 20 + engagement)
+
+    def segment(i, form_submissions, resume_downloads):
+        if form_submissions > 0 or resume_downloads > 0:
+            return "converter"
+        return "power_user" if sessions[i] >= 3 else "returning" if sessions[i] >= 2 else "new"
+
+    return top_visitor_rows(columns, dictionaries, stats, score, segment, 0,
+                            lambda i: total(stats, "conversions_count", i))
+
+
+def gist_visitor_segments_rows(start: date, end: date) -> list[dict]:
+    columns, _ = range_columns("sessions", start, end)
+    stats = visitor_stats(columns)
+    sessions = stats["sessions"]
+    segments = {}
+    for i in range(len(stats["users"])):
+        # AVG(engagement_score) per visitor, kept at the scale Postgres gives it
+        engagement = pg_div(*[int(x[i]) for x in stats["engagement_score"]]) if stats["engagement_score"][1][i] else None
+        conversions = total(stats, "conversions_count", i)
+        if conversions is not None and conversions > 0:
+            segment = "converter"
+        elif sessions[i] >= 3 and engagement is not None and engagement > 50:
+            segment = "power_user"
+        elif sessions[i] >= 2:
+            segment = "returning"
+        elif engagement is not None and engagement > 30:
+            segment = "engaged_new"
+        else:
+            segment = "casual"
+        segments.setdefault(segment, []).append((int(sessions[i]), engagement))
+
+    rows = []
+    for segment, members in sorted(segments.items()):
+        engagements = [engagement for _, engagement in members if engagement is not None]
+        avg_engagement = pg_round(pg_div(exact_sum(engagements), len(engagements)), 2) if engagements else None
+        rows.append({
+            "visitor_segment": segment,
+            "count": len(members),
+            "avg_value_score": avg_engagement,
+            "avg_sessions": average(sum(sessions for sessions, _ in members), len(members), 2),
+            "avg_engagement_rate": avg_engagement,
+        })
+    return sorted(rows, key=lambda row: -row["count"])
+
+
+# ============================================================================
+# DAILY TABLES (daily_metrics, conversion_funnel, recommendation_performance)
+# ============================================================================
+
+DAILY_METRICS_COLUMNS = {   # output name -> daily_metrics column
+    "sessions": "total_sessions", "visitors": "unique_visitors", "engagement_rate": "engagement_rate",
+    "bounce_rate": "bounce_rate", "avg_duration": "avg_session_duration_sec", "desktop_sessions": "desktop_sessions",
+    "mobile_sessions": "mobile_sessions", "tablet_sessions": "tablet_sessions",
+}
+CONVERSION_COLUMNS = {      # output name -> conversion_funnel column
+    "cta_views": "total_cta_views", "cta_clicks": "total_cta_clicks", "form_starts": "contact_form_starts",
+    "form_submissions": "contact_form_submissions", "resume_downloads": "resume_downloads",
+    "social_clicks": "social_clicks", "outbound_clicks": "outbound_clicks",
+    "publication_clicks": "publication_clicks", "content_copies": "content_copies",
+}
+
+
+def daily_metrics_rows(start: date, end: date) -> list[dict]:
+    columns, _ = range_columns("daily_metrics", start, end)
+    return [{"date": date.fromordinal(int(columns["days"][i])),
+             **{name: value(columns, column, i) for name, column in DAILY_METRICS_COLUMNS.items()}}
+            for i in range(len(columns["days"]))]
+
+
+def bucket_start(day: date, unit: str) -> date:
+    """date_trunc(unit, day)"""
+    if unit == "week":
+        return date.fromordinal(day.toordinal() - day.weekday())
+    if unit == "month":
+        return day.replace(day=1)
+    if unit == "quarter":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    return day.replace(month=1, day=1)
+
+
+def column_sum(columns: dict, name: str, rows: list[int]):
+    """SUM(name) over rows, NULL when none has a value"""
+    values = [value(columns, name, i) for i in rows]
+    values = [v for v in values if v is not None]
+    return sum(values) if values else None
+
+
+def weighted_average(columns: dict, name: str, weight: str, rows: list[int]):
+    """dashboard_queries.weighted_average(): float sums in row order, as Postgres adds them"""
+    pairs = [(value(columns, name, i), value(columns, weight, i)) for i in rows]
+    pairs = [(rate, count) for rate, count in pairs if rate is not None and count is not None]
+    weights = sum(count for _, count in pairs)
+    if not pairs or not weights:
+        return None
+    total = 0.0
+    for rate, count in pairs:
+        total += rate * count
+    return total / weights
+
+
+def bucketed_daily_metrics(unit: str):
+    """daily_metrics per `unit` bucket (dashboard_queries.daily_metrics_sql)"""
+    def rows(start: date, end: date) -> list[dict]:
+        columns, _ = range_columns("daily_metrics", start, end)
+        buckets = {}
+        for i, day in enumerate(columns["days"]):
+            buckets.setdefault(max(bucket_start(date.fromordinal(int(day)), unit), start), []).append(i)
+        return [{
+            "date": bucket,
+            "sessions": column_sum(columns, "total_sessions", members),
+            "visitors": column_sum(columns, "unique_visitors", members),
+            "engagement_rate": weighted_average(columns, "engagement_rate", "total_sessions", members),
+            "bounce_rate": weighted_average(columns, "bounce_rate", "total_sessions", members),
+            "avg_duration": weighted_average(columns, "avg_session_duration_sec", "total_sessions", members),
+            "desktop_sessions": column_sum(columns, "desktop_sessions", members),
+            "mobile_sessions": column_sum(columns, "mobile_sessions", members),
+            "tablet_sessions": column_sum(columns, "tablet_sessions", members),
+            "days": len(members),
+        } for bucket, members in sorted(buckets.items())]
+    return rows
+
+
+def conversion_summary_rows(start: date, end: date) -> list[dict]:
+    columns, _ = range_columns("conversion_funnel", start, end)
+    rows = range(len(columns["days"]))
+    return [{name: column_sum(columns, column, rows) for name, column in CONVERSION_COLUMNS.items()}]
+
+
+def partial_conversions_rows(start: date, end: date) -> list[dict]:
+    columns, _ = range_columns("conversion_funnel", start, end)
+    days = {}
+    for i, day in enumerate(columns["days"]):
+        days.setdefault(int(day), []).append(i)
+    return [{"event_date": date.fromordinal(day),
+             **{name: column_sum(columns, column, rows) for name, column in CONVERSION_COLUMNS.items()}}
+            for day, rows in days.items()]
+
+
+def recommendation_performance_rows(start: date, end: date) -> list[dict]:
+    """Not date-filtered: SELECT * ... LIMIT 1"""
+    return [dict(row) for row in _tables["recommendation_performance"]["records"][:1]]
+
+
+# ============================================================================
+# DAILY STATS SECTIONS (entity aggregates, ranked by ranking_engine.py)
+# ============================================================================
+
+def entity_aggregates(table: str, start: date, end: date, key: str, maxes: dict, sums: dict,
+                      daily: bool = False) -> list[dict]:
+    """
+    GROUP BY key (event_date, key when daily) of a *_daily_stats table: MAX()
+    of string columns (output name -> column) and SUM(COALESCE(...)) of integer
+    columns (output name -> columns added together), in the catalog query's
+    column order. The daily rows get the partial_* queries' DENSE_RANK
+    <name>_order of each MAX() column.
+    """
+    columns, dictionaries = range_columns(table, start, end)
+    groups, inverse = group(columns["days"], columns[key]) if daily else group(columns[key])
+    n = len(groups)
+    maxima = {name: max_by(inverse, n, columns[column], columns[column] >= 0) for name, column in maxes.items()}
+    totals = {name: sum_by(inverse, n, sum(columns[column] for column in added)) for name, added in sums.items()}
+    orders = {name: dense_rank(maxima[name]) for name in maxes} if daily else {}
+    rows = []
+    for i in range(n):
+        row = {"event_date": date.fromordinal(int(groups[i, 0]))} if daily else {}
+        row[key] = decode(dictionaries[key], groups[i, -1])
+        row.update({name: decode(dictionaries[maxes[name]], maxima[name][i]) for name in maxes})
+        row.update({name: int(totals[name][i]) for name in sums})
+        row.update({f"{name}_order": int(orders[name][i]) for name in orders})
+        rows.append(row)
+    return rows
+
+
+def project_aggregates_rows(start: date, end: date) -> list[dict]:
+    return entity_aggregates("project_daily_stats", start, end, "project_id",
+                             {"project_title": "project_title", "project_category": "project_category"},
+                             {f"total_{column}": [column] for column in STORE_TABLES["project_daily_stats"]["integers"]})
+
+
+def skill_aggregates_rows(start: date, end: date) -> list[dict]:
+    return entity_aggregates("skill_daily_stats", start, end, "skill_name", {}, {
+        "total_interactions": ["clicks", "hovers"],
+        "total_unique_users": ["unique_users"],
+        "weighted_score": ["weighted_interest_score"],
+    })
+
+
+def domain_aggregates_rows(start: date, end: date) -> list[dict]:
+    return entity_aggregates("domain_daily_stats", start, end, "domain", {}, {
+        "total_explicit_interest": ["explicit_interest_signals"],
+        "total_implicit_interest": ["implicit_interest_from_views"],
+        "total_interactions": ["total_domain_interactions"],
+        "total_unique_users": ["unique_interested_users"],
+        "total_interest_score": ["domain_interest_score"],
+    })
+
+
+def experience_aggregates_rows(start: date, end: date) -> list[dict]:
+    return entity_aggregates("experience_daily_stats", start, end, "experience_id",
+                             {"experience_title": "experience_title", "company": "company"}, {
+        "total_interactions": ["total_interactions"],
+        "total_unique_users": ["unique_interested_users"],
+        "total_sessions": ["unique_sessions"],
+    })
+
+
+def partial_projects_rows(start: date, end: date) -> list[dict]:
+    return entity_aggregates("project_daily_stats", start, end, "project_id",
+                             {"project_title": "project_title", "project_category": "project_category"},
+                             {column: [column] for column in STORE_TABLES["project_daily_stats"]["integers"]},
+                             daily=True)
+
+
+def partial_skills_rows(start: date, end: date) -> list[dict]:
+    return entity_aggregates("skill_daily_stats", start, end, "skill_name", {}, {
+        "total_interactions": ["clicks", "hovers"],
+        "total_unique_users": ["unique_users"],
+        "interest_score": ["weighted_interest_score"],
+    }, daily=True)
+
+
+def partial_domains_rows(start: date, end: date) -> list[dict]:
+    return entity_aggregates("domain_daily_stats", start, end, "domain", {}, {
+        "total_explicit_interest": ["explicit_interest_signals"],
+        "total_implicit_interest": ["implicit_interest_from_views"],
+        "total_interactions": ["total_domain_interactions"],
+        "total_unique_users": ["unique_interested_users"],
+        "total_interest_score": ["domain_interest_score"],
+    }, daily=True)
+
+
+def partial_experiences_rows(start: date, end: date) -> list[dict]:
+    return entity_aggregates("experience_daily_stats", start, end, "experience_id",
+                             {"experience_title": "experience_title", "company": "company"}, {
+        "total_interactions": ["total_interactions"],
+        "total_unique_users": ["unique_interested_users"],
+        "total_sessions": ["unique_sessions"],
+    }, daily=True)
+
+
+def section_sums(start: date, end: date, daily: bool):
+    """section_daily_stats grouped by section_id (event_date, section_id when daily): sums and float (sum, count)"""
+    columns, dictionaries = range_columns("section_daily_stats", start, end)
+    groups, inverse = group(columns["days"], columns["section_id"]) if daily else group(columns["section_id"])
+    n = len(groups)
+    sums = {column: sum_by(inverse, n, columns[column]) for column in SECTION_SUMS}
+    averages = {}
+    for column in SECTION_AVERAGES:
+        valid = ~np.isnan(columns[column])
+        averages[column] = (sum_by(inverse[valid], n, columns[column][valid]), count_by(inverse, n, valid))
+    milestones = max_by(inverse, n, columns["max_scroll_milestone"], columns["max_scroll_milestone_valid"])
+    return groups, dictionaries["section_id"], sums, averages, milestones
+
+
+def partial_sections_rows(start: date, end: date) -> list[dict]:
+    groups, sections, sums, averages, milestones = section_sums(start, end, daily=True)
+    rows = []
+    for i in range(len(groups)):
+        row = {"event_date": date.fromordinal(int(groups[i, 0])), "section_id": decode(sections, groups[i, 1])}
+        row.update({column: int(sums[column][i]) for column in SECTION_SUMS})
+        for column, (total, count) in averages.items():
+            row[f"{column}_sum"] = float(total[i]) if count[i] else None
+            row[f"{column}_count"] = int(count[i])
+        row["max_scroll_milestone"] = int(milestones[i]) if milestones[i] >= 0 else None
+        rows.append(row)
+    # ORDER BY event_date, section_id: NULL ids last
+    return sorted(rows, key=lambda row: (row["event_date"], row["section_id"] is None))
+
+
+def section_rankings_rows(start: date, end: date) -> list[dict]:
+    groups, sections, sums, averages, milestones = section_sums(start, end, daily=False)
+    return rank_sections([section_ranking_row(
+        decode(sections, groups[i, 0]),
+        {column: int(sums[column][i]) for column in SECTION_SUMS},
+        {column: float(total[i] / count[i]) if count[i] else None for column, (total, count) in averages.items()},
+        int(milestones[i]) if milestones[i] >= 0 else None,
+    ) for i in range(len(groups))])
+
+
+# Catalog query -> (tables it reads, rows for a range)
+STORE_SECTIONS = {
+    "overview": (["sessions"], overview_rows),
+    "temporal_hourly": (["sessions"], temporal_hourly_rows),
+    "temporal_dow": (["sessions"], temporal_dow_rows),
+    "devices": (["sessions"], devices_rows),
+    "browsers": (["sessions"], browsers_rows),
+    "operating_systems": (["sessions"], operating_systems_rows),
+    "geographic": (["sessions"], geographic_rows),
+    "visitor_segments": (["sessions"], visitor_segments_rows),
+    "project_aggregates": (["project_daily_stats"], project_aggregates_rows),
+    "section_rankings": (["section_daily_stats"], section_rankings_rows),
+    "skill_aggregates": (["skill_daily_stats"], skill_aggregates_rows),
+    "domain_aggregates": (["domain_daily_stats"], domain_aggregates_rows),
+    "experience_aggregates": (["experience_daily_stats"], experience_aggregates_rows),
+    "traffic_sources_summary": (["sessions", "visitor_insights"], traffic_sources_summary_rows),
+    "top_visitors": (["sessions", "visitor_insights"], top_visitors_rows),
+    "gist_top_visitors": (["sessions", "visitor_insights"], gist_top_visitors_rows),
+    "gist_visitor_segments": (["sessions"], gist_visitor_segments_rows),
+    "daily_metrics": (["daily_metrics"], daily_metrics_rows),
+    **{f"daily_metrics_{unit}": (["daily_metrics"], bucketed_daily_metrics(unit))
+       for unit in ["week", "month", "quarter", "year"]},
+    "conversion_summary": (["conversion_funnel"], conversion_summary_rows),
+    "recommendation_performance": (["recommendation_performance"], recommendation_performance_rows),
+    # The per-day partials of daily_partials.py
+    "partial_conversions": (["conversion_funnel"], partial_conversions_rows),
+    "partial_projects": (["project_daily_stats"], partial_projects_rows),
+    "partial_sections": (["section_daily_stats"], partial_sections_rows),
+    "partial_skills": (["skill_daily_stats"], partial_skills_rows),
+    "partial_domains": (["domain_daily_stats"], partial_domains_rows),
+    "partial_experiences": (["experience_daily_stats"], partial_experiences_rows),
+}
+
+
+def query(name: str, start: date, end: date) -> list[dict]:
+    """A catalog query's rows for a range, from the store"""
+    return STORE_SECTIONS[name][1](start, end)
@@ -0,0 +1,166 @@
+"""
+Shared Cache - encoded dashboard responses shared by the API's worker processes
+With several uvicorn workers (WEB_CONCURRENCY, see main.py) each process has
+its own section cache; this SQLite database in shared memory (/dev/shm) holds
+the encoded /api/dashboard3 responses they all read, so a range is computed,
+and its JSON encoded, once for every worker rather than once per worker.
+
+    responses    key -> JSON body, stored under the epoch it was built at
+    leases       key -> expiry: a worker is building that response; the others
+                 wait for its entry instead of querying Supabase too
+    meta         epoch, bumped by the leader on every invalidation; entries
+                 of an older epoch are never served
+
+One worker is the leader (it holds an flock on <path>.leader while it runs):
+it alone follows the syncs (LISTEN / watermark polls), warms the standard
+ranges and bumps the epoch; followers drop their own caches when they see the
+epoch move. When the leader exits, the next worker that tries takes over.
+"""
+
+import os
+import time
+import fcntl
+import sqlite3
+import tempfile
+import threading
+
+# Shared memory where there is one (entries vanish with the container), else the temp dir
+SHARED_CACHE_PATH = os.getenv("DASHBOARD_SHARED_CACHE_PATH", os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "portfolio-analytics-cache.sqlite"))
+SHARED_CACHE_SIZE = int(os.getenv("DASHBOARD_SHARED_CACHE_SIZE", "64"))   # responses kept, oldest dropped first
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, epoch INTEGER, body BLOB, stored_at REAL);
+CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires_at REAL);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);
+"""
+
+_local = threading.local()   # one connection per thread
+_leader = {"file": None}
+# Counters of this process, reported by /api/metrics
+SHARED_METRICS = {
+    "hits": 0,         # responses read from the cache
+    "misses": 0,       # lookups finding no entry at the current epoch
+    "stores": 0,       # responses written
+    "leases": 0,       # builds started under a lease
+    "epoch_bumps": 0,  # invalidations published by this process
+}
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+def connection() -> sqlite3.Connection:
+    """This thread's connection to the cache database, created with its tables on first use"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(SHARED_CACHE_PATH, timeout=2.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")   # readers never wait for a writer
+        conn.execute("PRAGMA synchronous=OFF")    # a cache: nothing to keep over a crash
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def cache_key(key: tuple) -> str:
+    return repr(key)
+
+
+def epoch() -> int:
+    """Current epoch; only entries stored at it are served"""
+    row = connection().execute("SELECT value FROM meta WHERE name = 'epoch'").fetchone()
+    return row[0] if row else 0
+
+
+def bump_epoch() -> int:
+    """Start a new epoch (the data changed) and drop the older entries; returns it"""
+    conn = connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("INSERT INTO meta VALUES ('epoch', 1) ON CONFLICT (name) DO UPDATE SET value = value + 1")
+        value = conn.execute("SELECT value FROM meta WHERE name = 'epoch'").fetchone()[0]
+        conn.execute("DELETE FROM responses WHERE epoch < ?", (value,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    SHARED_METRICS["epoch_bumps"] += 1
+    return value
+
+
+# ============================================================================
+# RESPONSES
+# ============================================================================
+
+def get(key: tuple, at_epoch: int) -> bytes:
+    """A response's body stored at `at_epoch`, or None"""
+    row = connection().execute("SELECT body FROM responses WHERE key = ? AND epoch = ?",
+                               (cache_key(key), at_epoch)).fetchone()
+    SHARED_METRICS["hits" if row else "misses"] += 1
+    return row[0] if row else None
+
+
+def put(key: tuple, at_epoch: int, body: bytes):
+    """Store a response built at `at_epoch`, unless the epoch moved on meanwhile; keeps the newest SHARED_CACHE_SIZE"""
+    conn = connection()
+    stored = conn.execute(
+        "INSERT OR REPLACE INTO responses SELECT ?, ?, ?, ? WHERE ? = COALESCE((SELECT value FROM meta WHERE name = 'epoch'), 0)",
+        (cache_key(key), at_epoch, body, time.time(), at_epoch)).rowcount
+    if stored:
+        SHARED_METRICS["stores"] += 1
+        conn.execute("DELETE FROM responses WHERE key NOT IN (SELECT key FROM responses ORDER BY stored_at DESC LIMIT ?)",
+                     (SHARED_CACHE_SIZE,))
+
+
+def lease(key: tuple, seconds: float) -> bool:
+    """Take the right to build a response for `seconds`; False while another worker holds it"""
+    now = time.time()
+    taken = connection().execute(
+        "INSERT INTO leases VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET expires_at = excluded.expires_at "
+        "WHERE leases.expires_at < ?", (cache_key(key), now + seconds, now)).rowcount
+    if taken:
+        SHARED_METRICS["leases"] += 1
+    return bool(taken)
+
+
+def release(key: tuple):
+    connection().execute("DELETE FROM leases WHERE key = ?", (cache_key(key),))
+
+
+# ============================================================================
+# LEADERSHIP
+# ============================================================================
+
+def acquire_leadership() -> bool:
+    """Whether this process is the leader, becoming it if no other process is"""
+    if _leader["file"] is not None:
+        return True
+    file = open(f"{SHARED_CACHE_PATH}.leader", "a")
+    try:
+        fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        file.close()
+        return False
+    _leader["file"] = file
+    # Entries from before this leader may predate syncs nobody followed meanwhile
+    bump_epoch()
+    print(f"Worker {os.getpid()} leads the shared cache ({SHARED_CACHE_PATH})")
+    return True
+
+
+def is_leader() -> bool:
+    return _leader["file"] is not None
+
+
+def stats() -> dict:
+    entries, total_bytes = connection().execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()
+    return {
+        **SHARED_METRICS,
+        "entries": entries,
+        "bytes": total_bytes,
+        "epoch": epoch(),
+        "leader": is_leader(),
+        "pid": os.getpid(),
+        "path": SHARED_CACHE_PATH,
+    }
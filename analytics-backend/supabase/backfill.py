@@ -0,0 +1,366 @@
+"""
+Resumable Chunked Backfill: BigQuery → Supabase
+Reloads a historical date range for the date-partitioned tables without one
+giant transaction.
+
+Flow:
+1. Split [--start, --end] into day or week chunks per table
+2. Skip chunks already checkpointed in sync_metadata (table_name 'backfill:<table>')
+3. Process the remaining chunks in parallel worker processes; each chunk:
+   - Extracts its date range from BigQuery to a Parquet file (see staging.py)
+   - Deletes the range in Supabase, loads the staged rows and records the
+     checkpoint, all in one transaction
+   - Is retried once if it fails, after reopening the worker's connection if
+     it dropped
+   Secondary indexes are dropped for the duration and rebuilt once at the end
+   (see maintenance.py), followed by a refresh of the cumulative stats (see
+   cumulative.py) and ANALYZE of the backfilled tables. Their definitions are
+   saved in sync_metadata (table_name 'backfill-index:<table>') before the drop
+4. Re-running the same command resumes: a failed or interrupted chunk is simply
+   picked up again, completed chunks are never redone, and indexes an
+   interrupted run dropped are rebuilt first
+
+Usage:
+    python backfill.py --start 2025-01-01 --end 2025-06-30
+    python backfill.py --start 2025-01-01 --end 2025-06-30 --chunk day --workers 8
+    python backfill.py --start 2025-01-01 --end 2025-06-30 --tables sessions --restart
+"""
+
+import os
+import sys
+import shutil
+import argparse
+from datetime import datetime, timedelta, date
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import psycopg2
+from google.cloud import bigquery
+from staging import STAGING_DIR, extract_query, load_staged_table, run_in_transaction
+from sync_to_supabase import TABLES_TO_SYNC
+from maintenance import get_deferrable_indexes, drop_indexes, timed_step, run_maintenance, notify_sync
+from cumulative import refresh_cumulative_tables
+from incremental_sync import (
+    PROJECT_ID, BQ_DATASET, TABLE_COLUMNS,
+    get_bigquery_client, get_supabase_connection,
+)
+
+# Backfill config
+BACKFILL_TABLES = [name for name, config in TABLES_TO_SYNC.items() if "date_column" in config]
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+BACKFILL_STAGING_DIR = STAGING_DIR / "backfill"
+CHUNK_DAYS = {"day": 1, "week": 7}
+CHECKPOINT_PREFIX = "backfill:"
+# A failed chunk is retried once (on a fresh connection if it dropped) before it's reported
+CHUNK_ATTEMPTS = 2
+
+# Definitions of the indexes a run dropped, one sync_metadata row each until rebuilt
+INDEX_PREFIX = "backfill-index:"
+INDEX_STATUS = "dropped"
+
+CHECKPOINT_INSERT = """
+    INSERT INTO sync_metadata (table_name, last_synced_at, rows_synced, sync_duration_seconds, status, checkpoint)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Per-process clients (created once per worker by init_worker)
+_bq_client = None
+_pg_conn = None
+
+
+# ============================================================================
+# CHUNKS AND CHECKPOINTS
+# ============================================================================
+
+def split_chunks(start_date: date, end_date: date, chunk: str) -> list[tuple[date, date]]:
+    """Split [start_date, end_date] into consecutive (chunk_start, chunk_end) ranges"""
+    step = timedelta(days=CHUNK_DAYS[chunk])
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + step - timedelta(days=1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def checkpoint_label(chunk_start: date, chunk_end: date) -> str:
+    """Checkpoint value recorded in sync_metadata for a completed chunk"""
+    return f"{chunk_start.isoformat()}..{chunk_end.isoformat()}"
+
+
+def get_completed_chunks(pg_conn, tables: list[str]) -> set[tuple[str, str]]:
+    """(table, checkpoint) pairs already committed by earlier backfill runs"""
+    with pg_conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT DISTINCT table_name, checkpoint
+            FROM sync_metadata
+            WHERE table_name = ANY(%s) AND checkpoint IS NOT NULL AND status = 'success'
+        """, ([CHECKPOINT_PREFIX + t for t in tables],))
+        completed = {(row['table_name'][len(CHECKPOINT_PREFIX):], row['checkpoint'])
+                     for row in cursor.fetchall()}
+    pg_conn.commit()
+    return completed
+
+
+def clear_checkpoints(pg_conn, tables: list[str]):
+    """Forget earlier backfill progress for these tables (--restart)"""
+    with pg_conn.cursor() as cursor:
+        cursor.execute("DELETE FROM sync_metadata WHERE table_name = ANY(%s) AND checkpoint IS NOT NULL",
+                       ([CHECKPOINT_PREFIX + t for t in tables],))
+    pg_conn.commit()
+
+
+# ============================================================================
+# DROPPED INDEXES
+# ============================================================================
+# A dropped index only exists as its saved definition until the rebuild, so the
+# definition is committed before the DROP and forgotten only together with the
+# rebuild. A run that dies in between leaves it for the next run to rebuild.
+
+def record_dropped_indexes(pg_conn, table_name: str, indexes: list[tuple]):
+    """Save the definitions of indexes about to be dropped"""
+    with pg_conn.cursor() as cursor:
+        for _, definition in indexes:
+            cursor.execute(CHECKPOINT_INSERT, (INDEX_PREFIX + table_name, datetime.utcnow(), 0, 0,
+                                               INDEX_STATUS, definition))
+    pg_conn.commit()
+
+
+def restore_indexes(pg_conn) -> list[str]:
+    """Rebuild every index recorded as dropped (by this run or an interrupted one); returns their tables"""
+    with pg_conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT DISTINCT table_name, checkpoint
+            FROM sync_metadata
+            WHERE table_name LIKE %s AND status = %s
+        """, (INDEX_PREFIX + "%", INDEX_STATUS))
+        rows = cursor.fetchall()
+    pg_conn.commit()
+
+    recorded = {}
+    for row in rows:
+        recorded.setdefault(row['table_name'], []).append(row['checkpoint'])
+
+    for label, definitions in recorded.items():
+        def work(cursor):
+            for definition in definitions:
+                cursor.execute(definition.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1))
+            cursor.execute("DELETE FROM sync_metadata WHERE table_name = %s AND status = %s",
+                           (label, INDEX_STATUS))
+
+        # Retried (and reconnected) on connection errors like a load
+        with timed_step(f"Rebuild {len(definitions)} indexes on {label[len(INDEX_PREFIX):]}"):
+            run_in_transaction(pg_conn, work)
+    return [label[len(INDEX_PREFIX):] for label in recorded]
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def init_worker():
+    """Open this worker process's BigQuery client and Supabase connection"""
+    global _bq_client, _pg_conn
+    _bq_client = get_bigquery_client()
+    _pg_conn = get_supabase_connection()
+
+
+def backfill_chunk(table_name: str, chunk_start: date, chunk_end: date, staging_dir: Path) -> dict:
+    """Run one chunk, reopening this worker's Supabase connection when it has dropped"""
+    for attempt in range(1, CHUNK_ATTEMPTS + 1):
+        if _pg_conn.closed:
+            try:
+                _pg_conn.reconnect()
+            except psycopg2.OperationalError as e:
+                result = {"table": table_name, "chunk": checkpoint_label(chunk_start, chunk_end),
+                          "rows": 0, "status": "error", "error": str(e)}
+                continue
+        result = run_chunk(table_name, chunk_start, chunk_end, staging_dir)
+        if result["status"] == "success":
+            break
+    return result
+
+
+def run_chunk(table_name: str, chunk_start: date, chunk_end: date, staging_dir: Path) -> dict:
+    """Extract one chunk and replace it in Supabase, committing the checkpoint with the data"""
+    start_time = datetime.now()
+    date_column = TABLES_TO_SYNC[table_name]["date_column"]
+    columns = TABLE_COLUMNS[table_name]
+    checkpoint = checkpoint_label(chunk_start, chunk_end)
+    stage_name = f"{table_name}_{chunk_start.isoformat()}_{chunk_end.isoformat()}"
+    # One staging directory per worker so concurrent manifest writes don't collide
+    worker_dir = Path(staging_dir) / f"worker-{os.getpid()}"
+
+    query = f"""
+        SELECT {', '.join(columns)}
+        FROM `{PROJECT_ID}.{BQ_DATASET}.{table_name}`
+        WHERE {date_column} BETWEEN @chunk_start AND @chunk_end
+    """
+
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("chunk_start", "DATE", chunk_start),
+            bigquery.ScalarQueryParameter("chunk_end", "DATE", chunk_end),
+        ]
+    )
+
+    try:
+        entry = extract_query(_bq_client, stage_name, query, columns,
+                              job_config=job_config, staging_dir=worker_dir)
+
+        rows = load_staged_table(
+            _pg_conn, table_name,
+            prepare_sql=f"DELETE FROM {table_name} WHERE {date_column} BETWEEN %s AND %s",
+            prepare_params=(chunk_start, chunk_end),
+            staging_dir=worker_dir,
+            stage_name=stage_name,
+            extra_statements=[
+                (CHECKPOINT_INSERT, (CHECKPOINT_PREFIX + table_name, datetime.utcnow(), entry["rows"],
+                                     (datetime.now() - start_time).total_seconds(), 'success', checkpoint)),
+            ],
+        )
+
+        duration = (datetime.now() - start_time).total_seconds()
+        return {"table": table_name, "chunk": checkpoint, "rows": rows, "duration": duration, "status": "success"}
+
+    except Exception as e:
+        if not _pg_conn.closed:
+            _pg_conn.rollback()
+        return {"table": table_name, "chunk": checkpoint, "rows": 0, "status": "error", "error": str(e)}
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Resumable chunked backfill of date-partitioned tables")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, required=True, help="Last day (YYYY-MM-DD, inclusive)")
+    parser.add_argument("--chunk", choices=list(CHUNK_DAYS), default="week",
+                        help="Chunk size; each chunk commits independently")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS,
+                        help="Worker processes (each with its own BigQuery and Supabase connection)")
+    parser.add_argument("--tables", nargs="+", choices=BACKFILL_TABLES, default=BACKFILL_TABLES,
+                        help="Only backfill these tables")
+    parser.add_argument("--staging-dir", type=Path, default=BACKFILL_STAGING_DIR,
+                        help="Directory for the per-chunk Parquet files")
+    parser.add_argument("--keep-indexes", action="store_true",
+                        help="Don't drop secondary indexes during the backfill")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore (and clear) checkpoints from earlier runs")
+    return parser.parse_args()
+
+
+def main():
+    """Main backfill function"""
+    args = parse_args()
+
+    if args.end < args.start:
+        print("--end must not be before --start")
+        sys.exit(2)
+
+    print("=" * 60)
+    print("Backfill: BigQuery → Supabase")
+    print("=" * 60)
+    print(f"Started at: {datetime.now()}")
+    print(f"Range: {args.start} to {args.end} ({args.chunk} chunks, {args.workers} workers)")
+    print()
+
+    print("Connecting to Supabase...")
+    pg_conn = get_supabase_connection()
+    # Indexes an interrupted run dropped and never rebuilt
+    print("Checking for indexes left dropped by an earlier run...")
+    restore_indexes(pg_conn)
+    if args.restart:
+        clear_checkpoints(pg_conn, args.tables)
+    completed = get_completed_chunks(pg_conn, args.tables)
+
+    chunks = split_chunks(args.start, args.end, args.chunk)
+    pending = [
+        (table_name, chunk_start, chunk_end)
+        for table_name in args.tables
+        for chunk_start, chunk_end in chunks
+        if (table_name, checkpoint_label(chunk_start, chunk_end)) not in completed
+    ]
+    skipped = len(chunks) * len(args.tables) - len(pending)
+
+    print(f"Chunks: {len(pending)} pending, {skipped} already completed")
+    print()
+
+    start_time = datetime.now()
+    results = []
+    pending_tables = list(dict.fromkeys(table_name for table_name, _, _ in pending))
+
+    # Secondary indexes are rebuilt once after all chunks; the date index stays
+    # since every chunk DELETEs its range by date
+    dropped = {}
+    if pending and not args.keep_indexes:
+        for table_name in pending_tables:
+            keep_columns = [TABLES_TO_SYNC[table_name]["date_column"]]
+            dropped[table_name] = get_deferrable_indexes(pg_conn, table_name, keep_columns)
+            record_dropped_indexes(pg_conn, table_name, dropped[table_name])
+            drop_indexes(pg_conn, table_name, keep_columns)
+
+    try:
+        if pending:
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as executor:
+                futures = [
+                    executor.submit(backfill_chunk, table_name, chunk_start, chunk_end, args.staging_dir)
+                    for table_name, chunk_start, chunk_end in pending
+                ]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    if result["status"] == "success":
+                        print(f"  {result['table']} {result['chunk']}: {result['rows']} rows "
+                              f"in {result['duration']:.2f}s ({len(results)}/{len(pending)})")
+                    else:
+                        print(f"  {result['table']} {result['chunk']}: ERROR {result['error']}")
+    finally:
+        # The connection sat idle through the chunks and may have been dropped;
+        # whatever is recorded is rebuilt on a fresh one
+        print("\nRebuilding deferred indexes:")
+        pg_conn.reconnect()
+        restore_indexes(pg_conn)
+
+    # Cumulative stats from the first backfilled day on (see cumulative.py)
+    backfilled = list(dict.fromkeys(r["table"] for r in results if r["status"] == "success"))
+    cumulative = refresh_cumulative_tables(pg_conn, backfilled, since=args.start)
+
+    # Fresh statistics (and VACUUM after the chunk DELETEs when needed)
+    run_maintenance(pg_conn, pending_tables + [r["table"] for r in cumulative if r["status"] == "success"])
+    notify_sync(pg_conn, backfilled + [r["table"] for r in cumulative if r["status"] == "success"])
+    pg_conn.close()
+
+    # Staged chunk files are only needed until their chunk commits
+    if args.staging_dir.exists() and all(r["status"] == "success" for r in results):
+        shutil.rmtree(args.staging_dir)
+
+    # Summary
+    duration = (datetime.now() - start_time).total_seconds()
+    failed = [r for r in results if r["status"] == "error"]
+
+    print("\n" + "=" * 60)
+    print("Backfill Summary:")
+    print("=" * 60)
+    print(f"  Chunks committed: {len(results) - len(failed)}/{len(pending)} (skipped {skipped})")
+    print(f"  Total rows: {sum(r['rows'] for r in results)}")
+    print(f"  Duration: {duration:.2f}s")
+    if failed:
+        print(f"  Failed: {len(failed)} (re-run the same command to resume)")
+        for r in failed:
+            print(f"    - {r['table']} {r['chunk']}: {r['error']}")
+    cumulative_failed = [r for r in cumulative if r["status"] == "error"]
+    for r in cumulative_failed:
+        print(f"  Cumulative refresh failed: {r['table']}: {r['error']} "
+              f"(run cumulative.py --since {args.start})")
+
+    print(f"\nCompleted at: {datetime.now()}")
+
+    if failed or cumulative_failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Cumulative Daily Stats (prefix sums) for the Ranking Sections
+Maintains <entity>_cumulative_stats next to each per-entity daily stats table:
+one row per entity per day, from the entity's first day to the last synced day,
+holding running totals up to and including that day.
+
+A range total is then two indexed lookups per entity instead of a scan of every
+day in the range (see the *_cumulative queries in functions/dashboard_queries.py):
+
+    total(start..end) = cumulative[end] - cumulative[start - 1]
+
+Besides the additive counters each table carries:
+    row_count             running count of daily rows (an entity is in a range
+                          when this grows across it, like GROUP BY on the scan)
+    <col>_sum/_count      for AVG columns: running sum of the non-NULL values and
+                          how many there were
+    <col>_max/_max_days   for MAX columns: running maximum and how many days had
+                          exactly that value, so a range can tell whether the
+                          maximum was reached inside it (falling back to the
+                          daily table for the rare range where it wasn't)
+
+The sync scripts refresh the tables after loading their sources; rows from the
+first changed day onward are rebuilt on top of the row before it. Can also be
+run on its own:
+    python cumulative.py                      # rebuild every cumulative table
+    python cumulative.py --tables project_daily_stats --since 2025-01-01
+"""
+
+import argparse
+from datetime import datetime, timedelta, date
+from staging import run_in_transaction
+
+# Source table -> cumulative table, entity key and the columns it carries
+# (sums: additive counters, NULL counted as 0; averages: AVG columns; maxes: MAX columns)
+CUMULATIVE_TABLES = {
+    "project_daily_stats": {
+        "table": "project_cumulative_stats",
+        "key": "project_id",
+        "sums": ["views", "unique_viewers", "clicks", "expands", "link_clicks", "github_clicks", "demo_clicks"],
+        "averages": [],
+        "maxes": ["project_title", "project_category"],
+    },
+    "section_daily_stats": {
+        "table": "section_cumulative_stats",
+        "key": "section_id",
+        "sums": ["unique_views", "unique_exits", "unique_viewers", "total_views", "total_exits", "engaged_sessions"],
+        "averages": ["unique_exit_rate", "total_exit_rate", "avg_revisits_per_session", "engagement_rate",
+                     "avg_time_spent_seconds", "avg_scroll_depth_percent"],
+        "maxes": ["max_scroll_milestone"],
+    },
+    "skill_daily_stats": {
+        "table": "skill_cumulative_stats",
+        "key": "skill_name",
+        "sums": ["clicks", "hovers", "unique_users", "weighted_interest_score"],
+        "averages": [],
+        "maxes": [],
+    },
+    "domain_daily_stats": {
+        "table": "domain_cumulative_stats",
+        "key": "domain",
+        "sums": ["explicit_interest_signals", "implicit_interest_from_views", "total_domain_interactions",
+                 "unique_interested_users", "domain_interest_score"],
+        "averages": [],
+        "maxes": [],
+    },
+    "experience_daily_stats": {
+        "table": "experience_cumulative_stats",
+        "key": "experience_id",
+        "sums": ["total_interactions", "unique_interested_users", "unique_sessions"],
+        "averages": [],
+        "maxes": ["experience_title", "company"],
+    },
+}
+
+
+SYNC_METADATA_INSERT = """
+    INSERT INTO sync_metadata (table_name, last_synced_at, rows_synced, sync_duration_seconds, status)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+# ============================================================================
+# REFRESH
+# ============================================================================
+
+def refresh_sql(source: str, config: dict) -> str:
+    """
+    INSERT of every cumulative row from %(since)s onward.
+
+    Days are laid out as a dense entity x day grid so ranges can look up any
+    end date; the row at since - 1 (if any) seeds each entity's running values.
+    """
+    table, key = config["table"], config["key"]
+
+    daily = ["COUNT(*) AS row_count"]
+    daily += [f"SUM(COALESCE({column}, 0)) AS {column}" for column in config["sums"]]
+    for column in config["averages"]:
+        daily += [f"SUM({column}::numeric) AS {column}_sum", f"COUNT({column}) AS {column}_count"]
+
+    # Additive columns: seed + running sum of the daily values
+    columns = ["row_count"] + config["sums"]
+    columns += [f"{column}{suffix}" for column in config["averages"] for suffix in ("_sum", "_count")]
+    running = [f"COALESCE(b.{column}, 0) + COALESCE(SUM(d.{column}) OVER w, 0) AS {column}" for column in columns]
+    final = list(columns)
+
+    for column in config["maxes"]:
+        daily.append(f"MAX({column}) AS {column}")
+        running += [
+            f"d.{column} AS {column}_day",
+            f"b.{column}_max AS {column}_base_max",
+            f"b.{column}_max_days AS {column}_base_days",
+            f"GREATEST(b.{column}_max, MAX(d.{column}) OVER w) AS {column}_max",
+        ]
+        # Days matching the running max: the seed's count carries over only
+        # while the max is still the seed's
+        columns += [f"{column}_max", f"{column}_max_days"]
+        final += [
+            f"{column}_max",
+            f"""CASE WHEN {column}_max = {column}_base_max THEN {column}_base_days ELSE 0 END
+                + COUNT(*) FILTER (WHERE {column}_day = {column}_max)
+                      OVER (PARTITION BY {key}, {column}_max ORDER BY event_date) AS {column}_max_days""",
+        ]
+
+    return f"""
+        WITH daily AS (
+            SELECT {key}, event_date, {', '.join(daily)}
+            FROM {source}
+            WHERE event_date >= %(since)s AND {key} IS NOT NULL
+            GROUP BY {key}, event_date
+        ),
+        base AS (
+            SELECT * FROM {table} WHERE event_date = %(since)s::date - 1
+        ),
+        entities AS (
+            SELECT {key}, MIN(first_day) AS first_day
+            FROM (
+                SELECT {key}, %(since)s::date AS first_day FROM base
+                UNION ALL
+                SELECT {key}, MIN(event_date) FROM daily GROUP BY {key}
+            ) e
+            GROUP BY {key}
+        ),
+        grid AS (
+            SELECT e.{key}, day::date AS event_date
+            FROM entities e
+            CROSS JOIN (SELECT MAX(event_date) AS last_day FROM {source}) l
+            CROSS JOIN generate_series(e.first_day, l.last_day, interval '1 day') AS day
+        ),
+        running AS (
+            SELECT g.{key}, g.event_date, {', '.join(running)}
+            FROM grid g
+            LEFT JOIN daily d ON d.{key} = g.{key} AND d.event_date = g.event_date
+            LEFT JOIN base b ON b.{key} = g.{key}
+            WINDOW w AS (PARTITION BY g.{key} ORDER BY g.event_date)
+        )
+        INSERT INTO {table} ({key}, event_date, {', '.join(columns)})
+        SELECT {key}, event_date, {', '.join(final)}
+        FROM running
+    """
+
+
+def refresh_cumulative_table(pg_conn, source: str, since: date = None) -> dict:
+    """
+    Rebuild a cumulative table from `since` onward (everything when None) in one
+    transaction, so the API never sees a half-built table.
+    """
+    start_time = datetime.now()
+    config = CUMULATIVE_TABLES[source]
+    table = config["table"]
+
+    def work(cursor):
+        # Rows only exist up to the last day synced before; a later `since`
+        # must still start right after it to carry every entity forward
+        cursor.execute(f"SELECT MAX(event_date) AS last_day FROM {table}")
+        row = cursor.fetchone()
+        # Works with both tuple and RealDictCursor connections
+        last_day = row["last_day"] if isinstance(row, dict) else row[0]
+        start = date.min if since is None or last_day is None else min(since, last_day + timedelta(days=1))
+
+        cursor.execute(f"DELETE FROM {table} WHERE event_date >= %s", (start,))
+        cursor.execute(refresh_sql(source, config), {"since": start})
+        rows = cursor.rowcount
+        # Recorded like any synced table: the API's cache treats a newer
+        # sync_metadata entry as "data changed" (see main.py)
+        cursor.execute(SYNC_METADATA_INSERT, (table, datetime.utcnow(), rows,
+                                              (datetime.now() - start_time).total_seconds(), 'success'))
+        return start, rows
+
+    print(f"  Refreshing {table} from {since or 'the first day'}...")
+    try:
+        start, rows = run_in_transaction(pg_conn, work)
+        duration = (datetime.now() - start_time).total_seconds()
+        print(f"    Wrote {rows} rows from {start if start != date.min else 'the first day'} in {duration:.2f}s")
+        return {"table": table, "rows": rows, "duration": duration, "status": "success"}
+    except Exception as e:
+        print(f"    Error: {e}")
+        pg_conn.rollback()
+        return {"table": table, "rows": 0, "status": "error", "error": str(e)}
+
+
+def refresh_cumulative_tables(pg_conn, tables: list[str], since: date = None) -> list[dict]:
+    """Refresh the cumulative tables of every source in `tables` that has one"""
+    sources = [table for table in dict.fromkeys(tables) if table in CUMULATIVE_TABLES]
+    if not sources:
+        return []
+    print("\nRefreshing cumulative stats:")
+    return [refresh_cumulative_table(pg_conn, source, since) for source in sources]
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rebuild the cumulative (prefix sum) daily stats tables")
+    parser.add_argument("--tables", nargs="+", choices=list(CUMULATIVE_TABLES), default=list(CUMULATIVE_TABLES),
+                        help="Source tables whose cumulative tables to refresh")
+    parser.add_argument("--since", type=date.fromisoformat,
+                        help="Only rebuild from this day (YYYY-MM-DD); default rebuilds everything")
+    return parser.parse_args()
+
+
+def main():
+    """Refresh cumulative tables on demand"""
+    from sync_to_supabase import get_supabase_connection
+    from maintenance import run_maintenance, notify_sync
+
+    args = parse_args()
+    pg_conn = get_supabase_connection()
+    results = refresh_cumulative_tables(pg_conn, args.tables, args.since)
+    refreshed = [r["table"] for r in results if r["status"] == "success"]
+    run_maintenance(pg_conn, refreshed)
+    notify_sync(pg_conn, refreshed)
+    pg_conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,37 @@
 """
 Incremental Sync: BigQuery → Supabase
 Runs daily at 8 PM IST to sync new data only.
+With --mode micro it instead upserts rows newer than each table's
+materialized_at watermark (run every 15-60 minutes).
 
 Flow:
+0. Re-check the last SYNC_LOOKBACK_DAYS synced days and re-sync any that changed
 1. Get last_processed_timestamp from Supabase
 2. Query BigQuery for data after that timestamp
 3. Transform raw events into materialized views
 4. APPEND new data to BigQuery materialized tables
-5. APPEND new data to Supabase tables
+5. Stage each result as Parquet (see staging.py), then APPEND to Supabase tables
 6. Update last_processed_timestamp
 """
 
 import os
 import sys
-from datetime import datetime, timedelta, date
+import argparse
+import hashlib
+from datetime import datetime, timedelta, date, timezone
 from pathlib import Path
 import psycopg2
-from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.extras import RealDictCursor
 from google.cloud import bigquery
 from dotenv import load_dotenv
+from staging import (
+    parse_columns, extract_query, stage_rows, staged_max, staged_min,
+    load_staged_table, upsert_staged_table, ReconnectingConnection,
+)
+from sync_to_supabase import TABLES_TO_SYNC, SYNC_METADATA_INSERT, sync_metadata_statement
+from maintenance import deferred_indexes, run_maintenance, notify_sync
+from cumulative import refresh_cumulative_tables
+from snapshot import refresh_snapshot
 
 # Load environment variables
 env_path = Path(__file__).parent.parent / "functions" / ".env"
@@ -29,6 +42,19 @@ PROJECT_ID = "portfolio-483605"
 BQ_DATASET = "analytics_materialized"
 BQ_RAW_DATASET = "analytics_325aborty"  # Raw GA4 events dataset
 
+# Column order for staged extracts (shared with the full sync)
+TABLE_COLUMNS = {name: parse_columns(config["pg_columns"]) for name, config in TABLES_TO_SYNC.items()}
+
+# Late-arriving data: re-check this many already-synced days on every run
+SYNC_LOOKBACK_DAYS = int(os.getenv("SYNC_LOOKBACK_DAYS", "3"))
+LOOKBACK_TABLES = ["sessions", "daily_metrics"]
+# materialized_at changes on every BigQuery materialization, so it's not part of the comparison
+FINGERPRINT_EXCLUDED_COLUMNS = {"materialized_at"}
+CHECKSUM_MODULUS = 2 ** 64
+
+# Micro-sync: every table with a row key can be upserted by materialized_at watermark
+MICRO_SYNC_TABLES = [name for name, config in TABLES_TO_SYNC.items() if "key_columns" in config]
+
 # Supabase config
 SUPABASE_CONFIG = {
     "host": os.getenv("SUPABASE_HOST", "aws-1-ap-south-1.pooler.supabase.com"),
@@ -40,7 +66,11 @@ SUPABASE_CONFIG = {
 
 
 def get_bigquery_client():
-    """Initialize BigQuery client"""
+    """Initialize BigQuery client (or the local stand-in when LOCAL_BIGQUERY_DIR is set)"""
+    if os.getenv("LOCAL_BIGQUERY_DIR"):
+        from local_bigquery import LocalBigQueryClient
+        return LocalBigQueryClient(os.environ["LOCAL_BIGQUERY_DIR"], project=PROJECT_ID)
+
     credentials_path = Path(__file__).parent.parent / "credentials" / "gcp-service-account.json"
     if credentials_path.exists():
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(credentials_path)
@@ -48,8 +78,8 @@ def get_bigquery_client():
 
 
 def get_supabase_connection():
-    """Get PostgreSQL connection to Supabase"""
-    return psycopg2.connect(
+    """Get PostgreSQL connection to Supabase (reopened by the loads if it drops)"""
+    return ReconnectingConnection(lambda: psycopg2.connect(
         host=SUPABASE_CONFIG["host"],
         port=SUPABASE_CONFIG["port"],
         database=SUPABASE_CONFIG["database"],
@@ -57,36 +87,32 @@ def get_supabase_connection():
         password=SUPABASE_CONFIG["password"],
         sslmode="require",
         cursor_factory=RealDictCursor
-    )
+    ))
 
 
 def get_last_sync_timestamp(pg_conn, table_name: str) -> datetime:
-    """Get the last sync timestamp for a table from Supabase"""
+    """
+    Get the sync watermark for a table from Supabase.
+
+    Every successful load records the MAX(materialized_at) of the rows it loaded
+    as the watermark, in the same transaction as the data; failed runs and
+    entries without one never move it.
+    """
     with pg_conn.cursor() as cursor:
         cursor.execute("""
-            SELECT last_synced_at
+            SELECT watermark
             FROM sync_metadata
-            WHERE table_name = %s
+            WHERE table_name = %s AND status = 'success' AND watermark IS NOT NULL
             ORDER BY last_synced_at DESC
             LIMIT 1
         """, (table_name,))
         result = cursor.fetchone()
 
-        if result and result['last_synced_at']:
-            return result['last_synced_at']
+        if result and result['watermark']:
+            return result['watermark']
 
         # Default: 30 days ago if no previous sync
-        return datetime.utcnow() - timedelta(days=30)
-
-
-def update_sync_timestamp(pg_conn, table_name: str, rows_synced: int, duration: float):
-    """Update the sync metadata after successful sync"""
-    with pg_conn.cursor() as cursor:
-        cursor.execute("""
-            INSERT INTO sync_metadata (table_name, last_synced_at, rows_synced, sync_duration_seconds, status)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (table_name, datetime.utcnow(), rows_synced, duration, 'success'))
-        pg_conn.commit()
+        return datetime.now(timezone.utc) - timedelta(days=30)
 
 
 def get_new_session_date(pg_conn) -> date:
@@ -105,6 +131,118 @@ def get_new_session_date(pg_conn) -> date:
         return (datetime.utcnow() - timedelta(days=30)).date()
 
 
+# ============================================================================
+# LATE-ARRIVING DATA LOOKBACK
+# ============================================================================
+# GA4 events can land in BigQuery days after the fact, so already-synced days are
+# re-checked within a rolling window. Each day is fingerprinted on both sides
+# (row count + order-independent checksum of the row contents) and only days whose
+# fingerprints differ are replaced.
+
+def row_fingerprint(values: tuple) -> int:
+    """64-bit hash of a row's values, normalized so BigQuery and Postgres rows compare equal"""
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append("\x00")
+        elif isinstance(value, datetime):
+            parts.append(value.astimezone(timezone.utc).isoformat())
+        elif isinstance(value, date):
+            parts.append(value.isoformat())
+        else:
+            parts.append(repr(value))
+    digest = hashlib.blake2b("\x1f".join(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def daily_fingerprints(rows: list[tuple], date_index: int) -> dict:
+    """Per-day (row_count, checksum) where checksum is the sum of row hashes mod 2^64"""
+    fingerprints = {}
+    for row in rows:
+        day = row[date_index]
+        count, checksum = fingerprints.get(day, (0, 0))
+        fingerprints[day] = (count + 1, (checksum + row_fingerprint(row)) % CHECKSUM_MODULUS)
+    return fingerprints
+
+
+def sync_lookback_window(bq_client, pg_conn, table_name: str, window_start: date, window_end: date) -> dict:
+    """Re-sync only the days in [window_start, window_end] whose contents differ from BigQuery"""
+    start_time = datetime.now()
+    config = TABLES_TO_SYNC[table_name]
+    date_column = config["date_column"]
+    columns = TABLE_COLUMNS[table_name]
+    compared = [c for c in columns if c not in FINGERPRINT_EXCLUDED_COLUMNS]
+    stage_name = f"{table_name}_lookback"
+
+    print(f"  Checking {table_name} ({window_start} to {window_end})...")
+
+    query = f"""
+        SELECT {', '.join(columns)}
+        FROM `{PROJECT_ID}.{BQ_DATASET}.{table_name}`
+        WHERE {date_column} BETWEEN @window_start AND @window_end
+    """
+
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("window_start", "DATE", window_start),
+            bigquery.ScalarQueryParameter("window_end", "DATE", window_end),
+        ]
+    )
+
+    try:
+        bq_rows = [tuple(row.values()) for row in bq_client.query(query, job_config=job_config).result()]
+
+        with pg_conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join(compared)}
+                FROM {table_name}
+                WHERE {date_column} BETWEEN %s AND %s
+            """, (window_start, window_end))
+            pg_rows = [tuple(row.values()) for row in cursor.fetchall()]
+
+        # Compare the same column subset on both sides
+        compared_idx = [columns.index(c) for c in compared]
+        bq_fingerprints = daily_fingerprints(
+            [tuple(row[i] for i in compared_idx) for row in bq_rows], compared.index(date_column)
+        )
+        pg_fingerprints = daily_fingerprints(pg_rows, compared.index(date_column))
+
+        changed_days = sorted(
+            day for day in set(bq_fingerprints) | set(pg_fingerprints)
+            if bq_fingerprints.get(day) != pg_fingerprints.get(day)
+        )
+
+        if not changed_days:
+            print(f"    All {len(bq_fingerprints)} days match")
+            return {"table": table_name, "rows": 0, "status": "no_changes"}
+
+        for day in changed_days:
+            bq_count = bq_fingerprints.get(day, (0, 0))[0]
+            pg_count = pg_fingerprints.get(day, (0, 0))[0]
+            print(f"    {day}: BigQuery {bq_count} rows, Supabase {pg_count} rows - re-syncing")
+
+        # Replace the changed days in one transaction
+        date_idx = columns.index(date_column)
+        changed = set(changed_days)
+        entry = stage_rows(stage_name, columns, [row for row in bq_rows if row[date_idx] in changed])
+        rows = load_staged_table(pg_conn, table_name,
+                                 prepare_sql=f"DELETE FROM {table_name} WHERE {date_column} = ANY(%s)",
+                                 prepare_params=(changed_days,),
+                                 stage_name=stage_name,
+                                 extra_statements=[sync_metadata_statement(
+                                     table_name, stage_name, entry["rows"], start_time)])
+
+        duration = (datetime.now() - start_time).total_seconds()
+        print(f"    Re-synced {len(changed_days)} days ({rows} rows) in {duration:.2f}s")
+
+        return {"table": table_name, "rows": rows, "duration": duration, "status": "success"}
+
+    except Exception as e:
+        print(f"    Error: {e}")
+        pg_conn.rollback()
+        return {"table": table_name, "rows": 0, "status": "error", "error": str(e)}
+
+
 # ============================================================================
 # INCREMENTAL SYNC FUNCTIONS FOR EACH TABLE
 # ============================================================================
@@ -113,6 +251,7 @@ def sync_sessions_incremental(bq_client, pg_conn, start_date: date) -> dict:
     """Sync new sessions from BigQuery to Supabase"""
     start_time = datetime.now()
     table_name = "sessions"
+    stage_name = f"{table_name}_incremental"
 
     print(f"  Syncing {table_name} (from {start_date})...")
 
@@ -141,54 +280,24 @@ def sync_sessions_incremental(bq_client, pg_conn, start_date: date) -> dict:
     )
 
     try:
-        query_job = bq_client.query(query, job_config=job_config)
-        rows = list(query_job.result())
+        # Extract: stage the BigQuery result locally (as a delta, apart from the full sync's file)
+        entry = extract_query(bq_client, stage_name, query, TABLE_COLUMNS[table_name], job_config=job_config)
 
-        if not rows:
+        if not entry["rows"]:
             print(f"    No new data for {table_name}")
             return {"table": table_name, "rows": 0, "status": "no_new_data"}
 
-        # Convert to list of tuples
-        data = [tuple(row.values()) for row in rows]
-
-        # Insert into Supabase (append)
-        with pg_conn.cursor() as cursor:
-            columns = """
-                user_pseudo_id, session_id, session_start, session_end,
-                device_category, os, browser, country, region, city, continent,
-                traffic_source, traffic_medium, campaign_name,
-                total_events, page_views, scroll_events, click_events,
-                engaged_session, landing_page, exit_page, is_returning,
-                engagement_score, engagement_level, max_scroll_depth,
-                sections_viewed_count, projects_clicked_count, conversions_count,
-                day_of_week_name, hour_of_day, session_duration_seconds,
-                session_date, session_hour, session_day_of_week,
-                is_bounce, is_engaged, engagement_tier, visitor_type,
-                has_conversion, materialized_at
-            """.replace('\n', '').replace(' ', '')
-
-            # Use ON CONFLICT to handle duplicates (upsert)
-            insert_query = f"""
-                INSERT INTO {table_name} ({columns})
-                VALUES %s
-                ON CONFLICT (session_id, user_pseudo_id) DO NOTHING
-            """
-
-            # For tables without unique constraint, just insert
-            insert_query = f"""
-                INSERT INTO {table_name} ({columns})
-                VALUES %s
-            """
-
-            execute_values(cursor, insert_query, data)
-            pg_conn.commit()
+        # Load: append from the staged file (sessions has no unique constraint, so plain insert)
+        with deferred_indexes(pg_conn, table_name, entry["rows"], keep_columns=["session_date"]):
+            rows = load_staged_table(pg_conn, table_name, stage_name=stage_name,
+                                     extra_statements=[sync_metadata_statement(
+                                         table_name, stage_name, entry["rows"], start_time)])
 
         duration = (datetime.now() - start_time).total_seconds()
-        print(f"    Synced {len(data)} rows in {duration:.2f}s")
+        print(f"    Synced {rows} rows in {duration:.2f}s")
 
-        update_sync_timestamp(pg_conn, table_name, len(data), duration)
 
-        return {"table": table_name, "rows": len(data), "duration": duration, "status": "success"}
+        return {"table": table_name, "rows": rows, "duration": duration, "status": "success"}
 
     except Exception as e:
         print(f"    Error: {e}")
@@ -200,6 +309,7 @@ def sync_daily_metrics_incremental(bq_client, pg_conn, start_date: date) -> dict
     """Sync new daily metrics"""
     start_time = datetime.now()
     table_name = "daily_metrics"
+    stage_name = f"{table_name}_incremental"
 
     print(f"  Syncing {table_name} (from {start_date})...")
 
@@ -222,37 +332,24 @@ def sync_daily_metrics_incremental(bq_client, pg_conn, start_date: date) -> dict
     )
 
     try:
-        query_job = bq_client.query(query, job_config=job_config)
-        rows = list(query_job.result())
+        entry = extract_query(bq_client, stage_name, query, TABLE_COLUMNS[table_name], job_config=job_config)
 
-        if not rows:
+        if not entry["rows"]:
             print(f"    No new data for {table_name}")
             return {"table": table_name, "rows": 0, "status": "no_new_data"}
 
-        data = [tuple(row.values()) for row in rows]
-
-        with pg_conn.cursor() as cursor:
-            columns = """
-                session_date, total_sessions, unique_visitors, total_page_views,
-                avg_pages_per_session, engaged_sessions, engagement_rate,
-                bounces, bounce_rate, avg_session_duration_sec, avg_engagement_time_sec,
-                desktop_sessions, mobile_sessions, tablet_sessions,
-                avg_engagement_score, returning_visitor_sessions, returning_visitor_rate,
-                dark_mode_sessions, light_mode_sessions, materialized_at
-            """.replace('\n', '').replace(' ', '')
-
-            # Delete existing data for these dates (to handle updates)
-            cursor.execute(f"DELETE FROM {table_name} WHERE session_date >= %s", (start_date,))
-
-            insert_query = f"INSERT INTO {table_name} ({columns}) VALUES %s"
-            execute_values(cursor, insert_query, data)
-            pg_conn.commit()
+        # Delete existing data for these dates (to handle updates) in the same transaction as the insert
+        rows = load_staged_table(pg_conn, table_name,
+                                 prepare_sql=f"DELETE FROM {table_name} WHERE session_date >= %s",
+                                 prepare_params=(start_date,),
+                                 stage_name=stage_name,
+                                 extra_statements=[sync_metadata_statement(
+                                     table_name, stage_name, entry["rows"], start_time)])
 
         duration = (datetime.now() - start_time).total_seconds()
-        print(f"    Synced {len(data)} rows in {duration:.2f}s")
-        update_sync_timestamp(pg_conn, table_name, len(data), duration)
+        print(f"    Synced {rows} rows in {duration:.2f}s")
 
-        return {"table": table_name, "rows": len(data), "duration": duration, "status": "success"}
+        return {"table": table_name, "rows": rows, "duration": duration, "status": "success"}
 
     except Exception as e:
         print(f"    Error: {e}")
@@ -263,30 +360,95 @@ def sync_daily_metrics_incremental(bq_client, pg_conn, start_date: date) -> dict
 def sync_rankings_full_refresh(bq_client, pg_conn, table_name: str, query: str, columns: str) -> dict:
     """Full refresh for ranking tables (they're aggregated, not date-based)"""
     start_time = datetime.now()
+    stage_name = f"{table_name}_incremental"
 
     print(f"  Syncing {table_name} (full refresh)...")
 
     try:
-        query_job = bq_client.query(query)
-        rows = list(query_job.result())
+        entry = extract_query(bq_client, stage_name, query, parse_columns(columns))
 
-        if not rows:
+        if not entry["rows"]:
             print(f"    No data for {table_name}")
             return {"table": table_name, "rows": 0, "status": "empty"}
 
-        data = [tuple(row.values()) for row in rows]
+        date_column = TABLES_TO_SYNC[table_name].get("date_column")
+        with deferred_indexes(pg_conn, table_name, entry["rows"], keep_columns=[date_column]):
+            rows = load_staged_table(pg_conn, table_name,
+                                     prepare_sql=f"TRUNCATE TABLE {table_name} RESTART IDENTITY",
+                                     stage_name=stage_name,
+                                     extra_statements=[sync_metadata_statement(
+                                         table_name, stage_name, entry["rows"], start_time)])
 
-        with pg_conn.cursor() as cursor:
-            cursor.execute(f"TRUNCATE TABLE {table_name} RESTART IDENTITY")
-            insert_query = f"INSERT INTO {table_name} ({columns}) VALUES %s"
-            execute_values(cursor, insert_query, data)
-            pg_conn.commit()
+        duration = (datetime.now() - start_time).total_seconds()
+        print(f"    Synced {rows} rows in {duration:.2f}s")
+
+        return {"table": table_name, "rows": rows, "duration": duration, "status": "success"}
+
+    except Exception as e:
+        print(f"    Error: {e}")
+        pg_conn.rollback()
+        return {"table": table_name, "rows": 0, "status": "error", "error": str(e)}
+
+
+# ============================================================================
+# MICRO-SYNC (materialized_at watermark)
+# ============================================================================
+# Pulls only rows whose materialized_at is newer than the table's stored watermark
+# and upserts them by key. The new watermark is written in the same transaction as
+# the data, so a failed run never skips rows. Cheap enough for a 15-60 min schedule;
+# note that a full BigQuery re-materialization stamps every row, so the first
+# micro-sync after it reloads whole tables.
+
+def micro_sync_table(bq_client, pg_conn, table_name: str) -> dict:
+    """Upsert rows materialized since the table's watermark"""
+    start_time = datetime.now()
+    config = TABLES_TO_SYNC[table_name]
+    columns = TABLE_COLUMNS[table_name]
+    key_columns = parse_columns(config["key_columns"])
+    stage_name = f"{table_name}_micro"
+
+    watermark = get_last_sync_timestamp(pg_conn, table_name)
+    if watermark.tzinfo is None:
+        watermark = watermark.replace(tzinfo=timezone.utc)
+    watermark = watermark.astimezone(timezone.utc)
+
+    print(f"  Micro-syncing {table_name} (materialized after {watermark})...")
+
+    query = f"""
+        SELECT {', '.join(columns)}
+        FROM `{PROJECT_ID}.{BQ_DATASET}.{table_name}`
+        WHERE materialized_at > @watermark
+    """
+
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("watermark", "TIMESTAMP", watermark)
+        ]
+    )
+
+    try:
+        # Staged apart from the full sync's file, which a --phase load replay reloads whole
+        entry = extract_query(bq_client, stage_name, query, columns, job_config=job_config)
 
+        if not entry["rows"]:
+            print(f"    No new data for {table_name}")
+            return {"table": table_name, "rows": 0, "status": "no_new_data"}
+
+        new_watermark = staged_max(stage_name, "materialized_at")
+        # Upserted rows can be for any day; cumulative stats are rebuilt from the earliest
+        first_day = staged_min(stage_name, config["date_column"]) if "date_column" in config else None
         duration = (datetime.now() - start_time).total_seconds()
-        print(f"    Synced {len(data)} rows in {duration:.2f}s")
-        update_sync_timestamp(pg_conn, table_name, len(data), duration)
 
-        return {"table": table_name, "rows": len(data), "duration": duration, "status": "success"}
+        # Data and watermark commit together
+        rows = upsert_staged_table(pg_conn, table_name, key_columns, extra_statements=[
+            (SYNC_METADATA_INSERT,
+             (table_name, datetime.utcnow(), entry["rows"], duration, 'success', new_watermark)),
+        ], stage_name=stage_name)
+
+        duration = (datetime.now() - start_time).total_seconds()
+        print(f"    Upserted {rows} rows in {duration:.2f}s (watermark → {new_watermark})")
+
+        return {"table": table_name, "rows": rows, "duration": duration, "status": "success", "since": first_day}
 
     except Exception as e:
         print(f"    Error: {e}")
@@ -294,8 +456,84 @@ def sync_rankings_full_refresh(bq_client, pg_conn, table_name: str, query: str,
         return {"table": table_name, "rows": 0, "status": "error", "error": str(e)}
 
 
+def touched_tables(results: list) -> list[str]:
+    """Tables that had rows written by this run"""
+    return [r["table"] for r in results if r["status"] == "success" and r.get("rows", 0) > 0]
+
+
+def print_summary(results: list):
+    """Print the sync summary"""
+    print("\n" + "=" * 60)
+    print("Sync Summary:")
+    print("=" * 60)
+
+    total_rows = sum(r.get("rows", 0) for r in results)
+    successful = sum(1 for r in results if r["status"] in ["success", "no_new_data", "no_changes"])
+    failed = sum(1 for r in results if r["status"] == "error")
+
+    print(f"  Tables synced: {successful}/{len(results)}")
+    print(f"  Total rows: {total_rows}")
+    if failed > 0:
+        print(f"  Failed: {failed}")
+        for r in results:
+            if r["status"] == "error":
+                print(f"    - {r['table']}: {r.get('error', 'Unknown error')}")
+
+    print(f"\nCompleted at: {datetime.now()}")
+    return failed
+
+
+def run_micro_sync(tables: list[str]):
+    """Micro-sync mode: watermark-driven upserts for the given tables"""
+    print("=" * 60)
+    print("Micro-Sync: BigQuery → Supabase (materialized_at watermark)")
+    print("=" * 60)
+    print(f"Started at: {datetime.now()}")
+    print()
+
+    print("Connecting to BigQuery...")
+    bq_client = get_bigquery_client()
+
+    print("Connecting to Supabase...")
+    pg_conn = get_supabase_connection()
+    print()
+
+    synced = [micro_sync_table(bq_client, pg_conn, table_name) for table_name in tables]
+    results = list(synced)
+    for result in synced:
+        if touched_tables([result]):
+            results += refresh_cumulative_tables(pg_conn, [result["table"]], since=result.get("since"))
+    run_maintenance(pg_conn, touched_tables(results))
+    notify_sync(pg_conn, touched_tables(results))
+    if touched_tables(results):
+        refresh_snapshot(pg_conn)
+
+    failed = print_summary(results)
+    pg_conn.close()
+
+    if failed > 0:
+        sys.exit(1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Incremental BigQuery → Supabase sync")
+    parser.add_argument("--mode", choices=["daily", "micro"], default="daily",
+                        help="daily: date-based incremental + full refresh; micro: materialized_at watermark upserts")
+    parser.add_argument("--lookback-days", type=int, default=SYNC_LOOKBACK_DAYS,
+                        help="Re-check this many already-synced days for late-arriving data (0 disables)")
+    parser.add_argument("--tables", nargs="+", choices=MICRO_SYNC_TABLES, default=MICRO_SYNC_TABLES,
+                        help="Tables to micro-sync (micro mode only)")
+    return parser.parse_args()
+
+
 def main():
     """Main incremental sync function"""
+    args = parse_args()
+
+    if args.mode == "micro":
+        run_micro_sync(args.tables)
+        return
+
     print("=" * 60)
     print("Incremental Sync: BigQuery → Supabase")
     print("=" * 60)
@@ -316,6 +554,17 @@ def main():
 
     results = []
 
+    # ========================================================================
+    # LOOKBACK WINDOW (late-arriving data for already-synced days)
+    # ========================================================================
+    if args.lookback_days > 0:
+        window_start = start_date - timedelta(days=args.lookback_days)
+        window_end = start_date - timedelta(days=1)
+        print(f"Checking lookback window ({args.lookback_days} days):")
+        for table_name in LOOKBACK_TABLES:
+            results.append(sync_lookback_window(bq_client, pg_conn, table_name, window_start, window_end))
+        print()
+
     # ========================================================================
     # DATE-BASED TABLES (Incremental)
     # ========================================================================
@@ -459,25 +708,29 @@ def main():
     ))
 
     # ========================================================================
-    # SUMMARY
+    # CUMULATIVE STATS (prefix sums of the reloaded daily stats)
     # ========================================================================
-    print("\n" + "=" * 60)
-    print("Sync Summary:")
-    print("=" * 60)
+    results += refresh_cumulative_tables(pg_conn, touched_tables(results))
 
-    total_rows = sum(r.get("rows", 0) for r in results)
-    successful = sum(1 for r in results if r["status"] in ["success", "no_new_data"])
-    failed = sum(1 for r in results if r["status"] == "error")
+    # ========================================================================
+    # MAINTENANCE (fresh statistics; VACUUM after big deletes)
+    # ========================================================================
+    run_maintenance(pg_conn, touched_tables(results))
 
-    print(f"  Tables synced: {successful}/{len(results)}")
-    print(f"  Total rows: {total_rows}")
-    if failed > 0:
-        print(f"  Failed: {failed}")
-        for r in results:
-            if r["status"] == "error":
-                print(f"    - {r['table']}: {r.get('error', 'Unknown error')}")
+    # ========================================================================
+    # NOTIFY (API instances refresh the sections reading these tables)
+    # ========================================================================
+    notify_sync(pg_conn, touched_tables(results))
 
-    print(f"\nCompleted at: {datetime.now()}")
+    # ========================================================================
+    # SNAPSHOT (local Parquet copy for offline dashboard builds, see snapshot.py)
+    # ========================================================================
+    refresh_snapshot(pg_conn)
+
+    # ========================================================================
+    # SUMMARY
+    # ========================================================================
+    failed = print_summary(results)
 
     # Close connection
     pg_conn.close()
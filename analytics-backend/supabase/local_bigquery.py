@@ -0,0 +1,131 @@
+"""
+Local BigQuery Stand-in
+Offline replacement for google.cloud.bigquery.Client used by the sync scripts.
+
+Tables are loaded from a directory of Parquet files (one per table, e.g. a
+staging directory written by a previous extract) into an in-memory SQLite
+database. Queries are rewritten from the BigQuery dialect used by the sync
+scripts (`project.dataset.table` references and @named parameters) and run
+against SQLite, so the whole extract → load flow can be exercised without GCP.
+
+Usage:
+    LOCAL_BIGQUERY_DIR=./staging python sync_to_supabase.py
+"""
+
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+import pyarrow.parquet as pq
+import pyarrow.types as pat
+
+# SQLite declared types → Python converters (used with PARSE_DECLTYPES)
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat())
+sqlite3.register_adapter(Decimal, lambda d: str(d))
+sqlite3.register_converter("DATE", lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda b: datetime.fromisoformat(b.decode()))
+sqlite3.register_converter("BOOLEAN", lambda b: bool(int(b)))
+
+TABLE_REFERENCE = re.compile(r"`[\w-]+\.[\w-]+\.(\w+)`")
+NAMED_PARAMETER = re.compile(r"@(\w+)")
+
+
+class SchemaField:
+    """Minimal stand-in for bigquery.SchemaField"""
+
+    def __init__(self, name: str, field_type: str):
+        self.name = name
+        self.field_type = field_type
+
+
+class Row(dict):
+    """Dict-backed stand-in for bigquery.Row (supports .values(), .get() and [key])"""
+
+
+class RowIterator(list):
+    """List of rows carrying the result schema, like bigquery's RowIterator"""
+
+    def __init__(self, rows: list, schema: list):
+        super().__init__(rows)
+        self.schema = schema
+        self.total_rows = len(rows)
+
+
+class QueryJob:
+    """Completed query job holding its result"""
+
+    def __init__(self, rows: RowIterator):
+        self._rows = rows
+
+    def result(self) -> RowIterator:
+        return self._rows
+
+
+def arrow_to_field_type(arrow_type) -> str:
+    """Map an Arrow type to the BigQuery field type name"""
+    if pat.is_boolean(arrow_type):
+        return "BOOLEAN"
+    if pat.is_integer(arrow_type):
+        return "INTEGER"
+    if pat.is_floating(arrow_type):
+        return "FLOAT"
+    if pat.is_decimal(arrow_type):
+        return "NUMERIC"
+    if pat.is_date(arrow_type):
+        return "DATE"
+    if pat.is_timestamp(arrow_type):
+        return "TIMESTAMP"
+    return "STRING"
+
+
+class LocalBigQueryClient:
+    """Runs sync queries against local Parquet files instead of BigQuery"""
+
+    def __init__(self, data_dir: str | Path, project: str = "local"):
+        self.project = project
+        self.data_dir = Path(data_dir)
+        self.field_types: dict[str, dict[str, str]] = {}
+        self.conn = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+
+        for path in sorted(self.data_dir.glob("*.parquet")):
+            self._load_table(path.stem, path)
+
+    def _load_table(self, table_name: str, path: Path):
+        """Create a SQLite table from a Parquet file"""
+        table = pq.read_table(path)
+        field_types = {f.name: arrow_to_field_type(f.type) for f in table.schema}
+        self.field_types[table_name] = field_types
+
+        column_defs = ", ".join(f'"{name}" {ftype}' for name, ftype in field_types.items())
+        self.conn.execute(f'CREATE TABLE "{table_name}" ({column_defs})')
+
+        if table.num_rows:
+            placeholders = ", ".join("?" for _ in field_types)
+            rows = zip(*[column.to_pylist() for column in table.columns])
+            self.conn.executemany(f'INSERT INTO "{table_name}" VALUES ({placeholders})', rows)
+        self.conn.commit()
+
+    def query(self, query: str, job_config=None) -> QueryJob:
+        """Run a BigQuery-dialect query against the local tables"""
+        referenced = TABLE_REFERENCE.findall(query)
+        sql = TABLE_REFERENCE.sub(lambda m: f'"{m.group(1)}"', query)
+        sql = NAMED_PARAMETER.sub(r":\1", sql)
+
+        params = {}
+        for param in getattr(job_config, "query_parameters", None) or []:
+            params[param.name] = param.value
+
+        cursor = self.conn.execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        rows = [Row(zip(names, row)) for row in cursor.fetchall()]
+
+        # Column types come from the source table when the column is selected as-is;
+        # computed expressions are left untyped and inferred from their values
+        known_types = {}
+        for table_name in referenced:
+            known_types.update(self.field_types.get(table_name, {}))
+        schema = [SchemaField(name, known_types.get(name)) for name in names]
+
+        return QueryJob(RowIterator(rows, schema))
@@ -0,0 +1,138 @@
+"""
+Local Gist API Stand-in
+Offline replacement for the GitHub Gist endpoints used by update_dashboard_gist.py:
+
+    GET   /gists/<id>               gist with its files (content inline)
+    PATCH /gists/<id>               update/add files ({"files": {name: {"content": ...}}},
+                                    a null file deletes it, like GitHub)
+    GET   /raw/<id>/<filename>      raw file content (what the dashboard downloads)
+    GET   /_stats                   number of PATCHes and bytes written, for checking
+                                    skip-if-unchanged publishing
+
+Gists are created on first PATCH and kept in memory; with --data-dir every
+write is also saved to <data-dir>/<id>/<filename> for inspection.
+
+Usage:
+    python local_gist_server.py --port 8765
+    GIST_API_URL=http://localhost:8765 GIST_TOKEN=local python update_dashboard_gist.py
+"""
+
+import json
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+GISTS: dict[str, dict[str, str]] = {}
+STATS = {"patches": 0, "bytes_written": 0}
+LOCK = threading.Lock()
+DATA_DIR: Path | None = None
+
+
+class GistHandler(BaseHTTPRequestHandler):
+    """Handles the subset of the Gist API used by the publisher"""
+
+    def _send(self, status: int, body, content_type: str = "application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _gist_json(self, gist_id: str) -> dict:
+        host = self.headers.get("Host", "localhost")
+        files = GISTS[gist_id]
+        return {
+            "id": gist_id,
+            "files": {
+                name: {
+                    "filename": name,
+                    "size": len(content.encode()),
+                    "truncated": False,
+                    "content": content,
+                    "raw_url": f"http://{host}/raw/{gist_id}/{name}",
+                }
+                for name, content in files.items()
+            },
+        }
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+
+        if parts == ["_stats"]:
+            with LOCK:
+                return self._send(200, dict(STATS))
+
+        if len(parts) == 2 and parts[0] == "gists":
+            with LOCK:
+                if parts[1] not in GISTS:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, self._gist_json(parts[1]))
+
+        if len(parts) == 3 and parts[0] == "raw":
+            with LOCK:
+                content = GISTS.get(parts[1], {}).get(parts[2])
+            if content is None:
+                return self._send(404, {"message": "Not Found"})
+            return self._send(200, content.encode(), "text/plain; charset=utf-8")
+
+        self._send(404, {"message": "Not Found"})
+
+    def do_PATCH(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "gists":
+            return self._send(404, {"message": "Not Found"})
+        if not self.headers.get("Authorization"):
+            return self._send(401, {"message": "Requires authentication"})
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return self._send(400, {"message": "Problems parsing JSON"})
+
+        gist_id = parts[1]
+        with LOCK:
+            files = GISTS.setdefault(gist_id, {})
+            for name, file in payload.get("files", {}).items():
+                if file is None:
+                    files.pop(name, None)
+                    continue
+                files[name] = file["content"]
+                STATS["bytes_written"] += len(file["content"].encode())
+                if DATA_DIR:
+                    path = DATA_DIR / gist_id / name
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    path.write_text(file["content"])
+            STATS["patches"] += 1
+            body = self._gist_json(gist_id)
+
+        print(f"[{datetime.now():%H:%M:%S}] PATCH {gist_id}: {', '.join(payload.get('files', {}))}")
+        self._send(200, body)
+
+    def log_message(self, format, *args):
+        pass  # PATCHes are logged above; GETs are too noisy
+
+
+def main():
+    global DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the GitHub Gist API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", type=Path, help="Also save written files here")
+    args = parser.parse_args()
+    DATA_DIR = args.data_dir
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), GistHandler)
+    print(f"Local Gist API on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
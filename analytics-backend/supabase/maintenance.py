@@ -0,0 +1,242 @@
+"""
+Post-Load Maintenance for Supabase Tables
+Keeps the planner and indexes healthy around the sync scripts' bulk loads.
+
+1. Deferred indexes: before a large load, non-critical secondary indexes are
+   dropped and rebuilt once afterwards (one sort per index instead of
+   row-by-row maintenance). Primary keys, unique indexes and indexes leading
+   with a kept column (the table's date column, used by the sync's own
+   DELETEs) are never touched.
+2. ANALYZE every touched table so the dashboard queries plan against fresh
+   statistics instead of waiting for autovacuum.
+3. Optional VACUUM (ANALYZE) when a table is left with many dead tuples
+   (e.g. after the lookback or backfill DELETEs).
+4. NOTIFY the API instances which tables changed (channel analytics_sync), so
+   they refresh only the dashboard sections that read them (see main.py).
+
+Each step logs its duration. Can also be run on its own:
+    python maintenance.py --tables sessions daily_metrics --vacuum always
+"""
+
+import os
+import json
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+
+# Maintenance config
+INDEX_DEFER_MIN_ROWS = int(os.getenv("SYNC_INDEX_DEFER_MIN_ROWS", "50000"))
+VACUUM_MODE = os.getenv("SYNC_VACUUM", "auto")  # auto | always | never
+VACUUM_DEAD_TUPLE_RATIO = float(os.getenv("SYNC_VACUUM_DEAD_RATIO", "0.2"))
+SYNC_NOTIFY_CHANNEL = os.getenv("SYNC_NOTIFY_CHANNEL", "analytics_sync")
+
+
+@contextmanager
+def timed_step(label: str, timings: list = None):
+    """Print (and optionally record) how long a maintenance step took"""
+    start_time = datetime.now()
+    try:
+        yield
+    finally:
+        duration = (datetime.now() - start_time).total_seconds()
+        print(f"    {label}: {duration:.2f}s")
+        if timings is not None:
+            timings.append({"step": label, "duration": duration})
+
+
+# ============================================================================
+# DEFERRED INDEXES
+# ============================================================================
+
+def get_deferrable_indexes(pg_conn, table_name: str, keep_columns: list[str] = ()) -> list[tuple]:
+    """(index_name, definition) of secondary indexes that can be rebuilt after a load"""
+    with pg_conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT i.relname AS index_name,
+                   pg_get_indexdef(ix.indexrelid) AS definition,
+                   pg_get_indexdef(ix.indexrelid, 1, true) AS leading_column
+            FROM pg_index ix
+            JOIN pg_class i ON i.oid = ix.indexrelid
+            JOIN pg_class t ON t.oid = ix.indrelid
+            WHERE t.relname = %s
+              AND t.relnamespace = 'public'::regnamespace
+              AND NOT ix.indisprimary
+              AND NOT ix.indisunique
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = ix.indexrelid)
+            ORDER BY i.relname
+        """, (table_name,))
+        rows = cursor.fetchall()
+    pg_conn.commit()
+
+    # Works with both tuple and RealDictCursor connections
+    rows = [tuple(row.values()) if isinstance(row, dict) else row for row in rows]
+    return [(name, definition) for name, definition, leading in rows if leading not in keep_columns]
+
+
+def drop_indexes(pg_conn, table_name: str, keep_columns: list[str] = (), timings: list = None) -> list[tuple]:
+    """Drop the table's deferrable indexes; returns what rebuild_indexes needs"""
+    indexes = get_deferrable_indexes(pg_conn, table_name, keep_columns)
+    if not indexes:
+        return []
+
+    with timed_step(f"Drop {len(indexes)} indexes on {table_name}", timings):
+        with pg_conn.cursor() as cursor:
+            for index_name, _ in indexes:
+                cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+        pg_conn.commit()
+    return indexes
+
+
+def rebuild_indexes(pg_conn, table_name: str, indexes: list[tuple], timings: list = None):
+    """Recreate indexes dropped by drop_indexes"""
+    if not indexes:
+        return
+
+    with timed_step(f"Rebuild {len(indexes)} indexes on {table_name}", timings):
+        with pg_conn.cursor() as cursor:
+            for _, definition in indexes:
+                cursor.execute(definition.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1))
+        pg_conn.commit()
+
+
+@contextmanager
+def deferred_indexes(pg_conn, table_name: str, rows: int, keep_columns: list[str] = (),
+                     min_rows: int = INDEX_DEFER_MIN_ROWS, timings: list = None):
+    """
+    Drop non-critical indexes around a load of `rows` rows (only if it's large).
+
+    The indexes are rebuilt even if the load fails. If the process is killed in
+    between, re-running schema.sql (CREATE INDEX IF NOT EXISTS) restores them.
+    """
+    if rows < min_rows:
+        yield
+        return
+
+    indexes = drop_indexes(pg_conn, table_name, keep_columns, timings)
+    try:
+        yield
+    finally:
+        if not pg_conn.closed:
+            pg_conn.rollback()  # no-op after a committed load; clears a failed one
+            rebuild_indexes(pg_conn, table_name, indexes, timings)
+
+
+# ============================================================================
+# STATISTICS AND VACUUM
+# ============================================================================
+
+def dead_tuple_ratio(pg_conn, table_name: str) -> float:
+    """Dead / live tuples for a table, from the statistics collector"""
+    with pg_conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT n_live_tup, n_dead_tup
+            FROM pg_stat_user_tables
+            WHERE relname = %s AND schemaname = 'public'
+        """, (table_name,))
+        row = cursor.fetchone()
+    pg_conn.commit()
+
+    if not row:
+        return 0.0
+    live, dead = tuple(row.values()) if isinstance(row, dict) else row
+    return dead / max(live, 1)
+
+
+def run_maintenance(pg_conn, tables: list[str], vacuum: str = VACUUM_MODE) -> list[dict]:
+    """
+    ANALYZE each touched table, or VACUUM (ANALYZE) it when vacuum is "always"
+    or ("auto" and its dead tuple ratio exceeds VACUUM_DEAD_TUPLE_RATIO).
+
+    VACUUM can't run inside a transaction, so the connection is switched to
+    autocommit for the duration.
+    """
+    timings = []
+    tables = list(dict.fromkeys(tables))
+    if not tables:
+        return timings
+
+    print(f"\nPost-load maintenance ({len(tables)} tables, vacuum: {vacuum}):")
+    start_time = datetime.now()
+
+    pg_conn.commit()
+    pg_conn.autocommit = True
+    try:
+        with pg_conn.cursor() as cursor:
+            for table_name in tables:
+                try:
+                    needs_vacuum = vacuum == "always" or (
+                        vacuum == "auto" and dead_tuple_ratio(pg_conn, table_name) > VACUUM_DEAD_TUPLE_RATIO
+                    )
+                    if needs_vacuum:
+                        with timed_step(f"VACUUM (ANALYZE) {table_name}", timings):
+                            cursor.execute(f"VACUUM (ANALYZE) {table_name}")
+                    else:
+                        with timed_step(f"ANALYZE {table_name}", timings):
+                            cursor.execute(f"ANALYZE {table_name}")
+                except Exception as e:
+                    # Maintenance is best-effort; the data is already committed
+                    print(f"    Maintenance of {table_name} failed: {e}")
+    finally:
+        if not pg_conn.closed:
+            pg_conn.autocommit = False
+
+    duration = (datetime.now() - start_time).total_seconds()
+    print(f"    Maintenance total: {duration:.2f}s")
+    return timings
+
+
+# ============================================================================
+# CHANGE NOTIFICATION
+# ============================================================================
+
+def notify_sync(pg_conn, tables: list[str]):
+    """
+    Tell listening API instances which tables this run changed.
+
+    Call once the data is committed: NOTIFY is delivered on commit, and only to
+    sessions that are LISTENing at that moment (an instance that was down
+    catches up from sync_metadata instead).
+    """
+    tables = list(dict.fromkeys(tables))
+    if not tables or pg_conn.closed:
+        return
+
+    payload = json.dumps({"tables": tables, "finished_at": datetime.utcnow().isoformat()})
+    try:
+        with pg_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", (SYNC_NOTIFY_CHANNEL, payload))
+        pg_conn.commit()
+        print(f"\nNotified {SYNC_NOTIFY_CHANNEL}: {', '.join(tables)}")
+    except Exception as e:
+        # Best-effort like maintenance: the API still notices via sync_metadata
+        print(f"\nNotify failed: {e}")
+        pg_conn.rollback()
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    from sync_to_supabase import TABLES_TO_SYNC
+
+    parser = argparse.ArgumentParser(description="ANALYZE / VACUUM Supabase analytics tables")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES_TO_SYNC), default=list(TABLES_TO_SYNC),
+                        help="Tables to maintain")
+    parser.add_argument("--vacuum", choices=["auto", "always", "never"], default=VACUUM_MODE,
+                        help="auto: VACUUM only tables with many dead tuples")
+    return parser.parse_args()
+
+
+def main():
+    """Run maintenance on demand"""
+    from sync_to_supabase import get_supabase_connection
+
+    args = parse_args()
+    pg_conn = get_supabase_connection()
+    run_maintenance(pg_conn, args.tables, args.vacuum)
+    pg_conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -256,6 +256,105 @@ CREATE TABLE IF NOT EXISTS experience_daily_stats (
 CREATE INDEX IF NOT EXISTS idx_experience_daily_date ON experience_daily_stats(event_date);
 CREATE INDEX IF NOT EXISTS idx_experience_daily_exp ON experience_daily_stats(experience_id);
 
+-- ============================================================================
+-- LAYER 2: Cumulative Daily Stats (prefix sums of the daily stats above)
+-- One row per entity per day with running totals up to that day, maintained
+-- by cumulative.py after each sync. A range total is the row at the end date
+-- minus the row before the start date. AVG columns keep <col>_sum/_count,
+-- MAX columns keep the running <col>_max and the days that reached it.
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS project_cumulative_stats (
+    project_id TEXT NOT NULL,
+    event_date DATE NOT NULL,
+    row_count BIGINT,
+    views BIGINT,
+    unique_viewers BIGINT,
+    clicks BIGINT,
+    expands BIGINT,
+    link_clicks BIGINT,
+    github_clicks BIGINT,
+    demo_clicks BIGINT,
+    project_title_max TEXT,
+    project_title_max_days INT,
+    project_category_max TEXT,
+    project_category_max_days INT,
+    PRIMARY KEY (project_id, event_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_project_cumulative_date ON project_cumulative_stats(event_date);
+
+CREATE TABLE IF NOT EXISTS section_cumulative_stats (
+    section_id TEXT NOT NULL,
+    event_date DATE NOT NULL,
+    row_count BIGINT,
+    unique_views BIGINT,
+    unique_exits BIGINT,
+    unique_viewers BIGINT,
+    total_views BIGINT,
+    total_exits BIGINT,
+    engaged_sessions BIGINT,
+    unique_exit_rate_sum NUMERIC,
+    unique_exit_rate_count BIGINT,
+    total_exit_rate_sum NUMERIC,
+    total_exit_rate_count BIGINT,
+    avg_revisits_per_session_sum NUMERIC,
+    avg_revisits_per_session_count BIGINT,
+    engagement_rate_sum NUMERIC,
+    engagement_rate_count BIGINT,
+    avg_time_spent_seconds_sum NUMERIC,
+    avg_time_spent_seconds_count BIGINT,
+    avg_scroll_depth_percent_sum NUMERIC,
+    avg_scroll_depth_percent_count BIGINT,
+    max_scroll_milestone_max INT,
+    max_scroll_milestone_max_days INT,
+    PRIMARY KEY (section_id, event_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_section_cumulative_date ON section_cumulative_stats(event_date);
+
+CREATE TABLE IF NOT EXISTS skill_cumulative_stats (
+    skill_name TEXT NOT NULL,
+    event_date DATE NOT NULL,
+    row_count BIGINT,
+    clicks BIGINT,
+    hovers BIGINT,
+    unique_users BIGINT,
+    weighted_interest_score BIGINT,
+    PRIMARY KEY (skill_name, event_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_skill_cumulative_date ON skill_cumulative_stats(event_date);
+
+CREATE TABLE IF NOT EXISTS domain_cumulative_stats (
+    domain TEXT NOT NULL,
+    event_date DATE NOT NULL,
+    row_count BIGINT,
+    explicit_interest_signals BIGINT,
+    implicit_interest_from_views BIGINT,
+    total_domain_interactions BIGINT,
+    unique_interested_users BIGINT,
+    domain_interest_score BIGINT,
+    PRIMARY KEY (domain, event_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_domain_cumulative_date ON domain_cumulative_stats(event_date);
+
+CREATE TABLE IF NOT EXISTS experience_cumulative_stats (
+    experience_id TEXT NOT NULL,
+    event_date DATE NOT NULL,
+    row_count BIGINT,
+    total_interactions BIGINT,
+    unique_interested_users BIGINT,
+    unique_sessions BIGINT,
+    experience_title_max TEXT,
+    experience_title_max_days INT,
+    company_max TEXT,
+    company_max_days INT,
+    PRIMARY KEY (experience_id, event_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_experience_cumulative_date ON experience_cumulative_stats(event_date);
+
 -- ============================================================================
 -- LAYER 3: Project Rankings
 -- ============================================================================
@@ -442,7 +541,13 @@ CREATE TABLE IF NOT EXISTS sync_metadata (
     last_synced_at TIMESTAMPTZ NOT NULL,
     rows_synced INT,
     sync_duration_seconds FLOAT,
-    status TEXT
+    status TEXT,
+    watermark TIMESTAMPTZ,  -- MAX(materialized_at) synced so far (micro-sync)
+    checkpoint TEXT         -- completed chunk, e.g. '2025-01-01..2025-01-07' (backfill)
 );
 
+-- Columns added after the initial release
+ALTER TABLE sync_metadata ADD COLUMN IF NOT EXISTS watermark TIMESTAMPTZ;
+ALTER TABLE sync_metadata ADD COLUMN IF NOT EXISTS checkpoint TEXT;
+
 CREATE INDEX IF NOT EXISTS idx_sync_table ON sync_metadata(table_name);
@@ -0,0 +1,189 @@
+"""
+Analytical Snapshot of the Dashboard Tables
+Writes every table the dashboard computes from (functions/session_store.py's
+STORE_TABLES) to a local directory of Parquet files, read in one consistent
+database snapshot:
+
+    <dir>/manifest.json     built_at, watermark (latest sync_metadata entry),
+                            per table its file, rows and bytes, and each text
+                            column's values in the database's collation
+    <dir>/<table>.parquet   SELECT * of the table, by day then id
+
+The gist publisher builds the dashboard from it without touching Supabase
+(GIST_SNAPSHOT_DIR, see update_dashboard_gist.py), and ad-hoc analysis can
+read it with anything that reads Parquet, or through the session store:
+
+    import session_store
+    session_store.load_snapshot("/tmp/dashboard-snapshot")
+    session_store.query("top_visitors", date(2025, 1, 1), date(2025, 1, 31))
+
+The sync scripts rewrite it after a successful sync when DASHBOARD_SNAPSHOT_DIR
+is set; the new directory replaces the old one only once it is complete. Can
+also be run on its own:
+    python snapshot.py --out /tmp/dashboard-snapshot
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+from datetime import datetime
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.parquet as pq
+from psycopg2.extensions import cursor as TupleCursor
+from staging import PARQUET_COMPRESSION
+
+# The store layout (tables, date and text columns) is shared with the API
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "functions"))
+from session_store import STORE_TABLES
+
+# Directory the sync scripts write the snapshot to (unset: no snapshot)
+SNAPSHOT_DIR = os.getenv("DASHBOARD_SNAPSHOT_DIR")
+# Rows fetched per round trip while writing a table
+SNAPSHOT_BATCH_ROWS = int(os.getenv("DASHBOARD_SNAPSHOT_BATCH_ROWS", "50000"))
+
+# Postgres type OID -> Arrow type of the Parquet column
+PG_TO_ARROW_TYPES = {
+    16: pa.bool_(),                        # boolean
+    20: pa.int64(),                        # bigint
+    21: pa.int16(),                        # smallint
+    23: pa.int32(),                        # integer
+    700: pa.float32(),                     # real
+    701: pa.float64(),                     # double precision
+    25: pa.string(),                       # text
+    1043: pa.string(),                     # varchar
+    1082: pa.date32(),                     # date
+    1114: pa.timestamp("us"),              # timestamp
+    1184: pa.timestamp("us", tz="UTC"),    # timestamptz
+}
+
+
+# ============================================================================
+# WRITE
+# ============================================================================
+
+def arrow_schema(description) -> pa.Schema:
+    """Arrow schema of a query's result columns"""
+    fields = []
+    for column in description:
+        if column.type_code not in PG_TO_ARROW_TYPES:
+            raise ValueError(f"column {column.name}: no Arrow type for Postgres type {column.type_code}")
+        fields.append(pa.field(column.name, PG_TO_ARROW_TYPES[column.type_code]))
+    return pa.schema(fields)
+
+
+def write_table(pg_conn, table: str, path: Path) -> int:
+    """Stream a whole table into a Parquet file, by day then id; returns its row count"""
+    date_column = STORE_TABLES[table]["date"]
+    order = f"{date_column}, id" if date_column else "id"
+    rows = 0
+    # Server-side cursor: the table is never held in memory whole
+    with pg_conn.cursor(name=f"snapshot_{table}", cursor_factory=TupleCursor) as cursor:
+        cursor.itersize = SNAPSHOT_BATCH_ROWS
+        cursor.execute(f"SELECT * FROM {table} ORDER BY {order}")
+        batch = cursor.fetchmany(SNAPSHOT_BATCH_ROWS)
+        schema = arrow_schema(cursor.description)
+        with pq.ParquetWriter(path, schema, compression=PARQUET_COMPRESSION) as writer:
+            while True:
+                writer.write_table(pa.Table.from_pylist(
+                    [dict(zip(schema.names, row)) for row in batch], schema=schema))
+                rows += len(batch)
+                if len(batch) < SNAPSHOT_BATCH_ROWS:
+                    break
+                batch = cursor.fetchmany(SNAPSHOT_BATCH_ROWS)
+    return rows
+
+
+def collations(cursor, table: str) -> dict:
+    """Each text column's distinct values, sorted in the database's collation (what MAX(text) follows)"""
+    result = {}
+    for column in STORE_TABLES[table].get("strings", []):
+        cursor.execute(f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL ORDER BY {column}")
+        result[column] = [row[0] for row in cursor.fetchall()]
+    return result
+
+
+def write_snapshot(pg_conn, out_dir) -> dict:
+    """Write the snapshot to out_dir, every table read in one REPEATABLE READ transaction; returns its manifest"""
+    start_time = datetime.now()
+    out_dir = Path(out_dir)
+    building = out_dir.with_name(f"{out_dir.name}.tmp")
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir(parents=True)
+
+    pg_conn.rollback()
+    pg_conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    try:
+        manifest = {"built_at": datetime.utcnow().isoformat() + "Z", "watermark": None,
+                    "tables": {}, "collations": {}}
+        # Tuple rows whatever the connection's cursor_factory (the incremental
+        # sync's is RealDictCursor)
+        with pg_conn.cursor(cursor_factory=TupleCursor) as cursor:
+            cursor.execute("SELECT MAX(last_synced_at) FROM sync_metadata WHERE status = 'success'")
+            watermark = cursor.fetchone()[0]
+            manifest["watermark"] = watermark.isoformat() if watermark else None
+            for table in STORE_TABLES:
+                manifest["collations"][table] = collations(cursor, table)
+        for table in STORE_TABLES:
+            file = f"{table}.parquet"
+            rows = write_table(pg_conn, table, building / file)
+            manifest["tables"][table] = {"file": file, "rows": rows, "bytes": (building / file).stat().st_size}
+    finally:
+        pg_conn.rollback()
+        pg_conn.set_session(isolation_level="DEFAULT", readonly="DEFAULT")
+
+    (building / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    # Swap the complete directory in; the previous snapshot is only removed after
+    previous = out_dir.with_name(f"{out_dir.name}.old")
+    shutil.rmtree(previous, ignore_errors=True)
+    if out_dir.exists():
+        out_dir.rename(previous)
+    building.rename(out_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    total_rows = sum(t["rows"] for t in manifest["tables"].values())
+    total_bytes = sum(t["bytes"] for t in manifest["tables"].values())
+    print(f"  Wrote {total_rows} rows of {len(manifest['tables'])} tables to {out_dir} "
+          f"({total_bytes / 1024:.0f} KiB) in {(datetime.now() - start_time).total_seconds():.2f}s")
+    return manifest
+
+
+def refresh_snapshot(pg_conn) -> dict:
+    """Rewrite the snapshot in DASHBOARD_SNAPSHOT_DIR after a sync (None when unset or on failure)"""
+    if not SNAPSHOT_DIR:
+        return None
+    print(f"\nWriting the dashboard snapshot to {SNAPSHOT_DIR}:")
+    try:
+        return write_snapshot(pg_conn, SNAPSHOT_DIR)
+    except Exception as e:
+        # The synced data is fine; only offline builds miss this sync
+        print(f"    Error: {e}")
+        pg_conn.rollback()
+        return None
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Write the dashboard tables to a local Parquet snapshot")
+    parser.add_argument("--out", default=SNAPSHOT_DIR, required=not SNAPSHOT_DIR,
+                        help="Snapshot directory (default: DASHBOARD_SNAPSHOT_DIR)")
+    return parser.parse_args()
+
+
+def main():
+    """Write a snapshot on demand"""
+    from sync_to_supabase import get_supabase_connection
+
+    args = parse_args()
+    pg_conn = get_supabase_connection()
+    write_snapshot(pg_conn, args.out)
+    pg_conn.close()
+
+
+if __name__ == "__main__":
+    main()
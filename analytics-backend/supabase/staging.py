@@ -0,0 +1,280 @@
+"""
+Parquet Staging Area for BigQuery → Supabase Syncs
+Splits each table sync into two phases:
+
+1. Extract: run the BigQuery query and write the result to a compressed Parquet
+   file on local disk (one file per table, plus a _manifest.json)
+2. Load: bulk-insert the staged file into Supabase
+
+A failed load can be retried or replayed from the staged files without paying
+for (or waiting on) the BigQuery query again.
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import psycopg2
+from psycopg2.extras import execute_values
+
+# Staging config
+STAGING_DIR = Path(os.getenv("SYNC_STAGING_DIR", Path(__file__).parent / "staging"))
+PARQUET_COMPRESSION = "zstd"
+MANIFEST_FILE = "_manifest.json"
+
+# Load config
+LOAD_RETRIES = int(os.getenv("SYNC_LOAD_RETRIES", "3"))
+LOAD_RETRY_BACKOFF_SECONDS = 2.0
+LOAD_PAGE_SIZE = 1000
+
+# BigQuery field types → Arrow types
+BQ_TO_ARROW_TYPES = {
+    "STRING": pa.string(),
+    "INTEGER": pa.int64(),
+    "INT64": pa.int64(),
+    "FLOAT": pa.float64(),
+    "FLOAT64": pa.float64(),
+    "NUMERIC": pa.decimal128(38, 9),
+    "BOOLEAN": pa.bool_(),
+    "BOOL": pa.bool_(),
+    "DATE": pa.date32(),
+    "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+    "DATETIME": pa.timestamp("us"),
+}
+
+
+def parse_columns(columns: str) -> list[str]:
+    """Split a comma-separated column list (as used in TABLES_TO_SYNC) into names"""
+    return [c.strip() for c in columns.split(",") if c.strip()]
+
+
+def staged_file(table_name: str, staging_dir: Path = STAGING_DIR) -> Path:
+    """Path of the staged Parquet file for a table"""
+    return Path(staging_dir) / f"{table_name}.parquet"
+
+
+def read_manifest(staging_dir: Path = STAGING_DIR) -> dict:
+    """Read the staging manifest (table → extract info)"""
+    manifest_path = Path(staging_dir) / MANIFEST_FILE
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def write_manifest_entry(table_name: str, entry: dict, staging_dir: Path = STAGING_DIR):
+    """Record a staged table in the manifest"""
+    manifest = read_manifest(staging_dir)
+    manifest[table_name] = entry
+    manifest_path = Path(staging_dir) / MANIFEST_FILE
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+# ============================================================================
+# EXTRACT PHASE
+# ============================================================================
+
+def build_arrow_table(columns: list[str], rows: list[tuple], bq_schema=None) -> pa.Table:
+    """Build a typed Arrow table using the column list and BigQuery result types"""
+    field_types = {f.name: f.field_type for f in (bq_schema or [])}
+    arrays = []
+    for i, column in enumerate(columns):
+        values = [row[i] for row in rows]
+        arrow_type = BQ_TO_ARROW_TYPES.get(field_types.get(column))
+        arrays.append(pa.array(values, type=arrow_type))
+    return pa.Table.from_arrays(arrays, names=columns)
+
+
+def stage_rows(table_name: str, columns: list[str], rows: list[tuple],
+               bq_schema=None, staging_dir: Path = STAGING_DIR) -> dict:
+    """Write rows to the table's Parquet file (atomically) and update the manifest"""
+    staging_dir = Path(staging_dir)
+    staging_dir.mkdir(parents=True, exist_ok=True)
+
+    table = build_arrow_table(columns, rows, bq_schema)
+    path = staged_file(table_name, staging_dir)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    pq.write_table(table, tmp_path, compression=PARQUET_COMPRESSION)
+    os.replace(tmp_path, path)
+
+    entry = {
+        "file": path.name,
+        "rows": len(rows),
+        "columns": columns,
+        "bytes": path.stat().st_size,
+        "extracted_at": datetime.utcnow().isoformat() + "Z",
+    }
+    write_manifest_entry(table_name, entry, staging_dir)
+    return entry
+
+
+def extract_query(bq_client, table_name: str, query: str, columns: list[str],
+                  job_config=None, staging_dir: Path = STAGING_DIR) -> dict:
+    """Run a BigQuery query and stage its result as Parquet"""
+    start_time = datetime.now()
+
+    result = bq_client.query(query, job_config=job_config).result()
+    rows = [tuple(row.values()) for row in result]
+
+    if rows and len(rows[0]) != len(columns):
+        raise ValueError(
+            f"{table_name}: query returned {len(rows[0])} columns, expected {len(columns)}"
+        )
+
+    entry = stage_rows(table_name, columns, rows, getattr(result, "schema", None), staging_dir)
+    duration = (datetime.now() - start_time).total_seconds()
+    print(f"    Extracted {entry['rows']} rows to {entry['file']} "
+          f"({entry['bytes'] / 1024:.1f} KB) in {duration:.2f}s")
+    return entry
+
+
+# ============================================================================
+# LOAD PHASE
+# ============================================================================
+
+def read_staged_rows(table_name: str, staging_dir: Path = STAGING_DIR) -> tuple[list[str], list[tuple]]:
+    """Read a staged Parquet file back as (columns, rows)"""
+    table = pq.read_table(staged_file(table_name, staging_dir))
+    rows = list(zip(*[column.to_pylist() for column in table.columns]))
+    return table.column_names, rows
+
+
+def staged_max(table_name: str, column: str, staging_dir: Path = STAGING_DIR):
+    """Maximum value of a column in a staged file (None if empty)"""
+    table = pq.read_table(staged_file(table_name, staging_dir), columns=[column])
+    return pc.max(table[column]).as_py()
+
+
+def staged_min(table_name: str, column: str, staging_dir: Path = STAGING_DIR):
+    """Minimum value of a column in a staged file (None if empty)"""
+    table = pq.read_table(staged_file(table_name, staging_dir), columns=[column])
+    return pc.min(table[column]).as_py()
+
+
+class ReconnectingConnection:
+    """
+    A psycopg2 connection that can be reopened in place.
+
+    Attributes and methods are those of the current connection; reconnect()
+    swaps in a fresh one from `factory`, so everything holding this object
+    keeps working after the network drops the old one.
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_conn", factory())
+
+    def reconnect(self):
+        """Close the current connection (if still open) and open a new one"""
+        if not self._conn.closed:
+            try:
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+        object.__setattr__(self, "_conn", self._factory())
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+
+def run_in_transaction(pg_conn, work, retries: int = LOAD_RETRIES):
+    """
+    Run work(cursor) in a single transaction and commit.
+
+    On a connection-level failure the transaction is rolled back and retried;
+    a dropped ReconnectingConnection is reopened first. SQL errors are raised
+    immediately since retrying them can't succeed.
+    """
+    for attempt in range(1, retries + 1):
+        try:
+            with pg_conn.cursor() as cursor:
+                result = work(cursor)
+            pg_conn.commit()
+            return result
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            if attempt == retries:
+                raise
+            if not pg_conn.closed:
+                try:
+                    pg_conn.rollback()
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    pass
+            if pg_conn.closed and not hasattr(pg_conn, "reconnect"):
+                raise
+            print(f"    Load attempt {attempt}/{retries} failed: {e}")
+            time.sleep(LOAD_RETRY_BACKOFF_SECONDS * attempt)
+            if pg_conn.closed:
+                try:
+                    pg_conn.reconnect()
+                except psycopg2.OperationalError as reconnect_error:
+                    # Still unreachable; the next attempt reconnects again
+                    print(f"    Reconnect failed: {reconnect_error}")
+
+
+def load_staged_table(pg_conn, table_name: str, prepare_sql: str = None, prepare_params: tuple = None,
+                      staging_dir: Path = STAGING_DIR, retries: int = LOAD_RETRIES,
+                      stage_name: str = None, extra_statements: list = None) -> int:
+    """
+    Bulk-load a staged table into Supabase in a single (retried) transaction.
+
+    prepare_sql runs first in the same transaction (e.g. TRUNCATE or a DELETE of
+    the date window being replaced). stage_name selects a staged file other than
+    the table's own (e.g. a partial extract). extra_statements [(sql, params), ...]
+    run after the insert in the same transaction (e.g. a backfill checkpoint).
+    """
+    columns, rows = read_staged_rows(stage_name or table_name, staging_dir)
+    insert_query = f"INSERT INTO {table_name} ({','.join(columns)}) VALUES %s"
+
+    def work(cursor):
+        if prepare_sql:
+            cursor.execute(prepare_sql, prepare_params)
+        if rows:
+            execute_values(cursor, insert_query, rows, page_size=LOAD_PAGE_SIZE)
+        for sql, params in extra_statements or []:
+            cursor.execute(sql, params)
+        return len(rows)
+
+    return run_in_transaction(pg_conn, work, retries)
+
+
+def upsert_staged_table(pg_conn, table_name: str, key_columns: list[str], extra_statements: list = None,
+                        staging_dir: Path = STAGING_DIR, retries: int = LOAD_RETRIES,
+                        stage_name: str = None) -> int:
+    """
+    Upsert a staged table into Supabase by key, in a single (retried) transaction.
+
+    Rows are bulk-loaded into a temp table, existing rows with matching keys are
+    deleted (NULL-safe, so no unique constraint is needed) and the staged rows are
+    inserted. extra_statements [(sql, params), ...] run in the same transaction,
+    e.g. to advance a sync watermark atomically with the data.
+    """
+    columns, rows = read_staged_rows(stage_name or table_name, staging_dir)
+    column_list = ",".join(columns)
+    temp_table = f"_staged_{table_name}"
+    key_match = " AND ".join(f"t.{k} IS NOT DISTINCT FROM s.{k}" for k in key_columns)
+
+    def work(cursor):
+        cursor.execute(f"""
+            CREATE TEMP TABLE {temp_table} ON COMMIT DROP AS
+            SELECT {column_list} FROM {table_name} WITH NO DATA
+        """)
+        if rows:
+            execute_values(cursor, f"INSERT INTO {temp_table} ({column_list}) VALUES %s",
+                           rows, page_size=LOAD_PAGE_SIZE)
+        cursor.execute(f"DELETE FROM {table_name} t USING {temp_table} s WHERE {key_match}")
+        cursor.execute(f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {temp_table}")
+        for sql, params in extra_statements or []:
+            cursor.execute(sql, params)
+        return len(rows)
+
+    return run_in_transaction(pg_conn, work, retries)
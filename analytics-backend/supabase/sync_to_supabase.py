@@ -1,16 +1,31 @@
 """
 Sync BigQuery Materialized Tables to Supabase
 Run this script after BigQuery materialization to copy data to Supabase for fast API reads.
+
+The sync runs in two phases with a local Parquet staging area in between:
+    python sync_to_supabase.py                  # extract + load
+    python sync_to_supabase.py --phase extract  # BigQuery → staging only
+    python sync_to_supabase.py --phase load     # replay staging → Supabase (no BigQuery)
+
+Set LOCAL_BIGQUERY_DIR to a directory of Parquet files to run offline
+against the local BigQuery stand-in instead of GCP.
 """
 
 import os
 import sys
+import argparse
 from datetime import datetime
 from pathlib import Path
 import psycopg2
-from psycopg2.extras import execute_values
 from google.cloud import bigquery
 from dotenv import load_dotenv
+from staging import (
+    STAGING_DIR, parse_columns, staged_file, read_manifest,
+    extract_query, load_staged_table, staged_max, ReconnectingConnection,
+)
+from maintenance import deferred_indexes, run_maintenance, notify_sync
+from cumulative import refresh_cumulative_tables
+from snapshot import refresh_snapshot
 
 # Load environment variables
 env_path = Path(__file__).parent.parent / "functions" / ".env"
@@ -30,8 +45,12 @@ SUPABASE_CONFIG = {
 }
 
 # Tables to sync with their column mappings
+# (date_column marks date-partitioned tables that can be synced day by day;
+#  key_columns identify a row for upserts)
 TABLES_TO_SYNC = {
     "sessions": {
+        "date_column": "session_date",
+        "key_columns": "user_pseudo_id, session_id",
         "bq_columns": """
             user_pseudo_id, session_id, session_start, session_end,
             device_category, os, browser, country, region, city, continent,
@@ -60,6 +79,8 @@ TABLES_TO_SYNC = {
         """
     },
     "daily_metrics": {
+        "date_column": "session_date",
+        "key_columns": "session_date",
         "bq_columns": """
             session_date, total_sessions, unique_visitors, total_page_views,
             avg_pages_per_session, engaged_sessions, engagement_rate,
@@ -78,6 +99,8 @@ TABLES_TO_SYNC = {
         """
     },
     "traffic_daily_stats": {
+        "date_column": "event_date",
+        "key_columns": "event_date, traffic_source, traffic_medium, campaign_name",
         "bq_columns": """
             event_date, traffic_source, traffic_medium, campaign_name,
             sessions, unique_visitors, total_page_views, avg_pages_per_session,
@@ -96,6 +119,8 @@ TABLES_TO_SYNC = {
         """
     },
     "conversion_funnel": {
+        "date_column": "event_date",
+        "key_columns": "event_date",
         "bq_columns": """
             event_date, total_sessions, unique_visitors,
             total_cta_views, total_cta_clicks, cta_click_rate,
@@ -114,6 +139,8 @@ TABLES_TO_SYNC = {
         """
     },
     "project_daily_stats": {
+        "date_column": "event_date",
+        "key_columns": "event_date, project_id",
         "bq_columns": """
             event_date, project_id, project_title, project_category,
             views, unique_viewers, unique_sessions, clicks, expands, link_clicks,
@@ -130,6 +157,8 @@ TABLES_TO_SYNC = {
         """
     },
     "section_daily_stats": {
+        "date_column": "event_date",
+        "key_columns": "event_date, section_id",
         "bq_columns": """
             event_date, section_id,
             unique_views, unique_exits, unique_viewers, unique_sessions, unique_exit_rate,
@@ -148,6 +177,8 @@ TABLES_TO_SYNC = {
         """
     },
     "skill_daily_stats": {
+        "date_column": "event_date",
+        "key_columns": "event_date, skill_name",
         "bq_columns": """
             event_date, skill_name, skill_category,
             clicks, hovers, unique_users, unique_sessions,
@@ -160,6 +191,8 @@ TABLES_TO_SYNC = {
         """
     },
     "domain_daily_stats": {
+        "date_column": "event_date",
+        "key_columns": "event_date, domain",
         "bq_columns": """
             event_date, domain,
             explicit_interest_signals, implicit_interest_from_views,
@@ -174,6 +207,8 @@ TABLES_TO_SYNC = {
         """
     },
     "experience_daily_stats": {
+        "date_column": "event_date",
+        "key_columns": "event_date, experience_id",
         "bq_columns": """
             event_date, experience_id, experience_title, company,
             total_interactions, unique_interested_users, unique_sessions,
@@ -186,6 +221,7 @@ TABLES_TO_SYNC = {
         """
     },
     "project_rankings": {
+        "key_columns": "project_id",
         "bq_columns": """
             project_id, project_title, project_category,
             total_views, total_unique_viewers, total_clicks, total_expands,
@@ -204,6 +240,7 @@ TABLES_TO_SYNC = {
         """
     },
     "section_rankings": {
+        "key_columns": "section_id",
         "bq_columns": """
             section_id,
             total_unique_views, total_unique_exits, total_unique_viewers, avg_exit_rate,
@@ -224,6 +261,7 @@ TABLES_TO_SYNC = {
         """
     },
     "visitor_insights": {
+        "key_columns": "user_pseudo_id",
         "bq_columns": """
             user_pseudo_id, total_sessions, first_visit, last_visit,
             visitor_tenure_days, total_page_views, avg_session_duration_sec,
@@ -242,6 +280,7 @@ TABLES_TO_SYNC = {
         """
     },
     "tech_demand_insights": {
+        "key_columns": "technology",
         "bq_columns": """
             technology, total_interactions, total_unique_users,
             demand_rank, demand_percentile, demand_tier,
@@ -254,6 +293,7 @@ TABLES_TO_SYNC = {
         """
     },
     "domain_rankings": {
+        "key_columns": "domain",
         "bq_columns": """
             domain, total_explicit_interest, total_implicit_interest,
             total_interactions, total_unique_users, total_interest_score,
@@ -268,6 +308,7 @@ TABLES_TO_SYNC = {
         """
     },
     "experience_rankings": {
+        "key_columns": "experience_id",
         "bq_columns": """
             experience_id, experience_title, company,
             total_interactions, total_unique_users, total_sessions,
@@ -298,8 +339,32 @@ TABLES_TO_SYNC = {
 }
 
 
+SYNC_METADATA_INSERT = """
+    INSERT INTO sync_metadata (table_name, last_synced_at, rows_synced, sync_duration_seconds, status, watermark)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def sync_metadata_statement(table_name: str, stage_name: str, rows: int, start_time: datetime,
+                            staging_dir: Path = STAGING_DIR) -> tuple:
+    """
+    sync_metadata entry for a load, to run in the load's own transaction.
+
+    Its watermark is the MAX(materialized_at) of the staged rows, so micro-syncs
+    (incremental_sync.py --mode micro) continue from what was actually loaded
+    rather than from the clock of the machine that ran the sync.
+    """
+    watermark = staged_max(stage_name, "materialized_at", staging_dir)
+    duration = (datetime.now() - start_time).total_seconds()
+    return (SYNC_METADATA_INSERT, (table_name, datetime.utcnow(), rows, duration, 'success', watermark))
+
+
 def get_bigquery_client():
-    """Initialize BigQuery client"""
+    """Initialize BigQuery client (or the local stand-in when LOCAL_BIGQUERY_DIR is set)"""
+    if os.getenv("LOCAL_BIGQUERY_DIR"):
+        from local_bigquery import LocalBigQueryClient
+        return LocalBigQueryClient(os.environ["LOCAL_BIGQUERY_DIR"], project=PROJECT_ID)
+
     credentials_path = Path(__file__).parent.parent / "credentials" / "gcp-service-account.json"
     if credentials_path.exists():
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(credentials_path)
@@ -307,72 +372,80 @@ def get_bigquery_client():
 
 
 def get_supabase_connection():
-    """Get PostgreSQL connection to Supabase"""
-    return psycopg2.connect(
+    """Get PostgreSQL connection to Supabase (reopened by the load phase if it drops)"""
+    return ReconnectingConnection(lambda: psycopg2.connect(
         host=SUPABASE_CONFIG["host"],
         port=SUPABASE_CONFIG["port"],
         database=SUPABASE_CONFIG["database"],
         user=SUPABASE_CONFIG["user"],
         password=SUPABASE_CONFIG["password"],
         sslmode="require"
-    )
+    ))
 
 
-def sync_table(bq_client, pg_conn, table_name: str, config: dict) -> dict:
-    """Sync a single table from BigQuery to Supabase"""
+def extract_table(bq_client, table_name: str, config: dict, staging_dir: Path = STAGING_DIR) -> dict:
+    """Extract phase: query BigQuery and stage the table as Parquet"""
     start_time = datetime.now()
 
-    print(f"  Syncing {table_name}...")
+    print(f"  Extracting {table_name}...")
 
-    # Query BigQuery
     bq_query = f"""
         SELECT {config['bq_columns']}
         FROM `{PROJECT_ID}.{BQ_DATASET}.{table_name}`
     """
 
     try:
-        query_job = bq_client.query(bq_query)
-        rows = list(query_job.result())
+        entry = extract_query(bq_client, table_name, bq_query,
+                              parse_columns(config['pg_columns']), staging_dir=staging_dir)
+        duration = (datetime.now() - start_time).total_seconds()
+        return {"table": table_name, "rows": entry["rows"], "duration": duration, "status": "extracted"}
 
-        if not rows:
-            print(f"    No data in {table_name}")
-            return {"table": table_name, "rows": 0, "status": "empty"}
+    except Exception as e:
+        print(f"    Error extracting {table_name}: {e}")
+        return {"table": table_name, "rows": 0, "status": "error", "error": str(e)}
+
+
+def load_table(pg_conn, table_name: str, staging_dir: Path = STAGING_DIR) -> dict:
+    """Load phase: replace the Supabase table with the staged Parquet file"""
+    start_time = datetime.now()
 
-        # Convert to list of tuples
-        data = [tuple(row.values()) for row in rows]
+    print(f"  Loading {table_name}...")
 
-        # Get column names for insert
-        pg_columns = config['pg_columns'].replace('\n', '').replace(' ', '')
-        columns_list = [c.strip() for c in pg_columns.split(',')]
+    if not staged_file(table_name, staging_dir).exists():
+        print(f"    No staged file for {table_name}")
+        return {"table": table_name, "rows": 0, "status": "error", "error": "not staged"}
 
-        # Truncate and insert into Supabase
-        with pg_conn.cursor() as cursor:
-            cursor.execute(f"TRUNCATE TABLE {table_name} RESTART IDENTITY")
+    staged_rows = read_manifest(staging_dir).get(table_name, {}).get("rows", 0)
+    date_column = TABLES_TO_SYNC[table_name].get("date_column")
 
-            # Build insert query
-            placeholders = ','.join(['%s'] * len(columns_list))
-            insert_query = f"""
-                INSERT INTO {table_name} ({pg_columns})
-                VALUES ({placeholders})
-            """
+    # An empty extract never replaces the table's data
+    if staged_rows == 0:
+        print(f"    No data in {table_name}")
+        return {"table": table_name, "rows": 0, "status": "empty"}
 
-            # Batch insert
-            cursor.executemany(insert_query, data)
-            pg_conn.commit()
+    try:
+        # Large reloads rebuild secondary indexes once afterwards instead of row by row
+        with deferred_indexes(pg_conn, table_name, staged_rows, keep_columns=[date_column]):
+            rows = load_staged_table(pg_conn, table_name,
+                                     prepare_sql=f"TRUNCATE TABLE {table_name} RESTART IDENTITY",
+                                     staging_dir=staging_dir,
+                                     extra_statements=[sync_metadata_statement(
+                                         table_name, table_name, staged_rows, start_time, staging_dir)])
 
         duration = (datetime.now() - start_time).total_seconds()
-        print(f"    Synced {len(data)} rows in {duration:.2f}s")
+        print(f"    Loaded {rows} rows in {duration:.2f}s")
 
         return {
             "table": table_name,
-            "rows": len(data),
+            "rows": rows,
             "duration": duration,
             "status": "success"
         }
 
     except Exception as e:
-        print(f"    Error syncing {table_name}: {e}")
-        pg_conn.rollback()
+        print(f"    Error loading {table_name}: {e}")
+        if not pg_conn.closed:
+            pg_conn.rollback()
         return {
             "table": table_name,
             "rows": 0,
@@ -381,10 +454,20 @@ def sync_table(bq_client, pg_conn, table_name: str, config: dict) -> dict:
         }
 
 
+def sync_table(bq_client, pg_conn, table_name: str, config: dict, staging_dir: Path = STAGING_DIR) -> dict:
+    """Sync a single table from BigQuery to Supabase (extract, then load)"""
+    extracted = extract_table(bq_client, table_name, config, staging_dir)
+    if extracted["status"] == "error":
+        return extracted
+    return load_table(pg_conn, table_name, staging_dir)
+
+
 def update_sync_metadata(pg_conn, results: list):
-    """Update sync metadata table"""
+    """Record the tables that didn't load (successful loads record themselves, see load_table)"""
     with pg_conn.cursor() as cursor:
         for result in results:
+            if result["status"] == "success":
+                continue
             cursor.execute("""
                 INSERT INTO sync_metadata (table_name, last_synced_at, rows_synced, sync_duration_seconds, status)
                 VALUES (%s, %s, %s, %s, %s)
@@ -398,32 +481,75 @@ def update_sync_metadata(pg_conn, results: list):
         pg_conn.commit()
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync BigQuery materialized tables to Supabase")
+    parser.add_argument("--phase", choices=["all", "extract", "load"], default="all",
+                        help="extract: BigQuery → Parquet only; load: Parquet → Supabase only (replay)")
+    parser.add_argument("--staging-dir", type=Path, default=STAGING_DIR,
+                        help="Directory for the staged Parquet files")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES_TO_SYNC), default=list(TABLES_TO_SYNC),
+                        help="Only sync these tables")
+    return parser.parse_args()
+
+
 def main():
     """Main sync function"""
+    args = parse_args()
+
     print("=" * 60)
     print("BigQuery → Supabase Sync")
     print("=" * 60)
     print(f"Started at: {datetime.now()}")
+    print(f"Phase: {args.phase} (staging: {args.staging_dir})")
     print()
 
-    # Initialize clients
-    print("Connecting to BigQuery...")
-    bq_client = get_bigquery_client()
+    results = []
 
-    print("Connecting to Supabase...")
-    pg_conn = get_supabase_connection()
+    # Extract phase
+    if args.phase in ("all", "extract"):
+        print("Connecting to BigQuery...")
+        bq_client = get_bigquery_client()
 
-    # Sync each table
-    print("\nSyncing tables:")
-    results = []
+        print("\nExtracting tables:")
+        for table_name in args.tables:
+            results.append(extract_table(bq_client, table_name, TABLES_TO_SYNC[table_name], args.staging_dir))
 
-    for table_name, config in TABLES_TO_SYNC.items():
-        result = sync_table(bq_client, pg_conn, table_name, config)
-        results.append(result)
+    # Load phase (skips tables whose extract failed in this run)
+    if args.phase in ("all", "load"):
+        failed_extracts = {r["table"] for r in results if r["status"] == "error"}
+        staged = read_manifest(args.staging_dir)
 
-    # Update metadata
-    print("\nUpdating sync metadata...")
-    update_sync_metadata(pg_conn, results)
+        print("\nConnecting to Supabase...")
+        pg_conn = get_supabase_connection()
+
+        print("\nLoading tables:")
+        load_results = []
+        for table_name in args.tables:
+            if table_name in failed_extracts:
+                continue
+            if args.phase == "load" and table_name in staged:
+                print(f"  {table_name}: staged {staged[table_name]['extracted_at']}")
+            load_results.append(load_table(pg_conn, table_name, args.staging_dir))
+
+        # Update metadata
+        print("\nUpdating sync metadata...")
+        update_sync_metadata(pg_conn, load_results)
+
+        # Prefix sums of the reloaded daily stats (see cumulative.py)
+        load_results += refresh_cumulative_tables(
+            pg_conn, [r["table"] for r in load_results if r["status"] == "success"])
+
+        # Fresh planner statistics for every reloaded table
+        run_maintenance(pg_conn, [r["table"] for r in load_results if r["status"] == "success"])
+
+        # Let the API instances refresh what changed
+        notify_sync(pg_conn, [r["table"] for r in load_results if r["status"] == "success"])
+
+        # Local Parquet copy for offline dashboard builds (see snapshot.py)
+        refresh_snapshot(pg_conn)
+
+        pg_conn.close()
+        results = [r for r in results if r["status"] == "error"] + load_results
 
     # Summary
     print("\n" + "=" * 60)
@@ -431,7 +557,7 @@ def main():
     print("=" * 60)
 
     total_rows = sum(r.get("rows", 0) for r in results)
-    successful = sum(1 for r in results if r["status"] == "success")
+    successful = sum(1 for r in results if r["status"] in ["success", "extracted"])
     failed = sum(1 for r in results if r["status"] == "error")
 
     print(f"  Tables synced: {successful}/{len(results)}")
@@ -444,9 +570,6 @@ def main():
 
     print(f"\nCompleted at: {datetime.now()}")
 
-    # Close connection
-    pg_conn.close()
-
     # Exit with error if any failures
     if failed > 0:
         sys.exit(1)
@@ -1,15 +1,47 @@
 """
 Update Dashboard Gist - Pre-computes dashboard data for all date ranges
 Runs after BigQuery → Supabase sync in GitHub Actions workflow.
+
+Gist files (compact JSON):
+    dashboard-manifest.json   ranges with their file, hash and size, plus metadata
+    dashboard-<range>.json    one file per date range
+    dashboard-analytics.json  all ranges combined (for older dashboard builds)
+
+The payload's content_hash is recorded in the metadata and manifest; when it
+matches the published manifest nothing is written, and unchanged range files
+are never rewritten. Set GIST_API_URL to a local_gist_server.py instance to
+run offline.
+
+The SQL comes from the API's query catalog (functions/dashboard_queries.py);
+DASHBOARD_PREPARED controls whether it runs as prepared statements. With
+GIST_SNAPSHOT_DIR set, the same sections are computed locally from the
+snapshot the sync wrote (supabase/snapshot.py) through the API's session store
+(functions/session_store.py), without connecting to Supabase.
 """
 
 import os
+import sys
 import json
+import hashlib
+import time
 import requests
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+from pathlib import Path
+
+# The dashboard SQL, rankings and daily partials are shared with the API
+# (functions/dashboard_queries.py, functions/ranking_engine.py, functions/daily_partials.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "functions"))
+from dashboard_queries import AUTO_MAX_POINTS, execute_query, bucketed_query, resolve_granularity
+from ranking_engine import pg_round, rank_entities
+from daily_partials import (
+    fetch_daily_partials, merge_partials, rank_by, sum_field, avg_field, derive_conversion_row,
+    project_aggregates_rows, domain_aggregates_rows, experience_aggregates_rows,
+)
 
 # Supabase config
 SUPABASE_CONFIG = {
@@ -20,9 +52,24 @@ SUPABASE_CONFIG = {
     "password": os.getenv("SUPABASE_PASSWORD"),
 }
 
+# Number of date ranges computed concurrently (each holds one Supabase connection)
+GIST_PARALLELISM = int(os.getenv("GIST_PARALLELISM", "3"))
+# Snapshot directory to build from instead of Supabase (see supabase/snapshot.py)
+GIST_SNAPSHOT_DIR = os.getenv("GIST_SNAPSHOT_DIR")
+
 # Gist config
 GIST_TOKEN = os.getenv("GIST_TOKEN")
 GIST_ID = os.getenv("GIST_ID", "dedbbf6ebcb32542e7b724b86f2b214f")
+GIST_API_URL = os.getenv("GIST_API_URL", "https://api.github.com")  # e.g. local_gist_server.py
+GIST_FILENAME = "dashboard-analytics.json"  # all ranges in one file (older dashboard builds)
+MANIFEST_FILENAME = "dashboard-manifest.json"
+GIST_DEFAULT_RANGE = os.getenv("GIST_DEFAULT_RANGE", "all_time")  # range the dashboard loads first
+GIST_FORCE_UPDATE = os.getenv("GIST_FORCE_UPDATE", "").lower() in ("1", "true", "yes")
+# Longer ranges publish dailyMetrics per week / month / ... (see dashboard_queries TIME BUCKETS)
+GIST_MAX_POINTS = int(os.getenv("GIST_MAX_POINTS", str(AUTO_MAX_POINTS)))
+
+# Metadata that changes on every run and is left out of the content hash
+VOLATILE_METADATA_FIELDS = {"updated_at", "content_hash"}
 
 
 def json_serializer(obj):
@@ -44,203 +91,129 @@ def get_data_date_range(cursor) -> tuple[date, date]:
     result = cursor.fetchone()
     if result and result["min_date"] and result["max_date"]:
         return result["min_date"], result["max_date"]
+    return default_date_range()
+
+
+def default_date_range() -> tuple[date, date]:
+    """The last 30 days, when there is no session data"""
     today = date.today()
     return today - timedelta(days=30), today - timedelta(days=1)
 
 
-def fetch_dashboard_data(cursor, start_date: date, end_date: date) -> dict:
-    """Fetch all dashboard data for a given date range using a single connection"""
+# ============================================================================
+# DAILY PARTIALS (fetched once for the widest range, shared by every range)
+# ============================================================================
+# The ranges are nested, so the additive sections are read once as per-day
+# partial aggregates and merged per range (functions/daily_partials.py); the
+# output is the same as running each range's queries. The rankings below keep
+# the gist's own rank-based tiers.
+
+def derive_project_rankings(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    """Top 10 projects by engagement score for a range"""
+    return rank_entities("gist_project_rankings", project_aggregates_rows(partials, start_date, end_date))
+
+
+def derive_section_rankings(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    """Section health rankings for a range"""
+    sections = []
+    for section_id, rows in merge_partials(partials["sections"], "section_id", start_date, end_date).items():
+        milestones = [row["max_scroll_milestone"] for row in rows if row["max_scroll_milestone"] is not None]
+        sections.append({
+            "section_id": section_id,
+            "total_unique_views": sum_field(rows, "unique_views"),
+            "total_unique_exits": sum_field(rows, "unique_exits"),
+            "total_unique_viewers": sum_field(rows, "unique_viewers"),
+            "avg_exit_rate": pg_round(avg_field(rows, "unique_exit_rate"), 2),
+            "total_views": sum_field(rows, "total_views"),
+            "total_exits": sum_field(rows, "total_exits"),
+            "avg_total_exit_rate": pg_round(avg_field(rows, "total_exit_rate"), 2),
+            "avg_revisits_per_session": pg_round(avg_field(rows, "avg_revisits_per_session"), 2),
+            "total_engaged_sessions": sum_field(rows, "engaged_sessions"),
+            "avg_engagement_rate": pg_round(avg_field(rows, "engagement_rate"), 2),
+            "avg_time_spent_seconds": pg_round(avg_field(rows, "avg_time_spent_seconds"), 2),
+            "avg_scroll_depth_percent": pg_round(avg_field(rows, "avg_scroll_depth_percent"), 2),
+            "max_scroll_milestone": max(milestones) if milestones else None,
+        })
+
+    for section in sections:
+        exit_rate = section["avg_exit_rate"] or 0
+        time_spent = section["avg_time_spent_seconds"] or 0
+        engagement = section["avg_engagement_rate"] or 0
+        scroll_depth = section["avg_scroll_depth_percent"] or 0
+        section["health_score"] = pg_round(
+            (1 - Decimal(exit_rate) / 100) * 30 +
+            min(Decimal(time_spent) / 10, Decimal(1)) * 25 +
+            Decimal(engagement) / 100 * 25 +
+            Decimal(scroll_depth) / 100 * 20, 2)
+
+    # NULLS LAST for both orderings
+    rank_by(sections, lambda s: (s["avg_engagement_rate"] is not None, s["avg_engagement_rate"] or 0),
+            "engagement_rank")
+    rank_by(sections, lambda s: s["total_views"], "view_rank")
+    rank_by(sections, lambda s: (s["avg_exit_rate"] is None, s["avg_exit_rate"] or 0),
+            "retention_rank", descending=False)
+
+    for section in sections:
+        health, exit_rate = section["health_score"], section["avg_exit_rate"]
+        time_spent, scroll_depth = section["avg_time_spent_seconds"], section["avg_scroll_depth_percent"]
+        section["health_tier"] = ("healthy" if health >= 60 else
+                                  "needs_attention" if health >= 40 else "critical")
+        section["dropoff_indicator"] = "high_dropoff" if exit_rate is not None and exit_rate > 50 else "normal"
+        if exit_rate is not None and exit_rate > 70:
+            section["optimization_hint"] = "add_cta_or_navigation"
+        elif time_spent is not None and time_spent < 3:
+            section["optimization_hint"] = "improve_content"
+        elif scroll_depth is not None and scroll_depth < 50:
+            section["optimization_hint"] = "optimize_layout"
+        else:
+            section["optimization_hint"] = "maintain"
+
+    return sorted(sections, key=lambda s: s["health_score"], reverse=True)
+
+
+def derive_tech_demand(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    """Skill demand rankings for a range"""
+    skills = [{
+        "skill_name": skill_name,
+        "total_interactions": sum_field(rows, "total_interactions"),
+        "total_unique_users": sum_field(rows, "total_unique_users"),
+        "interest_score": sum_field(rows, "interest_score"),
+    } for skill_name, rows in merge_partials(partials["skills"], "skill_name", start_date, end_date).items()]
+
+    return rank_entities("gist_tech_demand", skills)
+
+
+def derive_domain_rankings(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    """Domain interest rankings for a range"""
+    return rank_entities("gist_domain_rankings", domain_aggregates_rows(partials, start_date, end_date))
+
+
+def derive_experience_rankings(partials: dict, start_date: date, end_date: date) -> list[dict]:
+    """Experience interest rankings for a range"""
+    return rank_entities("gist_experience_rankings", experience_aggregates_rows(partials, start_date, end_date))
+
+
+def fetch_dashboard_data(query, start_date: date, end_date: date, partials: dict = None) -> dict:
+    """
+    Fetch all dashboard data for a given date range. query(name, start, end)
+    returns a catalog query's rows: run on one connection, or computed from a
+    snapshot.
+
+    partials (from fetch_daily_partials) must cover the range; when omitted they
+    are fetched for just this range.
+    """
+    if partials is None:
+        partials = fetch_daily_partials(query, start_date, end_date)
 
     # Overview - use COUNT(DISTINCT session_id) to avoid counting duplicate rows
-    cursor.execute("""
-        SELECT
-            COUNT(DISTINCT session_id) as total_sessions,
-            COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-            ROUND(AVG(session_duration_seconds)::numeric, 0) as avg_session_duration,
-            ROUND(AVG(page_views)::numeric, 1) as avg_pages_per_session,
-            ROUND(COUNT(DISTINCT CASE WHEN is_bounce THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as bounce_rate,
-            ROUND(COUNT(DISTINCT CASE WHEN is_engaged THEN session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT session_id), 0), 2) as engagement_rate,
-            ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement_score
-        FROM sessions WHERE session_date BETWEEN %s AND %s
-    """, (start_date, end_date))
-    overview_row = cursor.fetchone() or {}
-
-    # Daily metrics
-    cursor.execute("""
-        SELECT session_date as date, total_sessions as sessions, unique_visitors as visitors,
-               engagement_rate, bounce_rate, avg_session_duration_sec as avg_duration,
-               desktop_sessions, mobile_sessions, tablet_sessions
-        FROM daily_metrics WHERE session_date BETWEEN %s AND %s ORDER BY session_date
-    """, (start_date, end_date))
-    daily_metrics = [dict(row) for row in cursor.fetchall()]
+    overview_rows = query("overview", start_date, end_date)
+    overview_row = overview_rows[0] if overview_rows else {}
 
     # Traffic sources (with conversion data)
-    cursor.execute("""
-        SELECT s.traffic_source, s.traffic_medium,
-               COUNT(DISTINCT s.session_id) as sessions,
-               COUNT(DISTINCT s.user_pseudo_id) as unique_visitors,
-               ROUND(COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as engagement_rate,
-               ROUND(COUNT(DISTINCT CASE WHEN s.is_bounce THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as bounce_rate,
-               ROUND(AVG(s.session_duration_seconds)::numeric, 0) as avg_duration,
-               COUNT(DISTINCT CASE WHEN vi.form_submissions > 0 THEN s.user_pseudo_id END) as conversions,
-               COUNT(DISTINCT CASE WHEN vi.resume_downloads > 0 THEN s.user_pseudo_id END) as resume_downloads
-        FROM sessions s
-        LEFT JOIN visitor_insights vi ON s.user_pseudo_id = vi.user_pseudo_id
-        WHERE s.session_date BETWEEN %s AND %s
-        GROUP BY s.traffic_source, s.traffic_medium ORDER BY sessions DESC LIMIT 10
-    """, (start_date, end_date))
-    traffic_sources = [dict(row) for row in cursor.fetchall()]
-
-    # Conversion summary
-    cursor.execute("""
-        SELECT
-            COALESCE(SUM(total_cta_views), 0) as cta_views,
-            COALESCE(SUM(total_cta_clicks), 0) as cta_clicks,
-            COALESCE(SUM(contact_form_starts), 0) as form_starts,
-            COALESCE(SUM(contact_form_submissions), 0) as form_submissions,
-            COALESCE(SUM(resume_downloads), 0) as resume_downloads,
-            COALESCE(SUM(social_clicks), 0) as social_clicks,
-            COALESCE(SUM(outbound_clicks), 0) as outbound_clicks,
-            COALESCE(SUM(publication_clicks), 0) as publication_clicks,
-            COALESCE(SUM(content_copies), 0) as content_copies
-        FROM conversion_funnel WHERE event_date BETWEEN %s AND %s
-    """, (start_date, end_date))
-    conv_row = cursor.fetchone() or {}
-
-    # Project rankings (date-filtered from daily stats)
-    cursor.execute("""
-        WITH aggregated AS (
-            SELECT
-                project_id,
-                MAX(project_title) as project_title,
-                MAX(project_category) as project_category,
-                SUM(COALESCE(views, 0)) as total_views,
-                SUM(COALESCE(unique_viewers, 0)) as total_unique_viewers,
-                SUM(COALESCE(clicks, 0)) as total_clicks,
-                SUM(COALESCE(expands, 0)) as total_expands,
-                SUM(COALESCE(link_clicks, 0)) as total_link_clicks,
-                SUM(COALESCE(github_clicks, 0)) as total_github_clicks,
-                SUM(COALESCE(demo_clicks, 0)) as total_demo_clicks,
-                (SUM(COALESCE(clicks, 0)) * 5 + SUM(COALESCE(expands, 0)) * 3 +
-                 SUM(COALESCE(link_clicks, 0)) * 4 + SUM(COALESCE(views, 0)) * 1) as engagement_score
-            FROM project_daily_stats
-            WHERE event_date BETWEEN %s AND %s
-            GROUP BY project_id
-        ),
-        ranked AS (
-            SELECT *,
-                ROW_NUMBER() OVER (ORDER BY engagement_score DESC) as overall_rank,
-                CASE
-                    WHEN engagement_score >= (SELECT PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY engagement_score) FROM aggregated) THEN 'top_performer'
-                    WHEN engagement_score >= (SELECT PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY engagement_score) FROM aggregated) THEN 'above_average'
-                    ELSE 'below_average'
-                END as performance_tier,
-                ROUND((PERCENT_RANK() OVER (ORDER BY engagement_score) * 100)::numeric, 1) as engagement_percentile
-            FROM aggregated
-        )
-        SELECT project_id, project_title, project_category, total_views, total_unique_viewers,
-               total_clicks, total_expands, total_link_clicks, total_github_clicks, total_demo_clicks,
-               engagement_score, overall_rank::int, performance_tier,
-               CASE WHEN overall_rank <= 3 THEN 'featured' ELSE 'standard' END as recommended_position,
-               engagement_percentile
-        FROM ranked ORDER BY overall_rank LIMIT 10
-    """, (start_date, end_date))
-    project_rankings = [dict(row) for row in cursor.fetchall()]
-
-    # Section rankings (date-filtered from daily stats)
-    cursor.execute("""
-        WITH aggregated AS (
-            SELECT
-                section_id,
-                SUM(COALESCE(unique_views, 0)) as total_unique_views,
-                SUM(COALESCE(unique_exits, 0)) as total_unique_exits,
-                SUM(COALESCE(unique_viewers, 0)) as total_unique_viewers,
-                ROUND(AVG(unique_exit_rate)::numeric, 2) as avg_exit_rate,
-                SUM(COALESCE(total_views, 0)) as total_views,
-                SUM(COALESCE(total_exits, 0)) as total_exits,
-                ROUND(AVG(total_exit_rate)::numeric, 2) as avg_total_exit_rate,
-                ROUND(AVG(avg_revisits_per_session)::numeric, 2) as avg_revisits_per_session,
-                SUM(COALESCE(engaged_sessions, 0)) as total_engaged_sessions,
-                ROUND(AVG(engagement_rate)::numeric, 2) as avg_engagement_rate,
-                ROUND(AVG(avg_time_spent_seconds)::numeric, 2) as avg_time_spent_seconds,
-                ROUND(AVG(avg_scroll_depth_percent)::numeric, 2) as avg_scroll_depth_percent,
-                MAX(max_scroll_milestone) as max_scroll_milestone
-            FROM section_daily_stats
-            WHERE event_date BETWEEN %s AND %s
-            GROUP BY section_id
-        ),
-        scored AS (
-            SELECT *,
-                ROUND((
-                    (1 - COALESCE(avg_exit_rate, 0) / 100.0) * 30 +
-                    LEAST(COALESCE(avg_time_spent_seconds, 0) / 10.0, 1) * 25 +
-                    COALESCE(avg_engagement_rate, 0) / 100.0 * 25 +
-                    COALESCE(avg_scroll_depth_percent, 0) / 100.0 * 20
-                )::numeric, 2) as health_score
-            FROM aggregated
-        ),
-        ranked AS (
-            SELECT *,
-                ROW_NUMBER() OVER (ORDER BY avg_engagement_rate DESC NULLS LAST) as engagement_rank,
-                ROW_NUMBER() OVER (ORDER BY total_views DESC) as view_rank,
-                ROW_NUMBER() OVER (ORDER BY avg_exit_rate ASC NULLS LAST) as retention_rank,
-                CASE
-                    WHEN health_score >= 60 THEN 'healthy'
-                    WHEN health_score >= 40 THEN 'needs_attention'
-                    ELSE 'critical'
-                END as health_tier,
-                CASE WHEN avg_exit_rate > 50 THEN 'high_dropoff' ELSE 'normal' END as dropoff_indicator,
-                CASE
-                    WHEN avg_exit_rate > 70 THEN 'add_cta_or_navigation'
-                    WHEN avg_time_spent_seconds < 3 THEN 'improve_content'
-                    WHEN avg_scroll_depth_percent < 50 THEN 'optimize_layout'
-                    ELSE 'maintain'
-                END as optimization_hint
-            FROM scored
-        )
-        SELECT section_id, total_unique_views, total_unique_exits, total_unique_viewers,
-               avg_exit_rate, total_views, total_exits, avg_total_exit_rate,
-               avg_revisits_per_session, total_engaged_sessions, avg_engagement_rate,
-               avg_time_spent_seconds, avg_scroll_depth_percent, max_scroll_milestone,
-               health_score, engagement_rank::int, view_rank::int, retention_rank::int,
-               health_tier, dropoff_indicator, optimization_hint
-        FROM ranked ORDER BY health_score DESC
-    """, (start_date, end_date))
-    section_rankings = [dict(row) for row in cursor.fetchall()]
+    traffic_sources = query("traffic_sources_summary", start_date, end_date)
 
     # Visitor segments (date-filtered from sessions)
-    cursor.execute("""
-        WITH visitor_stats AS (
-            SELECT
-                user_pseudo_id,
-                COUNT(DISTINCT session_id) as total_sessions,
-                SUM(page_views) as total_page_views,
-                AVG(session_duration_seconds) as avg_duration,
-                AVG(engagement_score) as avg_engagement,
-                SUM(conversions_count) as total_conversions,
-                MAX(device_category) as primary_device
-            FROM sessions
-            WHERE session_date BETWEEN %s AND %s
-            GROUP BY user_pseudo_id
-        ),
-        segmented AS (
-            SELECT *,
-                CASE
-                    WHEN total_conversions > 0 THEN 'converter'
-                    WHEN total_sessions >= 3 AND avg_engagement > 50 THEN 'power_user'
-                    WHEN total_sessions >= 2 THEN 'returning'
-                    WHEN avg_engagement > 30 THEN 'engaged_new'
-                    ELSE 'casual'
-                END as visitor_segment
-            FROM visitor_stats
-        )
-        SELECT visitor_segment, COUNT(*) as count,
-               ROUND(AVG(avg_engagement)::numeric, 2) as avg_value_score,
-               ROUND(AVG(total_sessions)::numeric, 2) as avg_sessions,
-               ROUND(AVG(avg_engagement)::numeric, 2) as avg_engagement_rate
-        FROM segmented GROUP BY visitor_segment ORDER BY count DESC
-    """, (start_date, end_date))
-    visitor_segments_raw = cursor.fetchall()
+    visitor_segments_raw = query("gist_visitor_segments", start_date, end_date)
     visitor_segments = {}
     for seg in visitor_segments_raw:
         visitor_segments[seg["visitor_segment"]] = {
@@ -251,184 +224,13 @@ def fetch_dashboard_data(cursor, start_date: date, end_date: date) -> dict:
         }
 
     # Top visitors (date-filtered from sessions, with conversion details from visitor_insights)
-    cursor.execute("""
-        WITH visitor_stats AS (
-            SELECT
-                s.user_pseudo_id,
-                COUNT(DISTINCT s.session_id) as total_sessions,
-                MIN(s.session_date) as first_visit,
-                MAX(s.session_date) as last_visit,
-                (MAX(s.session_date) - MIN(s.session_date)) as visitor_tenure_days,
-                SUM(s.page_views) as total_page_views,
-                ROUND(AVG(s.session_duration_seconds)::numeric, 0) as avg_session_duration_sec,
-                ROUND(COUNT(DISTINCT CASE WHEN s.is_engaged THEN s.session_id END)::numeric * 100.0 / NULLIF(COUNT(DISTINCT s.session_id), 0), 2) as engagement_rate,
-                MODE() WITHIN GROUP (ORDER BY s.device_category) as primary_device,
-                MODE() WITHIN GROUP (ORDER BY s.country) as primary_country,
-                MODE() WITHIN GROUP (ORDER BY s.traffic_source) as primary_traffic_source,
-                SUM(s.projects_clicked_count) as projects_viewed,
-                SUM(s.conversions_count) as cta_clicks,
-                COALESCE(MAX(vi.form_submissions), 0) as form_submissions,
-                COALESCE(MAX(vi.social_clicks), 0) as social_clicks,
-                COALESCE(MAX(vi.resume_downloads), 0) as resume_downloads,
-                (COUNT(DISTINCT s.session_id) * 10 + SUM(s.page_views) * 2 + SUM(s.conversions_count) * 20 +
-                 ROUND(AVG(s.engagement_score)::numeric, 0)) as visitor_value_score
-            FROM sessions s
-            LEFT JOIN visitor_insights vi ON s.user_pseudo_id = vi.user_pseudo_id
-            WHERE s.session_date BETWEEN %s AND %s
-            GROUP BY s.user_pseudo_id
-        ),
-        segmented AS (
-            SELECT *,
-                CASE
-                    WHEN form_submissions > 0 OR resume_downloads > 0 THEN 'converter'
-                    WHEN total_sessions >= 3 THEN 'power_user'
-                    WHEN total_sessions >= 2 THEN 'returning'
-                    ELSE 'new'
-                END as visitor_segment,
-                'general_visitor' as interest_profile
-            FROM visitor_stats
-        )
-        SELECT user_pseudo_id, total_sessions, visitor_tenure_days, total_page_views,
-               avg_session_duration_sec, engagement_rate, primary_device, primary_country,
-               primary_traffic_source, projects_viewed, cta_clicks, form_submissions,
-               social_clicks, resume_downloads, visitor_value_score, visitor_segment, interest_profile
-        FROM segmented ORDER BY visitor_value_score DESC LIMIT 15
-    """, (start_date, end_date))
-    top_visitors = [dict(row) for row in cursor.fetchall()]
-
-    # Tech demand (date-filtered from skill daily stats)
-    cursor.execute("""
-        WITH aggregated AS (
-            SELECT
-                skill_name,
-                SUM(COALESCE(clicks, 0) + COALESCE(hovers, 0)) as total_interactions,
-                SUM(COALESCE(unique_users, 0)) as total_unique_users,
-                SUM(COALESCE(weighted_interest_score, 0)) as interest_score
-            FROM skill_daily_stats
-            WHERE event_date BETWEEN %s AND %s
-            GROUP BY skill_name
-        ),
-        ranked AS (
-            SELECT *,
-                ROW_NUMBER() OVER (ORDER BY interest_score DESC) as demand_rank,
-                ROUND((PERCENT_RANK() OVER (ORDER BY interest_score) * 100)::numeric, 1) as demand_percentile,
-                CASE
-                    WHEN ROW_NUMBER() OVER (ORDER BY interest_score DESC) <= 5 THEN 'high_demand'
-                    WHEN ROW_NUMBER() OVER (ORDER BY interest_score DESC) <= 15 THEN 'moderate_demand'
-                    ELSE 'niche'
-                END as demand_tier,
-                CASE
-                    WHEN ROW_NUMBER() OVER (ORDER BY interest_score DESC) <= 5 THEN 'maintain_expertise'
-                    WHEN ROW_NUMBER() OVER (ORDER BY interest_score DESC) <= 10 THEN 'showcase_more'
-                    ELSE 'consider_highlighting'
-                END as learning_priority
-            FROM aggregated
-        )
-        SELECT skill_name, total_interactions, total_unique_users,
-               demand_rank::int, demand_percentile, demand_tier, learning_priority
-        FROM ranked ORDER BY demand_rank
-    """, (start_date, end_date))
-    tech_demand = [dict(row) for row in cursor.fetchall()]
-
-    # Domain rankings (date-filtered from domain daily stats)
-    cursor.execute("""
-        WITH aggregated AS (
-            SELECT
-                domain,
-                SUM(COALESCE(explicit_interest_signals, 0)) as total_explicit_interest,
-                SUM(COALESCE(implicit_interest_from_views, 0)) as total_implicit_interest,
-                SUM(COALESCE(total_domain_interactions, 0)) as total_interactions,
-                SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
-                SUM(COALESCE(domain_interest_score, 0)) as total_interest_score
-            FROM domain_daily_stats
-            WHERE event_date BETWEEN %s AND %s
-            GROUP BY domain
-        ),
-        ranked AS (
-            SELECT *,
-                ROW_NUMBER() OVER (ORDER BY total_interest_score DESC) as interest_rank,
-                ROUND((PERCENT_RANK() OVER (ORDER BY total_interest_score) * 100)::numeric, 1) as interest_percentile,
-                CASE
-                    WHEN ROW_NUMBER() OVER (ORDER BY total_interest_score DESC) <= 3 THEN 'high_demand'
-                    WHEN ROW_NUMBER() OVER (ORDER BY total_interest_score DESC) <= 7 THEN 'moderate_demand'
-                    ELSE 'niche'
-                END as demand_tier,
-                CASE
-                    WHEN ROW_NUMBER() OVER (ORDER BY total_interest_score DESC) <= 3 THEN 'feature_prominently'
-                    ELSE 'maintain_presence'
-                END as portfolio_recommendation
-            FROM aggregated
-        )
-        SELECT domain, total_explicit_interest, total_implicit_interest, total_interactions,
-               total_unique_users, total_interest_score, interest_rank::int, interest_percentile,
-               demand_tier, portfolio_recommendation
-        FROM ranked ORDER BY interest_rank
-    """, (start_date, end_date))
-    domain_rankings = [dict(row) for row in cursor.fetchall()]
-
-    # Experience rankings (date-filtered from experience daily stats)
-    cursor.execute("""
-        WITH aggregated AS (
-            SELECT
-                experience_id,
-                MAX(experience_title) as experience_title,
-                MAX(company) as company,
-                SUM(COALESCE(total_interactions, 0)) as total_interactions,
-                SUM(COALESCE(unique_interested_users, 0)) as total_unique_users,
-                SUM(COALESCE(unique_sessions, 0)) as total_sessions
-            FROM experience_daily_stats
-            WHERE event_date BETWEEN %s AND %s
-            GROUP BY experience_id
-        ),
-        ranked AS (
-            SELECT *,
-                ROW_NUMBER() OVER (ORDER BY total_interactions DESC) as interest_rank,
-                ROUND((PERCENT_RANK() OVER (ORDER BY total_interactions) * 100)::numeric, 1) as interest_percentile,
-                CASE
-                    WHEN ROW_NUMBER() OVER (ORDER BY total_interactions DESC) <= 2 THEN 'highly_attractive'
-                    ELSE 'moderately_attractive'
-                END as role_attractiveness,
-                CASE
-                    WHEN ROW_NUMBER() OVER (ORDER BY total_interactions DESC) <= 2 THEN 'feature_at_top'
-                    ELSE 'maintain_position'
-                END as positioning_suggestion
-            FROM aggregated
-        )
-        SELECT experience_id, experience_title, company, total_interactions, total_unique_users,
-               total_sessions, interest_rank::int, interest_percentile, role_attractiveness, positioning_suggestion
-        FROM ranked ORDER BY interest_rank
-    """, (start_date, end_date))
-    experience_rankings = [dict(row) for row in cursor.fetchall()]
-
-    # Recommendation performance
-    cursor.execute("SELECT * FROM recommendation_performance LIMIT 1")
-    recommendation_performance = [dict(row) for row in cursor.fetchall()]
+    top_visitors = query("gist_top_visitors", start_date, end_date)
 
     # Temporal hourly
-    cursor.execute("""
-        SELECT hour_of_day as hour, COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-               ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement,
-               ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate
-        FROM sessions WHERE session_date BETWEEN %s AND %s AND hour_of_day IS NOT NULL
-        GROUP BY hour_of_day ORDER BY hour_of_day
-    """, (start_date, end_date))
-    hourly_distribution = [dict(row) for row in cursor.fetchall()]
+    hourly_distribution = query("temporal_hourly", start_date, end_date)
 
     # Temporal day of week
-    cursor.execute("""
-        SELECT
-            CASE session_day_of_week
-                WHEN 1 THEN 'Sunday' WHEN 2 THEN 'Monday' WHEN 3 THEN 'Tuesday'
-                WHEN 4 THEN 'Wednesday' WHEN 5 THEN 'Thursday' WHEN 6 THEN 'Friday' WHEN 7 THEN 'Saturday'
-            END as day_name,
-            session_day_of_week as day_number,
-            COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-            ROUND(AVG(engagement_score)::numeric, 2) as avg_engagement,
-            ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate
-        FROM sessions WHERE session_date BETWEEN %s AND %s
-        GROUP BY session_day_of_week ORDER BY session_day_of_week
-    """, (start_date, end_date))
-    day_of_week_raw = {row['day_number']: dict(row) for row in cursor.fetchall()}
+    day_of_week_raw = {row['day_number']: row for row in query("temporal_dow", start_date, end_date)}
     # Ensure all 7 days are present, even with zero values
     all_days = [
         (1, 'Sunday'), (2, 'Monday'), (3, 'Tuesday'), (4, 'Wednesday'),
@@ -442,35 +244,28 @@ def fetch_dashboard_data(cursor, start_date: date, end_date: date) -> dict:
     ]
 
     # Devices
-    cursor.execute("""
-        SELECT device_category, COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-               ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate,
-               ROUND(AVG(session_duration_seconds)::numeric, 0) as avg_duration
-        FROM sessions WHERE session_date BETWEEN %s AND %s GROUP BY device_category ORDER BY sessions DESC
-    """, (start_date, end_date))
-    device_categories = [dict(row) for row in cursor.fetchall()]
+    device_categories = query("devices", start_date, end_date)
 
-    cursor.execute("""
-        SELECT COALESCE(browser, 'Unknown') as browser, COUNT(*) as sessions,
-               COUNT(DISTINCT user_pseudo_id) as unique_visitors
-        FROM sessions WHERE session_date BETWEEN %s AND %s GROUP BY browser ORDER BY sessions DESC LIMIT 10
-    """, (start_date, end_date))
-    browsers = [dict(row) for row in cursor.fetchall()]
+    browsers = query("browsers", start_date, end_date)
 
-    cursor.execute("""
-        SELECT COALESCE(os, 'Unknown') as operating_system, COUNT(*) as sessions,
-               COUNT(DISTINCT user_pseudo_id) as unique_visitors
-        FROM sessions WHERE session_date BETWEEN %s AND %s GROUP BY os ORDER BY sessions DESC LIMIT 10
-    """, (start_date, end_date))
-    operating_systems = [dict(row) for row in cursor.fetchall()]
+    operating_systems = query("operating_systems", start_date, end_date)
 
     # Geographic
-    cursor.execute("""
-        SELECT country, city, COUNT(*) as sessions, COUNT(DISTINCT user_pseudo_id) as unique_visitors,
-               ROUND(COUNT(*) FILTER (WHERE is_engaged)::numeric * 100.0 / NULLIF(COUNT(*), 0), 2) as engagement_rate
-        FROM sessions WHERE session_date BETWEEN %s AND %s GROUP BY country, city ORDER BY sessions DESC LIMIT 20
-    """, (start_date, end_date))
-    geographic = [dict(row) for row in cursor.fetchall()]
+    geographic = query("geographic", start_date, end_date)
+
+    # Additive sections, merged from the daily partials
+    granularity = resolve_granularity("auto", start_date, end_date, GIST_MAX_POINTS)
+    if granularity == "day":
+        daily_metrics = [row for row in partials["daily_metrics"] if start_date <= row["date"] <= end_date]
+    else:
+        daily_metrics = query(bucketed_query("daily_metrics", granularity), start_date, end_date)
+    conv_row = derive_conversion_row(partials, start_date, end_date)
+    project_rankings = derive_project_rankings(partials, start_date, end_date)
+    section_rankings = derive_section_rankings(partials, start_date, end_date)
+    tech_demand = derive_tech_demand(partials, start_date, end_date)
+    domain_rankings = derive_domain_rankings(partials, start_date, end_date)
+    experience_rankings = derive_experience_rankings(partials, start_date, end_date)
+    recommendation_performance = partials["recommendation_performance"]
 
     # Build conversion summary
     conversion_summary = {
@@ -522,102 +317,292 @@ def fetch_dashboard_data(cursor, start_date: date, end_date: date) -> dict:
         },
         "geographic": geographic,
         "dateRange": {"start": str(start_date), "end": str(end_date)},
+        "granularity": granularity,
     }
 
 
-def update_gist(content: dict) -> bool:
-    """Update the GitHub Gist with new content"""
-    if not GIST_TOKEN:
-        print("Error: GIST_TOKEN not set")
-        return False
+def canonical_json(content) -> str:
+    """Deterministic, compact JSON encoding used for hashing"""
+    return json.dumps(content, sort_keys=True, separators=(",", ":"), default=json_serializer)
+
+
+def compute_content_hash(content: dict) -> str:
+    """SHA-256 of the canonical payload, ignoring metadata that changes on every run"""
+    stable = dict(content)
+    stable["metadata"] = {k: v for k, v in content["metadata"].items() if k not in VOLATILE_METADATA_FIELDS}
+    return hashlib.sha256(canonical_json(stable).encode()).hexdigest()
 
-    url = f"https://api.github.com/gists/{GIST_ID}"
-    headers = {
+
+def gist_headers() -> dict:
+    return {
         "Authorization": f"token {GIST_TOKEN}",
         "Accept": "application/vnd.github.v3+json",
     }
 
-    payload = {
-        "files": {
-            "dashboard-analytics.json": {
-                "content": json.dumps(content, indent=2, default=json_serializer)
+
+def range_filename(range_name: str) -> str:
+    """Gist file holding a single date range"""
+    return f"dashboard-{range_name}.json"
+
+
+def get_published_manifest() -> dict | None:
+    """Manifest of the currently published gist (None if missing or unreadable)"""
+    try:
+        response = requests.get(f"{GIST_API_URL}/gists/{GIST_ID}", headers=gist_headers(), timeout=30)
+        if response.status_code != 200:
+            return None
+        file = response.json()["files"].get(MANIFEST_FILENAME)
+        if not file:
+            return None
+        # The API truncates large files; the raw URL always has the full content
+        content = file["content"]
+        if file.get("truncated"):
+            content = requests.get(file["raw_url"], timeout=30).text
+        return json.loads(content)
+    except Exception as e:
+        print(f"Could not read the published manifest ({e}), publishing everything")
+        return None
+
+
+def build_manifest(content: dict, range_hashes: dict, range_sizes: dict) -> dict:
+    """Small index of the per-range files, fetched first by the dashboard"""
+    metadata = content["metadata"]
+    return {
+        "updated_at": metadata["updated_at"],
+        "data_start_date": metadata["data_start_date"],
+        "data_end_date": metadata["data_end_date"],
+        "content_hash": metadata["content_hash"],
+        "default_range": GIST_DEFAULT_RANGE,
+        "combined_file": GIST_FILENAME,
+        "ranges": {
+            range_name: {
+                "file": range_filename(range_name),
+                "hash": range_hashes[range_name],
+                "size": range_sizes[range_name],
+                "start": content[range_name].get("dateRange", {}).get("start"),
+                "end": content[range_name].get("dateRange", {}).get("end"),
             }
-        }
+            for range_name in range_hashes
+        },
     }
 
-    response = requests.patch(url, headers=headers, json=payload, timeout=30)
+
+def update_gist(content: dict) -> bool:
+    """
+    Update the GitHub Gist with new content.
+
+    Writes one file per range, the manifest and the combined file (kept for
+    older clients). Nothing is written when the payload hash matches the
+    published manifest, and range files whose hash is unchanged are left alone.
+    """
+    if not GIST_TOKEN:
+        print("Error: GIST_TOKEN not set")
+        return False
+
+    content_hash = compute_content_hash(content)
+    content["metadata"]["content_hash"] = content_hash
+
+    published = {} if GIST_FORCE_UPDATE else (get_published_manifest() or {})
+    if published.get("content_hash") == content_hash:
+        print(f"Gist content unchanged ({content_hash[:12]}), skipping update")
+        return True
+
+    files, range_hashes, range_sizes = {}, {}, {}
+    published_ranges = published.get("ranges", {})
+    for range_name, data in content.items():
+        if range_name == "metadata":
+            continue
+        body = json.dumps(data, separators=(",", ":"), default=json_serializer)
+        range_hashes[range_name] = hashlib.sha256(canonical_json(data).encode()).hexdigest()
+        range_sizes[range_name] = len(body.encode())
+        if published_ranges.get(range_name, {}).get("hash") != range_hashes[range_name]:
+            files[range_filename(range_name)] = {"content": body}
+
+    manifest = build_manifest(content, range_hashes, range_sizes)
+    files[GIST_FILENAME] = {"content": json.dumps(content, separators=(",", ":"), default=json_serializer)}
+    files[MANIFEST_FILENAME] = {"content": json.dumps(manifest, separators=(",", ":"))}
+
+    response = requests.patch(f"{GIST_API_URL}/gists/{GIST_ID}", headers=gist_headers(),
+                              json={"files": files}, timeout=30)
 
     if response.status_code == 200:
-        print("Gist updated successfully!")
+        changed = [name for name in range_hashes if range_filename(name) in files]
+        print(f"Gist updated successfully! (hash {content_hash[:12]}; "
+              f"changed ranges: {', '.join(changed) or 'none'})")
+        for name, file in files.items():
+            print(f"  {name}: {len(file['content'].encode()) / 1024:.1f} KB")
         return True
     else:
         print(f"Error updating Gist: {response.status_code} - {response.text}")
         return False
 
 
-def main():
-    print("=" * 60)
-    print("Dashboard Gist Update - Starting")
-    print("=" * 60)
+def get_connection_pool(size: int) -> ThreadedConnectionPool:
+    """Pool of Supabase connections, one per concurrently computed range"""
+    return ThreadedConnectionPool(
+        1, size,
+        host=SUPABASE_CONFIG["host"],
+        port=SUPABASE_CONFIG["port"],
+        database=SUPABASE_CONFIG["database"],
+        user=SUPABASE_CONFIG["user"],
+        password=SUPABASE_CONFIG["password"],
+        sslmode="require",
+        cursor_factory=RealDictCursor,
+        connect_timeout=10
+    )
+
 
-    # Connect to Supabase (single connection for all queries)
-    print("\nConnecting to Supabase...")
+def database_query(cursor):
+    """query(name, start, end) running catalog queries on a cursor"""
+    return lambda name, start, end: execute_query(cursor, name, start, end)
+
+
+def fetch_range(pool: ThreadedConnectionPool, start: date, end: date, partials: dict) -> tuple[dict, float]:
+    """Compute one date range on its own pooled connection; returns (data, seconds)"""
+    start_time = time.perf_counter()
+    conn = pool.getconn()
     try:
-        conn = psycopg2.connect(
-            host=SUPABASE_CONFIG["host"],
-            port=SUPABASE_CONFIG["port"],
-            database=SUPABASE_CONFIG["database"],
-            user=SUPABASE_CONFIG["user"],
-            password=SUPABASE_CONFIG["password"],
-            sslmode="require",
-            cursor_factory=RealDictCursor,
-            connect_timeout=10
-        )
+        with conn.cursor() as cursor:
+            data = fetch_dashboard_data(database_query(cursor), start, end, partials)
+        conn.rollback()  # end the read-only transaction before returning the connection
+    except Exception as e:
+        # A dropped connection can't roll back; it fails this range, not the publish
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass  # dropped while rolling back; closed now
+        data = {"error": str(e)}
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
+    return data, time.perf_counter() - start_time
+
+
+def dashboard_date_ranges(data_start: date, data_end: date) -> dict:
+    """The published date ranges: the last days up to yesterday, and all the data"""
+    yesterday = date.today() - timedelta(days=1)
+    return {
+        "yesterday": (yesterday, yesterday),
+        "last_7_days": (yesterday - timedelta(days=6), yesterday),
+        "last_14_days": (yesterday - timedelta(days=13), yesterday),
+        "last_30_days": (yesterday - timedelta(days=29), yesterday),
+        "all_time": (data_start, data_end),
+    }
+
+
+def widest_range(date_ranges: dict) -> tuple[date, date]:
+    """Span of every range, which the shared daily partials cover"""
+    return min(start for start, _ in date_ranges.values()), max(end for _, end in date_ranges.values())
+
+
+def fetch_from_database() -> tuple[date, date, dict]:
+    """(data start, data end, range name -> data), queried from Supabase"""
+    # Connect to Supabase (one pooled connection per concurrent range)
+    print(f"\nConnecting to Supabase (parallelism: {GIST_PARALLELISM})...")
+    try:
+        pool = get_connection_pool(GIST_PARALLELISM)
         print("Connected!")
     except Exception as e:
         print(f"Failed to connect to Supabase: {e}")
         exit(1)
 
     try:
-        with conn.cursor() as cursor:
-            # Get actual data date range
-            data_start, data_end = get_data_date_range(cursor)
-            print(f"Data available from {data_start} to {data_end}")
-
-            # Calculate date ranges
-            today = date.today()
-            yesterday = today - timedelta(days=1)
-
-            date_ranges = {
-                "yesterday": (yesterday, yesterday),
-                "last_7_days": (yesterday - timedelta(days=6), yesterday),
-                "last_14_days": (yesterday - timedelta(days=13), yesterday),
-                "last_30_days": (yesterday - timedelta(days=29), yesterday),
-                "all_time": (data_start, data_end),
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                # Get actual data date range
+                data_start, data_end = get_data_date_range(cursor)
+                print(f"Data available from {data_start} to {data_end}")
+                date_ranges = dashboard_date_ranges(data_start, data_end)
+
+                # Per-day partials for the widest range, shared by every range
+                widest_start, widest_end = widest_range(date_ranges)
+                print(f"\nFetching daily partials: {widest_start} to {widest_end}...")
+                partials_start = time.perf_counter()
+                partials = fetch_daily_partials(database_query(cursor), widest_start, widest_end)
+                partials_duration = time.perf_counter() - partials_start
+                print(f"  Done in {partials_duration:.2f}s")
+            conn.rollback()
+        finally:
+            pool.putconn(conn)
+
+        # Fetch the date ranges concurrently; a failing range only affects its own entry
+        print(f"\nFetching {len(date_ranges)} date ranges...")
+        results, timings = {}, {}
+        with ThreadPoolExecutor(max_workers=GIST_PARALLELISM) as executor:
+            futures = {
+                executor.submit(fetch_range, pool, start, end, partials): range_name
+                for range_name, (start, end) in date_ranges.items()
             }
+            for future in as_completed(futures):
+                range_name = futures[future]
+                results[range_name], timings[range_name] = future.result()
+                print_range(range_name, date_ranges[range_name], results[range_name], timings[range_name])
 
-            # Build the gist content
-            gist_content = {
-                "metadata": {
-                    "updated_at": datetime.utcnow().isoformat() + "Z",
-                    "data_start_date": str(data_start),
-                    "data_end_date": str(data_end),
-                }
-            }
-
-            # Fetch data for each date range
-            for range_name, (start, end) in date_ranges.items():
-                print(f"\nFetching '{range_name}': {start} to {end}...")
-                try:
-                    gist_content[range_name] = fetch_dashboard_data(cursor, start, end)
-                    print(f"  Done!")
-                except Exception as e:
-                    print(f"  Error: {e}")
-                    gist_content[range_name] = {"error": str(e)}
+        slowest = max(timings, key=timings.get)
+        print(f"\nCritical path: partials {partials_duration:.2f}s + '{slowest}' {timings[slowest]:.2f}s"
+              f" (sum of ranges {sum(timings.values()):.2f}s)")
 
     finally:
-        conn.close()
-        print("\nDatabase connection closed.")
+        pool.closeall()
+        print("\nDatabase connections closed.")
+
+    return data_start, data_end, {range_name: results[range_name] for range_name in date_ranges}
+
+
+def fetch_from_snapshot(path: str) -> tuple[date, date, dict]:
+    """(data start, data end, range name -> data), computed from a snapshot without Supabase"""
+    import session_store
+
+    print(f"\nLoading snapshot {path}...")
+    load_start = time.perf_counter()
+    manifest = session_store.load_snapshot(path)
+    print(f"  {sum(table['rows'] for table in manifest['tables'].values())} rows, built {manifest['built_at']} "
+          f"(synced up to {manifest['watermark']}), loaded in {time.perf_counter() - load_start:.2f}s")
+
+    data_start, data_end = session_store.day_range("sessions") or default_date_range()
+    print(f"Data available from {data_start} to {data_end}")
+    date_ranges = dashboard_date_ranges(data_start, data_end)
+    partials = fetch_daily_partials(session_store.query, *widest_range(date_ranges))
+
+    print(f"\nComputing {len(date_ranges)} date ranges...")
+    results = {}
+    for range_name, (start, end) in date_ranges.items():
+        range_start = time.perf_counter()
+        try:
+            results[range_name] = fetch_dashboard_data(session_store.query, start, end, partials)
+        except Exception as e:
+            results[range_name] = {"error": str(e)}
+        print_range(range_name, (start, end), results[range_name], time.perf_counter() - range_start)
+    return data_start, data_end, results
+
+
+def print_range(range_name: str, date_range: tuple[date, date], data: dict, seconds: float):
+    status = "Error: " + data["error"] if "error" in data else "Done"
+    print(f"  '{range_name}' ({date_range[0]} to {date_range[1]}): {status} in {seconds:.2f}s")
+
+
+def main():
+    print("=" * 60)
+    print("Dashboard Gist Update - Starting")
+    print("=" * 60)
+
+    if GIST_SNAPSHOT_DIR and (Path(GIST_SNAPSHOT_DIR) / "manifest.json").exists():
+        data_start, data_end, results = fetch_from_snapshot(GIST_SNAPSHOT_DIR)
+    else:
+        if GIST_SNAPSHOT_DIR:
+            print(f"\nNo snapshot in {GIST_SNAPSHOT_DIR}, querying Supabase")
+        data_start, data_end, results = fetch_from_database()
+
+    # Build the gist content
+    gist_content = {
+        "metadata": {
+            "updated_at": datetime.utcnow().isoformat() + "Z",
+            "data_start_date": str(data_start),
+            "data_end_date": str(data_end),
+        },
+        **results,
+    }
 
     # Update the Gist
     print("\n" + "=" * 60)
@@ -237,6 +237,7 @@ export type GistData = {
     updated_at: string;
     data_start_date: string;
     data_end_date: string;
+    content_hash?: string; // SHA-256 of the payload (excluding updated_at); unchanged data keeps its hash
   };
   yesterday: DashboardData;
   last_7_days: DashboardData;
@@ -245,9 +246,30 @@ export type GistData = {
   all_time: DashboardData;
 };
 
+type GistRangePreset = Exclude<DateRangePreset, 'custom'>;
+
+export type GistManifest = {
+  updated_at: string;
+  data_start_date: string;
+  data_end_date: string;
+  content_hash: string;
+  default_range: GistRangePreset;
+  combined_file: string;
+  ranges: Partial<Record<GistRangePreset, {
+    file: string;
+    hash: string;
+    size: number;
+    start: string | null;
+    end: string | null;
+  }>>;
+};
+
 // ==================== CONFIG ====================
 
-const DASHBOARD_GIST_URL = 'https://gist.githubusercontent.com/AbhinavSarkarr/dedbbf6ebcb32542e7b724b86f2b214f/raw/dashboard-analytics.json';
+const GIST_RAW_BASE_URL = 'https://gist.githubusercontent.com/AbhinavSarkarr/dedbbf6ebcb32542e7b724b86f2b214f/raw';
+// Small index of the per-range files; the combined file is only a fallback for older gists
+const DASHBOARD_MANIFEST_URL = `${GIST_RAW_BASE_URL}/dashboard-manifest.json`;
+const DASHBOARD_GIST_URL = `${GIST_RAW_BASE_URL}/dashboard-analytics.json`;
 const BACKEND_API_URL = import.meta.env.VITE_ANALYTICS_API_URL || 'https://portfolio-analytics-api.onrender.com';
 
 // ==================== DATA NORMALIZATION ====================
@@ -515,14 +537,85 @@ function normalizeDashboardData(raw: Record<string, unknown>): DashboardData {
 let gistCache: GistData | null = null;
 let gistFetchPromise: Promise<GistData> | null = null;
 
+let manifestCache: GistManifest | null = null;
+let manifestFetchPromise: Promise<GistManifest | null> | null = null;
+// Per-range files, keyed by `${preset}:${hash}` so a new manifest never serves stale data
+const rangeCache = new Map<string, Record<string, unknown>>();
+const rangeFetchPromises = new Map<string, Promise<Record<string, unknown> | null>>();
+// Preset ranges prefetched from the backend's batch endpoint when the Gist is unavailable,
+// keyed by `${startDate}:${endDate}`
+const backendRangeCache = new Map<string, DashboardData>();
+const BACKEND_PREFETCH_PRESETS: GistRangePreset[] = ['yesterday', 'last_7_days', 'last_14_days', 'last_30_days', 'all_time'];
+
 export async function prefetchDashboardData(): Promise<void> {
-  // Fire and forget - just populate the cache
+  // Fire and forget - just populate the cache (manifest + default range only)
   console.log('[Prefetch] Starting dashboard data prefetch...');
-  fetchGistData()
+  fetchGistManifest()
+    .then(manifest => (manifest ? fetchGistRange(manifest.default_range) : fetchGistData()))
+    // Gist unavailable: every preset from the backend in one batch request
+    .then(gistData => (gistData ? gistData : prefetchFromBackend(BACKEND_PREFETCH_PRESETS)))
     .then(() => console.log('[Prefetch] Dashboard data cached successfully'))
     .catch(() => console.log('[Prefetch] Dashboard data prefetch failed'));
 }
 
+async function fetchGistManifest(): Promise<GistManifest | null> {
+  if (manifestCache) return manifestCache;
+  if (manifestFetchPromise) return manifestFetchPromise;
+
+  manifestFetchPromise = fetch(DASHBOARD_MANIFEST_URL)
+    .then(response => {
+      if (!response.ok) throw new Error('Failed to fetch Gist manifest');
+      return response.json();
+    })
+    .then((manifest: GistManifest) => {
+      if (!manifest.ranges) return null;
+      manifestCache = manifest;
+      return manifest;
+    })
+    .catch(err => {
+      console.warn('Gist manifest unavailable, falling back to the combined file:', err);
+      return null;
+    })
+    .finally(() => {
+      manifestFetchPromise = null;
+    });
+
+  return manifestFetchPromise;
+}
+
+async function fetchGistRange(preset: GistRangePreset): Promise<Record<string, unknown> | null> {
+  const manifest = await fetchGistManifest();
+  const entry = manifest?.ranges[preset];
+  if (!entry) return null;
+
+  const key = `${preset}:${entry.hash}`;
+  const cached = rangeCache.get(key);
+  if (cached) return cached;
+  const pending = rangeFetchPromises.get(key);
+  if (pending) return pending;
+
+  const promise = fetch(`${GIST_RAW_BASE_URL}/${entry.file}`)
+    .then(response => {
+      if (!response.ok) throw new Error(`Failed to fetch Gist range ${preset}`);
+      return response.json();
+    })
+    .then((rangeData: Record<string, unknown>) => {
+      if ('error' in rangeData) return null;
+      rangeCache.set(key, rangeData);
+      return rangeData;
+    })
+    .catch(err => {
+      console.error(`Failed to fetch Gist range ${preset}:`, err);
+      return null;
+    })
+    .finally(() => {
+      rangeFetchPromises.delete(key);
+    });
+
+  rangeFetchPromises.set(key, promise);
+  return promise;
+}
+
 async function fetchGistData(): Promise<GistData | null> {
   if (gistCache) return gistCache;
   if (gistFetchPromise) return gistFetchPromise;
@@ -553,9 +646,32 @@ async function fetchGistData(): Promise<GistData | null> {
   return gistFetchPromise;
 }
 
+async function prefetchFromBackend(presets: GistRangePreset[]): Promise<void> {
+  const keys = presets.map(preset => {
+    const { startDate, endDate } = getPresetDates(preset);
+    return `${startDate}:${endDate}`;
+  });
+  try {
+    const query = keys.map(key => `ranges=${key}`).join('&');
+    const response = await fetch(`${BACKEND_API_URL}/api/dashboard3/batch?${query}&granularity=auto`);
+    if (!response.ok) throw new Error('Backend API error');
+    const { ranges } = await response.json();
+    for (const key of keys) {
+      if (ranges[key] && !('error' in ranges[key])) {
+        backendRangeCache.set(key, normalizeDashboardData(ranges[key]));
+      }
+    }
+  } catch (err) {
+    console.error('Failed to prefetch from backend:', err);
+  }
+}
+
 async function fetchFromBackend(startDate: string, endDate: string): Promise<DashboardData | null> {
+  const prefetched = backendRangeCache.get(`${startDate}:${endDate}`);
+  if (prefetched) return prefetched;
   try {
-    const url = `${BACKEND_API_URL}/api/dashboard3?start_date=${startDate}&end_date=${endDate}`;
+    // granularity=auto: long custom ranges come back bucketed (week / month) so charts stay readable
+    const url = `${BACKEND_API_URL}/api/dashboard3?start_date=${startDate}&end_date=${endDate}&granularity=auto`;
     const response = await fetch(url);
     if (!response.ok) throw new Error('Backend API error');
     const rawData = await response.json();
@@ -574,8 +690,13 @@ export async function fetchDashboardData(
   customEndDate?: string
 ): Promise<{ data: DashboardData | null; source: 'gist' | 'backend' | 'error' }> {
 
-  // For preset ranges, try Gist first
+  // For preset ranges, try the Gist first: the range's own file, then the combined file
   if (preset !== 'custom') {
+    const rangeData = await fetchGistRange(preset);
+    if (rangeData) {
+      return { data: normalizeDashboardData(rangeData), source: 'gist' };
+    }
+
     const gistData = await fetchGistData();
     if (gistData && gistData[preset]) {
       return {
@@ -682,13 +803,14 @@ export function useDashboardData(options: UseDashboardDataOptions = {}): Dashboa
     setError(null);
 
     try {
-      // First, try to get metadata from Gist
-      const gistData = await fetchGistData();
-      if (gistData?.metadata) {
+      // First, try to get metadata from the Gist manifest (or the combined file for older gists)
+      const manifest = await fetchGistManifest();
+      const gistMetadata = manifest ?? (await fetchGistData())?.metadata;
+      if (gistMetadata) {
         setMetadata({
-          dataStartDate: gistData.metadata.data_start_date,
-          dataEndDate: gistData.metadata.data_end_date,
-          updatedAt: gistData.metadata.updated_at,
+          dataStartDate: gistMetadata.data_start_date,
+          dataEndDate: gistMetadata.data_end_date,
+          updatedAt: gistMetadata.updated_at,
         });
       }
 